@@ -10,6 +10,22 @@ class DBType(StrEnum):
     POSTGRESQL = "postgresql"
 
 
+class GeocoderBackend(StrEnum):
+    NOMINATIM = "nominatim"
+    GAZETTEER = "gazetteer"  # Local address gazetteer with Nominatim as fallback
+
+
+class PasswordHashExecutor(StrEnum):
+    THREAD = "thread"  # bcrypt releases the GIL, so threads hash in parallel
+    PROCESS = "process"
+
+
+class PoolPrePing(StrEnum):
+    ALWAYS = "always"  # Ping every connection on checkout, one extra round trip each time
+    IDLE = "idle"  # Only ping connections unused for DB_POOL_PRE_PING_IDLE_SECONDS
+    NEVER = "never"
+
+
 class EnvConfig(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
@@ -21,11 +37,89 @@ class EnvConfig(BaseSettings):
     DB_HOST: str = "localhost"
     DB_PORT: int = 5432
     APP_LOG_LEVEL: int = logging.INFO  # Default log level as int
+    DB_ECHO: bool = False  # Log every SQL statement
+
+    # Connection Pool Settings, for each of the synchronous and the asyncio engine
+    DB_POOL_SIZE: int = 5  # Connections kept open
+    DB_MAX_OVERFLOW: int = 10  # Extra connections opened under load and closed when returned, -1 for no limit
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0  # Longest wait for a free connection before the request fails
+    DB_POOL_RECYCLE_SECONDS: int = 3600  # Connections older than this are replaced on checkout, -1 never
+    DB_POOL_PRE_PING: PoolPrePing = PoolPrePing.IDLE
+    DB_POOL_PRE_PING_IDLE_SECONDS: float = 30.0
+    DB_POOL_READY_SATURATION: float = 1.0  # /health/ready answers 503 from this share of checked-out connections
+    METRICS_TOKEN: str = ""  # Bearer token /health/metrics requires; the endpoint answers 404 while empty
+
+    # Read Replica Settings
+    DB_READ_REPLICA_URL: str = ""  # Replica for read-only routes, e.g. postgresql://user:pw@replica/db; "" for none
+    DB_READ_YOUR_WRITES_SECONDS: float = 5.0  # After a user's write, their reads go to the primary for this long
+    DB_READ_YOUR_WRITES_CLIENTS: int = 10000  # Recent writers remembered
+
+    # SQLite Settings, set on every connection when DB_TYPE is sqlite
+    SQLITE_JOURNAL_MODE: str = "wal"  # Readers keep reading the last commit while a writer appends to the log
+    SQLITE_SYNCHRONOUS: str = "normal"  # With WAL, fsync at checkpoints only; a power loss can lose the last commits
+    SQLITE_MMAP_SIZE: int = 268435456  # Bytes of the database file read through memory mapping, 0 disables it
+    SQLITE_CACHE_SIZE_KIB: int = 65536  # Page cache of each connection
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000  # How long a connection waits for a lock before "database is locked"
+    SQLITE_FOREIGN_KEYS: bool = True
+    SQLITE_LOCK_RETRIES: int = 5  # Times a write locked out by another writer is run again
+    SQLITE_LOCK_RETRY_DELAY_SECONDS: float = 0.05  # Backoff before the first retry, doubled on every further one
 
     # JWT Settings
     JWT_SECRET_KEY: str = "super-secret-key"  # Change this in production!
     JWT_ALGORITHM: str = "HS256"
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    TOKEN_CACHE_SIZE: int = 10000  # Verified tokens whose decoded claims are kept until they expire
+    USER_CACHE_SIZE: int = 10000  # Authenticated users kept in memory by get_current_user
+    USER_CACHE_TTL_SECONDS: float = 30.0  # Longest time changes made by other workers can go unnoticed
+    # Trust the profile claims of access tokens instead of loading the user on every request. Changes made
+    # by other workers are then only noticed when the token expires.
+    AUTH_STATELESS: bool = False
+    REVOCATION_BUCKET_SECONDS: int = 60  # Revoked tokens are forgotten in buckets of this width after they expire
+    REVOCATION_BLOOM_CAPACITY: int = 10000  # Revocations per bucket before the Bloom filter loses precision
+    REVOCATION_REDIS_URL: str = ""  # Share revocations between workers, e.g. "redis://localhost:6379/0"
+
+    # Login Throttling Settings
+    LOGIN_RATE_LIMIT_PER_EMAIL: int = 5  # Login attempts per email within the window, 0 disables the limit
+    LOGIN_RATE_LIMIT_PER_IP: int = 30  # Login attempts per client address within the window, 0 disables the limit
+    LOGIN_RATE_LIMIT_WINDOW_SECONDS: float = 60.0
+    LOGIN_RATE_LIMITER_SIZE: int = 100000  # Counters kept in memory in each of the below- and at-limit LRUs
+    LOGIN_RATE_LIMIT_REDIS_URL: str = ""  # Count attempts across workers, e.g. "redis://localhost:6379/0"
+
+    # Password Hashing Settings
+    PASSWORD_HASH_EXECUTOR: PasswordHashExecutor = PasswordHashExecutor.THREAD
+    PASSWORD_HASH_WORKERS: int = 4  # bcrypt operations running at the same time
+    PASSWORD_HASH_MAX_QUEUE: int = 64  # Operations waiting for a worker before requests are answered with 503
+    PASSWORD_HASH_RETRY_AFTER_SECONDS: int = 2  # Retry-After of the 503 response
+
+    # Geocoding Settings
+    GEOCODE_CACHE_SIZE: int = 4096  # Entries kept in the in-process LRU
+    GEOCODE_CACHE_TTL_DAYS: int = 90
+    GEOCODE_CACHE_NEGATIVE_TTL_HOURS: int = 24  # How long "address not found" is remembered
+    GEOCODER_REQUESTS_PER_SECOND: float = 1.0  # Nominatim usage policy allows at most 1 request per second
+    GEOCODER_MAX_RETRIES: int = 3
+    GEOCODER_BACKEND: GeocoderBackend = GeocoderBackend.NOMINATIM
+    GAZETTEER_PATH: str = ""  # CSV (street,house_number,postal_code,city,latitude,longitude) or .osm extract
+
+    # Map Settings
+    MAP_REBUILD_DEBOUNCE_SECONDS: float = 2.0  # Quiet period after location/event changes before the map is rebuilt
+    MAP_REBUILD_MAX_DELAY_SECONDS: float = 30.0  # Rebuild at the latest this long after the first pending change
+    MAP_EVENT_MARKERS: int = 100  # Upcoming events baked into the map page
+    MAP_VECTOR_TILES: bool = False  # Draw the map from /tiles/{z}/{x}/{y}.mvt instead of GeoJSON clusters
+    LOCATION_INDEX_CHECK_SECONDS: float = 5.0  # Longest time locations added or deleted by other processes go unseen
+    LOCATION_INDEX_MAX_AGE_SECONDS: float = 600.0  # Rebuild interval, picks up locations moved by other processes
+
+    # Vector Tile Settings
+    TILE_CACHE_DIR: str = "data/tile_cache"  # Rendered tiles as TILE_CACHE_DIR/z/x/y.mvt
+    TILE_CACHE_MAX_ZOOM: int = 14  # Deeper tiles are rendered on every request
+    TILE_CACHE_TTL_SECONDS: float = 600.0  # Cached tiles older than this are rendered again
+
+    # Nearby Events Settings
+    EVENTS_NEARBY_KM_PER_DAY: float = 10.0  # Extra distance /events/nearby ranks the same as starting a day later
+    EVENTS_NEARBY_HORIZON_DAYS: float = 30.0  # Events starting later are not considered by default
+
+    # Response Cache Settings
+    RESPONSE_CACHE_SIZE: int = 1024  # Rendered responses of public listings kept in memory
+    RESPONSE_CACHE_TTL_SECONDS: float = 60.0  # Longest time changes made by other workers can go unnoticed
 
     @field_validator("APP_LOG_LEVEL", mode="before")
     @classmethod
@@ -80,6 +174,62 @@ DB_USER = env_config.DB_USER
 DB_PASSWORD = env_config.DB_PASSWORD
 DB_PORT = env_config.DB_PORT
 APP_LOG_LEVEL = env_config.APP_LOG_LEVEL
+DB_ECHO = env_config.DB_ECHO
+DB_POOL_SIZE = env_config.DB_POOL_SIZE
+DB_MAX_OVERFLOW = env_config.DB_MAX_OVERFLOW
+DB_POOL_TIMEOUT_SECONDS = env_config.DB_POOL_TIMEOUT_SECONDS
+DB_POOL_RECYCLE_SECONDS = env_config.DB_POOL_RECYCLE_SECONDS
+DB_POOL_PRE_PING = env_config.DB_POOL_PRE_PING
+DB_POOL_PRE_PING_IDLE_SECONDS = env_config.DB_POOL_PRE_PING_IDLE_SECONDS
+DB_POOL_READY_SATURATION = env_config.DB_POOL_READY_SATURATION
+METRICS_TOKEN = env_config.METRICS_TOKEN
+DB_READ_REPLICA_URL = env_config.DB_READ_REPLICA_URL
+DB_READ_YOUR_WRITES_SECONDS = env_config.DB_READ_YOUR_WRITES_SECONDS
+DB_READ_YOUR_WRITES_CLIENTS = env_config.DB_READ_YOUR_WRITES_CLIENTS
+SQLITE_JOURNAL_MODE = env_config.SQLITE_JOURNAL_MODE
+SQLITE_SYNCHRONOUS = env_config.SQLITE_SYNCHRONOUS
+SQLITE_MMAP_SIZE = env_config.SQLITE_MMAP_SIZE
+SQLITE_CACHE_SIZE_KIB = env_config.SQLITE_CACHE_SIZE_KIB
+SQLITE_BUSY_TIMEOUT_MS = env_config.SQLITE_BUSY_TIMEOUT_MS
+SQLITE_FOREIGN_KEYS = env_config.SQLITE_FOREIGN_KEYS
+SQLITE_LOCK_RETRIES = env_config.SQLITE_LOCK_RETRIES
+SQLITE_LOCK_RETRY_DELAY_SECONDS = env_config.SQLITE_LOCK_RETRY_DELAY_SECONDS
 JWT_SECRET_KEY = env_config.JWT_SECRET_KEY
 JWT_ALGORITHM = env_config.JWT_ALGORITHM
 JWT_ACCESS_TOKEN_EXPIRE_MINUTES = env_config.JWT_ACCESS_TOKEN_EXPIRE_MINUTES
+TOKEN_CACHE_SIZE = env_config.TOKEN_CACHE_SIZE
+USER_CACHE_SIZE = env_config.USER_CACHE_SIZE
+USER_CACHE_TTL_SECONDS = env_config.USER_CACHE_TTL_SECONDS
+AUTH_STATELESS = env_config.AUTH_STATELESS
+REVOCATION_BUCKET_SECONDS = env_config.REVOCATION_BUCKET_SECONDS
+REVOCATION_BLOOM_CAPACITY = env_config.REVOCATION_BLOOM_CAPACITY
+REVOCATION_REDIS_URL = env_config.REVOCATION_REDIS_URL
+LOGIN_RATE_LIMIT_PER_EMAIL = env_config.LOGIN_RATE_LIMIT_PER_EMAIL
+LOGIN_RATE_LIMIT_PER_IP = env_config.LOGIN_RATE_LIMIT_PER_IP
+LOGIN_RATE_LIMIT_WINDOW_SECONDS = env_config.LOGIN_RATE_LIMIT_WINDOW_SECONDS
+LOGIN_RATE_LIMITER_SIZE = env_config.LOGIN_RATE_LIMITER_SIZE
+LOGIN_RATE_LIMIT_REDIS_URL = env_config.LOGIN_RATE_LIMIT_REDIS_URL
+PASSWORD_HASH_EXECUTOR = env_config.PASSWORD_HASH_EXECUTOR
+PASSWORD_HASH_WORKERS = env_config.PASSWORD_HASH_WORKERS
+PASSWORD_HASH_MAX_QUEUE = env_config.PASSWORD_HASH_MAX_QUEUE
+PASSWORD_HASH_RETRY_AFTER_SECONDS = env_config.PASSWORD_HASH_RETRY_AFTER_SECONDS
+GEOCODE_CACHE_SIZE = env_config.GEOCODE_CACHE_SIZE
+GEOCODE_CACHE_TTL_DAYS = env_config.GEOCODE_CACHE_TTL_DAYS
+GEOCODE_CACHE_NEGATIVE_TTL_HOURS = env_config.GEOCODE_CACHE_NEGATIVE_TTL_HOURS
+GEOCODER_REQUESTS_PER_SECOND = env_config.GEOCODER_REQUESTS_PER_SECOND
+GEOCODER_MAX_RETRIES = env_config.GEOCODER_MAX_RETRIES
+GEOCODER_BACKEND = env_config.GEOCODER_BACKEND
+GAZETTEER_PATH = env_config.GAZETTEER_PATH
+MAP_REBUILD_DEBOUNCE_SECONDS = env_config.MAP_REBUILD_DEBOUNCE_SECONDS
+MAP_REBUILD_MAX_DELAY_SECONDS = env_config.MAP_REBUILD_MAX_DELAY_SECONDS
+MAP_EVENT_MARKERS = env_config.MAP_EVENT_MARKERS
+MAP_VECTOR_TILES = env_config.MAP_VECTOR_TILES
+LOCATION_INDEX_CHECK_SECONDS = env_config.LOCATION_INDEX_CHECK_SECONDS
+LOCATION_INDEX_MAX_AGE_SECONDS = env_config.LOCATION_INDEX_MAX_AGE_SECONDS
+TILE_CACHE_DIR = env_config.TILE_CACHE_DIR
+TILE_CACHE_MAX_ZOOM = env_config.TILE_CACHE_MAX_ZOOM
+TILE_CACHE_TTL_SECONDS = env_config.TILE_CACHE_TTL_SECONDS
+EVENTS_NEARBY_KM_PER_DAY = env_config.EVENTS_NEARBY_KM_PER_DAY
+EVENTS_NEARBY_HORIZON_DAYS = env_config.EVENTS_NEARBY_HORIZON_DAYS
+RESPONSE_CACHE_SIZE = env_config.RESPONSE_CACHE_SIZE
+RESPONSE_CACHE_TTL_SECONDS = env_config.RESPONSE_CACHE_TTL_SECONDS
@@ -0,0 +1,72 @@
+"""The application container: the resources started before serving and stopped after.
+
+Importing a module of the application only defines things. Engines are built
+by ``Database`` on first use, the password hasher's workers on the first
+hash, and the map renderer imports folium on its first rebuild. ``startup`` and
+``shutdown``, run by the lifespan of app/main.py, start and stop the rest
+explicitly and in order.
+"""
+
+import logging
+
+from app.db_handler.db_connection import Database, database
+from app.logs import setup_logging
+from app.services.map_builder import MapBuilder, map_builder
+from app.services.password_hasher import PasswordHasher, password_hasher
+from app.services.token_revocation import RevocationStore, revocation_store
+
+logger = logging.getLogger(__name__)
+
+
+class AppContainer:
+    """
+    The application's long-lived resources.
+
+    Args:
+        database: Engines and session factories
+        builder: Background rebuilds of the map page
+        hasher: Worker pool hashing passwords
+        revocations: Store of revoked tokens
+
+    Example:
+        >>> container = AppContainer()
+        >>> container.startup()  # before serving requests
+        >>> await container.shutdown()  # after the last one
+    """
+
+    def __init__(
+        self,
+        database: Database = database,
+        builder: MapBuilder = map_builder,
+        hasher: PasswordHasher = password_hasher,
+        revocations: RevocationStore = revocation_store,
+    ):
+        self.database = database
+        self.map_builder = builder
+        self.password_hasher = hasher
+        self.revocation_store = revocations
+        self.started = False
+
+    def startup(self) -> None:
+        """Create the database's tables and start the background work."""
+        setup_logging()
+        logger.info("Initializing database...")
+        self.database.startup()
+        logger.info("Database initialized successfully")
+        # Regenerates osm_map.html in the background whenever locations or events change
+        self.map_builder.start(self.database.session_factory)
+        # Follows tokens revoked by other workers when REVOCATION_REDIS_URL is set
+        self.revocation_store.start()
+        self.started = True
+
+    async def shutdown(self) -> None:
+        """Stop the background work and close the database connections."""
+        logger.info("Shutting down...")
+        self.map_builder.stop()
+        self.password_hasher.shutdown()
+        self.revocation_store.stop()
+        await self.database.dispose()
+        self.started = False
+
+
+container = AppContainer()
@@ -1,8 +1,18 @@
-from app.schemas.db_models import Registration
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app.config import EVENTS_NEARBY_HORIZON_DAYS, EVENTS_NEARBY_KM_PER_DAY
+from app.db_handler.sqlite_profile import retry_on_locked
+from app.schemas.db_models import Event, Location, Registration
 from app.models.event import EventUserRegistration
-from sqlalchemy.orm import Session
+from app.utils.geo import bounding_box, haversine_km_array
+from sqlalchemy import Row, Select, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
 
 
+@retry_on_locked()
 def register_for_event(session: Session, registration_data: EventUserRegistration) -> Registration:
     registration = Registration(
         user_id=registration_data.user_id, event_id=registration_data.event_id, status=registration_data.status
@@ -18,3 +28,216 @@ def register_for_event(session: Session, registration_data: EventUserRegistratio
 
 def create_event(session: Session):
     pass
+
+
+def _upcoming_events(limit: int) -> Select:
+    return (
+        select(Event)
+        .options(joinedload(Event.location))
+        .where(Event.start_date >= datetime.now())
+        .order_by(Event.start_date.asc())
+        .limit(limit)
+    )
+
+
+def get_upcoming_events(session: Session, limit: int = 100) -> list[Event]:
+    """
+    Return the events that have not started yet, soonest first, with their locations loaded.
+
+    Args:
+        session: SQLAlchemy Session
+        limit: Maximum number of events returned
+    """
+    return list(session.scalars(_upcoming_events(limit)))
+
+
+def _upcoming_event_page(
+    limit: int,
+    after: tuple[datetime, int] | None = None,
+    start_from: datetime | None = None,
+    start_to: datetime | None = None,
+    organisation_id: int | None = None,
+    name: str | None = None,
+) -> Select:
+    lower = datetime.now() if start_from is None else max(start_from, datetime.now())
+    if after is not None:
+        # Also bound start_date alone, which is what the planner uses to seek into the (start_date, id) index
+        lower = max(lower, after[0])
+    query = select(Event.id, Event.name, Event.description, Event.start_date, Event.end_date).where(
+        Event.start_date >= lower
+    )
+    if start_to is not None:
+        query = query.where(Event.start_date < start_to)
+    if organisation_id is not None:
+        query = query.where(Event.organisation_id == organisation_id)
+    if name:
+        query = query.where(Event.name.icontains(name, autoescape=True))
+    if after is not None:
+        query = query.where(tuple_(Event.start_date, Event.id) > tuple_(*after))
+    return query.order_by(Event.start_date, Event.id).limit(limit)
+
+
+def get_upcoming_event_page(
+    session: Session,
+    limit: int = 100,
+    after: tuple[datetime, int] | None = None,
+    start_from: datetime | None = None,
+    start_to: datetime | None = None,
+    organisation_id: int | None = None,
+    name: str | None = None,
+) -> list[Row]:
+    """
+    Return a page of events that have not started yet, ordered by (start_date, id).
+
+    Pages are addressed by the sort key of the last row of the previous page
+    rather than an offset, so fetching a deep page costs the same as the first.
+    Only the columns listed by /events/upcoming are selected.
+
+    Args:
+        session: SQLAlchemy Session
+        limit: Maximum number of events returned
+        after: (start_date, id) of the last event of the previous page
+        start_from: Earliest start date, if later than now
+        start_to: Start dates must be before this
+        organisation_id: Only events of this organisation
+        name: Only events whose name contains this text, case-insensitively
+
+    Returns:
+        Rows with id, name, description, start_date and end_date
+    """
+    return list(session.execute(_upcoming_event_page(limit, after, start_from, start_to, organisation_id, name)))
+
+
+def _nearby_event_candidates(
+    latitude: float, longitude: float, radius_km: float, now: datetime, within_days: float
+) -> Select:
+    min_lat, min_lon, max_lat, max_lon = bounding_box(latitude, longitude, radius_km)
+    return (
+        select(
+            Event.id,
+            Event.name,
+            Event.description,
+            Event.start_date,
+            Event.end_date,
+            Location.latitude,
+            Location.longitude,
+        )
+        .join(Location, Event.location_id == Location.id)
+        .where(
+            Location.latitude.between(min_lat, max_lat),
+            Location.longitude.between(min_lon, max_lon),
+            Event.start_date >= now,
+            Event.start_date < now + timedelta(days=within_days),
+        )
+    )
+
+
+def rank_events_nearby(
+    rows: list[Row],
+    latitude: float,
+    longitude: float,
+    radius_km: float,
+    km_per_day: float,
+    limit: int,
+    now: datetime,
+) -> list[tuple[Row, float]]:
+    """
+    Keep the candidate events within radius_km of a point, best score first.
+
+    The score of an event is the number of days until it starts plus its
+    distance divided by km_per_day, so an event km_per_day kilometres further
+    away ranks the same as one starting a day later. Distances and scores of
+    all candidates are computed at once with numpy.
+
+    Returns:
+        (row, distance_km) pairs
+    """
+    if not rows:
+        return []
+    # Transposed once; numpy's conversion of datetime objects is slower than calling timestamp() on each
+    columns = dict(zip(rows[0]._fields, zip(*rows)))
+    ids = np.array(columns["id"], dtype=np.int64)
+    starts = np.fromiter((start_date.timestamp() for start_date in columns["start_date"]), float, len(rows))
+    latitudes = np.array(columns["latitude"], dtype=float)
+    longitudes = np.array(columns["longitude"], dtype=float)
+
+    distances = haversine_km_array(latitude, longitude, latitudes, longitudes)
+    scores = (starts - now.timestamp()) / 86400 + distances / km_per_day
+    inside = np.flatnonzero(distances <= radius_km)
+    best = inside[np.lexsort((ids[inside], scores[inside]))][:limit]
+    return [(rows[i], float(distances[i])) for i in best]
+
+
+def get_upcoming_events_nearby(
+    session: Session,
+    latitude: float,
+    longitude: float,
+    radius_km: float,
+    limit: int = 50,
+    km_per_day: float = EVENTS_NEARBY_KM_PER_DAY,
+    within_days: float = EVENTS_NEARBY_HORIZON_DAYS,
+) -> list[tuple[Row, float]]:
+    """
+    Return the events starting within within_days at locations within radius_km of a point.
+
+    The database narrows the candidates to upcoming events inside the bounding
+    box of the circle; they are then filtered by haversine distance and ranked
+    by rank_events_nearby.
+
+    Args:
+        session: SQLAlchemy Session
+        latitude: Latitude of the point
+        longitude: Longitude of the point
+        radius_km: Search radius in kilometres
+        limit: Maximum number of events returned
+        km_per_day: Distance ranked the same as starting one day later
+        within_days: Only events starting this many days from now
+
+    Returns:
+        (row, distance_km) pairs; rows have id, name, description, start_date, end_date, latitude and longitude
+    """
+    now = datetime.now()
+    rows = list(session.execute(_nearby_event_candidates(latitude, longitude, radius_km, now, within_days)))
+    return rank_events_nearby(rows, latitude, longitude, radius_km, km_per_day, limit, now)
+
+
+# Async versions for routes using get_async_db
+
+
+@retry_on_locked()
+async def register_for_event_async(session: AsyncSession, registration_data: EventUserRegistration) -> Registration:
+    """Async version of register_for_event."""
+    return await session.run_sync(register_for_event, registration_data)
+
+
+async def get_upcoming_events_async(session: AsyncSession, limit: int = 100) -> list[Event]:
+    """Async version of get_upcoming_events."""
+    return list(await session.scalars(_upcoming_events(limit)))
+
+
+async def get_upcoming_event_page_async(
+    session: AsyncSession,
+    limit: int = 100,
+    after: tuple[datetime, int] | None = None,
+    start_from: datetime | None = None,
+    start_to: datetime | None = None,
+    organisation_id: int | None = None,
+    name: str | None = None,
+) -> list[Row]:
+    """Async version of get_upcoming_event_page."""
+    return list(await session.execute(_upcoming_event_page(limit, after, start_from, start_to, organisation_id, name)))
+
+
+async def get_upcoming_events_nearby_async(
+    session: AsyncSession,
+    latitude: float,
+    longitude: float,
+    radius_km: float,
+    limit: int = 50,
+    km_per_day: float = EVENTS_NEARBY_KM_PER_DAY,
+    within_days: float = EVENTS_NEARBY_HORIZON_DAYS,
+) -> list[tuple[Row, float]]:
+    """Async version of get_upcoming_events_nearby."""
+    now = datetime.now()
+    rows = list(await session.execute(_nearby_event_candidates(latitude, longitude, radius_km, now, within_days)))
+    return rank_events_nearby(rows, latitude, longitude, radius_km, km_per_day, limit, now)
@@ -1,24 +1,45 @@
-from geopy.geocoders import Nominatim
-from app.schemas.db_models import Location, User
+from app.db_handler.sqlite_profile import retry_on_locked
+from app.schemas.db_models import Event, Location, User
 from app.schemas.enums import LocationType, UserType
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from collections.abc import Iterator
+from sqlalchemy import Row, Select, and_, case, or_, select
 from app.models.location import AddLocation
+from app.services.geocode_cache import GeocodeFn, geocode_cache
+from app.services.geocoders import get_default_geocoder
+from app.services.spatial_index import location_index
+from app.utils.geo import BoundingBox, bounding_box, geohash_cover, haversine_km
+from app.utils.single_flight import single_flight
 
 
-def address_to_coordinates(address: str) -> tuple[float, float]:
-    geolocator = Nominatim(user_agent="osm_address_locator")
-    location = geolocator.geocode(address)
-    if location:
-        # print(f"Address: {address}")
-        # print(f"Latitude: {location.latitude}, Longitude: {location.longitude}")
-        return (location.latitude, location.longitude)
+def address_to_coordinates(
+    address: str, session: Session | None = None, geocoder: GeocodeFn | None = None
+) -> tuple[float, float]:
+    """
+    Resolve an address to (latitude, longitude).
+
+    When a session is given the persistent geocode cache is consulted first and
+    the geocoder is only called on a miss. Without an explicit geocoder the one
+    configured by GEOCODER_BACKEND is used.
+
+    Raises:
+        ValueError: If the address cannot be found
+    """
+    if geocoder is None:
+        geocoder = get_default_geocoder()
+    if session is not None:
+        coordinates = geocode_cache.get_or_geocode(session, address, geocoder)
     else:
+        coordinates = geocoder(address)
+    if coordinates is None:
         raise ValueError("Address not found.")
+    return coordinates
 
 
-def add_address(session: Session, location_data: AddLocation) -> Location:
-    latitude, longitude = address_to_coordinates(location_data.address)
+@retry_on_locked()
+def add_address(session: Session, location_data: AddLocation, geocoder: GeocodeFn | None = None) -> Location:
+    latitude, longitude = address_to_coordinates(location_data.address, session=session, geocoder=geocoder)
     location = Location(name=location_data.location_name, latitude=latitude, longitude=longitude)
 
     try:
@@ -36,11 +57,194 @@ def get_all_locations(session: Session) -> list[Location]:
     return locations
 
 
+def _locations_for_location_type(location_type: LocationType) -> Select:
+    # Drive the query from the indexed foreign keys instead of testing EXISTS for every location
+    if location_type == LocationType.EVENT:
+        location_ids = select(Event.location_id)
+    else:
+        location_ids = select(User.location_id).where(User.user_type == UserType(location_type.value))
+    return select(Location).where(Location.id.in_(location_ids))
+
+
 def get_locations_for_location_type(session: Session, location_type: LocationType) -> list[Location]:
+    """
+    Return the locations of events, organisations or volunteers.
+
+    The ids come from ix_event_location_id_start_date or ix_users_user_type_location_id
+    and the locations are then looked up by primary key.
+    """
+    return list(session.scalars(_locations_for_location_type(location_type)))
+
+
+def get_locations_nearby(
+    session: Session, latitude: float, longitude: float, radius_km: float, limit: int = 50
+) -> list[tuple[Location, float]]:
+    """
+    Find the locations within radius_km of a point, nearest first.
+
+    Candidates come from the in-memory grid index of the session's engine, so
+    only the returned locations are loaded from the database.
+
+    Returns:
+        (location, distance_km) pairs
+    """
+    matches = location_index.get(session).nearby(latitude, longitude, radius_km)[:limit]
+    if not matches:
+        return []
+    stmt = select(Location).where(Location.id.in_([location_id for location_id, _ in matches]))
+    locations = {location.id: location for location in session.execute(stmt).scalars()}
+    return [(locations[location_id], distance) for location_id, distance in matches if location_id in locations]
+
+
+def query_locations_nearby(
+    session: Session, latitude: float, longitude: float, radius_km: float, limit: int = 50
+) -> list[tuple[Location, float]]:
+    """
+    Same search as get_locations_nearby answered by the database alone.
+
+    The geohash index narrows the scan to the cells covering the bounding box of
+    the circle, the box itself is checked in SQL and the rest is ranked by
+    haversine distance. Locations without a geohash (bulk inserts not yet
+    backfilled by init_db) are matched by the bounding box alone.
+
+    Returns:
+        (location, distance_km) pairs
+    """
+    min_lat, min_lon, max_lat, max_lon = bounding_box(latitude, longitude, radius_km)
+    cells = geohash_cover((min_lat, min_lon, max_lat, max_lon))
+    stmt = select(Location).where(
+        or_(
+            *(and_(Location.geohash >= cell, Location.geohash < cell + "~") for cell in cells),
+            Location.geohash.is_(None),
+        ),
+        Location.latitude.between(min_lat, max_lat),
+        Location.longitude.between(min_lon, max_lon),
+    )
+    results = []
+    for location in session.execute(stmt).scalars():
+        distance = haversine_km(latitude, longitude, location.latitude, location.longitude)
+        if distance <= radius_km:
+            results.append((location, distance))
+    results.sort(key=lambda result: (result[1], result[0].id))
+    return results[:limit]
+
+
+def _location_category():
+    """SQL expression naming what a location belongs to: "event", "organisation", "volunteer" or NULL."""
+    return case(
+        (Location.events.any(), LocationType.EVENT.value),
+        (Location.users.any(User.user_type == UserType.ORGANISATION), LocationType.ORGANISATION.value),
+        (Location.users.any(User.user_type == UserType.VOLUNTEER), LocationType.VOLUNTEER.value),
+        else_=None,
+    ).label("category")
+
+
+def iter_locations_in_bbox(
+    session: Session,
+    box: BoundingBox,
+    location_type: LocationType | None = None,
+    limit: int | None = None,
+    batch_size: int = 1000,
+) -> Iterator[Row]:
+    """
+    Stream the locations inside a bounding box as lightweight rows.
+
+    Only the columns needed for map features are selected and rows are fetched
+    from the cursor batch_size at a time, so memory stays flat for large viewports.
+
+    Args:
+        session: Database session
+        box: (min_lat, min_lon, max_lat, max_lon)
+        location_type: Only locations of events, organisations or volunteers
+        limit: Maximum number of rows
+        batch_size: Rows fetched per round trip
+
+    Yields:
+        Rows with id, name, latitude, longitude and category ("event", "organisation", "volunteer" or None)
+    """
+    min_lat, min_lon, max_lat, max_lon = box
+    stmt = (
+        select(Location.id, Location.name, Location.latitude, Location.longitude, _location_category())
+        .where(Location.latitude.between(min_lat, max_lat), Location.longitude.between(min_lon, max_lon))
+        .order_by(Location.id)
+        .limit(limit)
+        .execution_options(yield_per=batch_size)
+    )
     if location_type == LocationType.EVENT:
-        stmt = select(Location).where(Location.events.any())
-        locations = session.execute(stmt).scalars().all()
-    elif location_type == LocationType.ORGANISATION:
-        stmt = select(Location).where(Location.users.any(User.user_type == UserType.ORGANISATION))
-        locations = session.execute(stmt).scalars().all()
-    return locations
+        stmt = stmt.where(Location.events.any())
+    elif location_type is not None:
+        stmt = stmt.where(Location.users.any(User.user_type == UserType(location_type.value)))
+    yield from session.execute(stmt)
+
+
+def get_location_labels(session: Session, location_ids: list[int]) -> dict[int, Row]:
+    """
+    Load the name and category of the given locations.
+
+    Returns:
+        Mapping of location id to a row with id, name and category
+    """
+    if not location_ids:
+        return {}
+    stmt = select(Location.id, Location.name, _location_category()).where(Location.id.in_(location_ids))
+    return {row.id: row for row in session.execute(stmt)}
+
+
+# Async versions for routes using get_async_db
+
+
+@retry_on_locked()
+async def add_address_async(
+    session: AsyncSession, location_data: AddLocation, geocoder: GeocodeFn | None = None
+) -> Location:
+    """
+    Async version of add_address.
+
+    The geocoder runs in a worker thread (see GeocodeCache.get_or_geocode_async),
+    only the geocode cache and the location are written through the session.
+    """
+    if geocoder is None:
+        geocoder = get_default_geocoder()
+    coordinates = await geocode_cache.get_or_geocode_async(session, location_data.address, geocoder)
+    if coordinates is None:
+        raise ValueError("Address not found.")
+    location = Location(name=location_data.location_name, latitude=coordinates[0], longitude=coordinates[1])
+
+    try:
+        session.add(location)
+        await session.commit()
+        await session.refresh(location)
+    except Exception as e:
+        await session.rollback()
+        raise e
+    return location
+
+
+async def get_all_locations_async(session: AsyncSession) -> list[Location]:
+    """Async version of get_all_locations."""
+    return list(await session.scalars(select(Location)))
+
+
+@single_flight()
+async def get_locations_for_location_type_async(session: AsyncSession, location_type: LocationType) -> list[Location]:
+    """Async version of get_locations_for_location_type; concurrent calls share one query."""
+    return await session.run_sync(get_locations_for_location_type, location_type)
+
+
+async def get_locations_nearby_async(
+    session: AsyncSession, latitude: float, longitude: float, radius_km: float, limit: int = 50
+) -> list[tuple[Location, float]]:
+    """Async version of get_locations_nearby, using the same grid index as the synchronous engine."""
+    return await session.run_sync(get_locations_nearby, latitude, longitude, radius_km, limit)
+
+
+async def query_locations_nearby_async(
+    session: AsyncSession, latitude: float, longitude: float, radius_km: float, limit: int = 50
+) -> list[tuple[Location, float]]:
+    """Async version of query_locations_nearby."""
+    return await session.run_sync(query_locations_nearby, latitude, longitude, radius_km, limit)
+
+
+async def get_location_labels_async(session: AsyncSession, location_ids: list[int]) -> dict[int, Row]:
+    """Async version of get_location_labels."""
+    return await session.run_sync(get_location_labels, location_ids)
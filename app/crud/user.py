@@ -1,10 +1,16 @@
 """CRUD operations for User-related database operations."""
 
-from sqlalchemy.orm import Session
+from collections.abc import Iterable
+
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
 from sqlalchemy.exc import IntegrityError
 
-from app.schemas.db_models import User, Volunteer, Organisation, Coordinator
+from app.db_handler.sqlite_profile import retry_on_locked
+from app.schemas.db_models import Location, User, Volunteer, Organisation, Coordinator
 from app.schemas.enums import UserType
+from app.utils.single_flight import single_flight
 from app.models.user import (
     UserCreate,
     VolunteerCreate,
@@ -47,6 +53,25 @@ def get_user_by_email(session: Session, email: str) -> User | None:
     return session.query(User).filter(User.email == email).first()
 
 
+def _user_coordinates(user_id: int) -> Select:
+    return (
+        select(Location.latitude, Location.longitude)
+        .join(User, User.location_id == Location.id)
+        .where(User.id == user_id)
+    )
+
+
+def get_user_coordinates(session: Session, user_id: int) -> tuple[float, float] | None:
+    """
+    Get the (latitude, longitude) of a user's location without loading the user.
+
+    Returns:
+        The coordinates, or None if the user does not exist or has no location
+    """
+    row = session.execute(_user_coordinates(user_id)).first()
+    return None if row is None else (row.latitude, row.longitude)
+
+
 def create_user(
     session: Session,
     user_data: UserCreate,
@@ -221,6 +246,7 @@ def get_coordinator_by_user_id(session: Session, user_id: int) -> Coordinator |
 # Update Operations
 
 
+@retry_on_locked()
 def update_volunteer(
     session: Session,
     user_id: int,
@@ -254,6 +280,7 @@ def update_volunteer(
         raise ValueError(f"Failed to update volunteer: {str(e)}")
 
 
+@retry_on_locked()
 def update_organisation(
     session: Session,
     user_id: int,
@@ -287,6 +314,7 @@ def update_organisation(
         raise ValueError(f"Failed to update organisation: {str(e)}")
 
 
+@retry_on_locked()
 def update_coordinator(
     session: Session,
     user_id: int,
@@ -323,12 +351,17 @@ def update_coordinator(
 # Get User with Profile
 
 
+def _with_profile(query: Select) -> Select:
+    # The profiles are one-to-one, so joining all three in the same statement never multiplies rows
+    return query.options(joinedload(User.volunteer), joinedload(User.organisation), joinedload(User.coordinator))
+
+
 def get_user_with_profile(session: Session, user_id: int) -> User | None:
     """
     Get a user with their complete profile (eagerly loads related data).
 
-    This function loads the user and their type-specific profile
-    (volunteer, organisation, or coordinator) in a single query.
+    The user and their type-specific profile (volunteer, organisation, or
+    coordinator) are loaded by a single statement joining the profile tables.
 
     Args:
         session: SQLAlchemy Session
@@ -342,24 +375,32 @@ def get_user_with_profile(session: Session, user_id: int) -> User | None:
         >>> if user and user.user_type == UserType.VOLUNTEER:
         >>>     print(user.volunteer.first_name)
     """
-    user = session.query(User).filter(User.id == user_id).first()
-    if not user:
-        return None
+    return session.scalars(_with_profile(select(User).where(User.id == user_id))).first()
+
 
-    # Eagerly load the type-specific profile
-    if user.user_type == UserType.VOLUNTEER:
-        _ = user.volunteer  # Triggers lazy loading
-    elif user.user_type == UserType.ORGANISATION:
-        _ = user.organisation  # Triggers lazy loading
-    elif user.user_type == UserType.COORDINATOR:
-        _ = user.coordinator  # Triggers lazy loading
+def get_users_with_profiles(session: Session, user_ids: Iterable[int]) -> dict[int, User]:
+    """
+    Batch version of get_user_with_profile for list views.
+
+    All users are loaded with their profiles by one statement, however many ids are given.
+
+    Args:
+        session: SQLAlchemy Session
+        user_ids: The users' IDs
 
-    return user
+    Returns:
+        Mapping of user ID to User with profile loaded; unknown IDs are absent
+    """
+    ids = set(user_ids)
+    if not ids:
+        return {}
+    return {user.id: user for user in session.scalars(_with_profile(select(User).where(User.id.in_(ids))))}
 
 
 # Combined Registration Operations
 
 
+@retry_on_locked()
 def register_volunteer(
     session: Session,
     user_data: UserCreate,
@@ -404,6 +445,7 @@ def register_volunteer(
         raise ValueError(f"Failed to register volunteer: {str(e)}")
 
 
+@retry_on_locked()
 def register_organisation(
     session: Session,
     user_data: UserCreate,
@@ -448,6 +490,7 @@ def register_organisation(
         raise ValueError(f"Failed to register organisation: {str(e)}")
 
 
+@retry_on_locked()
 def register_coordinator(
     session: Session,
     user_data: UserCreate,
@@ -492,6 +535,7 @@ def register_coordinator(
         raise ValueError(f"Failed to register coordinator: {str(e)}")
 
 
+@retry_on_locked()
 def delete_user(session: Session, user_id: int) -> bool:
     """
     Delete a user and all associated data.
@@ -514,3 +558,127 @@ def delete_user(session: Session, user_id: int) -> bool:
     except Exception as e:
         session.rollback()
         raise ValueError(f"Failed to delete user: {str(e)}")
+
+
+# Async Operations
+#
+# Versions of the operations above for routes using get_async_db. Single-statement
+# reads are awaited directly; multi-step operations run the synchronous
+# implementation through AsyncSession.run_sync, where lazy loading and commit
+# handling work unchanged without blocking the event loop.
+
+
+async def get_user_by_id_async(session: AsyncSession, user_id: int) -> User | None:
+    """Async version of get_user_by_id."""
+    return await session.scalar(select(User).where(User.id == user_id).limit(1))
+
+
+async def get_user_by_email_async(session: AsyncSession, email: str) -> User | None:
+    """Async version of get_user_by_email."""
+    return await session.scalar(select(User).where(User.email == email).limit(1))
+
+
+async def get_user_coordinates_async(session: AsyncSession, user_id: int) -> tuple[float, float] | None:
+    """Async version of get_user_coordinates."""
+    row = (await session.execute(_user_coordinates(user_id))).first()
+    return None if row is None else (row.latitude, row.longitude)
+
+
+async def get_volunteer_by_user_id_async(session: AsyncSession, user_id: int) -> Volunteer | None:
+    """Async version of get_volunteer_by_user_id."""
+    return await session.scalar(select(Volunteer).where(Volunteer.user_id == user_id).limit(1))
+
+
+async def get_organisation_by_user_id_async(session: AsyncSession, user_id: int) -> Organisation | None:
+    """Async version of get_organisation_by_user_id."""
+    return await session.scalar(select(Organisation).where(Organisation.user_id == user_id).limit(1))
+
+
+async def get_coordinator_by_user_id_async(session: AsyncSession, user_id: int) -> Coordinator | None:
+    """Async version of get_coordinator_by_user_id."""
+    return await session.scalar(select(Coordinator).where(Coordinator.user_id == user_id).limit(1))
+
+
+@single_flight()
+async def get_user_with_profile_async(session: AsyncSession, user_id: int) -> User | None:
+    """
+    Async version of get_user_with_profile.
+
+    Concurrent calls for the same user share one query and the returned objects.
+    """
+    return (await session.scalars(_with_profile(select(User).where(User.id == user_id)))).first()
+
+
+async def get_users_with_profiles_async(session: AsyncSession, user_ids: Iterable[int]) -> dict[int, User]:
+    """Async version of get_users_with_profiles."""
+    ids = set(user_ids)
+    if not ids:
+        return {}
+    users = await session.scalars(_with_profile(select(User).where(User.id.in_(ids))))
+    return {user.id: user for user in users}
+
+
+@retry_on_locked()
+async def update_volunteer_async(
+    session: AsyncSession, user_id: int, volunteer_data: VolunteerUpdate
+) -> Volunteer | None:
+    """Async version of update_volunteer."""
+    return await session.run_sync(update_volunteer, user_id, volunteer_data)
+
+
+@retry_on_locked()
+async def update_organisation_async(
+    session: AsyncSession, user_id: int, org_data: OrganisationUpdate
+) -> Organisation | None:
+    """Async version of update_organisation."""
+    return await session.run_sync(update_organisation, user_id, org_data)
+
+
+@retry_on_locked()
+async def update_coordinator_async(
+    session: AsyncSession, user_id: int, coord_data: CoordinatorUpdate
+) -> Coordinator | None:
+    """Async version of update_coordinator."""
+    return await session.run_sync(update_coordinator, user_id, coord_data)
+
+
+@retry_on_locked()
+async def register_volunteer_async(
+    session: AsyncSession,
+    user_data: UserCreate,
+    volunteer_data: VolunteerCreate,
+    password_hash: str,
+    location_id: int | None = None,
+) -> tuple[User, Volunteer]:
+    """Async version of register_volunteer."""
+    return await session.run_sync(register_volunteer, user_data, volunteer_data, password_hash, location_id)
+
+
+@retry_on_locked()
+async def register_organisation_async(
+    session: AsyncSession,
+    user_data: UserCreate,
+    org_data: OrganisationCreate,
+    password_hash: str,
+    location_id: int | None = None,
+) -> tuple[User, Organisation]:
+    """Async version of register_organisation."""
+    return await session.run_sync(register_organisation, user_data, org_data, password_hash, location_id)
+
+
+@retry_on_locked()
+async def register_coordinator_async(
+    session: AsyncSession,
+    user_data: UserCreate,
+    coord_data: CoordinatorCreate,
+    password_hash: str,
+    location_id: int | None = None,
+) -> tuple[User, Coordinator]:
+    """Async version of register_coordinator."""
+    return await session.run_sync(register_coordinator, user_data, coord_data, password_hash, location_id)
+
+
+@retry_on_locked()
+async def delete_user_async(session: AsyncSession, user_id: int) -> bool:
+    """Async version of delete_user."""
+    return await session.run_sync(delete_user, user_id)
@@ -1,50 +1,232 @@
 import logging
-from typing import Generator
+from functools import cached_property
+from typing import AsyncGenerator, Generator
 
-from sqlalchemy import create_engine, Engine
+from fastapi import Request
+from sqlalchemy import bindparam, create_engine, inspect, select, update, Engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.schema import CreateColumn
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import QueuePool
 
-from app.schemas.db_models import Base
-from app.config import DB_NAME, DB_TYPE, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT
-from app.db_handler.db_util import ConnectionStringBuilder
-# from app.db_handler.example_data import add_data
+from app.schemas.db_models import Base, Location
+from app.config import DB_NAME, DB_TYPE, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DBType, PoolPrePing
+from app.config import (
+    DB_ECHO,
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_PRE_PING_IDLE_SECONDS,
+    DB_POOL_RECYCLE_SECONDS,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT_SECONDS,
+    DB_READ_REPLICA_URL,
+)
+from app.db_handler.pool import (
+    MeteredAsyncAdaptedQueuePool,
+    MeteredQueuePool,
+    instrument_pool,
+    ping_idle_connections,
+)
+from app.db_handler.db_util import ConnectionStringBuilder, alias_engine, to_async_url
+from app.utils.geo import geohash_encode
+from app.db_handler.read_replica import reads_from_primary, track_writes
+from app.db_handler.sqlite_profile import apply_sqlite_profile, sqlite_engine_options
 
 logger = logging.getLogger(__name__)
 
 
-def create_db_engine(echo: bool = False) -> Engine:
+def _engine_options(db_conn: str, async_driver: bool = False) -> dict:
+    if make_url(db_conn).get_backend_name() == DBType.SQLITE:
+        options = sqlite_engine_options(db_conn)
+    else:
+        options = {
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "pool_timeout": DB_POOL_TIMEOUT_SECONDS,
+            "pool_recycle": DB_POOL_RECYCLE_SECONDS,
+            "pool_pre_ping": DB_POOL_PRE_PING == PoolPrePing.ALWAYS,
+        }
+    options.setdefault("poolclass", MeteredAsyncAdaptedQueuePool if async_driver else MeteredQueuePool)
+    return options
+
+
+def _configure_engine(engine: Engine) -> None:
+    if engine.dialect.name == DBType.SQLITE:
+        apply_sqlite_profile(engine)
+    elif DB_POOL_PRE_PING == PoolPrePing.IDLE:
+        ping_idle_connections(engine, DB_POOL_PRE_PING_IDLE_SECONDS)
+
+
+def create_db_engine(echo: bool = DB_ECHO, url: str | None = None) -> Engine:
     """
     Create and configure the database engine.
 
+    The pool is sized by the DB_POOL_* settings and its checkouts are timed once
+    it is instrumented, see app/db_handler/pool.py. SQLite connections get the
+    pragmas of SQLiteProfile, see app/db_handler/sqlite_profile.py.
+
     Args:
         echo: If True, SQLAlchemy will log all SQL statements
+        url: Connection string of another database, such as the read replica;
+            by default the one built from the DB_* settings
 
     Returns:
         Engine: Configured SQLAlchemy engine
     """
-    db_conn = ConnectionStringBuilder.build(DB_TYPE, DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT)
+    db_conn = url or ConnectionStringBuilder.build(DB_TYPE, DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT)
     try:
-        engine = create_engine(
-            db_conn,
-            echo=echo,
-            future=True,
-            poolclass=QueuePool,
-            pool_size=5,
-            max_overflow=10,
-            pool_pre_ping=True,  # Verify connections before using them
-            pool_recycle=3600,  # Recycle connections after 1 hour
-        )
-        logger.info(f"Database engine created successfully for: {DB_NAME}")
+        engine = create_engine(db_conn, echo=echo, future=True, **_engine_options(db_conn))
+        _configure_engine(engine)
+        logger.info(f"Database engine created successfully for: {engine.url.database}")
         return engine
     except Exception as e:
         logger.error(f"Failed to create database engine: {e}")
         raise
 
 
+def create_async_db_engine(echo: bool = DB_ECHO, url: str | None = None) -> AsyncEngine:
+    """
+    Create the asyncio engine for the same database (aiosqlite for SQLite, asyncpg for PostgreSQL).
+
+    Queries through it suspend the calling coroutine instead of blocking the event loop.
+    An in-memory SQLite database is not shared with the synchronous engine.
+
+    Args:
+        echo: If True, SQLAlchemy will log all SQL statements
+        url: Synchronous connection string of another database, such as the read
+            replica; by default the one built from the DB_* settings
+
+    Returns:
+        AsyncEngine: Configured SQLAlchemy asyncio engine
+    """
+    if url:
+        db_conn = to_async_url(url)
+    else:
+        db_conn = ConnectionStringBuilder.build(
+            DB_TYPE, DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, async_driver=True
+        )
+    try:
+        engine = create_async_engine(db_conn, echo=echo, **_engine_options(db_conn, async_driver=True))
+        _configure_engine(engine.sync_engine)
+        logger.info(f"Async database engine created successfully for: {engine.url.database}")
+        return engine
+    except Exception as e:
+        logger.error(f"Failed to create async database engine: {e}")
+        raise
+
+
+def add_missing_columns(engine: Engine) -> list[str]:
+    """
+    Add the columns declared in the models that an existing database lacks.
+
+    create_all never alters existing tables, so databases created before a
+    column was added to the models would lack it and every query selecting it
+    would fail. Columns are added with their server default; one that cannot
+    be added, such as a NOT NULL column without a server default, is logged
+    and skipped.
+
+    Args:
+        engine: SQLAlchemy engine instance
+
+    Returns:
+        Names of the columns added, as "table.column"
+    """
+    added = []
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            table_name = engine.dialect.identifier_preparer.format_table(table)
+            definition = CreateColumn(column).compile(dialect=engine.dialect)
+            try:
+                with engine.begin() as connection:
+                    connection.exec_driver_sql(f"ALTER TABLE {table_name} ADD COLUMN {definition}")
+            except DBAPIError as e:
+                logger.error(f"Failed to add column {table.name}.{column.name}: {e}")
+                continue
+            added.append(f"{table.name}.{column.name}")
+    if added:
+        logger.info(f"Added missing columns: {', '.join(added)}")
+    return added
+
+
+def create_missing_indexes(engine: Engine) -> list[str]:
+    """
+    Create the indexes declared in the models that an existing database lacks.
+
+    create_all only creates missing tables, so databases created before an index
+    was added to the models would never get it. An index that cannot be built,
+    such as a unique index over duplicate rows, is logged and skipped.
+
+    Args:
+        engine: SQLAlchemy engine instance
+
+    Returns:
+        Names of the indexes created
+    """
+    created = []
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            if index.name in existing:
+                continue
+            try:
+                index.create(engine)
+            except DBAPIError as e:
+                logger.error(f"Failed to create index {index.name}: {e}")
+                continue
+            created.append(index.name)
+    if created:
+        logger.info(f"Created missing indexes: {', '.join(created)}")
+    return created
+
+
+def backfill_location_geohashes(engine: Engine, batch_size: int = 1000) -> int:
+    """
+    Fill in the geohash of locations that have none.
+
+    Locations stored before the column was added, or inserted with bulk
+    ``insert(Location)`` statements that bypass set_location_geohash, have a
+    NULL geohash. query_locations_nearby still finds them by their coordinates,
+    but only through a scan of those rows.
+
+    Args:
+        engine: SQLAlchemy engine instance
+        batch_size: Locations updated per transaction
+
+    Returns:
+        Number of locations updated
+    """
+    location = Location.__table__
+    missing = select(location.c.id, location.c.latitude, location.c.longitude).where(location.c.geohash.is_(None))
+    set_geohash = update(location).where(location.c.id == bindparam("location_id")).values(geohash=bindparam("hash"))
+    filled = 0
+    while True:
+        with engine.begin() as connection:
+            rows = connection.execute(missing.limit(batch_size)).all()
+            if not rows:
+                break
+            connection.execute(
+                set_geohash,
+                [{"location_id": row.id, "hash": geohash_encode(row.latitude, row.longitude)} for row in rows],
+            )
+        filled += len(rows)
+    if filled:
+        logger.info(f"Filled in the geohash of {filled} locations")
+    return filled
+
+
 def init_db(engine: Engine) -> None:
     """
-    Initialize the database by creating all tables.
+    Initialize the database by creating all tables and any columns and indexes they lack.
 
     Args:
         engine: SQLAlchemy engine instance
@@ -56,29 +238,121 @@ def init_db(engine: Engine) -> None:
     except Exception as e:
         logger.error(f"Failed to create database tables: {e}")
         raise
+    add_missing_columns(engine)
+    create_missing_indexes(engine)
+    backfill_location_geohashes(engine)
 
 
-# Create engine and session factory
-engine = create_db_engine(echo=True)
+class Database:
+    """
+    The application's engines and session factories, created on first use.
 
-init_db(engine)
+    Importing this module opens no connection and creates no table: each engine
+    is built, with its pool instrumented, when it is first needed. ``startup``
+    builds them all and creates the tables before requests are served, so no
+    two requests race to build one; ``dispose`` closes their connections.
 
-# Create a session factory
-SessionLocal = sessionmaker(
-    bind=engine,
-    autoflush=False,
-    autocommit=False,
-    future=True,
-    expire_on_commit=False,  # Don't expire objects after commit
-)
+    Args:
+        url: Connection string of the primary, by default built from the DB_* settings
+        read_replica_url: Synchronous connection string of the read replica used by
+            get_read_db and get_async_read_db, "" for none
+
+    Example:
+        >>> database = Database()
+        >>> database.startup()  # in the application's lifespan
+        >>> with database.session_factory() as session: ...
+    """
+
+    def __init__(self, url: str | None = None, read_replica_url: str = DB_READ_REPLICA_URL):
+        self.url = url
+        self.read_replica_url = read_replica_url
+
+    @cached_property
+    def engine(self) -> Engine:
+        engine = create_db_engine(url=self.url)
+        instrument_pool(engine, "sync")
+        return engine
+
+    @cached_property
+    def async_engine(self) -> AsyncEngine:
+        async_engine = create_async_db_engine(url=self.url)
+        instrument_pool(async_engine.sync_engine, "async")
+        # Commits through either engine keep the same in-memory indexes up to date
+        alias_engine(async_engine.sync_engine, self.engine)
+        return async_engine
+
+    @cached_property
+    def session_factory(self) -> sessionmaker:
+        return sessionmaker(
+            bind=self.engine,
+            autoflush=False,
+            autocommit=False,
+            future=True,
+            expire_on_commit=False,  # Don't expire objects after commit
+        )
+
+    @cached_property
+    def async_session_factory(self) -> async_sessionmaker:
+        return async_sessionmaker(
+            bind=self.async_engine,
+            autoflush=False,
+            expire_on_commit=False,  # Attributes must not be lazily reloaded after commit in async code
+        )
+
+    @cached_property
+    def read_engine(self) -> Engine | None:
+        """Engine of the read replica, None without one."""
+        if not self.read_replica_url:
+            return None
+        read_engine = create_db_engine(url=self.read_replica_url)
+        instrument_pool(read_engine, "read")
+        # The in-memory location indexes are kept up to date by commits on the primary
+        alias_engine(read_engine, self.engine)
+        return read_engine
 
-db_session = SessionLocal()
+    @cached_property
+    def async_read_engine(self) -> AsyncEngine | None:
+        """Asyncio engine of the read replica, None without one."""
+        if not self.read_replica_url:
+            return None
+        async_read_engine = create_async_db_engine(url=self.read_replica_url)
+        instrument_pool(async_read_engine.sync_engine, "async_read")
+        # Not aliased: reads coalesced by single_flight must not mix sessions on the primary and the replica
+        return async_read_engine
 
+    @cached_property
+    def read_session_factory(self) -> sessionmaker | None:
+        if self.read_engine is None:
+            return None
+        return sessionmaker(bind=self.read_engine, autoflush=False, future=True, expire_on_commit=False)
 
-# add_data(db_session)
+    @cached_property
+    def async_read_session_factory(self) -> async_sessionmaker | None:
+        if self.async_read_engine is None:
+            return None
+        return async_sessionmaker(bind=self.async_read_engine, autoflush=False, expire_on_commit=False)
 
+    def startup(self) -> None:
+        """Build every engine and create the tables and indexes the database lacks."""
+        init_db(self.engine)
+        # Build the other engines now rather than on the first request using them
+        for name in ("async_engine", "read_engine", "async_read_engine"):
+            getattr(self, name)
 
-def get_db() -> Generator[Session, None, None]:
+    async def dispose(self) -> None:
+        """Close the pooled connections of the engines built so far; they reconnect if used again."""
+        for name in ("engine", "read_engine"):
+            if self.__dict__.get(name) is not None:
+                self.__dict__[name].dispose()
+        for name in ("async_engine", "async_read_engine"):
+            if self.__dict__.get(name) is not None:
+                await self.__dict__[name].dispose()
+
+
+database = Database()
+
+
+def get_db(request: Request) -> Generator[Session, None, None]:
     """
     FastAPI dependency that provides a database session.
 
@@ -87,6 +361,9 @@ def get_db() -> Generator[Session, None, None]:
     - Automatically closes the session after use
     - Handles exceptions gracefully
 
+    Commits that write keep the user's reads on the primary for a while, see
+    app/db_handler/read_replica.py.
+
     Yields:
         Session: SQLAlchemy database session
 
@@ -95,7 +372,8 @@ def get_db() -> Generator[Session, None, None]:
         def get_users(db: Session = Depends(get_db)):
             return db.query(User).all()
     """
-    db = SessionLocal()
+    db = database.session_factory()
+    track_writes(db, request)
     try:
         yield db
     except Exception as e:
@@ -104,3 +382,88 @@ def get_db() -> Generator[Session, None, None]:
         raise
     finally:
         db.close()
+
+
+def get_read_db(request: Request) -> Generator[Session, None, None]:
+    """
+    FastAPI dependency that provides a session for routes that only read.
+
+    The session is on the read replica (DB_READ_REPLICA_URL), or on the primary
+    when there is none or the user wrote within DB_READ_YOUR_WRITES_SECONDS,
+    so that they see their own changes.
+
+    Yields:
+        Session: SQLAlchemy database session
+
+    Example:
+        @app.get("/locations/nearby")
+        def get_nearby(db: Session = Depends(get_read_db)):
+            return get_locations_nearby(db, 50.06, 19.94, 5.0)
+    """
+    factory = database.read_session_factory
+    if factory is None or reads_from_primary(request):
+        factory = database.session_factory
+    db = factory()
+    try:
+        yield db
+    except Exception as e:
+        logger.error(f"Database session error: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def get_async_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    FastAPI dependency that provides an asyncio database session.
+
+    Use it in ``async def`` routes: every query is awaited, so a slow query only
+    suspends its own request instead of blocking the event loop for all of them.
+    Relationships must be loaded eagerly (or inside ``AsyncSession.run_sync``),
+    as lazy loading is not possible on attribute access. Commits that write keep
+    the user's reads on the primary for a while, see app/db_handler/read_replica.py.
+
+    Yields:
+        AsyncSession: SQLAlchemy asyncio database session
+
+    Example:
+        @app.get("/users/{user_id}")
+        async def get_user(user_id: int, db: AsyncSession = Depends(get_async_db)):
+            return await get_user_by_id_async(db, user_id)
+    """
+    async with database.async_session_factory() as db:
+        track_writes(db, request)
+        try:
+            yield db
+        except Exception as e:
+            logger.error(f"Database session error: {e}")
+            await db.rollback()
+            raise
+
+
+async def get_async_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    FastAPI dependency that provides an asyncio session for routes that only read.
+
+    Like get_read_db: on the read replica unless there is none or the user
+    wrote within DB_READ_YOUR_WRITES_SECONDS.
+
+    Yields:
+        AsyncSession: SQLAlchemy asyncio database session
+
+    Example:
+        @app.get("/users/{user_id}/profile")
+        async def get_user_profile(user_id: int, db: AsyncSession = Depends(get_async_read_db)):
+            return await get_user_with_profile_async(db, user_id)
+    """
+    factory = database.async_read_session_factory
+    if factory is None or reads_from_primary(request):
+        factory = database.async_session_factory
+    async with factory() as db:
+        try:
+            yield db
+        except Exception as e:
+            logger.error(f"Database session error: {e}")
+            await db.rollback()
+            raise
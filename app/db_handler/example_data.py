@@ -2,12 +2,15 @@ from sqlalchemy.orm import Session
 import pandas as pd
 import os
 from app.crud.user import create_organisation, OrganisationCreate
-from app.crud.location import add_address, get_all_locations
-from app.db_handler.db_connection import SessionLocal
-from app.models.location import AddLocation, LocationData
-from app.schemas.db_models import User
-from app.schemas.enums import UserType, LocationType
-from app.services.osm_maps import generate_map_with_locations
+from app.db_handler.db_connection import database
+from app.config import GEOCODER_REQUESTS_PER_SECOND
+from app.schemas.db_models import Location, User
+from app.schemas.enums import UserType
+from app.services.geocode_batch import BatchGeocoder, BatchGeocodeStats
+from app.services.geocode_cache import GeocodeFn
+from app.services.geocoders import get_default_geocoder
+from app.services.map_builder import map_builder
+from app.utils.address import format_address
 
 
 def add_data(session: Session):
@@ -19,7 +22,11 @@ def add_events(session: Session):
     pass
 
 
-def add_schools_as_organisations(session: Session):
+def add_schools_as_organisations(
+    session: Session,
+    geocoder: GeocodeFn | None = None,
+    requests_per_second: float = GEOCODER_REQUESTS_PER_SECOND,
+) -> BatchGeocodeStats:
     primary_schools_csv_path = os.path.join(
         os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__)))),
         "data",
@@ -27,49 +34,69 @@ def add_schools_as_organisations(session: Session):
     )
 
     df = pd.read_csv(primary_schools_csv_path)
-    idx = 0
-    for row in df.itertuples(index=True):
-        idx += 1
-        schoole_name = row._4
-        address = f"{row.Ulica} {row._24}, {row.Miejscowość}"
-        print(f"{schoole_name}: {address}")
-        user_db = User(email=f"test{idx}@krakow.um.pl", password_hash="dummy@#$pass", user_type=UserType.ORGANISATION)
-        session.add(user_db)
-        session.commit()
-        session.refresh(user_db)
-        org = OrganisationCreate(
-            org_name=schoole_name,
-            contact_person=f"Smok Wawelski nr {idx}",
-            description=schoole_name,
-            phone_number="123456789",
-            address=address,
-            verified=True,
+    schools = [
+        (
+            row._4,
+            format_address(
+                row.Ulica,
+                row._24,
+                row.Miejscowość,
+                unit=row._25 if pd.notna(row._25) else None,
+                postal_code=row._26,
+            ),
         )
+        for row in df.itertuples(index=True)
+    ]
+
+    # Geocode all distinct addresses up front, then write every school in one transaction
+    if geocoder is None:
+        geocoder = get_default_geocoder()
+    batch_geocoder = BatchGeocoder(geocoder, requests_per_second=requests_per_second)
+    coordinates, stats = batch_geocoder.geocode_all(session, [address for _, address in schools])
 
-        org = create_organisation(session, user_db, org_data=org)
-        location_data = AddLocation(address=org.address, location_name=org.org_name)
-        location = add_address(session=session, location_data=location_data)
-        user_db.location_id = location.id
+    users = []
+    for idx, (school_name, address) in enumerate(schools, start=1):
+        if coordinates[address] is None:
+            print(f"Skipping {school_name}: address not found ({address})")
+            continue
+        users.append(
+            (
+                User(email=f"test{idx}@krakow.um.pl", password_hash="dummy@#$pass", user_type=UserType.ORGANISATION),
+                idx,
+                school_name,
+                address,
+            )
+        )
+    try:
+        session.add_all([user_db for user_db, *_ in users])
+        session.flush()
+        for user_db, idx, school_name, address in users:
+            org = OrganisationCreate(
+                org_name=school_name,
+                contact_person=f"Smok Wawelski nr {idx}",
+                description=school_name,
+                phone_number="123456789",
+                address=address,
+                verified=True,
+            )
+            create_organisation(session, user_db, org_data=org)
+            latitude, longitude = coordinates[address]
+            user_db.location = Location(name=school_name, latitude=latitude, longitude=longitude)
         session.commit()
-        session.refresh(user_db)
-        session.refresh(location)
+    except Exception as e:
+        session.rollback()
+        raise e
+    print(f"Imported {len(users)} schools: {stats.as_dict()}")
+    return stats
 
 
 def generate_map_from_example_data():
-    session = SessionLocal()
+    database.startup()
+    session = database.session_factory()
     add_schools_as_organisations(session)
-    locations = get_all_locations(session)
-    location_datas = []
-    for location in locations:
-        location_datas.append(
-            LocationData(
-                name=location.name,
-                latitude=location.latitude,
-                longitude=location.longitude,
-                category=LocationType.ORGANISATION,
-            )
-        )
-    generate_map_with_locations(location_datas)
+    # The map loads the imported locations from /locations/clusters and bakes in upcoming events
+    map_builder.rebuild(session)
 
-generate_map_from_example_data()
 
+if __name__ == "__main__":
+    generate_map_from_example_data()
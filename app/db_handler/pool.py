@@ -0,0 +1,221 @@
+"""Connection pool instrumentation: checkout latency, saturation, connection age and the pre-ping strategy.
+
+Engines built by create_db_engine and create_async_db_engine use the metered
+pools below, which time every checkout from the moment a connection is asked
+for until it is handed out, including waiting for a free connection, opening a
+new one and pinging it. ``instrument_pool`` attaches a ``PoolMetrics`` to an
+engine, reported by /health/metrics and checked by /health/ready.
+"""
+
+import threading
+import time
+import weakref
+from collections import deque
+
+from sqlalchemy import Engine, event
+from sqlalchemy.exc import DisconnectionError, TimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+
+class PoolMetrics:
+    """
+    Live statistics of an engine's connection pool.
+
+    Args:
+        engine: Synchronous engine, or the ``sync_engine`` of an AsyncEngine
+        window: Number of recent checkouts the wait percentiles are computed over
+    """
+
+    def __init__(self, engine: Engine, window: int = 1024):
+        self._engine = engine
+        self._waits: deque[float] = deque(maxlen=window)
+        self._connected_at: dict[int, float] = {}
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        # Only used for pools that do not count their connections, such as StaticPool
+        self._checked_out = 0
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "close", self._on_close)
+        event.listen(engine, "detach", self._on_close)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+
+    def _on_connect(self, dbapi_connection, connection_record) -> None:
+        with self._lock:
+            self._connected_at[id(connection_record)] = time.monotonic()
+
+    def _on_close(self, dbapi_connection, connection_record) -> None:
+        with self._lock:
+            self._connected_at.pop(id(connection_record), None)
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        with self._lock:
+            self._checked_out += 1
+
+    def _on_checkin(self, dbapi_connection, connection_record) -> None:
+        with self._lock:
+            self._checked_out -= 1
+
+    def record_checkout(self, seconds: float, timed_out: bool = False) -> None:
+        """Record the duration of a checkout, called by the metered pools."""
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+                self._waits.append(seconds)
+
+    @property
+    def pool(self) -> Pool:
+        # Engine.dispose() replaces the pool, so it is looked up on every read
+        return self._engine.pool
+
+    def capacity(self) -> int | None:
+        """Connections the pool can hand out at once, None when unlimited or shared."""
+        pool = self.pool
+        if not isinstance(pool, QueuePool) or pool._max_overflow < 0:
+            return None
+        return pool.size() + pool._max_overflow
+
+    def checked_out(self) -> int:
+        pool = self.pool
+        return pool.checkedout() if isinstance(pool, QueuePool) else self._checked_out
+
+    def saturation(self) -> float:
+        """Share of the pool's capacity that is checked out; at 1.0 further checkouts wait."""
+        capacity = self.capacity()
+        return self.checked_out() / capacity if capacity else 0.0
+
+    def as_dict(self) -> dict:
+        pool = self.pool
+        now = time.monotonic()
+        with self._lock:
+            waits = sorted(self._waits)
+            ages = [now - connected_at for connected_at in self._connected_at.values()]
+            checkouts, timeouts = self.checkouts, self.timeouts
+        queued = isinstance(pool, QueuePool)
+        return {
+            "pool": type(pool).__name__,
+            "size": pool.size() if queued else None,
+            "capacity": self.capacity(),
+            "checked_out": self.checked_out(),
+            "checked_in": pool.checkedin() if queued else None,
+            "overflow": max(pool.overflow(), 0) if queued else None,
+            "saturation": round(self.saturation(), 3),
+            "checkouts": checkouts,
+            "timeouts": timeouts,
+            "checkout_wait_ms": {
+                "p50": round(_percentile(waits, 50) * 1000, 3),
+                "p99": round(_percentile(waits, 99) * 1000, 3),
+                "max": round(waits[-1] * 1000, 3) if waits else 0.0,
+            },
+            "connections": len(ages),
+            "connection_age_seconds": {
+                "mean": round(sum(ages) / len(ages), 1) if ages else 0.0,
+                "max": round(max(ages), 1) if ages else 0.0,
+            },
+        }
+
+
+def _percentile(ordered: list[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))]
+
+
+class _MeteredPool:
+    """Mixin timing Pool.connect() into the PoolMetrics set by instrument_pool."""
+
+    metrics: PoolMetrics | None = None
+
+    def connect(self):
+        if self.metrics is None:
+            return super().connect()
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except TimeoutError:
+            self.metrics.record_checkout(time.perf_counter() - start, timed_out=True)
+            raise
+        self.metrics.record_checkout(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class MeteredQueuePool(_MeteredPool, QueuePool):
+    """QueuePool whose checkouts are timed once the engine is instrumented."""
+
+
+class MeteredAsyncAdaptedQueuePool(_MeteredPool, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool whose checkouts are timed once the engine is instrumented."""
+
+
+_metrics: weakref.WeakValueDictionary[str, PoolMetrics] = weakref.WeakValueDictionary()
+
+
+def instrument_pool(engine: Engine, name: str) -> PoolMetrics:
+    """
+    Collect the statistics of an engine's pool and report them under name.
+
+    Checkout latency is only measured for the metered pools; the other
+    statistics are available for any pool.
+
+    Args:
+        engine: Synchronous engine, or the ``sync_engine`` of an AsyncEngine
+        name: Key of the pool in pool_stats()
+
+    Example:
+        >>> instrument_pool(async_engine.sync_engine, "async")
+    """
+    metrics = PoolMetrics(engine)
+    if isinstance(engine.pool, _MeteredPool):
+        engine.pool.metrics = metrics
+    _metrics[name] = metrics
+    return metrics
+
+
+def pool_metrics() -> dict[str, PoolMetrics]:
+    """The instrumented pools, by name."""
+    return dict(sorted(_metrics.items()))
+
+
+def pool_stats() -> dict[str, dict]:
+    """Statistics of every instrumented pool, by name."""
+    return {name: metrics.as_dict() for name, metrics in pool_metrics().items()}
+
+
+def ping_idle_connections(engine: Engine, idle_seconds: float) -> None:
+    """
+    Test connections that sat unused in the pool for idle_seconds before handing them out.
+
+    pool_pre_ping costs a round trip on every checkout. Connections returned a
+    moment ago are almost never broken, so only idle ones, which the server or
+    a firewall may have dropped, are pinged. A failed ping makes the pool
+    discard the connection and open a fresh one.
+
+    Args:
+        engine: Synchronous engine, or the ``sync_engine`` of an AsyncEngine
+        idle_seconds: Idle time after which a connection is pinged
+    """
+
+    @event.listens_for(engine, "checkin")
+    def remember_checkin(dbapi_connection, connection_record):
+        # info is cleared whenever the record opens a new DBAPI connection
+        connection_record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def ping(dbapi_connection, connection_record, connection_proxy):
+        checked_in_at = connection_record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < idle_seconds:
+            return
+        try:
+            cursor = dbapi_connection.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+        except Exception as e:
+            raise DisconnectionError(f"Idle connection failed the ping: {e}") from e
@@ -0,0 +1,117 @@
+"""Routing of read-only requests to a read replica, with read-your-writes for recent writers.
+
+When ``DB_READ_REPLICA_URL`` is set, the GET routes listing events, showing
+profiles and searching locations take their session from ``get_read_db`` or
+``get_async_read_db``, bound to the replica, so they no longer compete with
+registrations and logins for the primary's connections.
+
+A replica applies the primary's commits with some lag. So that users see their
+own changes, sessions handed out by get_db and get_async_db remember which user
+the request came from, and a commit that wrote anything marks that user as a
+recent writer. For ``DB_READ_YOUR_WRITES_SECONDS`` after that, their reads go
+to the primary. Writers are remembered by the process that served the write;
+with several workers, keep the window comfortably above the replica's usual lag.
+"""
+
+import jwt
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from app.config import DB_READ_YOUR_WRITES_CLIENTS, DB_READ_YOUR_WRITES_SECONDS
+from app.utils.cache import TTLCache
+
+# Key in Session.info naming the user the session's request came from
+_CLIENT = "read_replica_client"
+# Key in Session.info set once the session wrote, until commit or rollback
+_WROTE = "read_replica_wrote"
+
+
+class RecentWriters:
+    """
+    Users who committed a write in the last ``window`` seconds.
+
+    Args:
+        window: Seconds a user's reads stay on the primary after a write
+        maxsize: Maximum number of users remembered
+
+    Example:
+        >>> writers = RecentWriters(window=5)
+        >>> writers.mark("42")
+        >>> writers.wrote_recently("42")
+        True
+    """
+
+    def __init__(self, window: float = DB_READ_YOUR_WRITES_SECONDS, maxsize: int = DB_READ_YOUR_WRITES_CLIENTS):
+        self._writes: TTLCache[str, bool] = TTLCache(maxsize=maxsize, ttl=window)
+
+    def mark(self, client: str) -> None:
+        self._writes.set(client, True)
+
+    def wrote_recently(self, client: str | None) -> bool:
+        return client is not None and client in self._writes
+
+    def clear(self) -> None:
+        self._writes.clear()
+
+
+recent_writers = RecentWriters()
+
+
+def client_key(request: Request) -> str | None:
+    """
+    The user a request comes from, i.e. the subject of its bearer token, or None.
+
+    Only used to route reads, so the token is not verified here: a forged
+    subject merely sends its own reads to the primary. The route's
+    authentication still verifies it.
+    """
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        subject = jwt.decode(token, options={"verify_signature": False}).get("sub")
+    except jwt.InvalidTokenError:
+        return None
+    return str(subject) if subject is not None else None
+
+
+def track_writes(session: Session | AsyncSession, request: Request) -> None:
+    """
+    Mark the request's user as a recent writer whenever the session commits a write.
+
+    Args:
+        session: Session or AsyncSession handed to a route that may write
+        request: Request the session is used for
+    """
+    session.info[_CLIENT] = client_key(request)
+
+
+def reads_from_primary(request: Request) -> bool:
+    """Whether the request's user wrote too recently for the replica to reflect it."""
+    return recent_writers.wrote_recently(client_key(request))
+
+
+@event.listens_for(Session, "after_flush")
+def _note_flushed_write(session: Session, flush_context) -> None:
+    if session.info.get(_CLIENT) is not None:
+        session.info[_WROTE] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _note_executed_write(state: ORMExecuteState) -> None:
+    # INSERT, UPDATE and DELETE statements executed without going through a flush
+    if state.session.info.get(_CLIENT) is not None and (state.is_insert or state.is_update or state.is_delete):
+        state.session.info[_WROTE] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _remember_writer(session: Session) -> None:
+    if session.info.pop(_WROTE, False):
+        recent_writers.mark(session.info[_CLIENT])
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_write(session: Session) -> None:
+    session.info.pop(_WROTE, None)
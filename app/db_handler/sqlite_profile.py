@@ -0,0 +1,212 @@
+"""Production profile for SQLite engines: connection pragmas, pool choice and retries on locks.
+
+With the default rollback journal a writer locks readers out of the whole
+database file and every pooled connection starts with a 2 MB page cache. The
+profile switches every connection to WAL, where readers see the last committed
+snapshot while one writer appends to the log, and sizes the caches for a
+server process.
+
+A write that cannot get the lock within ``busy_timeout`` fails with
+"database is locked". So does, immediately, a transaction that read a snapshot
+another writer has since committed over, which WAL cannot upgrade to a write.
+Both succeed when the whole unit of work is run again, which is what
+``retry_on_locked`` does, with exponential backoff and jitter.
+"""
+
+import asyncio
+import functools
+import inspect
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from sqlalchemy import Engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.config import (
+    DB_MAX_OVERFLOW,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT_SECONDS,
+    SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_CACHE_SIZE_KIB,
+    SQLITE_FOREIGN_KEYS,
+    SQLITE_JOURNAL_MODE,
+    SQLITE_LOCK_RETRIES,
+    SQLITE_LOCK_RETRY_DELAY_SECONDS,
+    SQLITE_MMAP_SIZE,
+    SQLITE_SYNCHRONOUS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SQLiteProfile:
+    """PRAGMA values set on every new SQLite connection, by default from the SQLITE_* settings."""
+
+    journal_mode: str = SQLITE_JOURNAL_MODE
+    synchronous: str = SQLITE_SYNCHRONOUS
+    mmap_size: int = SQLITE_MMAP_SIZE
+    cache_size_kib: int = SQLITE_CACHE_SIZE_KIB
+    busy_timeout_ms: int = SQLITE_BUSY_TIMEOUT_MS
+    foreign_keys: bool = SQLITE_FOREIGN_KEYS
+
+    def pragmas(self) -> list[str]:
+        """The PRAGMA statements, in the order they are run."""
+        return [
+            f"PRAGMA journal_mode={self.journal_mode}",
+            f"PRAGMA synchronous={self.synchronous}",
+            f"PRAGMA mmap_size={self.mmap_size}",
+            # A negative cache_size is in KiB rather than pages
+            f"PRAGMA cache_size={-self.cache_size_kib}",
+            f"PRAGMA busy_timeout={self.busy_timeout_ms}",
+            f"PRAGMA foreign_keys={'ON' if self.foreign_keys else 'OFF'}",
+        ]
+
+
+def sqlite_engine_options(url: str) -> dict:
+    """
+    Pool options of create_engine or create_async_engine suited to a SQLite database.
+
+    An in-memory database only exists in the connection that created it, so all
+    sessions share a single one. Connections to a file are pooled without pre-ping
+    or recycling, which only guard against network databases dropping idle
+    connections, and may be used from the threads the pool hands them to.
+
+    Args:
+        url: SQLite connection string, with either driver
+    """
+    if make_url(url).database in (None, "", ":memory:"):
+        return {"poolclass": StaticPool, "connect_args": {"check_same_thread": False}}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT_SECONDS,
+        "connect_args": {"check_same_thread": False},
+    }
+
+
+def apply_sqlite_profile(engine: Engine, profile: SQLiteProfile | None = None) -> None:
+    """
+    Run the profile's pragmas on every connection the engine opens.
+
+    Args:
+        engine: Synchronous engine, or the ``sync_engine`` of an AsyncEngine
+        profile: Pragma values, SQLiteProfile() by default
+    """
+    pragmas = (profile or SQLiteProfile()).pragmas()
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+@dataclass
+class LockRetryStats:
+    """Counters of retry_on_locked."""
+
+    retries: int = 0
+    failures: int = 0  # Calls still locked out after the last retry
+
+    def as_dict(self) -> dict:
+        return {"retries": self.retries, "failures": self.failures}
+
+
+lock_retry_stats = LockRetryStats()
+
+
+def is_database_locked(error: BaseException) -> bool:
+    """Whether the error, or one it was raised while handling, is SQLite's "database is locked"."""
+    while error is not None:
+        if isinstance(error, OperationalError) and "database is locked" in str(error.orig):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def _session_of(args: tuple) -> Session | AsyncSession | None:
+    return next((arg for arg in args if isinstance(arg, (Session, AsyncSession))), None)
+
+
+def _retry_delay(attempt: int, delay: float) -> float:
+    # Jitter keeps writers that collided once from colliding again at the same moment
+    return delay * 2**attempt * random.uniform(0.5, 1.5)
+
+
+def retry_on_locked(retries: int = SQLITE_LOCK_RETRIES, delay: float = SQLITE_LOCK_RETRY_DELAY_SECONDS) -> Callable:
+    """
+    Run the decorated unit of work again when it fails because the database is locked.
+
+    The session passed to the function is rolled back before every retry, so the
+    function must start its work from scratch, like the CRUD functions that add
+    their objects and commit. Works on coroutine functions, which back off with
+    asyncio.sleep, and plain functions. Plain functions called through
+    ``AsyncSession.run_sync`` are not retried themselves: sleeping there would
+    block the event loop, so the retry is left to their async version.
+
+    Args:
+        retries: Attempts after the first one
+        delay: Backoff before the first retry, doubled on every further one
+
+    Example:
+        >>> @retry_on_locked()
+        >>> def register_for_event(session, registration_data): ...
+    """
+
+    def decorator(func: Callable) -> Callable:
+        def should_retry(error: Exception, attempt: int) -> bool:
+            if not is_database_locked(error):
+                return False
+            if attempt == retries:
+                lock_retry_stats.failures += 1
+                return False
+            lock_retry_stats.retries += 1
+            logger.warning(f"{func.__qualname__}: database is locked, retry {attempt + 1} of {retries}")
+            return True
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                session = _session_of(args)
+                for attempt in range(retries + 1):
+                    try:
+                        return await func(*args, **kwargs)
+                    except Exception as e:
+                        if not should_retry(e, attempt):
+                            raise
+                    if session is not None:
+                        await session.rollback()
+                    await asyncio.sleep(_retry_delay(attempt, delay))
+
+        else:
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                session = _session_of(args)
+                if session is not None and session.get_bind().dialect.is_async:
+                    return func(*args, **kwargs)
+                for attempt in range(retries + 1):
+                    try:
+                        return func(*args, **kwargs)
+                    except Exception as e:
+                        if not should_retry(e, attempt):
+                            raise
+                    if session is not None:
+                        session.rollback()
+                    time.sleep(_retry_delay(attempt, delay))
+
+        return wrapper
+
+    return decorator
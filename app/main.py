@@ -1,30 +1,21 @@
-import logging
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
 from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-import uvicorn
 
-from app.routes import user, health_check, navigation, event
-from app.logs import setup_logging
+from app.routes import user, health_check, navigation, event, location, tiles
 from app.config import SERVER_ADDRESS
-from app.db_handler.db_connection import init_db, engine
-
-setup_logging()
-logger = logging.getLogger(__name__)
+from app.container import container
+from app.services.map_page import RequestPathGuardMiddleware
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: Initialize database
-    logger.info("Initializing database...")
-    init_db(engine)
-    logger.info("Database initialized successfully")
+    container.startup()
     yield
-    # Shutdown: cleanup if needed
-    logger.info("Shutting down...")
+    await container.shutdown()
 
 
 app = FastAPI(
@@ -34,10 +25,14 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+app.add_middleware(RequestPathGuardMiddleware)
+
 app.include_router(health_check.router)
 app.include_router(user.router)
 app.include_router(navigation.router)
 app.include_router(event.router)
+app.include_router(location.router)
+app.include_router(tiles.router)
 
 
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
@@ -51,6 +46,8 @@ async def home(request: Request):
 
 
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run(
         "main:app",  # Module path to FastAPI instance
         host=SERVER_ADDRESS,
@@ -1,13 +1,18 @@
+from typing import TYPE_CHECKING
+
 from pydantic import BaseModel
-from datetime import date
+from datetime import date, datetime
 
-from location import Location
-from organisation import OrganisationModel
-from task import TaskModel
-from registration import RegistrationModel
-from certificate import CertificateModel
 from app.schemas.enums import RegistrationStatus
 
+if TYPE_CHECKING:
+    # The nested models import each other in a cycle; EventModel stays unresolved until they are rebuilt
+    from app.models.location import Location
+    from app.models.organisation import OrganisationModel
+    from app.models.task import TaskModel
+    from app.models.registration import RegistrationModel
+    from app.models.certificate import CertificateModel
+
 
 class EventModel(BaseModel):
     id: int
@@ -19,11 +24,11 @@ class EventModel(BaseModel):
     signup_end: date
     location_id: int
     organisation_id: int
-    location: Location
-    organisation: OrganisationModel
-    task: TaskModel
-    registrations: list[RegistrationModel]
-    certificates: list[CertificateModel]
+    location: "Location"
+    organisation: "OrganisationModel"
+    task: "TaskModel"
+    registrations: list["RegistrationModel"]
+    certificates: list["CertificateModel"]
 
 
 class EventUserRegistration(BaseModel):
@@ -32,6 +37,17 @@ class EventUserRegistration(BaseModel):
     status: RegistrationStatus = RegistrationStatus.PENDING
 
 
+class NearbyEvent(BaseModel):
+    id: int
+    name: str
+    description: str
+    start_date: datetime
+    end_date: datetime
+    latitude: float
+    longitude: float
+    distance_km: float
+
+
 class EventCreation(BaseModel):
     name: str
     description: str
@@ -40,4 +56,4 @@ class EventCreation(BaseModel):
     signup_start: date
     signup_end: date
     address: str
-    organisation: OrganisationModel
+    organisation: "OrganisationModel"
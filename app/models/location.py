@@ -9,6 +9,14 @@ class LocationData(BaseModel):
     category: LocationType
 
 
+class NearbyLocation(BaseModel):
+    id: int
+    name: str
+    latitude: float
+    longitude: float
+    distance_km: float
+
+
 class AddLocation(BaseModel):
     address: str
     location_name: str
@@ -1,14 +1,23 @@
 from datetime import datetime, date
-from typing import List
+from typing import Annotated, List
 
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db_handler.db_connection import get_db
-from app.schemas.db_models import Event
+from app.config import EVENTS_NEARBY_HORIZON_DAYS, EVENTS_NEARBY_KM_PER_DAY
+from app.crud.event import get_upcoming_event_page_async, get_upcoming_events_nearby_async
+from app.crud.user import get_user_coordinates_async
+from app.db_handler.db_connection import get_async_read_db
+from app.models.event import NearbyEvent
+from app.services.response_cache import cache_response
+from app.utils.auth import Principal, get_current_principal
+from app.utils.pagination import decode_cursor, encode_cursor
 
 router = APIRouter(prefix="/events", tags=["events"])
 
+# Response header carrying the cursor of the next page, absent on the last page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
 
 def _to_iso_date(dt: datetime | date) -> str:
     if isinstance(dt, datetime):
@@ -16,25 +25,102 @@ def _to_iso_date(dt: datetime | date) -> str:
     return dt.isoformat()
 
 
+def _naive_local(dt: datetime | None) -> datetime | None:
+    # Event dates are stored as naive local times
+    if dt is None or dt.tzinfo is None:
+        return dt
+    return dt.astimezone().replace(tzinfo=None)
+
+
 @router.get("/upcoming")
-def get_upcoming_events(db: Session = Depends(get_db)) -> List[dict]:
-    today = datetime.now()
-    q = (
-        db.query(Event)
-        .filter(Event.start_date >= today)
-        .order_by(Event.start_date.asc())
-        .limit(500)
+@cache_response("event")
+async def get_upcoming_events(
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
+    limit: Annotated[int, Query(ge=1, le=500)] = 100,
+    cursor: Annotated[
+        str | None, Query(description=f"Value of the {NEXT_CURSOR_HEADER} header of the previous page")
+    ] = None,
+    start_from: Annotated[datetime | None, Query(description="Only events starting at or after this time")] = None,
+    start_to: Annotated[datetime | None, Query(description="Only events starting before this time")] = None,
+    organisation_id: Annotated[int | None, Query(description="Only events of this organisation")] = None,
+    q: Annotated[str | None, Query(max_length=255, description="Only events whose name contains this text")] = None,
+) -> List[dict]:
+    """
+    Return a page of the events that have not started yet, soonest first.
+
+    When more events match, the cursor of the next page is returned in the
+    X-Next-Cursor header; pass it back as ``cursor`` with the same filters.
+    Responses are cached until events change and carry an ETag; requests with
+    a matching If-None-Match get 304.
+    """
+    rows = await get_upcoming_event_page_async(
+        db,
+        limit=limit + 1,
+        after=decode_cursor(cursor) if cursor else None,
+        start_from=_naive_local(start_from),
+        start_to=_naive_local(start_to),
+        organisation_id=organisation_id,
+        name=q,
     )
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1].start_date, rows[-1].id)
+    return [
+        {
+            "id": row.id,
+            "name": row.name,
+            "description": row.description,
+            "start_date": row.start_date.isoformat(),
+            "end_date": row.end_date.isoformat(),
+        }
+        for row in rows
+    ]
 
-    events = []
-    for ev in q.all():
-        events.append(
-            {
-                "id": ev.id,
-                "name": ev.name,
-                "description": ev.description,
-                "start_date": ev.start_date.isoformat(),
-                "end_date": ev.end_date.isoformat(),
-            }
+
+@router.get("/nearby", response_model=List[NearbyEvent], summary="Upcoming events near the current user")
+async def get_nearby_events(
+    principal: Annotated[Principal, Depends(get_current_principal)],
+    db: AsyncSession = Depends(get_async_read_db),
+    radius_km: Annotated[float, Query(gt=0, le=500, description="Search radius in kilometres")] = 10.0,
+    limit: Annotated[int, Query(ge=1, le=500)] = 50,
+    km_per_day: Annotated[
+        float, Query(gt=0, description="Extra distance ranked the same as an event starting one day later")
+    ] = EVENTS_NEARBY_KM_PER_DAY,
+    within_days: Annotated[
+        float, Query(gt=0, le=366, description="Only events starting within this many days")
+    ] = EVENTS_NEARBY_HORIZON_DAYS,
+    lat: Annotated[float | None, Query(ge=-90, le=90, description="Latitude to search from")] = None,
+    lon: Annotated[float | None, Query(ge=-180, le=180, description="Longitude to search from")] = None,
+):
+    """
+    Return the upcoming events within radius_km of the user's location, best first.
+
+    Events are ranked by days until they start plus distance / km_per_day, so
+    an event km_per_day kilometres further away ranks the same as one starting
+    a day later. Pass lat and lon to search from another point.
+    """
+    if (lat is None) != (lon is None):
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_CONTENT, detail="Pass both lat and lon")
+    origin = (lat, lon) if lat is not None else await get_user_coordinates_async(db, principal.id)
+    if origin is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Set a location on your profile or pass lat and lon",
+        )
+    matches = await get_upcoming_events_nearby_async(
+        db, *origin, radius_km, limit=limit, km_per_day=km_per_day, within_days=within_days
+    )
+    return [
+        NearbyEvent(
+            id=row.id,
+            name=row.name,
+            description=row.description,
+            start_date=row.start_date,
+            end_date=row.end_date,
+            latitude=row.latitude,
+            longitude=row.longitude,
+            distance_km=round(distance, 3),
         )
-    return events
+        for row, distance in matches
+    ]
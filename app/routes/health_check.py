@@ -1,8 +1,96 @@
-from fastapi import APIRouter
+import secrets
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from app.config import DB_POOL_READY_SATURATION, METRICS_TOKEN
+from app.db_handler.pool import pool_metrics, pool_stats
+from app.db_handler.sqlite_profile import lock_retry_stats
+from app.services.login_limiter import LoginLimiter, get_login_limiter
+from app.services.password_hasher import PasswordHasher, get_password_hasher
+from app.services.response_cache import ResponseCache, get_response_cache
+from app.services.token_revocation import RevocationStore, get_revocation_store
+from app.services.user_cache import UserCache, get_user_cache
+from app.utils.auth import token_cache
+from app.utils.single_flight import single_flight_stats
 
 router = APIRouter()
 
+metrics_bearer = HTTPBearer(auto_error=False)
+
+
+def get_metrics_token() -> str:
+    """FastAPI dependency returning the token /health/metrics requires, "" when it is disabled."""
+    return METRICS_TOKEN
+
+
+def require_metrics_token(
+    token: Annotated[str, Depends(get_metrics_token)],
+    credentials: Annotated[HTTPAuthorizationCredentials | None, Depends(metrics_bearer)],
+) -> None:
+    """
+    Admit only monitoring clients sending ``Authorization: Bearer <METRICS_TOKEN>``.
+
+    The counters describe the login limiter, revoked tokens and caches, which
+    would help probing them, so the endpoint does not exist unless a token is set.
+
+    Raises:
+        HTTPException: 404 if METRICS_TOKEN is empty, 401 if the token is missing or wrong
+    """
+    if not token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if credentials is None or not secrets.compare_digest(credentials.credentials.encode(), token.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
 
 @router.get("/health", tags=["system"])
 async def healthcheck():
     return {"status": "ok"}
+
+
+@router.get("/health/ready", tags=["system"])
+async def readiness(response: Response):
+    """
+    Whether the instance can take more requests: 503 while a connection pool is saturated.
+
+    A pool is saturated when DB_POOL_READY_SATURATION of its connections are checked
+    out, so that further requests would wait for one; load balancers should route
+    new requests to other instances until it drains.
+    """
+    saturation = {name: round(metrics.saturation(), 3) for name, metrics in pool_metrics().items()}
+    saturated = [name for name, value in saturation.items() if value >= DB_POOL_READY_SATURATION]
+    if saturated:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {"status": "saturated" if saturated else "ready", "saturated": saturated, "pool_saturation": saturation}
+
+
+@router.get("/health/metrics", tags=["system"], dependencies=[Depends(require_metrics_token)])
+async def metrics(
+    hasher: Annotated[PasswordHasher, Depends(get_password_hasher)],
+    user_cache: Annotated[UserCache, Depends(get_user_cache)],
+    revocations: Annotated[RevocationStore, Depends(get_revocation_store)],
+    limiter: Annotated[LoginLimiter, Depends(get_login_limiter)],
+    responses: Annotated[ResponseCache, Depends(get_response_cache)],
+):
+    """
+    Counters and queue depths of the background workers, hit ratios of the in-process caches,
+    collapsed calls, retried SQLite writes and the database connection pools.
+
+    Only served with METRICS_TOKEN set, to clients sending it as bearer token.
+    """
+    return {
+        "password_hasher": hasher.stats.as_dict(),
+        "user_cache": user_cache.stats.as_dict(),
+        "token_cache": token_cache.stats.as_dict(),
+        "token_revocation": {**revocations.stats.as_dict(), "active": len(revocations)},
+        "login_limiter": {**limiter.stats.as_dict(), "tracked": limiter.tracked},
+        "response_cache": responses.as_dict(),
+        "single_flight": single_flight_stats(),
+        "sqlite_lock_retries": lock_retry_stats.as_dict(),
+        "db_pools": pool_stats(),
+    }
@@ -0,0 +1,147 @@
+"""Location search routes."""
+
+import json
+from collections.abc import Iterable, Iterator
+from typing import Annotated, List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Row
+from sqlalchemy.orm import Session
+
+from app.crud.location import get_location_labels, get_locations_nearby, iter_locations_in_bbox
+from app.db_handler.db_connection import get_read_db
+from app.models.location import NearbyLocation
+from app.schemas.enums import LocationType
+from app.services.clustering import cluster_index
+from app.utils.geo import BoundingBox
+
+router = APIRouter(prefix="/locations", tags=["locations"])
+
+DBSession = Annotated[Session, Depends(get_read_db)]
+
+# Features serialized per chunk of the streamed response
+GEOJSON_CHUNK_SIZE = 500
+
+
+def parse_bbox(bbox: str) -> BoundingBox:
+    """
+    Parse a "west,south,east,north" string (Leaflet's ``getBounds().toBBoxString()``).
+
+    Returns:
+        (min_lat, min_lon, max_lat, max_lon)
+
+    Raises:
+        HTTPException: 422 if the string is not four coordinates in range
+    """
+    try:
+        west, south, east, north = (float(value) for value in bbox.split(","))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail="bbox must be four comma-separated numbers: west,south,east,north",
+        )
+    if not (-90 <= south <= north <= 90):
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_CONTENT, detail="Invalid bbox latitudes")
+    # Leaflet reports longitudes beyond +-180 when the map is panned around the globe
+    west, east = max(west, -180.0), min(east, 180.0)
+    if west > east:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_CONTENT, detail="Invalid bbox longitudes")
+    return (south, west, north, east)
+
+
+def _feature(row: Row) -> dict:
+    return {
+        "type": "Feature",
+        "id": row.id,
+        "geometry": {"type": "Point", "coordinates": [row.longitude, row.latitude]},
+        "properties": {"name": row.name, "category": row.category},
+    }
+
+
+def stream_feature_collection(rows: Iterable[Row]) -> Iterator[str]:
+    """Serialize rows as a GeoJSON FeatureCollection, one chunk of features at a time."""
+    yield '{"type":"FeatureCollection","features":['
+    chunk = []
+    separator = ""
+    for row in rows:
+        chunk.append(json.dumps(_feature(row), separators=(",", ":")))
+        if len(chunk) == GEOJSON_CHUNK_SIZE:
+            yield separator + ",".join(chunk)
+            separator = ","
+            chunk = []
+    if chunk:
+        yield separator + ",".join(chunk)
+    yield "]}"
+
+
+@router.get("/nearby", response_model=List[NearbyLocation], summary="Find locations within a radius")
+def get_nearby_locations(
+    db: DBSession,
+    lat: Annotated[float, Query(ge=-90, le=90, description="Latitude of the search centre")],
+    lon: Annotated[float, Query(ge=-180, le=180, description="Longitude of the search centre")],
+    radius_km: Annotated[float, Query(gt=0, le=500, description="Search radius in kilometres")] = 5.0,
+    limit: Annotated[int, Query(ge=1, le=500)] = 50,
+):
+    """
+    Return the locations within radius_km of (lat, lon), nearest first.
+    """
+    return [
+        NearbyLocation(
+            id=location.id,
+            name=location.name,
+            latitude=location.latitude,
+            longitude=location.longitude,
+            distance_km=round(distance, 3),
+        )
+        for location, distance in get_locations_nearby(db, lat, lon, radius_km, limit)
+    ]
+
+
+@router.get("/geojson", summary="Stream the locations inside a map viewport as GeoJSON")
+def get_locations_geojson(
+    db: DBSession,
+    bbox: Annotated[str, Query(description="Viewport as west,south,east,north", examples=["19.8,50.0,20.1,50.1"])],
+    type: Annotated[LocationType | None, Query(description="Only locations of this type")] = None,
+    limit: Annotated[int, Query(ge=1, le=50_000)] = 10_000,
+):
+    """
+    Return the locations inside the bounding box as a GeoJSON FeatureCollection.
+
+    The response is streamed while rows are read from the database, so large
+    viewports neither build the whole document in memory nor delay the first byte.
+    """
+    box = parse_bbox(bbox)
+    rows = iter_locations_in_bbox(db, box, location_type=type, limit=limit)
+    return StreamingResponse(stream_feature_collection(rows), media_type="application/geo+json")
+
+
+@router.get("/clusters", summary="Clustered locations for a map viewport and zoom level")
+def get_location_clusters(
+    db: DBSession,
+    bbox: Annotated[str, Query(description="Viewport as west,south,east,north", examples=["19.8,50.0,20.1,50.1"])],
+    zoom: Annotated[int, Query(ge=0, le=22, description="Map zoom level")],
+) -> dict:
+    """
+    Return the clusters visible in the bounding box at a zoom level as a GeoJSON FeatureCollection.
+
+    Clusters carry ``point_count`` and the ``expansion_zoom`` at which they split;
+    single locations carry their id, name and category like /locations/geojson.
+    """
+    box = parse_bbox(bbox)
+    clusters = cluster_index.get(db).get_clusters(box, zoom)
+    labels = get_location_labels(db, [cluster.location_id for cluster in clusters if cluster.location_id is not None])
+    features = []
+    for cluster in clusters:
+        geometry = {"type": "Point", "coordinates": [cluster.longitude, cluster.latitude]}
+        if cluster.location_id is None:
+            properties = {"cluster": True, "point_count": cluster.count, "expansion_zoom": cluster.expansion_zoom}
+            features.append({"type": "Feature", "geometry": geometry, "properties": properties})
+            continue
+        label = labels.get(cluster.location_id)
+        if label is None:
+            # Deleted by another process since the index last compared itself with the table
+            continue
+        properties = {"cluster": False, "name": label.name, "category": label.category}
+        features.append({"type": "Feature", "id": cluster.location_id, "geometry": geometry, "properties": properties})
+    return {"type": "FeatureCollection", "features": features}
@@ -1,7 +1,10 @@
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
 
+from app.services.map_builder import MapBuilder, get_map_builder
+from app.services.response_cache import etag_matches
+
 router = APIRouter(prefix="/navigation", tags=["navigation"])
 templates = Jinja2Templates(directory="app/templates")
 
@@ -14,3 +17,28 @@ async def login_page(request: Request):
 @router.get("/register", response_class=HTMLResponse)
 async def register_page(request: Request):
     return templates.TemplateResponse(request, "register.html")
+
+
+@router.get("/map", response_class=HTMLResponse)
+def map_page(
+    builder: MapBuilder = Depends(get_map_builder),
+    if_none_match: str | None = Header(default=None),
+):
+    """
+    Serve the generated map page with an ETag; 304 if the client's copy is current.
+
+    The page is only ever read here. If it has not been generated yet a rebuild is
+    requested from the background builder and 503 is returned.
+    """
+    page = builder.page()
+    if page is None:
+        builder.schedule()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="The map is being generated",
+            headers={"Retry-After": "5"},
+        )
+    headers = {"ETag": page.etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, page.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return HTMLResponse(page.content, headers=headers)
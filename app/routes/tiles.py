@@ -0,0 +1,48 @@
+"""Vector tile routes."""
+
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Response, status
+from sqlalchemy.orm import Session
+
+from app.config import DB_READ_YOUR_WRITES_SECONDS
+from app.db_handler.db_connection import get_db, get_read_db
+from app.services.tiles import MAX_TILE_ZOOM, TileCache, get_tile_cache, render_tile
+
+router = APIRouter(prefix="/tiles", tags=["tiles"])
+
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+
+
+@router.get(
+    "/{z}/{x}/{y}.mvt",
+    response_class=Response,
+    responses={200: {"content": {MVT_MEDIA_TYPE: {}}}},
+    summary="Clustered locations as a Mapbox Vector Tile",
+)
+def get_tile(
+    db: Annotated[Session, Depends(get_read_db)],
+    primary: Annotated[Session, Depends(get_db)],
+    cache: Annotated[TileCache, Depends(get_tile_cache)],
+    z: Annotated[int, Path(ge=0, le=MAX_TILE_ZOOM)],
+    x: Annotated[int, Path(ge=0)],
+    y: Annotated[int, Path(ge=0)],
+):
+    """
+    Return tile z/x/y with a "locations" layer of clusters and single locations.
+
+    Tiles are served from the on-disk cache when present; the ``X-Tile-Cache``
+    header tells whether the tile was a cache hit or was rendered. Shortly after
+    an invalidation, misses are rendered from the primary rather than the replica.
+    """
+    if x >= 1 << z or y >= 1 << z:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tile out of range")
+    data = cache.get(z, x, y)
+    if data is not None:
+        return Response(data, media_type=MVT_MEDIA_TYPE, headers={"X-Tile-Cache": "hit"})
+    generation = cache.generation
+    # A lagging replica would put the tile back as it was before the commit that invalidated it
+    session = primary if cache.invalidated_within(DB_READ_YOUR_WRITES_SECONDS) else db
+    data = render_tile(session, z, x, y)
+    cache.put(z, x, y, data, generation)
+    return Response(data, media_type=MVT_MEDIA_TYPE, headers={"X-Tile-Cache": "miss"})
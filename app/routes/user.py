@@ -1,10 +1,10 @@
 """User management routes."""
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Annotated
 
-from app.db_handler.db_connection import get_db
+from app.db_handler.db_connection import get_async_db, get_async_read_db
 from app.models.user import (
     # Registration models
     VolunteerRegistration,
@@ -28,37 +28,91 @@ from app.models.user import (
 )
 from app.crud.user import (
     # Registration
-    register_volunteer,
-    register_organisation,
-    register_coordinator,
+    register_volunteer_async,
+    register_organisation_async,
+    register_coordinator_async,
     # Read operations
-    get_user_by_id,
-    get_user_by_email,
-    get_user_with_profile,
-    get_volunteer_by_user_id,
-    get_organisation_by_user_id,
-    get_coordinator_by_user_id,
+    get_user_by_id_async,
+    get_user_by_email_async,
+    get_user_with_profile_async,
+    get_users_with_profiles_async,
     # Update operations
-    update_volunteer,
-    update_organisation,
-    update_coordinator,
+    update_volunteer_async,
+    update_organisation_async,
+    update_coordinator_async,
     # Delete operations
-    delete_user,
+    delete_user_async,
 )
+from app.config import PASSWORD_HASH_RETRY_AFTER_SECONDS
+from app.schemas.db_models import User
 from app.schemas.enums import UserType
+from app.services.login_limiter import LoginLimiter, get_login_limiter
+from app.services.password_hasher import PasswordHasher, PasswordHasherOverloadedError, get_password_hasher
 from app.utils.auth import (
-    hash_password,
-    verify_password,
+    Principal,
     create_access_token,
-    get_current_active_user,
+    get_current_principal,
+    get_token_claims,
+    profile_claims,
+    revoke_token,
 )
-from app.schemas.db_models import User
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 # Dependency for database session
-DBSession = Annotated[Session, Depends(get_db)]
-AuthUser = Annotated[User, Depends(get_current_active_user)]
+DBSession = Annotated[AsyncSession, Depends(get_async_db)]
+# For routes that only read: on the read replica, if configured
+ReadDBSession = Annotated[AsyncSession, Depends(get_async_read_db)]
+AuthUser = Annotated[Principal, Depends(get_current_principal)]
+Hasher = Annotated[PasswordHasher, Depends(get_password_hasher)]
+Limiter = Annotated[LoginLimiter, Depends(get_login_limiter)]
+
+# Largest number of ids accepted by /users/profiles
+MAX_PROFILES_PER_REQUEST = 100
+
+
+def _service_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many login and registration requests, please try again shortly",
+        headers={"Retry-After": str(PASSWORD_HASH_RETRY_AFTER_SECONDS)},
+    )
+
+
+async def _hash_password(hasher: PasswordHasher, password: str) -> str:
+    """Hash a password off the event loop, shedding load with 503 when the hasher is saturated."""
+    try:
+        return await hasher.hash(password)
+    except PasswordHasherOverloadedError:
+        raise _service_busy()
+
+
+async def _verify_password(hasher: PasswordHasher, plain_password: str, hashed_password: str) -> bool:
+    """Check a password off the event loop, shedding load with 503 when the hasher is saturated."""
+    try:
+        return await hasher.verify(plain_password, hashed_password)
+    except PasswordHasherOverloadedError:
+        raise _service_busy()
+
+
+def _profile_response(user: User) -> VolunteerProfile | OrganisationProfile | CoordinatorProfile | None:
+    """Build the profile matching the user's type from a user loaded with get_user_with_profile."""
+    if user.user_type == UserType.VOLUNTEER:
+        return VolunteerProfile(
+            user=UserResponse.model_validate(user),
+            volunteer=VolunteerResponse.model_validate(user.volunteer),
+        )
+    elif user.user_type == UserType.ORGANISATION:
+        return OrganisationProfile(
+            user=UserResponse.model_validate(user),
+            organisation=OrganisationResponse.model_validate(user.organisation),
+        )
+    elif user.user_type == UserType.COORDINATOR:
+        return CoordinatorProfile(
+            user=UserResponse.model_validate(user),
+            coordinator=CoordinatorResponse.model_validate(user.coordinator),
+        )
+    return None
 
 
 # ==================== Registration Endpoints ====================
@@ -73,6 +127,7 @@ AuthUser = Annotated[User, Depends(get_current_active_user)]
 async def create_volunteer_account(
     registration: VolunteerRegistration,
     db: DBSession,
+    hasher: Hasher,
 ):
     """
     Register a new volunteer account.
@@ -80,7 +135,7 @@ async def create_volunteer_account(
     Creates both a User and Volunteer profile in a single transaction.
     """
     # Check if email already exists
-    existing_user = get_user_by_email(db, registration.user.email)
+    existing_user = await get_user_by_email_async(db, registration.user.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -89,10 +144,10 @@ async def create_volunteer_account(
 
     try:
         # Hash password
-        password_hash = hash_password(registration.user.password)
+        password_hash = await _hash_password(hasher, registration.user.password)
 
         # Register volunteer
-        user, volunteer = register_volunteer(
+        user, volunteer = await register_volunteer_async(
             session=db,
             user_data=registration.user,
             volunteer_data=registration.volunteer,
@@ -119,6 +174,7 @@ async def create_volunteer_account(
 async def create_organisation_account(
     registration: OrganisationRegistration,
     db: DBSession,
+    hasher: Hasher,
 ):
     """
     Register a new organisation account.
@@ -126,7 +182,7 @@ async def create_organisation_account(
     Creates both a User and Organisation profile in a single transaction.
     """
     # Check if email already exists
-    existing_user = get_user_by_email(db, registration.user.email)
+    existing_user = await get_user_by_email_async(db, registration.user.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -135,10 +191,10 @@ async def create_organisation_account(
 
     try:
         # Hash password
-        password_hash = hash_password(registration.user.password)
+        password_hash = await _hash_password(hasher, registration.user.password)
 
         # Register organisation
-        user, organisation = register_organisation(
+        user, organisation = await register_organisation_async(
             session=db,
             user_data=registration.user,
             org_data=registration.organisation,
@@ -165,6 +221,7 @@ async def create_organisation_account(
 async def create_coordinator_account(
     registration: CoordinatorRegistration,
     db: DBSession,
+    hasher: Hasher,
 ):
     """
     Register a new coordinator account.
@@ -172,7 +229,7 @@ async def create_coordinator_account(
     Creates both a User and Coordinator profile in a single transaction.
     """
     # Check if email already exists
-    existing_user = get_user_by_email(db, registration.user.email)
+    existing_user = await get_user_by_email_async(db, registration.user.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -181,10 +238,10 @@ async def create_coordinator_account(
 
     try:
         # Hash password
-        password_hash = hash_password(registration.user.password)
+        password_hash = await _hash_password(hasher, registration.user.password)
 
         # Register coordinator
-        user, coordinator = register_coordinator(
+        user, coordinator = await register_coordinator_async(
             session=db,
             user_data=registration.user,
             coord_data=registration.coordinator,
@@ -210,15 +267,26 @@ async def create_coordinator_account(
     response_model=TokenResponse,
     summary="User login",
 )
-async def login(credentials: UserLogin, db: DBSession):
+async def login(credentials: UserLogin, request: Request, db: DBSession, hasher: Hasher, limiter: Limiter):
     """
     Authenticate a user and return JWT access token.
 
+    Attempts beyond the per-email or per-client limit are answered with 429
+    before the user is looked up or the password checked.
+
     The token should be included in subsequent requests as:
     Authorization: Bearer <token>
     """
+    retry_after = limiter.attempt(credentials.email, request.client.host if request.client else None)
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, please try again later",
+            headers={"Retry-After": str(retry_after)},
+        )
+
     # Get user by email
-    user = get_user_by_email(db, credentials.email)
+    user = await get_user_by_email_async(db, credentials.email)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -227,7 +295,7 @@ async def login(credentials: UserLogin, db: DBSession):
         )
 
     # Verify password
-    if not verify_password(credentials.password, user.password_hash):
+    if not await _verify_password(hasher, credentials.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password",
@@ -235,9 +303,7 @@ async def login(credentials: UserLogin, db: DBSession):
         )
 
     # Generate JWT token (sub must be a string per JWT spec)
-    access_token = create_access_token(
-        data={"sub": str(user.id), "email": user.email, "user_type": user.user_type.value}
-    )
+    access_token = create_access_token(data=profile_claims(user))
 
     return TokenResponse(
         access_token=access_token,
@@ -251,15 +317,17 @@ async def login(credentials: UserLogin, db: DBSession):
     status_code=status.HTTP_200_OK,
     summary="User logout",
 )
-async def logout(_: AuthUser):
+async def logout(_: AuthUser, claims: Annotated[dict, Depends(get_token_claims)]):
     """
     Logout the current user.
 
-    Since JWT tokens are stateless, the actual logout is handled client-side
-    by discarding the token. This endpoint validates the token and confirms logout.
+    Revokes the access token, so it is refused until it would have expired
+    anyway. Tokens issued without a "jti" claim cannot be revoked and stay
+    valid until they expire.
 
     Requires valid JWT token in Authorization header.
     """
+    revoke_token(claims)
     return {
         "message": "Successfully logged out",
         "detail": "Please discard your access token",
@@ -287,57 +355,65 @@ async def get_current_user_info(current_user: AuthUser):
     "/me/profile",
     summary="Get current user's complete profile",
 )
-async def get_current_user_profile(auth_user: AuthUser, db: DBSession):
+async def get_current_user_profile(auth_user: AuthUser, db: ReadDBSession):
     """
     Get complete profile for the currently authenticated user.
 
     Requires valid JWT token in Authorization header.
     Returns different profile structures based on user type.
     """
-    user = get_user_with_profile(db, auth_user.id)
+    user = await get_user_with_profile_async(db, auth_user.id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User profile not found",
         )
 
-    if user.user_type == UserType.VOLUNTEER:
-        return VolunteerProfile(
-            user=UserResponse.model_validate(user),
-            volunteer=VolunteerResponse.model_validate(user.volunteer),
-        )
-    elif user.user_type == UserType.ORGANISATION:
-        return OrganisationProfile(
-            user=UserResponse.model_validate(user),
-            organisation=OrganisationResponse.model_validate(user.organisation),
-        )
-    elif user.user_type == UserType.COORDINATOR:
-        return CoordinatorProfile(
-            user=UserResponse.model_validate(user),
-            coordinator=CoordinatorResponse.model_validate(user.coordinator),
-        )
-    else:
+    profile = _profile_response(user)
+    if profile is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User type is invalid!",
         )
+    return profile
 
 
 # ==================== Read Endpoints ====================
 
 
+@router.get(
+    "/profiles",
+    summary="Get the profiles of several users",
+)
+async def get_user_profiles(
+    _: AuthUser,
+    db: ReadDBSession,
+    ids: Annotated[list[int], Query(min_length=1, max_length=MAX_PROFILES_PER_REQUEST, description="User IDs")],
+):
+    """
+    Get the complete profiles of several users, e.g. for a list view.
+
+    Profiles are returned in the order of ``ids``; unknown IDs are skipped.
+    All users are loaded with a single query.
+
+    Requires valid JWT token in Authorization header.
+    """
+    users = await get_users_with_profiles_async(db, ids)
+    return [_profile_response(users[user_id]) for user_id in dict.fromkeys(ids) if user_id in users]
+
+
 @router.get(
     "/{user_id}",
     response_model=UserResponse,
     summary="Get user by ID",
 )
-async def get_user(auth_user: AuthUser, db: DBSession):
+async def get_user(auth_user: AuthUser, db: ReadDBSession):
     """
     Get basic user information by ID.
 
     Requires valid JWT token in Authorization header.
     """
-    user = get_user_by_id(db, auth_user.id)
+    user = await get_user_by_id_async(db, auth_user.id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -350,7 +426,7 @@ async def get_user(auth_user: AuthUser, db: DBSession):
     "/{user_id}/profile",
     summary="Get user profile",
 )
-async def get_user_profile(_: AuthUser, user_id: int, db: DBSession):
+async def get_user_profile(_: AuthUser, user_id: int, db: ReadDBSession):
     """
     Get complete user profile including type-specific information.
 
@@ -361,7 +437,7 @@ async def get_user_profile(_: AuthUser, user_id: int, db: DBSession):
 
     Requires valid JWT token in Authorization header.
     """
-    user = get_user_with_profile(db, user_id)
+    user = await get_user_with_profile_async(db, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -369,24 +445,7 @@ async def get_user_profile(_: AuthUser, user_id: int, db: DBSession):
         )
 
     # Return appropriate profile based on user type
-    if user.user_type == UserType.VOLUNTEER:
-        volunteer = get_volunteer_by_user_id(db, user_id)
-        return VolunteerProfile(
-            user=UserResponse.model_validate(user),
-            volunteer=VolunteerResponse.model_validate(volunteer),
-        )
-    elif user.user_type == UserType.ORGANISATION:
-        organisation = get_organisation_by_user_id(db, user_id)
-        return OrganisationProfile(
-            user=UserResponse.model_validate(user),
-            organisation=OrganisationResponse.model_validate(organisation),
-        )
-    elif user.user_type == UserType.COORDINATOR:
-        coordinator = get_coordinator_by_user_id(db, user_id)
-        return CoordinatorProfile(
-            user=UserResponse.model_validate(user),
-            coordinator=CoordinatorResponse.model_validate(coordinator),
-        )
+    return _profile_response(user)
 
 
 # ==================== Update Endpoints ====================
@@ -411,7 +470,7 @@ async def update_volunteer_profile(
     Requires valid JWT token in Authorization header.
     """
     # Verify user exists and is a volunteer
-    user = get_user_by_id(db, user_id)
+    user = await get_user_by_id_async(db, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -424,7 +483,7 @@ async def update_volunteer_profile(
         )
 
     # Update volunteer
-    volunteer = update_volunteer(db, user_id, volunteer_data)
+    volunteer = await update_volunteer_async(db, user_id, volunteer_data)
     if not volunteer:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -456,7 +515,7 @@ async def update_organisation_profile(
     Requires valid JWT token in Authorization header.
     """
     # Verify user exists and is an organisation
-    user = get_user_by_id(db, user_id)
+    user = await get_user_by_id_async(db, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -469,7 +528,7 @@ async def update_organisation_profile(
         )
 
     # Update organisation
-    organisation = update_organisation(db, user_id, org_data)
+    organisation = await update_organisation_async(db, user_id, org_data)
     if not organisation:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -501,7 +560,7 @@ async def update_coordinator_profile(
     Requires valid JWT token in Authorization header.
     """
     # Verify user exists and is a coordinator
-    user = get_user_by_id(db, user_id)
+    user = await get_user_by_id_async(db, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -514,7 +573,7 @@ async def update_coordinator_profile(
         )
 
     # Update coordinator
-    coordinator = update_coordinator(db, user_id, coord_data)
+    coordinator = await update_coordinator_async(db, user_id, coord_data)
     if not coordinator:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -544,7 +603,7 @@ async def delete_user_account(_: AuthUser, user_id: int, db: DBSession):
 
     Requires valid JWT token in Authorization header.
     """
-    success = delete_user(db, user_id)
+    success = await delete_user_async(db, user_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
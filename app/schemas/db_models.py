@@ -1,10 +1,12 @@
 from app.schemas.enums import UserType, RegistrationStatus
+from app.utils.geo import geohash_encode
 from app.utils.time_utils import get_poland_time_now
 
 from sqlalchemy.orm import DeclarativeBase, mapped_column, Mapped
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import object_session, relationship
 import datetime
-from sqlalchemy import Integer, String, Enum, DateTime, Text, ForeignKey, Boolean, Date, Table, Column
+from sqlalchemy import Integer, String, Enum, DateTime, Text, ForeignKey, Boolean, Date, Table, Column, Float
+from sqlalchemy import Index, event
 
 
 class Base(DeclarativeBase):
@@ -12,40 +14,45 @@ class Base(DeclarativeBase):
 
 
 # Many-to-many association tables
+# The primary key serves lookups from the first column, the index on the second one the reverse direction
 user_chat_association = Table(
     "user_chat_association",
     Base.metadata,
-    Column("user_id", Integer, ForeignKey("users.id")),
-    Column("chat_id", Integer, ForeignKey("chat.id")),
+    Column("user_id", Integer, ForeignKey("users.id"), primary_key=True),
+    Column("chat_id", Integer, ForeignKey("chat.id"), primary_key=True, index=True),
 )
 
 user_domain_association = Table(
     "user_domain_association",
     Base.metadata,
-    Column("user_id", Integer, ForeignKey("users.id")),
-    Column("domain_id", Integer, ForeignKey("domain.id")),
+    Column("user_id", Integer, ForeignKey("users.id"), primary_key=True),
+    Column("domain_id", Integer, ForeignKey("domain.id"), primary_key=True, index=True),
 )
 
 volunteer_skill_association = Table(
     "volunteer_skill_association",
     Base.metadata,
-    Column("volunteer_id", Integer, ForeignKey("volunteer.id")),
-    Column("skill_id", Integer, ForeignKey("skill.id")),
+    Column("volunteer_id", Integer, ForeignKey("volunteer.id"), primary_key=True),
+    Column("skill_id", Integer, ForeignKey("skill.id"), primary_key=True, index=True),
 )
 
 
 class User(Base):
     __tablename__ = "users"
+    # Backs the Location.users.any(User.user_type == ...) filters of the map and the locations of a user type
+    __table_args__ = (Index("ix_users_user_type_location_id", "user_type", "location_id"),)
 
     id: Mapped[int] = mapped_column(primary_key=True)
     email: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
     password_hash: Mapped[str] = mapped_column(String(255), nullable=False)
     user_type: Mapped[UserType] = mapped_column(Enum(UserType, name="user_type"), nullable=False)
-    location_id: Mapped[int | None] = mapped_column(ForeignKey("location.id"), nullable=True, default=None)
+    location_id: Mapped[int | None] = mapped_column(ForeignKey("location.id"), index=True, nullable=True, default=None)
     created_at: Mapped[datetime.datetime] = mapped_column(DateTime, default=get_poland_time_now())
     updated_at: Mapped[datetime.datetime] = mapped_column(
         DateTime, default=get_poland_time_now(), onupdate=get_poland_time_now()
     )
+    # Incremented on every update, see bump_profile_version; signed into access tokens as "pv"
+    profile_version: Mapped[int] = mapped_column(Integer, default=1, server_default="1", nullable=False)
 
     location: Mapped["Location"] = relationship("Location", back_populates="users")
     chats: Mapped[list["Chat"]] = relationship("Chat", secondary=user_chat_association, back_populates="users")
@@ -57,11 +64,18 @@ class User(Base):
     coordinator = relationship("Coordinator", uselist=False, back_populates="user", cascade="all, delete-orphan")
 
 
+@event.listens_for(User, "before_update")
+def bump_profile_version(mapper, connection, target: User) -> None:
+    session = object_session(target)
+    if session is None or session.is_modified(target, include_collections=False):
+        target.profile_version = (target.profile_version or 1) + 1
+
+
 class Volunteer(Base):
     __tablename__ = "volunteer"
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"))
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), index=True)
     first_name: Mapped[str] = mapped_column(String(100))
     last_name: Mapped[str] = mapped_column(String(100))
     birth_date: Mapped[datetime.date] = mapped_column(Date)
@@ -79,7 +93,7 @@ class Organisation(Base):
     __tablename__ = "organisation"
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"))
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), index=True)
     org_name: Mapped[str] = mapped_column(String(255))
     contact_person: Mapped[str] = mapped_column(String(100))
     description: Mapped[str] = mapped_column(Text)
@@ -94,7 +108,7 @@ class Coordinator(Base):
     __tablename__ = "coordinator"
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"))
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), index=True)
     school: Mapped[str] = mapped_column(String(500))
     first_name: Mapped[str] = mapped_column(String(100))
     last_name: Mapped[str] = mapped_column(String(100))
@@ -127,17 +141,33 @@ class Domain(Base):
 
 class Location(Base):
     __tablename__ = "location"
+    __table_args__ = (Index("ix_location_latitude_longitude", "latitude", "longitude"),)
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     latitude: Mapped[float]
     longitude: Mapped[float]
+    # Filled from latitude/longitude on every insert and update, see set_location_geohash
+    geohash: Mapped[str | None] = mapped_column(String(12), index=True, nullable=True, default=None)
 
     users: Mapped[list["User"]] = relationship("User", back_populates="location")
     events: Mapped[list["Event"]] = relationship("Event", back_populates="location")
 
 
+@event.listens_for(Location, "before_insert")
+@event.listens_for(Location, "before_update")
+def set_location_geohash(mapper, connection, target: Location) -> None:
+    target.geohash = geohash_encode(target.latitude, target.longitude)
+
+
 class Event(Base):
     __tablename__ = "event"
+    # Back the keyset pagination of /events/upcoming, with and without the organisation filter,
+    # and the upcoming events of the locations around a point for /events/nearby
+    __table_args__ = (
+        Index("ix_event_start_date_id", "start_date", "id"),
+        Index("ix_event_organisation_id_start_date_id", "organisation_id", "start_date", "id"),
+        Index("ix_event_location_id_start_date", "location_id", "start_date"),
+    )
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     description: Mapped[str] = mapped_column(Text)
@@ -161,8 +191,8 @@ class Task(Base):
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     description: Mapped[str] = mapped_column(Text)
     estimation_minutes: Mapped[int] = mapped_column(Integer)
-    organisation_id: Mapped[int | None] = mapped_column(ForeignKey("users.id"))
-    event_id: Mapped[int | None] = mapped_column(ForeignKey("event.id"))
+    organisation_id: Mapped[int | None] = mapped_column(ForeignKey("users.id"), index=True)
+    event_id: Mapped[int | None] = mapped_column(ForeignKey("event.id"), index=True)
 
     event: Mapped[Event | None] = relationship("Event", back_populates="tasks")
     organisation: Mapped["User | None"] = relationship("User", foreign_keys=[organisation_id])
@@ -174,8 +204,8 @@ class Requirement(Base):
     __tablename__ = "requirement"
     id: Mapped[int] = mapped_column(primary_key=True)
     description: Mapped[str] = mapped_column(Text)
-    task_id: Mapped[int] = mapped_column(ForeignKey("task.id"))
-    skill_id: Mapped[int] = mapped_column(ForeignKey("skill.id"))
+    task_id: Mapped[int] = mapped_column(ForeignKey("task.id"), index=True)
+    skill_id: Mapped[int] = mapped_column(ForeignKey("skill.id"), index=True)
 
     task: Mapped["Task"] = relationship("Task", back_populates="requirements")
     skill: Mapped["Skill"] = relationship("Skill", back_populates="requirements")
@@ -192,9 +222,11 @@ class Chat(Base):
 
 class Message(Base):
     __tablename__ = "message"
+    # Backs reading a chat's messages in order
+    __table_args__ = (Index("ix_message_chat_id_sent_at", "chat_id", "sent_at"),)
     id: Mapped[int] = mapped_column(primary_key=True)
     chat_id: Mapped[int] = mapped_column(ForeignKey("chat.id"))
-    sender_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    sender_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
     content: Mapped[str] = mapped_column(Text, nullable=False)
     sent_at: Mapped[datetime.datetime] = mapped_column(DateTime, default=get_poland_time_now())
 
@@ -204,6 +236,12 @@ class Message(Base):
 
 class Registration(Base):
     __tablename__ = "registration"
+    # A user registers for an event at most once; the unique index also serves the registrations of a user,
+    # the second one the registrations of an event, by status
+    __table_args__ = (
+        Index("uq_registration_user_id_event_id", "user_id", "event_id", unique=True),
+        Index("ix_registration_event_id_status", "event_id", "status"),
+    )
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
     event_id: Mapped[int] = mapped_column(ForeignKey("event.id"))
@@ -217,7 +255,7 @@ class Registration(Base):
 class Review(Base):
     __tablename__ = "review"
     id: Mapped[int] = mapped_column(primary_key=True)
-    volunteer_id: Mapped[int] = mapped_column(ForeignKey("volunteer.id"))
+    volunteer_id: Mapped[int] = mapped_column(ForeignKey("volunteer.id"), index=True)
     rating: Mapped[int] = mapped_column(Integer)
     comment: Mapped[str] = mapped_column(Text)
     created_at: Mapped[datetime.datetime] = mapped_column(DateTime, default=get_poland_time_now())
@@ -228,8 +266,8 @@ class Review(Base):
 class Certificate(Base):
     __tablename__ = "certificate"
     id: Mapped[int] = mapped_column(primary_key=True)
-    volunteer_id: Mapped[int] = mapped_column(ForeignKey("volunteer.id"))
-    template_id: Mapped[int] = mapped_column(ForeignKey("certificate_template.id"))
+    volunteer_id: Mapped[int] = mapped_column(ForeignKey("volunteer.id"), index=True)
+    template_id: Mapped[int] = mapped_column(ForeignKey("certificate_template.id"), index=True)
     confirmed: Mapped[bool] = mapped_column(Boolean, default=False)
     issued_at: Mapped[datetime.datetime] = mapped_column(DateTime, default=get_poland_time_now())
 
@@ -248,11 +286,23 @@ class CertificateTemplate(Base):
 
 class TimeLog(Base):
     __tablename__ = "timelog"
+    # Backs a user's time logs in order
+    __table_args__ = (Index("ix_timelog_user_id_logged_at", "user_id", "logged_at"),)
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int | None] = mapped_column(ForeignKey("users.id"))
-    task_id: Mapped[int | None] = mapped_column(ForeignKey("task.id"))
+    task_id: Mapped[int | None] = mapped_column(ForeignKey("task.id"), index=True)
     minutes: Mapped[int] = mapped_column(Integer)
     logged_at: Mapped[datetime.datetime] = mapped_column(DateTime, default=get_poland_time_now())
 
     user: Mapped["User"] = relationship("User", back_populates="time_logs")
     task: Mapped["Task"] = relationship("Task", back_populates="time_logs")
+
+
+class GeocodeCacheEntry(Base):
+    __tablename__ = "geocode_cache"
+    address_key: Mapped[str] = mapped_column(String(512), primary_key=True)
+    latitude: Mapped[float | None] = mapped_column(Float, nullable=True)
+    longitude: Mapped[float | None] = mapped_column(Float, nullable=True)
+    found: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    created_at: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=False)
+    expires_at: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=False)
@@ -0,0 +1,324 @@
+"""Server-side hierarchical grid clustering of locations for the map.
+
+Points are projected to Web Mercator and keyed by the Morton (Z-order) code of
+their position on a fine 2^24 x 2^24 grid. At zoom level z a cluster is a grid
+cell whose edge is ``radius`` pixels of a ``extent``-pixel tile; because every
+cell edge is a power of two, the cells of all zoom levels nest and a cell's
+points form one contiguous run of the sorted keys. Prefix sums over the
+sorted points therefore give the count, centroid and (for single points) id of
+any cluster at any zoom level with two binary searches, which is how the
+clusters of every zoom level are precomputed in O(n) memory.
+
+Changes are absorbed incrementally: added and removed points are aggregated
+into small per-zoom delta tables and merged into the sorted arrays once
+DELTA_LIMIT changes have accumulated.
+"""
+
+import math
+import threading
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+
+from app.services.spatial_index import LocationIndexRegistry
+from app.utils.geo import BoundingBox
+
+GRID_BITS = 24
+GRID_SIZE = 1 << GRID_BITS
+
+DEFAULT_MAX_ZOOM = 16
+DEFAULT_RADIUS = 64  # Cluster cell edge in pixels
+DEFAULT_EXTENT = 256  # Tile size in pixels, as used by Leaflet and OSM raster tiles
+DELTA_LIMIT = 4096  # Pending changes that trigger a merge into the sorted arrays
+
+_MAX_LATITUDE = 85.05112878
+
+
+@dataclass(frozen=True)
+class Cluster:
+    """A cluster of points, or a single point when count is 1."""
+
+    latitude: float
+    longitude: float
+    count: int
+    location_id: int | None = None
+    expansion_zoom: int | None = None
+
+
+def project(latitude: float, longitude: float) -> tuple[float, float]:
+    """Project a point to Web Mercator coordinates in [0, 1] x [0, 1] (y grows southwards)."""
+    sin = math.sin(math.radians(max(-_MAX_LATITUDE, min(_MAX_LATITUDE, latitude))))
+    x = longitude / 360 + 0.5
+    y = 0.5 - math.log((1 + sin) / (1 - sin)) / (4 * math.pi)
+    return min(max(x, 0.0), 1.0), min(max(y, 0.0), 1.0)
+
+
+def unproject(x: float, y: float) -> tuple[float, float]:
+    """Inverse of project, returning (latitude, longitude)."""
+    return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y)))), (x - 0.5) * 360
+
+
+def _spread(value: int) -> int:
+    value = (value | (value << 16)) & 0x0000FFFF0000FFFF
+    value = (value | (value << 8)) & 0x00FF00FF00FF00FF
+    value = (value | (value << 4)) & 0x0F0F0F0F0F0F0F0F
+    value = (value | (value << 2)) & 0x3333333333333333
+    return (value | (value << 1)) & 0x5555555555555555
+
+
+def _compact(value: int) -> int:
+    value &= 0x5555555555555555
+    value = (value | (value >> 1)) & 0x3333333333333333
+    value = (value | (value >> 2)) & 0x0F0F0F0F0F0F0F0F
+    value = (value | (value >> 4)) & 0x00FF00FF00FF00FF
+    value = (value | (value >> 8)) & 0x0000FFFF0000FFFF
+    return (value | (value >> 16)) & 0x00000000FFFFFFFF
+
+
+def morton_key(x: float, y: float) -> int:
+    """Z-order key of a projected point on the 2^24 x 2^24 grid."""
+    return _spread(min(int(x * GRID_SIZE), GRID_SIZE - 1)) | (_spread(min(int(y * GRID_SIZE), GRID_SIZE - 1)) << 1)
+
+
+class LocationClusterIndex:
+    """
+    Clusters of locations for every zoom level from 0 to max_zoom.
+
+    Args:
+        max_zoom: Last zoom level that is clustered; above it single points are returned
+        radius: Cluster cell edge in pixels, extent / radius must be a power of two
+        extent: Tile size in pixels
+        delta_limit: Pending changes that trigger a merge
+    """
+
+    def __init__(
+        self,
+        max_zoom: int = DEFAULT_MAX_ZOOM,
+        radius: int = DEFAULT_RADIUS,
+        extent: int = DEFAULT_EXTENT,
+        delta_limit: int = DELTA_LIMIT,
+    ):
+        ratio = extent // radius
+        if extent % radius or ratio & (ratio - 1):
+            raise ValueError("extent / radius must be a power of two")
+        self.cell_bits = ratio.bit_length() - 1
+        if max_zoom + self.cell_bits > GRID_BITS:
+            raise ValueError(f"max_zoom must be at most {GRID_BITS - self.cell_bits}")
+        self.max_zoom = max_zoom
+        self.delta_limit = delta_limit
+        self._lock = threading.Lock()
+        # Sorted points and their prefix sums
+        self._keys = array("Q")
+        self._ids = array("q")
+        self._xs = array("d")
+        self._ys = array("d")
+        self._sum_x = array("d", [0.0])
+        self._sum_y = array("d", [0.0])
+        self._xor_id = array("q", [0])
+        # Changes since the last merge
+        self._key_by_id: dict[int, int] = {}
+        self._added: dict[int, tuple[float, float]] = {}
+        self._removed: set[int] = set()
+        self._delta: list[dict[int, list]] = [{} for _ in range(max_zoom + 1)]
+
+    def __len__(self) -> int:
+        return len(self._key_by_id)
+
+    @property
+    def pending_changes(self) -> int:
+        return len(self._added) + len(self._removed)
+
+    def _shift(self, zoom: int) -> int:
+        """Bits dropped from a point key to get the key of its cell at a zoom level."""
+        return 2 * (GRID_BITS - zoom - self.cell_bits)
+
+    def load(self, points: Iterable[tuple[int, float, float]]) -> None:
+        """Replace the contents of the index with (location_id, latitude, longitude) points."""
+        rows = []
+        for location_id, latitude, longitude in points:
+            x, y = project(latitude, longitude)
+            rows.append((morton_key(x, y), location_id, x, y))
+        with self._lock:
+            self._build(rows)
+
+    def _build(self, rows: list[tuple[int, int, float, float]]) -> None:
+        rows.sort()
+        self._keys = array("Q", (row[0] for row in rows))
+        self._ids = array("q", (row[1] for row in rows))
+        self._xs = array("d", (row[2] for row in rows))
+        self._ys = array("d", (row[3] for row in rows))
+        sum_x, sum_y, xor_id = array("d", [0.0]), array("d", [0.0]), array("q", [0])
+        acc_x = acc_y = 0.0
+        acc_id = 0
+        for _, location_id, x, y in rows:
+            acc_x += x
+            acc_y += y
+            acc_id ^= location_id
+            sum_x.append(acc_x)
+            sum_y.append(acc_y)
+            xor_id.append(acc_id)
+        self._sum_x, self._sum_y, self._xor_id = sum_x, sum_y, xor_id
+        self._key_by_id = {row[1]: row[0] for row in rows}
+        self._added.clear()
+        self._removed.clear()
+        self._delta = [{} for _ in range(self.max_zoom + 1)]
+
+    def _merge(self) -> None:
+        rows = [
+            (key, location_id, x, y)
+            for key, location_id, x, y in zip(self._keys, self._ids, self._xs, self._ys)
+            if location_id not in self._removed
+        ]
+        rows.extend((morton_key(x, y), location_id, x, y) for location_id, (x, y) in self._added.items())
+        self._build(rows)
+
+    def _apply_delta(self, location_id: int, key: int, x: float, y: float, sign: int) -> None:
+        for zoom, cells in enumerate(self._delta):
+            cell = key >> self._shift(zoom)
+            entry = cells.get(cell)
+            if entry is None:
+                entry = cells[cell] = [0, 0.0, 0.0, 0]
+            entry[0] += sign
+            entry[1] += sign * x
+            entry[2] += sign * y
+            entry[3] ^= location_id
+
+    def _main_position(self, location_id: int, key: int) -> int:
+        position = bisect_left(self._keys, key)
+        while self._ids[position] != location_id:
+            position += 1
+        return position
+
+    def upsert(self, location_id: int, latitude: float, longitude: float) -> None:
+        x, y = project(latitude, longitude)
+        with self._lock:
+            self._remove(location_id)
+            key = morton_key(x, y)
+            self._key_by_id[location_id] = key
+            self._added[location_id] = (x, y)
+            self._apply_delta(location_id, key, x, y, 1)
+            if self.pending_changes > self.delta_limit:
+                self._merge()
+
+    def remove(self, location_id: int) -> None:
+        with self._lock:
+            self._remove(location_id)
+
+    def _remove(self, location_id: int) -> None:
+        key = self._key_by_id.pop(location_id, None)
+        if key is None:
+            return
+        if location_id in self._added:
+            x, y = self._added.pop(location_id)
+        else:
+            position = self._main_position(location_id, key)
+            x, y = self._xs[position], self._ys[position]
+            self._removed.add(location_id)
+        self._apply_delta(location_id, key, x, y, -1)
+
+    def _cells(self, zoom: int, box: BoundingBox) -> tuple[int, int, int, int]:
+        """Range of cell coordinates (x0, y0, x1, y1) covering a bounding box at a zoom level."""
+        min_lat, min_lon, max_lat, max_lon = box
+        x0, y0 = project(max_lat, min_lon)
+        x1, y1 = project(min_lat, max_lon)
+        size = 1 << (zoom + self.cell_bits)
+        return (
+            min(int(x0 * size), size - 1),
+            min(int(y0 * size), size - 1),
+            min(int(x1 * size), size - 1),
+            min(int(y1 * size), size - 1),
+        )
+
+    def _main_ranges(self, zoom: int, box: BoundingBox) -> Iterator[tuple[int, int, int]]:
+        """(cell, lo, hi) runs of the sorted points for the non-empty cells inside the box at a zoom level."""
+        shift = self._shift(zoom)
+        cx0, cy0, cx1, cy1 = self._cells(zoom, box)
+        first = bisect_left(self._keys, (_spread(cx0) | (_spread(cy0) << 1)) << shift)
+        last = bisect_left(self._keys, ((_spread(cx1) | (_spread(cy1) << 1)) + 1) << shift)
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) <= last - first:
+            # Few cells: look each one up
+            for cy in range(cy0, cy1 + 1):
+                for cx in range(cx0, cx1 + 1):
+                    cell = _spread(cx) | (_spread(cy) << 1)
+                    lo = bisect_left(self._keys, cell << shift, first, last)
+                    hi = bisect_left(self._keys, (cell + 1) << shift, lo, last)
+                    if hi > lo:
+                        yield cell, lo, hi
+        else:
+            # Many cells: walk the occupied ones between the corners in Z-order
+            lo = first
+            while lo < last:
+                cell = self._keys[lo] >> shift
+                hi = bisect_left(self._keys, (cell + 1) << shift, lo, last)
+                if cx0 <= _compact(cell) <= cx1 and cy0 <= _compact(cell >> 1) <= cy1:
+                    yield cell, lo, hi
+                lo = hi
+
+    def _occupied_cells(self, zoom: int, box: BoundingBox) -> dict[int, list]:
+        """Aggregates [count, sum_x, sum_y, xor_id] of the non-empty cells inside the box at a zoom level."""
+        cells = {
+            cell: [
+                hi - lo,
+                self._sum_x[hi] - self._sum_x[lo],
+                self._sum_y[hi] - self._sum_y[lo],
+                self._xor_id[hi] ^ self._xor_id[lo],
+            ]
+            for cell, lo, hi in self._main_ranges(zoom, box)
+        }
+        cx0, cy0, cx1, cy1 = self._cells(zoom, box)
+        for cell, (count, sum_x, sum_y, xor_id) in self._delta[zoom].items():
+            if cx0 <= _compact(cell) <= cx1 and cy0 <= _compact(cell >> 1) <= cy1:
+                entry = cells.setdefault(cell, [0, 0.0, 0.0, 0])
+                entry[0] += count
+                entry[1] += sum_x
+                entry[2] += sum_y
+                entry[3] ^= xor_id
+        return cells
+
+    def _point(self, location_id: int) -> tuple[float, float]:
+        if location_id in self._added:
+            return self._added[location_id]
+        position = self._main_position(location_id, self._key_by_id[location_id])
+        return self._xs[position], self._ys[position]
+
+    def get_clusters(self, box: BoundingBox, zoom: int) -> list[Cluster]:
+        """
+        Clusters and single points whose position lies inside a bounding box at a zoom level.
+
+        Args:
+            box: (min_lat, min_lon, max_lat, max_lon)
+            zoom: Map zoom level; above max_zoom every point is returned on its own
+        """
+        min_lat, min_lon, max_lat, max_lon = box
+        results = []
+        with self._lock:
+            if zoom > self.max_zoom:
+                points = [
+                    (self._ids[i], self._xs[i], self._ys[i])
+                    for _, lo, hi in self._main_ranges(self.max_zoom, box)
+                    for i in range(lo, hi)
+                    if self._ids[i] not in self._removed
+                ]
+                points.extend((location_id, x, y) for location_id, (x, y) in self._added.items())
+                for location_id, x, y in points:
+                    latitude, longitude = unproject(x, y)
+                    if min_lat <= latitude <= max_lat and min_lon <= longitude <= max_lon:
+                        results.append(Cluster(latitude, longitude, 1, location_id=location_id))
+                return results
+
+            for count, sum_x, sum_y, xor_id in self._occupied_cells(zoom, box).values():
+                if count == 0:
+                    continue
+                if count == 1:
+                    latitude, longitude = unproject(*self._point(xor_id))
+                    cluster = Cluster(latitude, longitude, 1, location_id=xor_id)
+                else:
+                    latitude, longitude = unproject(sum_x / count, sum_y / count)
+                    cluster = Cluster(latitude, longitude, count, expansion_zoom=min(zoom + 1, self.max_zoom + 1))
+                if min_lat <= cluster.latitude <= max_lat and min_lon <= cluster.longitude <= max_lon:
+                    results.append(cluster)
+        return results
+
+
+cluster_index = LocationIndexRegistry(LocationClusterIndex)
@@ -0,0 +1,205 @@
+"""Batch geocoding pipeline for bulk imports."""
+
+import logging
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Iterable
+
+from geopy.exc import GeocoderRateLimited, GeocoderTimedOut, GeocoderUnavailable
+from sqlalchemy.orm import Session
+
+from app.config import GEOCODER_MAX_RETRIES, GEOCODER_REQUESTS_PER_SECOND
+from app.services.geocode_cache import (
+    NOT_FOUND,
+    Coordinates,
+    GeocodeCache,
+    GeocodeFn,
+    geocode_cache,
+)
+from app.utils.address import address_key
+from app.utils.cache import MISSING
+
+logger = logging.getLogger(__name__)
+
+# Errors worth retrying; anything else (bad query, auth) fails the address immediately
+RETRYABLE_ERRORS = (GeocoderTimedOut, GeocoderUnavailable, GeocoderRateLimited)
+
+
+class RateLimiter:
+    """
+    Thread-safe limiter that spaces calls evenly at a fixed rate.
+
+    Every caller reserves the next free time slot and sleeps until it arrives,
+    so concurrent workers together never exceed ``rate`` calls per second.
+
+    Args:
+        rate: Allowed calls per second
+        clock: Monotonic time source (injectable for tests)
+        sleep: Sleep function (injectable for tests)
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.interval = 1.0 / rate
+        self._clock = clock
+        self._sleep = sleep
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until the caller may issue its next request."""
+        with self._lock:
+            now = self._clock()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            self._sleep(slot - now)
+
+
+@dataclass
+class BatchGeocodeStats:
+    """Summary of one batch geocoding run."""
+
+    addresses: int = 0
+    unique_addresses: int = 0
+    cache_hits: int = 0
+    geocoded: int = 0
+    not_found: int = 0
+    failed: int = 0
+    retries: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Input addresses resolved per second."""
+        return self.addresses / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "addresses": self.addresses,
+            "unique_addresses": self.unique_addresses,
+            "cache_hits": self.cache_hits,
+            "geocoded": self.geocoded,
+            "not_found": self.not_found,
+            "failed": self.failed,
+            "retries": self.retries,
+            "elapsed": round(self.elapsed, 3),
+            "addresses_per_second": round(self.throughput, 2),
+        }
+
+
+class BatchGeocoder:
+    """
+    Geocode many addresses at once through one shared, rate-limited geocoder.
+
+    Addresses are deduplicated by their cache key and looked up in the geocode
+    cache first. The remaining ones are geocoded concurrently by a thread pool
+    whose calls share a single request-per-second budget, and all results are
+    written back to the cache in one transaction.
+
+    Args:
+        geocoder: Callable returning (latitude, longitude) or None for an address
+        requests_per_second: Budget shared by all workers
+        max_workers: Concurrent lookups; defaults to the per-second budget
+        max_retries: Retries per address on timeouts, unavailability or rate limiting
+        backoff: Base delay in seconds of the exponential backoff between retries
+        cache: Geocode cache consulted before and updated after geocoding
+    """
+
+    def __init__(
+        self,
+        geocoder: GeocodeFn,
+        requests_per_second: float = GEOCODER_REQUESTS_PER_SECOND,
+        max_workers: int | None = None,
+        max_retries: int = GEOCODER_MAX_RETRIES,
+        backoff: float = 0.5,
+        cache: GeocodeCache = geocode_cache,
+    ):
+        self.geocoder = geocoder
+        self.limiter = RateLimiter(requests_per_second)
+        self.max_workers = max_workers or max(1, math.ceil(requests_per_second))
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.cache = cache
+        self._stats_lock = threading.Lock()
+
+    def _geocode_with_retry(self, address: str, stats: BatchGeocodeStats) -> Coordinates | None:
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            try:
+                return self.geocoder(address)
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+                with self._stats_lock:
+                    stats.retries += 1
+                delay = self.backoff * 2**attempt
+                retry_after = getattr(e, "retry_after", None)
+                time.sleep(max(delay, retry_after or 0))
+        return None
+
+    def geocode_all(
+        self, session: Session, addresses: Iterable[str]
+    ) -> tuple[dict[str, Coordinates | None], BatchGeocodeStats]:
+        """
+        Resolve every address, geocoding each distinct one at most once.
+
+        Args:
+            session: SQLAlchemy Session used for the geocode cache
+            addresses: Addresses to resolve (duplicates allowed)
+
+        Returns:
+            Tuple of (mapping of every input address to coordinates or None, run statistics)
+        """
+        start = time.perf_counter()
+        addresses = list(addresses)
+        stats = BatchGeocodeStats(addresses=len(addresses))
+
+        by_key: dict[str, str] = {}
+        for address in addresses:
+            by_key.setdefault(address_key(address), address)
+        stats.unique_addresses = len(by_key)
+
+        resolved: dict[str, Coordinates | None] = {}
+        pending: dict[str, str] = {}
+        for key, address in by_key.items():
+            cached = self.cache.lookup(session, address)
+            if cached is MISSING:
+                pending[key] = address
+                continue
+            stats.cache_hits += 1
+            resolved[key] = None if cached is NOT_FOUND else cached
+
+        if pending:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="geocoder") as executor:
+                futures = {
+                    key: executor.submit(self._geocode_with_retry, address, stats) for key, address in pending.items()
+                }
+            fresh: dict[str, Coordinates | None] = {}
+            for key, future in futures.items():
+                try:
+                    coordinates = future.result()
+                except Exception as e:
+                    stats.failed += 1
+                    logger.warning(f"Geocoding failed for '{pending[key]}': {e}")
+                    resolved[key] = None
+                    continue
+                stats.geocoded += 1
+                fresh[pending[key]] = coordinates
+                resolved[key] = coordinates
+            self.cache.stats.geocoder_calls += len(pending)
+            self.cache.store_many(session, fresh)
+
+        stats.not_found = sum(1 for coordinates in resolved.values() if coordinates is None) - stats.failed
+        stats.elapsed = time.perf_counter() - start
+        logger.info(f"Batch geocoding finished: {stats.as_dict()}")
+        return {address: resolved[address_key(address)] for address in addresses}, stats
@@ -0,0 +1,201 @@
+"""Persistent geocoding cache with an in-process LRU in front of the database table."""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import GEOCODE_CACHE_SIZE, GEOCODE_CACHE_TTL_DAYS, GEOCODE_CACHE_NEGATIVE_TTL_HOURS
+from app.schemas.db_models import GeocodeCacheEntry
+from app.utils.address import address_key
+from app.utils.cache import MISSING, TTLCache
+
+logger = logging.getLogger(__name__)
+
+Coordinates = tuple[float, float]
+GeocodeFn = Callable[[str], Coordinates | None]
+
+# Marker stored in the in-process LRU for addresses the geocoder could not resolve
+NOT_FOUND = object()
+
+
+@dataclass
+class GeocodeCacheStats:
+    """Hit/miss counters of the geocode cache."""
+
+    memory_hits: int = 0
+    db_hits: int = 0
+    negative_hits: int = 0
+    misses: int = 0
+    geocoder_calls: int = 0
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.db_hits
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "geocoder_calls": self.geocoder_calls,
+            "hit_ratio": round(self.hit_ratio, 4),
+        }
+
+
+class GeocodeCache:
+    """
+    Two-level cache of geocoding results.
+
+    Entries are keyed by the normalized address (see ``app.utils.address``), so
+    differently written forms of one address share an entry. Lookups are answered
+    from an in-process LRU first and from the ``geocode_cache`` table second, so
+    results survive restarts and are shared between workers.
+    Addresses the geocoder could not resolve are stored as negative entries with
+    a shorter TTL so that they are retried eventually.
+
+    Args:
+        maxsize: Number of entries kept in the in-process LRU
+        ttl: Lifetime of a resolved address
+        negative_ttl: Lifetime of an "address not found" entry
+    """
+
+    def __init__(self, maxsize: int, ttl: timedelta, negative_ttl: timedelta):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._memory: TTLCache[str, object] = TTLCache(maxsize=maxsize)
+        self.stats = GeocodeCacheStats()
+
+    def lookup(self, session: Session, address: str):
+        """
+        Look an address up without calling the geocoder.
+
+        Returns:
+            Coordinates, NOT_FOUND for a cached negative result, or MISSING if the address is unknown
+        """
+        key = address_key(address)
+        cached = self._memory.get(key, MISSING)
+        if cached is not MISSING:
+            self.stats.memory_hits += 1
+            if cached is NOT_FOUND:
+                self.stats.negative_hits += 1
+            return cached
+
+        entry = session.get(GeocodeCacheEntry, key)
+        now = datetime.now()
+        if entry is None or entry.expires_at <= now:
+            self.stats.misses += 1
+            return MISSING
+
+        self.stats.db_hits += 1
+        remaining = (entry.expires_at - now).total_seconds()
+        if not entry.found:
+            self.stats.negative_hits += 1
+            self._memory.set(key, NOT_FOUND, ttl=remaining)
+            return NOT_FOUND
+        coordinates = (entry.latitude, entry.longitude)
+        self._memory.set(key, coordinates, ttl=remaining)
+        return coordinates
+
+    def store(self, session: Session, address: str, coordinates: Coordinates | None) -> None:
+        """
+        Persist a geocoding result; None records the address as not found.
+
+        Args:
+            session: SQLAlchemy Session
+            address: Address that was geocoded
+            coordinates: (latitude, longitude) or None
+        """
+        self.store_many(session, {address: coordinates})
+
+    def store_many(self, session: Session, results: dict[str, Coordinates | None]) -> None:
+        """
+        Persist several geocoding results in a single transaction.
+
+        Args:
+            session: SQLAlchemy Session
+            results: Mapping of address to (latitude, longitude) or None
+        """
+        now = datetime.now()
+        try:
+            for address, coordinates in results.items():
+                key = address_key(address)
+                ttl = self.ttl if coordinates is not None else self.negative_ttl
+                session.merge(
+                    GeocodeCacheEntry(
+                        address_key=key,
+                        latitude=coordinates[0] if coordinates else None,
+                        longitude=coordinates[1] if coordinates else None,
+                        found=coordinates is not None,
+                        created_at=now,
+                        expires_at=now + ttl,
+                    )
+                )
+                self._memory.set(key, coordinates if coordinates is not None else NOT_FOUND, ttl=ttl.total_seconds())
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.warning(f"Failed to persist {len(results)} geocode cache entries: {e}")
+
+    def get_or_geocode(self, session: Session, address: str, geocoder: GeocodeFn) -> Coordinates | None:
+        """
+        Return cached coordinates for an address, calling the geocoder only on a cache miss.
+
+        Returns:
+            (latitude, longitude) or None if the address cannot be resolved
+        """
+        cached = self.lookup(session, address)
+        if cached is NOT_FOUND:
+            return None
+        if cached is not MISSING:
+            return cached
+
+        self.stats.geocoder_calls += 1
+        coordinates = geocoder(address)
+        self.store(session, address, coordinates)
+        return coordinates
+
+    async def get_or_geocode_async(
+        self, session: AsyncSession, address: str, geocoder: GeocodeFn
+    ) -> Coordinates | None:
+        """
+        Async version of get_or_geocode.
+
+        The cache is read and written through the session, while the geocoder,
+        a blocking HTTP request for Nominatim, runs in a worker thread so that
+        the event loop keeps serving other requests meanwhile.
+        """
+        cached = await session.run_sync(self.lookup, address)
+        if cached is NOT_FOUND:
+            return None
+        if cached is not MISSING:
+            return cached
+
+        self.stats.geocoder_calls += 1
+        coordinates = await asyncio.to_thread(geocoder, address)
+        await session.run_sync(self.store, address, coordinates)
+        return coordinates
+
+    def clear_memory(self) -> None:
+        """Drop the in-process LRU; persisted entries are kept."""
+        self._memory.clear()
+
+    def reset_stats(self) -> None:
+        self.stats = GeocodeCacheStats()
+
+
+geocode_cache = GeocodeCache(
+    maxsize=GEOCODE_CACHE_SIZE,
+    ttl=timedelta(days=GEOCODE_CACHE_TTL_DAYS),
+    negative_ttl=timedelta(hours=GEOCODE_CACHE_NEGATIVE_TTL_HOURS),
+)
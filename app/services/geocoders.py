@@ -0,0 +1,264 @@
+"""Pluggable geocoder implementations.
+
+Every geocoder is a callable taking an address and returning ``(latitude, longitude)``
+or None, so instances can be passed anywhere a plain geocoding function is accepted
+(``add_address``, ``BatchGeocoder``, the geocode cache).
+"""
+
+import csv
+import logging
+import threading
+import xml.etree.ElementTree as ET
+from abc import ABC, abstractmethod
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from app.config import GAZETTEER_PATH, GEOCODER_BACKEND, GeocoderBackend
+from app.utils.address import format_address, normalize_address
+
+if TYPE_CHECKING:
+    from geopy.geocoders import Nominatim
+
+logger = logging.getLogger(__name__)
+
+Coordinates = tuple[float, float]
+
+GAZETTEER_FIELDS = ["street", "house_number", "postal_code", "city", "latitude", "longitude"]
+
+
+class Geocoder(ABC):
+    """Base class of all geocoders."""
+
+    @abstractmethod
+    def geocode(self, address: str) -> Coordinates | None:
+        """
+        Resolve an address.
+
+        Returns:
+            (latitude, longitude) or None if the address is unknown
+        """
+
+    def __call__(self, address: str) -> Coordinates | None:
+        return self.geocode(address)
+
+
+class NominatimGeocoder(Geocoder):
+    """Online geocoder backed by the public Nominatim service, sharing one client."""
+
+    def __init__(self, user_agent: str = "osm_address_locator"):
+        self.user_agent = user_agent
+        self._client: "Nominatim | None" = None
+
+    def geocode(self, address: str) -> Coordinates | None:
+        if self._client is None:
+            # geopy and requests are only imported once an address is looked up online
+            from geopy.geocoders import Nominatim
+
+            self._client = Nominatim(user_agent=self.user_agent)
+        location = self._client.geocode(address)
+        if location:
+            return (location.latitude, location.longitude)
+        return None
+
+
+class GazetteerGeocoder(Geocoder):
+    """
+    Offline geocoder answering lookups from a local address gazetteer.
+
+    Address points are normalized with ``app.utils.address``; their coordinates are
+    packed into two ``array('d')`` columns addressed through string-keyed dict
+    indexes, so a lookup is one normalization plus a few dict probes.
+
+    Streets are indexed under their full name on (city, street, house number).
+    An address written with the shortened name ("Wrony 115" for "Mieczysława
+    Wrony 115") is found through a separate alias index, and through an index on
+    (postal code, street or alias, house number) when the city is missing or
+    spelled differently. An alias shared by several streets ("Kleparz" for
+    "Stary Kleparz" and "Nowy Kleparz") resolves to none of them.
+
+    Example:
+        >>> gazetteer = GazetteerGeocoder()
+        >>> gazetteer.add("Mieczysława Wrony", "115", "30-399", "Kraków", 50.0165, 19.8879)
+        >>> gazetteer.geocode("ul. Mieczysława Wrony 115, Kraków")
+        (50.0165, 19.8879)
+    """
+
+    def __init__(self):
+        self._latitudes = array("d")
+        self._longitudes = array("d")
+        self._by_street: dict[str, int] = {}
+        # Fallback indexes: key -> key in _by_street, or "" when it names several streets
+        self._by_alias: dict[str, str] = {}
+        self._by_postal_code: dict[str, str] = {}
+
+    @staticmethod
+    def _add_fallback(index: dict[str, str], key: str, street_key: str) -> None:
+        index[key] = street_key if index.get(key, street_key) == street_key else ""
+
+    def add(
+        self,
+        street: str,
+        house_number: str,
+        postal_code: str | None,
+        city: str | None,
+        latitude: float,
+        longitude: float,
+    ) -> None:
+        """Add one address point to the gazetteer."""
+        normalized = normalize_address(format_address(street, house_number, city or "", postal_code=postal_code))
+        idx = len(self._latitudes)
+        self._latitudes.append(latitude)
+        self._longitudes.append(longitude)
+        street_key = f"{normalized.city}|{normalized.street_key}|{normalized.house_number}"
+        self._by_street[street_key] = idx
+        if normalized.street_alias != normalized.street_key:
+            alias = f"{normalized.city}|{normalized.street_alias}|{normalized.house_number}"
+            self._add_fallback(self._by_alias, alias, street_key)
+        if normalized.postal_code:
+            for name in {normalized.street_key, normalized.street_alias}:
+                key = f"{normalized.postal_code}|{name}|{normalized.house_number}"
+                self._add_fallback(self._by_postal_code, key, street_key)
+
+    def geocode(self, address: str) -> Coordinates | None:
+        normalized = normalize_address(address)
+        if not normalized.house_number:
+            return None
+        street_key = f"{normalized.city}|{normalized.street_key}|{normalized.house_number}"
+        if street_key not in self._by_street:
+            # The address may name the street by its alias, or come without the gazetteer's city
+            street_key = self._by_alias.get(street_key)
+            if not street_key and normalized.postal_code:
+                street_key = self._by_postal_code.get(
+                    f"{normalized.postal_code}|{normalized.street_key}|{normalized.house_number}"
+                )
+            if not street_key:
+                return None
+        idx = self._by_street[street_key]
+        return (self._latitudes[idx], self._longitudes[idx])
+
+    def __len__(self) -> int:
+        return len(self._latitudes)
+
+    @classmethod
+    def from_csv(cls, path: str | Path) -> "GazetteerGeocoder":
+        """
+        Load a gazetteer CSV with the columns street, house_number, postal_code, city, latitude, longitude.
+        """
+        gazetteer = cls()
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                gazetteer.add(
+                    row["street"],
+                    row["house_number"],
+                    row.get("postal_code") or None,
+                    row.get("city") or None,
+                    float(row["latitude"]),
+                    float(row["longitude"]),
+                )
+        logger.info(f"Loaded {len(gazetteer)} gazetteer entries from {path}")
+        return gazetteer
+
+    @classmethod
+    def from_osm_xml(cls, path: str | Path) -> "GazetteerGeocoder":
+        """
+        Load address points from an OSM XML extract.
+
+        Only nodes carrying ``addr:housenumber`` and ``addr:street`` (or ``addr:place``)
+        are used; in Poland addresses are mapped almost entirely as such address points.
+        """
+        gazetteer = cls()
+        for _, element in ET.iterparse(path, events=("end",)):
+            if element.tag != "node":
+                if element.tag in ("way", "relation"):
+                    element.clear()
+                continue
+            tags = {tag.get("k"): tag.get("v") for tag in element.iter("tag")}
+            street = tags.get("addr:street") or tags.get("addr:place")
+            house_number = tags.get("addr:housenumber")
+            if street and house_number:
+                gazetteer.add(
+                    street,
+                    house_number,
+                    tags.get("addr:postcode"),
+                    tags.get("addr:city"),
+                    float(element.get("lat")),
+                    float(element.get("lon")),
+                )
+            element.clear()
+        logger.info(f"Loaded {len(gazetteer)} gazetteer entries from {path}")
+        return gazetteer
+
+
+@dataclass
+class FallbackStats:
+    """How often the primary geocoder answered and how often the fallback was needed."""
+
+    primary_hits: int = 0
+    fallback_calls: int = 0
+    fallback_hits: int = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "primary_hits": self.primary_hits,
+            "fallback_calls": self.fallback_calls,
+            "fallback_hits": self.fallback_hits,
+        }
+
+
+class FallbackGeocoder(Geocoder):
+    """
+    Ask the primary geocoder first and fall back to another one on a miss.
+
+    Args:
+        primary: Geocoder tried first (e.g. the offline gazetteer)
+        fallback: Geocoder used when the primary does not know the address (e.g. Nominatim)
+    """
+
+    def __init__(self, primary: Geocoder, fallback: Geocoder):
+        self.primary = primary
+        self.fallback = fallback
+        self.stats = FallbackStats()
+        self._lock = threading.Lock()
+
+    def geocode(self, address: str) -> Coordinates | None:
+        coordinates = self.primary.geocode(address)
+        if coordinates is not None:
+            with self._lock:
+                self.stats.primary_hits += 1
+            return coordinates
+        with self._lock:
+            self.stats.fallback_calls += 1
+        coordinates = self.fallback.geocode(address)
+        if coordinates is not None:
+            with self._lock:
+                self.stats.fallback_hits += 1
+        return coordinates
+
+
+_default_geocoder: Geocoder | None = None
+_default_geocoder_lock = threading.Lock()
+
+
+def get_default_geocoder() -> Geocoder:
+    """
+    Return the geocoder selected by GEOCODER_BACKEND, creating it on first use.
+
+    With the gazetteer backend the file at GAZETTEER_PATH is loaded once and
+    Nominatim is kept as the fallback for addresses it does not contain.
+    """
+    global _default_geocoder
+    with _default_geocoder_lock:
+        if _default_geocoder is None:
+            if GEOCODER_BACKEND == GeocoderBackend.GAZETTEER:
+                if not GAZETTEER_PATH:
+                    raise ValueError("GAZETTEER_PATH must be set when GEOCODER_BACKEND is 'gazetteer'")
+                if GAZETTEER_PATH.endswith(".osm"):
+                    gazetteer = GazetteerGeocoder.from_osm_xml(GAZETTEER_PATH)
+                else:
+                    gazetteer = GazetteerGeocoder.from_csv(GAZETTEER_PATH)
+                _default_geocoder = FallbackGeocoder(gazetteer, NominatimGeocoder())
+            else:
+                _default_geocoder = NominatimGeocoder()
+        return _default_geocoder
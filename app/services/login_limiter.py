@@ -0,0 +1,215 @@
+"""Sliding-window throttling of login attempts per email and per client address.
+
+Each failed login costs a bcrypt check, so credential stuffing or guessing the
+password of one account can keep every hasher worker busy. ``/users/login``
+therefore asks the ``LoginLimiter`` first, before the user is looked up or the
+password checked, and answers attempts beyond the limit with 429.
+
+Attempts are counted in fixed windows, and the sliding window is estimated from
+the current and the previous window: the previous count is weighted by how much
+of it still overlaps the sliding window. That needs two counters per key
+instead of a timestamp per attempt. Counters live in bounded in-process LRUs
+and expire after two windows; counters that reached their limit are kept apart
+from the others, so that spraying attempts over many emails cannot evict them.
+With ``LOGIN_RATE_LIMIT_REDIS_URL`` set they are kept in a Redis-compatible
+store shared by the workers instead. Refused attempts are not counted, so a
+client retrying at the limit keeps getting through at the allowed rate.
+"""
+
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from app.config import (
+    LOGIN_RATE_LIMIT_PER_EMAIL,
+    LOGIN_RATE_LIMIT_PER_IP,
+    LOGIN_RATE_LIMIT_REDIS_URL,
+    LOGIN_RATE_LIMIT_WINDOW_SECONDS,
+    LOGIN_RATE_LIMITER_SIZE,
+)
+from app.utils.cache import TTLCache
+from app.utils.redis_client import connect_redis
+
+
+@dataclass
+class LoginLimiterStats:
+    """Counters of allowed and refused login attempts."""
+
+    allowed: int = 0
+    rejected: int = 0
+
+    def as_dict(self) -> dict:
+        return {"allowed": self.allowed, "rejected": self.rejected}
+
+
+class _LocalCounters:
+    """
+    Attempt counts per (key, window) in bounded in-process LRUs.
+
+    Counters that reached their limit move to a second LRU of their own, so attempts
+    sprayed over many new emails or addresses only evict counters still below their
+    limit and cannot reset the window of a throttled key.
+    """
+
+    def __init__(self, maxsize: int, window_seconds: float):
+        self._counts: TTLCache[tuple[str, int], int] = TTLCache(maxsize=maxsize, ttl=2 * window_seconds)
+        self._limited: TTLCache[tuple[str, int], int] = TTLCache(maxsize=maxsize, ttl=2 * window_seconds)
+
+    def add(self, keys: list[tuple[str, int]], window: int) -> list[tuple[int, int]]:
+        counts = []
+        for key, limit in keys:
+            current = self._get((key, window))
+            counts.append((self._get((key, window - 1)), current))
+            self._set((key, window), current + 1, limit)
+        return counts
+
+    def remove(self, keys: list[tuple[str, int]], window: int) -> None:
+        for key, limit in keys:
+            self._set((key, window), self._get((key, window)) - 1, limit)
+
+    def _get(self, name: tuple[str, int]) -> int:
+        return self._limited.get(name) or self._counts.get(name, 0)
+
+    def _set(self, name: tuple[str, int], count: int, limit: int) -> None:
+        if count >= limit:
+            self._counts.pop(name)
+            self._limited.set(name, count)
+        else:
+            self._limited.pop(name)
+            self._counts.set(name, count)
+
+    def __len__(self) -> int:
+        return len(self._counts) + len(self._limited)
+
+
+class _RedisCounters:
+    """
+    Attempt counts per (key, window) as expiring Redis integers shared by the workers.
+
+    Each attempt increments its counters with ``INCR`` and ``EXPIRE`` in one
+    transaction, so concurrent workers see distinct counts and at most the limit
+    gets through; refused attempts are taken back with ``DECR``.
+    """
+
+    def __init__(self, client: Any, window_seconds: float):
+        self._client = client
+        self._ttl = math.ceil(2 * window_seconds)
+
+    def add(self, keys: list[tuple[str, int]], window: int) -> list[tuple[int, int]]:
+        pipeline = self._client.pipeline()
+        for key, _ in keys:
+            name = f"login:{key}:{window}"
+            pipeline.get(f"login:{key}:{window - 1}")
+            pipeline.incr(name)
+            pipeline.expire(name, self._ttl)
+        results = pipeline.execute()
+        return [(int(results[i] or 0), int(results[i + 1]) - 1) for i in range(0, len(results), 3)]
+
+    def remove(self, keys: list[tuple[str, int]], window: int) -> None:
+        pipeline = self._client.pipeline()
+        for key, _ in keys:
+            pipeline.decr(f"login:{key}:{window}")
+        pipeline.execute()
+
+    def __len__(self) -> int:
+        return 0
+
+
+class LoginLimiter:
+    """
+    Sliding-window limits on login attempts per email and per client address.
+
+    Args:
+        per_email: Attempts allowed per email within the window, 0 for no limit
+        per_ip: Attempts allowed per client address within the window, 0 for no limit
+        window_seconds: Length of the sliding window
+        maxsize: Counters kept in memory below and at their limit each, before the least recently used are evicted
+        redis_client: Redis client shared by the workers, or None to count in-process
+        clock: Time source (injectable for tests)
+
+    Example:
+        >>> limiter = LoginLimiter(per_email=5, per_ip=20, window_seconds=60)
+        >>> limiter.attempt("jan@example.com", "203.0.113.7")  # None, or seconds to wait
+    """
+
+    def __init__(
+        self,
+        per_email: int = LOGIN_RATE_LIMIT_PER_EMAIL,
+        per_ip: int = LOGIN_RATE_LIMIT_PER_IP,
+        window_seconds: float = LOGIN_RATE_LIMIT_WINDOW_SECONDS,
+        maxsize: int = LOGIN_RATE_LIMITER_SIZE,
+        redis_client: Any = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        if window_seconds <= 0:
+            raise ValueError("window_seconds must be positive")
+        self.window_seconds = window_seconds
+        self._limits = {"email": per_email, "ip": per_ip}
+        self._counters = (
+            _LocalCounters(maxsize, window_seconds)
+            if redis_client is None
+            else _RedisCounters(redis_client, window_seconds)
+        )
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.stats = LoginLimiterStats()
+
+    @property
+    def tracked(self) -> int:
+        """Counters currently held in memory."""
+        return len(self._counters)
+
+    def attempt(self, email: str, ip: str | None) -> int | None:
+        """
+        Record a login attempt unless it is over a limit.
+
+        Args:
+            email: Email the attempt logs in with
+            ip: Address of the client, or None if unknown
+
+        Returns:
+            None if the attempt may proceed, otherwise the seconds to wait before retrying
+        """
+        now = self._clock()
+        window, elapsed = divmod(now, self.window_seconds)
+        window = int(window)
+        keys = [(f"email:{email.lower()}", self._limits["email"])]
+        if ip is not None:
+            keys.append((f"ip:{ip}", self._limits["ip"]))
+        keys = [(key, limit) for key, limit in keys if limit > 0]
+
+        with self._lock:
+            # Count first and take the attempt back if it is refused, so that checking and
+            # counting are one atomic step in the shared store
+            counts = self._counters.add(keys, window)
+            waits = [self._wait(*count, limit, elapsed) for count, (_, limit) in zip(counts, keys)]
+            waits = [wait for wait in waits if wait is not None]
+            if waits:
+                self._counters.remove(keys, window)
+                self.stats.rejected += 1
+                return max(1, math.ceil(max(waits)))
+            self.stats.allowed += 1
+            return None
+
+    def _wait(self, previous: int, current: int, limit: int, elapsed: float) -> float | None:
+        """Seconds until one more attempt fits into the sliding window, None if it fits now."""
+        window = self.window_seconds
+        if previous * (1 - elapsed / window) + current < limit:
+            return None
+        if current < limit:
+            # Later in this window, once enough of the previous window has slid out
+            return window * (1 - (limit - current) / previous) - elapsed
+        # In the next window, once enough of this one has slid out
+        return window - elapsed + window * (1 - limit / current)
+
+
+login_limiter = LoginLimiter(
+    redis_client=connect_redis(LOGIN_RATE_LIMIT_REDIS_URL) if LOGIN_RATE_LIMIT_REDIS_URL else None
+)
+
+
+def get_login_limiter() -> LoginLimiter:
+    """FastAPI dependency returning the application's login limiter."""
+    return login_limiter
@@ -0,0 +1,262 @@
+"""Background regeneration of the map page.
+
+The page at ``app/templates/osm_map.html`` bakes in the upcoming events, so it
+goes stale whenever locations or events change. Rather than rendering it in
+a web worker, commits that touch ``Location`` or ``Event`` rows notify every
+started ``MapBuilder`` of the same engine. The builder's thread waits until
+changes stop arriving for ``debounce`` seconds (but never longer than
+``max_delay`` after the first one), so a burst of inserts causes one rebuild.
+The page is written atomically and served with an ETag derived from its content.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import chain
+from pathlib import Path
+
+from sqlalchemy import Engine, event
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.config import MAP_EVENT_MARKERS, MAP_REBUILD_DEBOUNCE_SECONDS, MAP_REBUILD_MAX_DELAY_SECONDS
+from app.crud.event import get_upcoming_events
+from app.db_handler.db_util import canonical_engine
+from app.schemas.db_models import Event, Location
+from app.services.map_page import MAP_PATH
+
+logger = logging.getLogger(__name__)
+
+# Key in Session.info marking that flushed changes affect the map
+_MAP_CHANGED = "map_changed"
+
+
+@dataclass
+class MapBuildStats:
+    """Counters and timings of map rebuilds."""
+
+    triggers: int = 0
+    rebuilds: int = 0
+    failures: int = 0
+    last_duration_ms: float = 0.0
+    max_duration_ms: float = 0.0
+    total_duration_ms: float = 0.0
+    last_built_at: datetime | None = None
+
+    def as_dict(self) -> dict:
+        return {
+            "triggers": self.triggers,
+            "rebuilds": self.rebuilds,
+            "failures": self.failures,
+            "last_duration_ms": round(self.last_duration_ms, 1),
+            "max_duration_ms": round(self.max_duration_ms, 1),
+            "avg_duration_ms": round(self.total_duration_ms / self.rebuilds, 1) if self.rebuilds else 0.0,
+            "last_built_at": self.last_built_at.isoformat() if self.last_built_at else None,
+        }
+
+
+@dataclass(frozen=True)
+class MapPage:
+    """Content of the generated page and its ETag."""
+
+    content: bytes
+    etag: str
+
+
+class MapBuilder:
+    """
+    Debounced background rebuilds of the map page.
+
+    Args:
+        path: Where the page is written
+        debounce: Seconds without further changes before a rebuild starts
+        max_delay: Upper bound in seconds between the first pending change and the rebuild
+        event_limit: Maximum number of upcoming events baked into the page
+
+    Example:
+        >>> builder = MapBuilder()
+        >>> builder.start(database.session_factory)  # on application startup
+        >>> builder.page().etag  # from a request handler
+        >>> builder.stop()  # on shutdown
+    """
+
+    def __init__(
+        self,
+        path: str | Path = MAP_PATH,
+        debounce: float = MAP_REBUILD_DEBOUNCE_SECONDS,
+        max_delay: float = MAP_REBUILD_MAX_DELAY_SECONDS,
+        event_limit: int = MAP_EVENT_MARKERS,
+    ):
+        if debounce < 0 or max_delay < debounce:
+            raise ValueError("debounce must be non-negative and not greater than max_delay")
+        self.path = Path(path)
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.event_limit = event_limit
+        self.stats = MapBuildStats()
+        self._session_factory: sessionmaker | None = None
+        self._thread: threading.Thread | None = None
+        self._condition = threading.Condition()
+        self._build_lock = threading.Lock()
+        self._first_change: float | None = None
+        self._last_change: float | None = None
+        self._stopping = False
+        self._page: tuple[tuple[int, int, int], MapPage] | None = None
+        _builders.add(self)
+
+    @property
+    def engine(self) -> Engine | None:
+        """Engine whose commits trigger rebuilds, once started."""
+        return self._session_factory.kw.get("bind") if self._session_factory else None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, session_factory: sessionmaker) -> None:
+        """Start the rebuild thread and schedule an initial rebuild."""
+        if self.running:
+            return
+        self._session_factory = session_factory
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="map-builder", daemon=True)
+        self._thread.start()
+        self.schedule()
+
+    def stop(self, timeout: float | None = 10.0) -> None:
+        """Stop the rebuild thread, waiting for a rebuild in progress. Pending changes are dropped."""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def schedule(self) -> None:
+        """Request a rebuild; calls within the debounce window are coalesced into one."""
+        now = time.monotonic()
+        with self._condition:
+            self.stats.triggers += 1
+            if self._first_change is None:
+                self._first_change = now
+            self._last_change = now
+            self._condition.notify()
+
+    def rebuild(self, session: Session | None = None) -> float:
+        """
+        Render the page now, in the calling thread.
+
+        Args:
+            session: Session to read the events with; a new one from the session
+                factory given to ``start`` is used by default
+
+        Returns:
+            Duration of the rebuild in seconds
+
+        Raises:
+            RuntimeError: If no session is given and the builder was never started
+        """
+        if session is None and self._session_factory is None:
+            raise RuntimeError("MapBuilder.start() must be called before rebuilding without a session")
+        with self._build_lock:
+            start = time.perf_counter()
+            if session is None:
+                with self._session_factory() as own_session:
+                    events = get_upcoming_events(own_session, limit=self.event_limit)
+            else:
+                events = get_upcoming_events(session, limit=self.event_limit)
+            # folium is only imported once a map is rendered
+            from app.services.osm_maps import generate_map
+
+            generate_map(self.path, events)
+            duration = time.perf_counter() - start
+            duration_ms = duration * 1000
+            self.stats.rebuilds += 1
+            self.stats.last_duration_ms = duration_ms
+            self.stats.max_duration_ms = max(self.stats.max_duration_ms, duration_ms)
+            self.stats.total_duration_ms += duration_ms
+            self.stats.last_built_at = datetime.now()
+        logger.info(f"Rebuilt {self.path.name} with {len(events)} events in {duration_ms:.1f} ms")
+        return duration
+
+    def page(self) -> MapPage | None:
+        """
+        Return the current page, or None if it has not been generated yet.
+
+        The file is re-read only when it has been replaced, so that every worker
+        process serving the same file reports the same content-based ETag.
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        cached = self._page
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        content = self.path.read_bytes()
+        page = MapPage(content=content, etag=f'"{hashlib.sha256(content).hexdigest()[:32]}"')
+        self._page = (key, page)
+        return page
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._stopping and self._first_change is None:
+                    self._condition.wait()
+                if self._stopping:
+                    return
+                due = min(self._last_change + self.debounce, self._first_change + self.max_delay)
+                remaining = due - time.monotonic()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+                self._first_change = self._last_change = None
+            try:
+                self.rebuild()
+            except Exception:
+                self.stats.failures += 1
+                logger.exception(f"Failed to rebuild {self.path.name}")
+
+
+_builders: weakref.WeakSet[MapBuilder] = weakref.WeakSet()
+
+map_builder = MapBuilder()
+
+
+def get_map_builder() -> MapBuilder:
+    """FastAPI dependency returning the application's map builder."""
+    return map_builder
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_map_changes(session: Session, flush_context) -> None:
+    if any(isinstance(obj, (Location, Event)) for obj in chain(session.new, session.dirty, session.deleted)):
+        session.info[_MAP_CHANGED] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _schedule_map_rebuild(session: Session) -> None:
+    if not session.info.pop(_MAP_CHANGED, False):
+        return
+    engine = canonical_engine(session.get_bind())
+    for builder in list(_builders):
+        if builder.running and builder.engine is not None and canonical_engine(builder.engine) is engine:
+            builder.schedule()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_map_changes(session: Session) -> None:
+    session.info.pop(_MAP_CHANGED, None)
+
+
+if __name__ == "__main__":
+    from app.db_handler.db_connection import database
+
+    database.startup()
+    with database.session_factory() as session:
+        map_builder.rebuild(session)
@@ -0,0 +1,39 @@
+"""Location of the map page and the guard keeping its rendering off the request path.
+
+Kept apart from app/services/osm_maps.py, which imports folium and pandas, so
+that importing the application does not pay for them until a map is rendered.
+"""
+
+import os
+from contextvars import ContextVar
+from pathlib import Path
+
+MAP_PATH = Path(os.path.dirname(os.path.dirname(os.path.realpath(__file__)))) / "templates" / "osm_map.html"
+
+# True while an HTTP request is being handled, see RequestPathGuardMiddleware
+_on_request_path: ContextVar[bool] = ContextVar("on_request_path", default=False)
+
+
+class MapRenderedOnRequestPathError(RuntimeError):
+    """Raised when the map page would be rendered while handling an HTTP request."""
+
+
+class RequestPathGuardMiddleware:
+    """
+    ASGI middleware marking the handling of HTTP requests, so that ``OSMMap.generate_map``
+    refuses to run there. Rendering takes hundreds of milliseconds and belongs to the
+    background ``MapBuilder`` (app/services/map_builder.py).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _on_request_path.set(True)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _on_request_path.reset(token)
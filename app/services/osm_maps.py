@@ -1,29 +1,193 @@
-from app.models.location import LocationData
 import folium
+from branca.element import MacroElement
+from folium.elements import JSCSSMixin
+from collections.abc import Iterable
+from html import escape
+from jinja2 import Template
 import os
+import tempfile
 from pathlib import Path
+from app.schemas.db_models import Event
 from app.schemas.enums import LocationType
 
+from app.config import MAP_VECTOR_TILES
+
+# Re-exported: they live in app.services.map_page so the application can be imported without folium
+from app.services.map_page import (  # noqa: F401
+    MAP_PATH,
+    MapRenderedOnRequestPathError,
+    RequestPathGuardMiddleware,
+    _on_request_path,
+)
+
+GEOJSON_URL = "/locations/geojson"
+CLUSTERS_URL = "/locations/clusters"
+VECTOR_TILES_URL = "/tiles/{z}/{x}/{y}.mvt"
+
+
+class ViewportGeoJSON(MacroElement):
+    """
+    Leaflet layer that loads the locations of the visible viewport from a GeoJSON endpoint.
+
+    Features are fetched again after every pan or zoom (the previous request is
+    aborted), so the generated page stays small however many locations exist.
+    The current zoom level is sent along; features with ``properties.cluster``
+    are drawn as numbered circles that zoom in on click.
+    """
+
+    _template = Template(
+        """
+        {% macro script(this, kwargs) %}
+        (function () {
+            var map = {{ this._parent.get_name() }};
+            var colors = {event: "#e77e98", organisation: "#3498db"};
+            var layer = L.geoJSON(null, {
+                pointToLayer: function (feature, latlng) {
+                    if (feature.properties.cluster) {
+                        var count = feature.properties.point_count;
+                        var size = count < 100 ? 30 : count < 1000 ? 40 : 50;
+                        var marker = L.marker(latlng, {
+                            icon: L.divIcon({
+                                html: '<div style="width:' + size + 'px;height:' + size + 'px;line-height:' + size +
+                                    'px;border-radius:50%;background:rgba(52,152,219,0.75);' +
+                                    'color:#fff;text-align:center;' +
+                                    'font:bold 12px Arial,sans-serif;">' + count + '</div>',
+                                className: "",
+                                iconSize: [size, size]
+                            })
+                        });
+                        marker.on("click", function () { map.setView(latlng, feature.properties.expansion_zoom); });
+                        return marker;
+                    }
+                    var color = colors[feature.properties.category] || "#7f8c8d";
+                    return L.circleMarker(latlng, {radius: 7, color: color, fillColor: color, fillOpacity: 0.8});
+                },
+                onEachFeature: function (feature, marker) {
+                    if (feature.properties.cluster) { return; }
+                    var popup = document.createElement("div");
+                    popup.textContent = feature.properties.name;
+                    marker.bindPopup(popup);
+                }
+            }).addTo(map);
+            var controller = null;
+            function refresh() {
+                if (controller) { controller.abort(); }
+                controller = new AbortController();
+                var params = new URLSearchParams({bbox: map.getBounds().toBBoxString(), zoom: map.getZoom()});
+                {% if this.location_type %}params.set("type", {{ this.location_type|tojson }});{% endif %}
+                fetch({{ this.url|tojson }} + "?" + params, {signal: controller.signal})
+                    .then(function (response) { return response.json(); })
+                    .then(function (data) { layer.clearLayers(); layer.addData(data); })
+                    .catch(function (error) { if (error.name !== "AbortError") { console.error(error); } });
+            }
+            map.on("moveend", refresh);
+            refresh();
+        })();
+        {% endmacro %}
+        """
+    )
+
+    def __init__(self, url: str = CLUSTERS_URL, location_type: LocationType | None = None):
+        super().__init__()
+        self._name = "ViewportGeoJSON"
+        self.url = url
+        self.location_type = location_type.value if location_type else None
+
+
+class VectorTileLayer(JSCSSMixin, MacroElement):
+    """
+    Leaflet.VectorGrid layer drawing the "locations" layer of the /tiles endpoint.
+
+    Only the tiles of the viewport are downloaded, as compact protobuf, and
+    the browser caches them like raster tiles, which keeps dashboards with
+    hundreds of thousands of locations responsive. Clusters are drawn with a
+    radius growing with their point count and zoom in on click.
+    """
+
+    _template = Template(
+        """
+        {% macro script(this, kwargs) %}
+        (function () {
+            var map = {{ this._parent.get_name() }};
+            var colors = {event: "#e77e98", organisation: "#3498db"};
+            var layer = L.vectorGrid.protobuf({{ this.url|tojson }}, {
+                interactive: true,
+                maxNativeZoom: 22,
+                vectorTileLayerStyles: {
+                    locations: function (properties) {
+                        if (properties.cluster) {
+                            var radius = 8 + 3 * Math.log2(properties.point_count);
+                            return {
+                                radius: radius, fill: true, fillColor: "#3498db", fillOpacity: 0.6,
+                                color: "#fff", weight: 2
+                            };
+                        }
+                        var color = colors[properties.category] || "#7f8c8d";
+                        return {radius: 7, fill: true, fillColor: color, fillOpacity: 0.8, color: color, weight: 1};
+                    }
+                }
+            }).addTo(map);
+            layer.on("click", function (e) {
+                var properties = e.layer.properties;
+                if (properties.cluster) {
+                    map.setView(e.latlng, properties.expansion_zoom);
+                    return;
+                }
+                var popup = document.createElement("div");
+                popup.textContent = properties.name;
+                L.popup().setLatLng(e.latlng).setContent(popup).openOn(map);
+            });
+        })();
+        {% endmacro %}
+        """
+    )
+
+    default_js = [
+        ("leaflet.vectorgrid", "https://unpkg.com/leaflet.vectorgrid@1.3.0/dist/Leaflet.VectorGrid.bundled.min.js")
+    ]
+
+    def __init__(self, url: str = VECTOR_TILES_URL):
+        super().__init__()
+        self._name = "VectorTileLayer"
+        self.url = url
+
 
 class OSMMap:
-    def __init__(self, center=(50.061945, 19.936857), zoom_start=13):
+    def __init__(
+        self,
+        center=(50.061945, 19.936857),
+        zoom_start=13,
+        geojson_url: str | None = CLUSTERS_URL,
+        vector_tiles_url: str | None = None,
+    ):
+        """
+        Args:
+            geojson_url: Endpoint the page loads the viewport's features from
+            vector_tiles_url: Tile URL template; when set, locations are drawn from
+                vector tiles instead of geojson_url
+        """
         self.center = center
         self.zoom_start = zoom_start
+        self.geojson_url = geojson_url
+        self.vector_tiles_url = vector_tiles_url
         self.markers: list[folium.Marker] = []
 
     def add_marker(
         self, lat, lon, label=None, category: LocationType = LocationType.ORGANISATION, description: str | None = None
     ):
-        popup = label if label else f"({lat}, {lon})"
+        popup = escape(label) if label else f"({lat}, {lon})"
         if category == LocationType.ORGANISATION:
             icon = folium.Icon(color="blue")
         elif category == LocationType.EVENT:
             popup = f"""
-                <div style="font-family:Arial,sans-serif;max-width:350px;padding:16px;border-radius:8px;box-shadow:0 2px 8px rgba(0,0,0,0.1);background:#fff;">
+                <div style="font-family:Arial,sans-serif;max-width:350px;padding:16px;border-radius:8px;
+                            box-shadow:0 2px 8px rgba(0,0,0,0.1);background:#fff;">
                     <h1 style="margin-top:0;color:#2c3e50;">Event: {popup}</h1>
-                    <p style="margin:4px 0;color:#34495e;">{description if description is not None else ""}</p>
+                    <p style="margin:4px 0;color:#34495e;">{escape(description) if description is not None else ""}</p>
                     <a href="YOUR_REGISTRATION_URL"
-                       style="display:inline-block;padding:10px 24px;margin-top:12px;background:#3498db;color:#fff;font-weight:bold;text-decoration:none;border-radius:4px;box-shadow:0 1px 4px rgba(52,152,219,0.2);transition:background 0.2s;"
+                       style="display:inline-block;padding:10px 24px;margin-top:12px;background:#3498db;color:#fff;
+                              font-weight:bold;text-decoration:none;border-radius:4px;
+                              box-shadow:0 1px 4px rgba(52,152,219,0.2);transition:background 0.2s;"
                        onmouseover="this.style.background='#de476c';"
                        onmouseout="this.style.background='#e77e98';">
                        Zarejestruj!
@@ -40,33 +204,59 @@ class OSMMap:
         self.markers.append(marker)
 
     def generate_map(self, map_location: str | Path = "osm_map.html"):
+        """
+        Render the map and write it to map_location.
+
+        The page is rendered into a temporary file in the same directory and renamed
+        over map_location, so readers see either the previous or the new page, never
+        a partially written one.
+
+        Raises:
+            MapRenderedOnRequestPathError: If called while handling an HTTP request
+        """
+        if _on_request_path.get():
+            raise MapRenderedOnRequestPathError("The map must be rendered by the background MapBuilder")
         m = folium.Map(location=self.center, zoom_start=self.zoom_start)
         for marker in self.markers:
             marker.add_to(m)
+        if self.vector_tiles_url:
+            m.add_child(VectorTileLayer(self.vector_tiles_url))
+        elif self.geojson_url:
+            m.add_child(ViewportGeoJSON(self.geojson_url))
         # Add click handler (for getting coordinates)
         m.add_child(folium.LatLngPopup())  # Shows lat/lon on click in the map
-        m.save(map_location)
+        map_location = Path(map_location)
+        fd, tmp_path = tempfile.mkstemp(dir=map_location.parent, prefix=f".{map_location.name}.", suffix=".tmp")
+        os.close(fd)
+        try:
+            m.save(tmp_path)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, map_location)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
 
 
-def generate_map_with_locations(locations: list[LocationData], map_filename: str = "osm_map.html"):
-    map_location = Path(
-        os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "templates", map_filename)
-    )
-    my_map = OSMMap()
+def generate_map(map_location: str | Path = MAP_PATH, events: Iterable[Event] = ()):
+    """
+    Write the map page, by default to app/templates/osm_map.html.
+
+    Locations are not embedded: the page loads the clusters of the visible viewport
+    from /locations/clusters, or from vector tiles when MAP_VECTOR_TILES is set.
+    Only the given events (the upcoming ones, see
+    ``MapBuilder``) are baked in as markers with a description and a signup link.
+    """
+    my_map = OSMMap(vector_tiles_url=VECTOR_TILES_URL if MAP_VECTOR_TILES else None)
     # my_map.add_marker(50.0530, 19.9336, "Smok Wawelski", LocationType.ORGANISATION)
     # my_map.add_marker(50.0617, 19.9334, "Collegium Maius", LocationType.ORGANISATION)
-    my_map.add_marker(
-        50.0677,
-        19.9915,
-        "HackYeah 2025",
-        LocationType.EVENT,
-        description="największy stacjonarny hackathon w Europie, który odbywa się w dniach 4-5 października 2025 w TAURON Arenie Kraków",
-    )
-    for location in locations:
-        my_map.add_marker(location.latitude, location.longitude, location.name)
+    for event in events:
+        if event.location is None:
+            continue
+        my_map.add_marker(
+            event.location.latitude,
+            event.location.longitude,
+            event.name,
+            LocationType.EVENT,
+            description=event.description,
+        )
     my_map.generate_map(map_location=map_location)
-
-
-# Example usage
-# if __name__ == "__main__":
-#     generate_map_with_locations(locations=)
@@ -0,0 +1,176 @@
+"""Password hashing off the event loop with a bounded number of waiting operations.
+
+A bcrypt hash or check costs a few hundred milliseconds of CPU. Run inside an
+``async def`` handler it freezes every other request of the worker, so the
+routes await ``PasswordHasher.hash`` and ``PasswordHasher.verify`` instead,
+which run bcrypt in a dedicated thread or process pool. At most ``workers``
+operations run at a time and at most ``max_queue`` more wait for a worker;
+further operations are refused with PasswordHasherOverloadedError, which the
+routes answer with 503 so that a burst of logins is shed instead of piling up.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, TypeVar
+
+from app.config import (
+    PASSWORD_HASH_EXECUTOR,
+    PASSWORD_HASH_MAX_QUEUE,
+    PASSWORD_HASH_WORKERS,
+    PasswordHashExecutor,
+)
+from app.utils.passwords import hash_password, verify_password
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class PasswordHasherOverloadedError(Exception):
+    """Raised when the queue of waiting password operations is full."""
+
+
+@dataclass
+class PasswordHasherStats:
+    """Counters of password operations and the current queue depth."""
+
+    hashes: int = 0
+    verifications: int = 0
+    rejected: int = 0
+    running: int = 0
+    queued: int = 0
+    max_queued: int = 0
+    total_duration_ms: float = 0.0  # From submission to result, including the time spent queued
+    max_duration_ms: float = 0.0
+
+    def as_dict(self) -> dict:
+        completed = self.hashes + self.verifications
+        return {
+            "hashes": self.hashes,
+            "verifications": self.verifications,
+            "rejected": self.rejected,
+            "running": self.running,
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "avg_duration_ms": round(self.total_duration_ms / completed, 1) if completed else 0.0,
+            "max_duration_ms": round(self.max_duration_ms, 1),
+        }
+
+
+class PasswordHasher:
+    """
+    bcrypt in a size-limited worker pool.
+
+    The pool is created on first use and can be shut down and recreated.
+
+    Args:
+        workers: Operations running at the same time (threads or processes)
+        max_queue: Operations allowed to wait for a worker before new ones are refused
+        executor: Whether the pool consists of threads or processes
+
+    Example:
+        >>> hasher = PasswordHasher(workers=2, max_queue=8)
+        >>> password_hash = await hasher.hash("SecurePass123")
+        >>> await hasher.verify("SecurePass123", password_hash)
+        True
+    """
+
+    def __init__(
+        self,
+        workers: int = PASSWORD_HASH_WORKERS,
+        max_queue: int = PASSWORD_HASH_MAX_QUEUE,
+        executor: PasswordHashExecutor = PASSWORD_HASH_EXECUTOR,
+    ):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        if max_queue < 0:
+            raise ValueError("max_queue must not be negative")
+        self.workers = workers
+        self.max_queue = max_queue
+        self.executor_type = PasswordHashExecutor(executor)
+        self.stats = PasswordHasherStats()
+        self._executor: Executor | None = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def queue_depth(self) -> int:
+        """Operations submitted but not yet picked up by a worker."""
+        return max(self._pending - self.workers, 0)
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.executor_type == PasswordHashExecutor.PROCESS:
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hasher")
+            return self._executor
+
+    def _update_gauges(self) -> None:
+        self.stats.running = min(self._pending, self.workers)
+        self.stats.queued = self.queue_depth
+        self.stats.max_queued = max(self.stats.max_queued, self.stats.queued)
+
+    async def _run(self, func: Callable[..., T], *args) -> T:
+        executor = self._get_executor()
+        with self._lock:
+            if self._pending >= self.workers + self.max_queue:
+                self.stats.rejected += 1
+                logger.warning(f"Password hasher overloaded, {self.queue_depth} operations queued")
+                raise PasswordHasherOverloadedError("Too many password operations in progress")
+            self._pending += 1
+            self._update_gauges()
+        submitted = time.perf_counter()
+        try:
+            return await asyncio.wrap_future(executor.submit(func, *args))
+        finally:
+            elapsed_ms = (time.perf_counter() - submitted) * 1000
+            with self._lock:
+                self._pending -= 1
+                self._update_gauges()
+                self.stats.total_duration_ms += elapsed_ms
+                self.stats.max_duration_ms = max(self.stats.max_duration_ms, elapsed_ms)
+
+    async def hash(self, password: str) -> str:
+        """
+        Hash a password in the worker pool.
+
+        Raises:
+            PasswordHasherOverloadedError: If the queue is full
+        """
+        password_hash = await self._run(hash_password, password)
+        with self._lock:
+            self.stats.hashes += 1
+        return password_hash
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """
+        Check a password against its bcrypt hash in the worker pool.
+
+        Raises:
+            PasswordHasherOverloadedError: If the queue is full
+        """
+        matches = await self._run(verify_password, plain_password, hashed_password)
+        with self._lock:
+            self.stats.verifications += 1
+        return matches
+
+    def shutdown(self) -> None:
+        """Wait for running operations and stop the workers."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+password_hasher = PasswordHasher()
+
+
+def get_password_hasher() -> PasswordHasher:
+    """FastAPI dependency returning the application's password hasher."""
+    return password_hasher
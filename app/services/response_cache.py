@@ -0,0 +1,251 @@
+"""Cache of rendered responses of public GET endpoints, revalidated with ETags.
+
+``@cache_response("event")`` on a route handler stores the rendered JSON body
+of each path and query string, with the headers the handler set and a strong
+ETag computed from the body. Later requests get the stored body without running
+the handler, or ``304 Not Modified`` when their If-None-Match names the ETag.
+
+Entries are tagged with the kinds of rows they were built from. Commits that
+insert, update or delete an ``Event`` invalidate the "event" entries, and
+``Location`` changes the "location" ones. Each tag has a generation counter, so
+invalidating costs one increment however many entries carry the tag, and a
+response computed while a commit was invalidating it is never served.
+Entries also expire after ``RESPONSE_CACHE_TTL_SECONDS``, which bounds how
+long changes made by other workers, by bulk statements bypassing the ORM, or
+by the passing of time (events that have started) go unnoticed.
+
+With a read replica, responses rendered within DB_READ_YOUR_WRITES_SECONDS of
+an invalidation of their tags are served but not stored: the handler may have
+read a replica that does not have the commit yet.
+"""
+
+import functools
+import hashlib
+import inspect
+import math
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from itertools import chain
+from typing import Callable
+
+from fastapi import Depends, Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.config import (
+    DB_READ_REPLICA_URL,
+    DB_READ_YOUR_WRITES_SECONDS,
+    RESPONSE_CACHE_SIZE,
+    RESPONSE_CACHE_TTL_SECONDS,
+)
+from app.schemas.db_models import Event, Location
+from app.utils.cache import CacheStats, TTLCache
+from app.utils.single_flight import SingleFlight
+
+# Key in Session.info collecting the tags of changed rows until commit
+_PENDING_TAGS = "response_cache_tags"
+
+# Tag invalidated by commits changing rows of each model
+MODEL_TAGS = {Event: "event", Location: "location"}
+
+# Headers set by a handler that are stored with the cached body
+_STORED_HEADERS = ("x-next-cursor",)
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Whether an If-None-Match header names the ETag (weak comparison, as for GET)."""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """A rendered response body, its ETag and the headers stored with it."""
+
+    body: bytes
+    etag: str
+    headers: dict[str, str]
+    stamp: tuple[int, ...]
+
+    def to_response(self, if_none_match: str | None) -> Response:
+        headers = {**self.headers, "ETag": self.etag, "Cache-Control": "no-cache"}
+        if etag_matches(if_none_match, self.etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(self.body, media_type="application/json", headers=headers)
+
+
+class ResponseCache:
+    """
+    Bounded LRU of rendered responses, invalidated by tag.
+
+    Args:
+        maxsize: Maximum number of responses kept
+        ttl: Seconds a response is served without running its handler
+        replica_lag: Seconds after an invalidation during which responses are not stored, 0 without a replica
+        clock: Monotonic time source (injectable for tests)
+
+    Example:
+        >>> cache = ResponseCache(maxsize=256, ttl=60)
+        >>> cache.invalidate({"event"})
+    """
+
+    def __init__(
+        self,
+        maxsize: int = RESPONSE_CACHE_SIZE,
+        ttl: float = RESPONSE_CACHE_TTL_SECONDS,
+        replica_lag: float = DB_READ_YOUR_WRITES_SECONDS if DB_READ_REPLICA_URL else 0.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._cache: TTLCache[str, CachedResponse] = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._generations: dict[str, int] = {}
+        self._invalidated_at: dict[str, float] = {}
+        self.replica_lag = replica_lag
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.not_modified = 0
+        _caches.add(self)
+
+    @property
+    def stats(self) -> CacheStats:
+        return self._cache.stats
+
+    def stamp(self, tags: tuple[str, ...]) -> tuple[int, ...]:
+        """Current generations of the tags, to be stored with a response computed from now on."""
+        return tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def get(self, key: str, tags: tuple[str, ...]) -> CachedResponse | None:
+        entry = self._cache.get(key)
+        if entry is not None and entry.stamp != self.stamp(tags):
+            self._cache.pop(key)
+            return None
+        return entry
+
+    def put(
+        self, key: str, body: bytes, headers: dict[str, str], stamp: tuple[int, ...], store: bool = True
+    ) -> CachedResponse:
+        entry = CachedResponse(body, f'"{hashlib.sha256(body).hexdigest()[:32]}"', headers, stamp)
+        if store:
+            self._cache.set(key, entry)
+        return entry
+
+    def replica_may_lag(self, tags: tuple[str, ...]) -> bool:
+        """Whether a tag was invalidated too recently for the read replica to have the change."""
+        now = self._clock()
+        return any(now - self._invalidated_at.get(tag, -math.inf) < self.replica_lag for tag in tags)
+
+    def invalidate(self, tags: set[str]) -> None:
+        with self._lock:
+            now = self._clock()
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+                self._invalidated_at[tag] = now
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def as_dict(self) -> dict:
+        return {**self.stats.as_dict(), "not_modified": self.not_modified, "entries": len(self._cache)}
+
+
+# Every ResponseCache, invalidated by the commit hooks below
+_caches: weakref.WeakSet[ResponseCache] = weakref.WeakSet()
+
+response_cache = ResponseCache()
+
+_flights = SingleFlight("response_cache")
+
+
+def get_response_cache() -> ResponseCache:
+    """FastAPI dependency returning the application's response cache."""
+    return response_cache
+
+
+def cache_response(*tags: str) -> Callable:
+    """
+    Serve a GET handler's JSON responses from the response cache.
+
+    The handler runs only on a miss; its result is rendered like FastAPI's
+    JSONResponse, and headers it sets on an injected ``response: Response`` that
+    are listed in _STORED_HEADERS are replayed on hits. Concurrent misses of
+    the same key run the handler once. Handlers must not
+    depend on anything but the path and query string, such as the caller's
+    identity.
+
+    Args:
+        *tags: Kinds of rows the response is built from, see MODEL_TAGS
+    """
+
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+
+        async def render(key: str, cache: ResponseCache, args: tuple, kwargs: dict) -> CachedResponse:
+            stamp = cache.stamp(tags)
+            store = not cache.replica_may_lag(tags)
+            if inspect.iscoroutinefunction(func):
+                result = await func(*args, **kwargs)
+            else:
+                result = await run_in_threadpool(func, *args, **kwargs)
+            handler_response = kwargs.get("response")
+            headers = {}
+            if isinstance(handler_response, Response):
+                headers = {name: value for name, value in handler_response.headers.items() if name in _STORED_HEADERS}
+            return cache.put(key, JSONResponse(jsonable_encoder(result)).body, headers, stamp, store)
+
+        @functools.wraps(func)
+        async def wrapper(*args, _cache_request: Request, _cache: ResponseCache, **kwargs):
+            request = _cache_request
+            key = f"{request.url.path}?{'&'.join(sorted(request.url.query.split('&')))}"
+            entry = _cache.get(key, tags)
+            if entry is None:
+                # Requests arriving while the entry is being rendered wait for it instead of rendering it again
+                entry = await _flights.run((_cache, key), lambda: render(key, _cache, args, kwargs))
+            response = entry.to_response(request.headers.get("if-none-match"))
+            if response.status_code == status.HTTP_304_NOT_MODIFIED:
+                _cache.not_modified += 1
+            return response
+
+        # FastAPI injects the request, needed for the key and If-None-Match, whether or not the handler asks for it
+        wrapper.__signature__ = signature.replace(
+            parameters=[
+                *signature.parameters.values(),
+                inspect.Parameter("_cache_request", inspect.Parameter.KEYWORD_ONLY, annotation=Request),
+                inspect.Parameter(
+                    "_cache",
+                    inspect.Parameter.KEYWORD_ONLY,
+                    annotation=ResponseCache,
+                    default=Depends(get_response_cache),
+                ),
+            ]
+        )
+        return wrapper
+
+    return decorator
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_response_changes(session: Session, flush_context) -> None:
+    for obj in chain(session.new, session.dirty, session.deleted):
+        for model, tag in MODEL_TAGS.items():
+            if isinstance(obj, model):
+                session.info.setdefault(_PENDING_TAGS, set()).add(tag)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_responses(session: Session) -> None:
+    tags = session.info.pop(_PENDING_TAGS, None)
+    if not tags:
+        return
+    for cache in list(_caches):
+        cache.invalidate(tags)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_response_changes(session: Session) -> None:
+    session.info.pop(_PENDING_TAGS, None)
@@ -0,0 +1,277 @@
+"""In-memory indexes over location coordinates.
+
+A ``LocationIndexRegistry`` keeps one index per engine (aliases such as the
+``sync_engine`` of the async engine share it, see ``alias_engine``), built on first use
+from the ``location`` table (id, latitude and longitude only). Afterwards all
+registries are kept in sync by session events: inserts, updates and deletes of
+``Location`` objects flushed by the ORM are collected per session and applied
+to every built index once the session commits, and discarded on rollback.
+Bulk ``UPDATE``/``DELETE`` statements bypass the ORM and require
+``invalidate(engine)`` on the affected registries.
+
+Commits made by other processes (other workers, ``example_data``) are not seen
+by these events. At most every LOCATION_INDEX_CHECK_SECONDS an index compares
+the row count and highest id of the table with what it holds and is rebuilt
+when they differ, which picks up inserts and deletes; every index is rebuilt at
+least every LOCATION_INDEX_MAX_AGE_SECONDS, which picks up moved locations.
+"""
+
+import logging
+import math
+import threading
+import time
+import weakref
+from collections import defaultdict
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from typing import Protocol
+
+from sqlalchemy import Engine, event, func, select
+from sqlalchemy.orm import Session
+
+from app.config import LOCATION_INDEX_CHECK_SECONDS, LOCATION_INDEX_MAX_AGE_SECONDS
+from app.db_handler.db_util import canonical_engine
+from app.schemas.db_models import Location
+from app.utils.geo import bounding_box, haversine_km
+
+logger = logging.getLogger(__name__)
+
+# Cell edge in degrees: ~5.5 km north-south and ~3.6 km east-west in Poland
+DEFAULT_CELL_DEGREES = 0.05
+
+_PENDING_CHANGES = "location_index_changes"
+# Key in Session.info collecting the ids of inserted locations until commit
+_PENDING_INSERTS = "location_index_inserts"
+
+
+class LocationIndex(Protocol):
+    """Interface of the indexes kept in sync with the location table."""
+
+    def __len__(self) -> int: ...
+
+    def load(self, points: Iterable[tuple[int, float, float]]) -> None: ...
+
+    def upsert(self, location_id: int, latitude: float, longitude: float) -> None: ...
+
+    def remove(self, location_id: int) -> None: ...
+
+
+class LocationGridIndex:
+    """
+    Points bucketed into fixed-size latitude/longitude cells.
+
+    A radius query visits only the cells overlapping the bounding box of the
+    circle and ranks the points found there by haversine distance.
+
+    Args:
+        cell_degrees: Edge length of a grid cell in degrees
+    """
+
+    def __init__(self, cell_degrees: float = DEFAULT_CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self._points: dict[int, tuple[float, float]] = {}
+        self._cells: defaultdict[tuple[int, int], set[int]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def _cell(self, latitude: float, longitude: float) -> tuple[int, int]:
+        return (math.floor(latitude / self.cell_degrees), math.floor(longitude / self.cell_degrees))
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def load(self, points: Iterable[tuple[int, float, float]]) -> None:
+        for location_id, latitude, longitude in points:
+            self.upsert(location_id, latitude, longitude)
+
+    def upsert(self, location_id: int, latitude: float, longitude: float) -> None:
+        with self._lock:
+            self._discard(location_id)
+            self._points[location_id] = (latitude, longitude)
+            self._cells[self._cell(latitude, longitude)].add(location_id)
+
+    def remove(self, location_id: int) -> None:
+        with self._lock:
+            self._discard(location_id)
+
+    def _discard(self, location_id: int) -> None:
+        point = self._points.pop(location_id, None)
+        if point is not None:
+            cell = self._cell(*point)
+            self._cells[cell].discard(location_id)
+            if not self._cells[cell]:
+                del self._cells[cell]
+
+    def nearby(self, latitude: float, longitude: float, radius_km: float) -> list[tuple[int, float]]:
+        """
+        Find the points within radius_km of a point.
+
+        Returns:
+            (location_id, distance_km) pairs ordered by distance
+        """
+        min_lat, min_lon, max_lat, max_lon = bounding_box(latitude, longitude, radius_km)
+        first_row, first_column = self._cell(min_lat, min_lon)
+        last_row, last_column = self._cell(max_lat, max_lon)
+
+        with self._lock:
+            if (last_row - first_row + 1) * (last_column - first_column + 1) > len(self._cells):
+                # Huge radius: visiting the occupied cells is cheaper than enumerating the box
+                candidates = [
+                    location_id
+                    for (row, column), ids in self._cells.items()
+                    if first_row <= row <= last_row and first_column <= column <= last_column
+                    for location_id in ids
+                ]
+            else:
+                candidates = [
+                    location_id
+                    for row in range(first_row, last_row + 1)
+                    for column in range(first_column, last_column + 1)
+                    for location_id in self._cells.get((row, column), ())
+                ]
+            points = [(location_id, self._points[location_id]) for location_id in candidates]
+
+        results = []
+        for location_id, (lat, lon) in points:
+            distance = haversine_km(latitude, longitude, lat, lon)
+            if distance <= radius_km:
+                results.append((location_id, distance))
+        results.sort(key=lambda result: (result[1], result[0]))
+        return results
+
+
+@dataclass
+class _Entry:
+    """A built index with the state of the location table it reflects."""
+
+    index: LocationIndex
+    count: int
+    max_id: int
+    built_at: float
+    checked_at: float
+
+
+class LocationIndexRegistry:
+    """
+    One lazily built index per engine.
+
+    Args:
+        factory: Creates an empty index, e.g. ``LocationGridIndex``
+        check_interval: Seconds between comparisons of an index with the location table
+        max_age: Seconds after which an index is rebuilt even if the table looks unchanged
+        clock: Monotonic time source (injectable for tests)
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], LocationIndex],
+        check_interval: float = LOCATION_INDEX_CHECK_SECONDS,
+        max_age: float = LOCATION_INDEX_MAX_AGE_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.factory = factory
+        self.check_interval = check_interval
+        self.max_age = max_age
+        self._clock = clock
+        self._entries: weakref.WeakKeyDictionary[Engine, _Entry] = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self.rebuilds = 0
+        _registries.add(self)
+
+    def get(self, session: Session) -> LocationIndex:
+        """
+        Return the index of the session's engine.
+
+        The index is loaded from the database on first use, and rebuilt when the
+        location table changed behind its back or it is older than max_age.
+        """
+        engine = canonical_engine(session.get_bind())
+        entry = self._entries.get(engine)
+        if entry is not None and self._clock() - entry.checked_at < self.check_interval:
+            return entry.index
+        with self._lock:
+            entry = self._entries.get(engine)
+            now = self._clock()
+            if entry is None:
+                entry = self._build(session, engine)
+            elif now - entry.checked_at >= self.check_interval:
+                count, max_id = _table_state(session)
+                if (count, max_id) != (entry.count, entry.max_id) or now - entry.built_at >= self.max_age:
+                    self.rebuilds += 1
+                    entry = self._build(session, engine)
+                else:
+                    entry.checked_at = now
+        return entry.index
+
+    def _build(self, session: Session, engine: Engine) -> _Entry:
+        count, max_id = _table_state(session)
+        index = self.factory()
+        index.load(session.execute(select(Location.id, Location.latitude, Location.longitude)))
+        now = self._clock()
+        entry = self._entries[engine] = _Entry(index, count, max_id, built_at=now, checked_at=now)
+        logger.info(f"Built {type(index).__name__} with {len(index)} locations")
+        return entry
+
+    def peek(self, engine: Engine) -> LocationIndex | None:
+        """Return the index of an engine if it has been built."""
+        entry = self._entries.get(canonical_engine(engine))
+        return entry.index if entry is not None else None
+
+    def invalidate(self, engine: Engine) -> None:
+        """Drop the index of an engine so that the next query rebuilds it."""
+        with self._lock:
+            self._entries.pop(canonical_engine(engine), None)
+
+    def apply(self, engine: Engine, changes: dict[int, tuple[float, float] | None], inserted: set[int]) -> None:
+        """Apply the location changes committed through this process to the engine's index."""
+        entry = self._entries.get(canonical_engine(engine))
+        if entry is None:
+            return
+        for location_id, point in changes.items():
+            if point is None:
+                entry.index.remove(location_id)
+            else:
+                entry.index.upsert(location_id, *point)
+        # Keep the table state in step, so that only other processes' commits trigger a rebuild
+        entry.count += sum(changes.get(location_id) is not None for location_id in inserted)
+        entry.count -= sum(point is None and location_id not in inserted for location_id, point in changes.items())
+        entry.max_id = max([entry.max_id, *inserted])
+
+
+def _table_state(session: Session) -> tuple[int, int]:
+    """Row count and highest id of the location table, both answered from the primary key index."""
+    count, max_id = session.execute(select(func.count(), func.max(Location.id)).select_from(Location)).one()
+    return count, max_id or 0
+
+
+_registries: weakref.WeakSet[LocationIndexRegistry] = weakref.WeakSet()
+
+location_index = LocationIndexRegistry(LocationGridIndex)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_location_changes(session: Session, flush_context) -> None:
+    for obj in session.new | session.dirty:
+        if isinstance(obj, Location):
+            session.info.setdefault(_PENDING_CHANGES, {})[obj.id] = (obj.latitude, obj.longitude)
+            if obj in session.new:
+                session.info.setdefault(_PENDING_INSERTS, set()).add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, Location):
+            session.info.setdefault(_PENDING_CHANGES, {})[obj.id] = None
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_location_changes(session: Session) -> None:
+    changes = session.info.pop(_PENDING_CHANGES, None)
+    inserted = session.info.pop(_PENDING_INSERTS, set())
+    if not changes:
+        return
+    engine = session.get_bind()
+    for registry in list(_registries):
+        registry.apply(engine, changes, inserted)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_location_changes(session: Session) -> None:
+    session.info.pop(_PENDING_CHANGES, None)
+    session.info.pop(_PENDING_INSERTS, None)
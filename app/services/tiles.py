@@ -0,0 +1,278 @@
+"""Vector tiles of the location clusters with an on-disk cache.
+
+Tile z/x/y holds the clusters of ``cluster_index`` at zoom z (single locations
+above the index's max_zoom) whose centre lies within the tile or its buffer,
+encoded as one MVT layer named "locations".
+
+Rendered tiles up to TILE_CACHE_MAX_ZOOM are kept as files under
+TILE_CACHE_DIR/z/x/y.mvt. When a commit changes a location (its position, or
+its category through an event or organisation), only the tiles that can show
+it are deleted: at a clustered zoom level a change can move the centroid of its
+whole cluster cell, so every tile whose buffered bounds intersect that cell is
+invalidated; above max_zoom only the tiles around the point itself.
+
+The cache directory may be shared by several workers, whose cluster indexes
+only notice each other's changes after LOCATION_INDEX_CHECK_SECONDS (see
+``app.services.spatial_index``). A tile rendered from a stale index in that
+window is therefore only served until it is TILE_CACHE_TTL_SECONDS old.
+
+With a read replica, tiles are rendered from the primary for
+DB_READ_YOUR_WRITES_SECONDS after an invalidation, so that a replica still
+lagging behind the commit cannot refill the cache with the tile it replaced.
+"""
+
+import logging
+import math
+import os
+import tempfile
+import threading
+import time
+import weakref
+from collections.abc import Iterable
+from itertools import chain
+from pathlib import Path
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from app.config import TILE_CACHE_DIR, TILE_CACHE_MAX_ZOOM, TILE_CACHE_TTL_SECONDS
+from app.crud.location import get_location_labels
+from app.schemas.db_models import Event, Location, User
+from app.services.clustering import DEFAULT_EXTENT, DEFAULT_MAX_ZOOM, DEFAULT_RADIUS, cluster_index, project, unproject
+from app.utils.geo import BoundingBox
+from app.utils.mvt import DEFAULT_EXTENT as MVT_EXTENT
+from app.utils.mvt import PointFeature, encode_layer, encode_tile
+
+logger = logging.getLogger(__name__)
+
+MAX_TILE_ZOOM = 22
+TILE_BUFFER = 64  # Tile units (of MVT_EXTENT) rendered beyond each edge, so markers are not cut off
+LAYER_NAME = "locations"
+
+# Cluster cells are 2^-(zoom + CLUSTER_CELL_BITS) of the world wide, see LocationClusterIndex
+CLUSTER_CELL_BITS = (DEFAULT_EXTENT // DEFAULT_RADIUS).bit_length() - 1
+
+# Key in Session.info collecting (latitude, longitude) of changed locations until commit
+_PENDING_POINTS = "tile_cache_points"
+
+
+def tile_box(z: int, x: int, y: int, buffer: float = 0.0) -> BoundingBox:
+    """
+    Bounding box of a tile, optionally grown by ``buffer`` tile widths on each side.
+
+    Returns:
+        (min_lat, min_lon, max_lat, max_lon)
+    """
+    size = 1 << z
+    west, north = max((x - buffer) / size, 0.0), max((y - buffer) / size, 0.0)
+    east, south = min((x + 1 + buffer) / size, 1.0), min((y + 1 + buffer) / size, 1.0)
+    min_lat, min_lon = unproject(west, south)
+    max_lat, max_lon = unproject(east, north)
+    return (min_lat, min_lon, max_lat, max_lon)
+
+
+def render_tile(session: Session, z: int, x: int, y: int) -> bytes:
+    """
+    Encode the clusters and locations of a tile.
+
+    Clusters carry ``cluster``, ``point_count`` and ``expansion_zoom``; single
+    locations carry their id and ``cluster``, ``name`` and ``category``
+    (event or organisation). A tile without any feature is empty.
+    """
+    clusters = cluster_index.get(session).get_clusters(tile_box(z, x, y, TILE_BUFFER / MVT_EXTENT), z)
+    if not clusters:
+        return b""
+    labels = get_location_labels(session, [cluster.location_id for cluster in clusters if cluster.location_id])
+    size = 1 << z
+    features = []
+    for cluster in clusters:
+        px, py = project(cluster.latitude, cluster.longitude)
+        tile_x, tile_y = round((px * size - x) * MVT_EXTENT), round((py * size - y) * MVT_EXTENT)
+        if cluster.location_id is None:
+            properties = {"cluster": True, "point_count": cluster.count, "expansion_zoom": cluster.expansion_zoom}
+            features.append(PointFeature(tile_x, tile_y, properties))
+            continue
+        label = labels.get(cluster.location_id)
+        if label is None:
+            # Deleted by another process since the index last compared itself with the table
+            continue
+        properties = {"cluster": False, "name": label.name, "category": label.category}
+        features.append(PointFeature(tile_x, tile_y, properties, id=cluster.location_id))
+    return encode_tile([encode_layer(LAYER_NAME, features, extent=MVT_EXTENT)])
+
+
+def affected_tiles(
+    points: Iterable[tuple[float, float]], max_zoom: int, cluster_max_zoom: int = DEFAULT_MAX_ZOOM
+) -> set[tuple[int, int, int]]:
+    """Return the tiles up to max_zoom that can show a change at any of the (latitude, longitude) points."""
+    pad = TILE_BUFFER / MVT_EXTENT
+    tiles = set()
+    for latitude, longitude in points:
+        px, py = project(latitude, longitude)
+        for z in range(max_zoom + 1):
+            size = 1 << z
+            if z <= cluster_max_zoom:
+                cells = 1 << (z + CLUSTER_CELL_BITS)
+                cell_x, cell_y = min(int(px * cells), cells - 1), min(int(py * cells), cells - 1)
+                min_x, min_y, max_x, max_y = cell_x / cells, cell_y / cells, (cell_x + 1) / cells, (cell_y + 1) / cells
+            else:
+                min_x, min_y, max_x, max_y = px, py, px, py
+            # Tile t shows [t - pad, t + 1 + pad] in tile widths; bounds are inclusive to err on the safe side
+            first_x, last_x = math.ceil(min_x * size - pad) - 1, math.floor(max_x * size + pad)
+            first_y, last_y = math.ceil(min_y * size - pad) - 1, math.floor(max_y * size + pad)
+            for tile_x in range(max(first_x, 0), min(last_x, size - 1) + 1):
+                for tile_y in range(max(first_y, 0), min(last_y, size - 1) + 1):
+                    tiles.add((z, tile_x, tile_y))
+    return tiles
+
+
+class TileCache:
+    """
+    Rendered tiles stored as directory/z/x/y.mvt.
+
+    Tiles are written atomically (temp file + rename). ``put`` takes the
+    ``generation`` read before rendering and drops the tile if an invalidation
+    happened in the meantime, so a tile rendered from stale data is never cached.
+
+    Args:
+        directory: Root directory of the cache, created on first write
+        max_zoom: Highest zoom level cached; deeper tiles hold few points and are always rendered
+        ttl: Age in seconds after which a cached tile is rendered again, None to keep tiles until invalidated
+    """
+
+    def __init__(
+        self, directory: str | Path, max_zoom: int = TILE_CACHE_MAX_ZOOM, ttl: float | None = TILE_CACHE_TTL_SECONDS
+    ):
+        self.directory = Path(directory)
+        self.max_zoom = max_zoom
+        self.ttl = ttl
+        self._generation = 0
+        self._invalidated_at = -math.inf
+        self._lock = threading.Lock()
+        _caches.add(self)
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def invalidated_within(self, seconds: float) -> bool:
+        """Whether tiles were invalidated during the last ``seconds``."""
+        return time.monotonic() - self._invalidated_at < seconds
+
+    def path(self, z: int, x: int, y: int) -> Path:
+        return self.directory / str(z) / str(x) / f"{y}.mvt"
+
+    def get(self, z: int, x: int, y: int) -> bytes | None:
+        """Return a cached tile, or None."""
+        if z > self.max_zoom:
+            return None
+        try:
+            with open(self.path(z, x, y), "rb") as f:
+                if self.ttl is not None and time.time() - os.fstat(f.fileno()).st_mtime > self.ttl:
+                    return None
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, z: int, x: int, y: int, data: bytes, generation: int) -> bool:
+        """
+        Store a tile rendered after ``generation`` was read.
+
+        Returns:
+            Whether the tile was stored
+        """
+        if z > self.max_zoom or generation != self._generation:
+            return False
+        path = self.path(z, x, y)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{y}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            with self._lock:
+                if generation != self._generation:
+                    os.unlink(tmp_path)
+                    return False
+                os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return True
+
+    def invalidate(self, points: Iterable[tuple[float, float]]) -> int:
+        """
+        Delete the cached tiles that can show a change at any of the points.
+
+        Returns:
+            Number of tile files deleted
+        """
+        with self._lock:
+            self._generation += 1
+            self._invalidated_at = time.monotonic()
+        if not self.directory.is_dir():
+            return 0
+        tiles = affected_tiles(points, self.max_zoom)
+        deleted = 0
+        with self._lock:
+            for z, x, y in tiles:
+                try:
+                    os.unlink(self.path(z, x, y))
+                    deleted += 1
+                except FileNotFoundError:
+                    pass
+        logger.debug(f"Invalidated {deleted} of {len(tiles)} candidate tiles")
+        return deleted
+
+
+_caches: weakref.WeakSet[TileCache] = weakref.WeakSet()
+
+tile_cache = TileCache(TILE_CACHE_DIR)
+
+
+def get_tile_cache() -> TileCache:
+    """FastAPI dependency returning the application's tile cache."""
+    return tile_cache
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_tile_changes(session: Session, flush_context) -> None:
+    points: set[tuple[float, float]] = session.info.setdefault(_PENDING_POINTS, set())
+    location_ids = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Location):
+            attrs = inspect(obj).attrs
+            points.add((obj.latitude, obj.longitude))
+            # Moved locations also disappear from the tiles of their previous position
+            old_latitude, old_longitude = attrs.latitude.history.deleted, attrs.longitude.history.deleted
+            if old_latitude or old_longitude:
+                points.add(
+                    (
+                        old_latitude[0] if old_latitude else obj.latitude,
+                        old_longitude[0] if old_longitude else obj.longitude,
+                    )
+                )
+        elif isinstance(obj, (Event, User)):
+            # The category of the event's or organisation's location may change
+            location_ids.add(obj.location_id)
+            location_ids.update(inspect(obj).attrs.location_id.history.deleted)
+    location_ids.discard(None)
+    if location_ids:
+        statement = select(Location.latitude, Location.longitude).where(Location.id.in_(location_ids))
+        points.update(tuple(row) for row in session.connection().execute(statement))
+    if not points:
+        session.info.pop(_PENDING_POINTS)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_tiles(session: Session) -> None:
+    points = session.info.pop(_PENDING_POINTS, None)
+    if not points:
+        return
+    for cache in list(_caches):
+        cache.invalidate(points)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_tile_changes(session: Session) -> None:
+    session.info.pop(_PENDING_POINTS, None)
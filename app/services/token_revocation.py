@@ -0,0 +1,177 @@
+"""Revoked access tokens, checked on every authenticated request without a database query.
+
+Access tokens carry a random ``jti`` claim. ``POST /users/logout`` revokes the
+token's jti until the token's own expiry; ``decode_access_token`` then refuses
+it. Revoked jtis are grouped in time buckets by the expiry of their token, so a
+lookup only looks at the single bucket its token's ``exp`` falls into, and
+whole buckets are dropped once every token in them has expired anyway. Each
+bucket puts a Bloom filter in front of its set of jtis, which answers the
+common case, a token that was never revoked, with a few bit tests.
+
+With ``REVOCATION_REDIS_URL`` set, revocations are also written to a
+Redis-compatible store and published to the other workers, which subscribe to
+them in a background thread and load the revocations still in effect on
+start. Lookups stay in-process either way. Revocations published while a
+worker is disconnected reach it only when it restarts.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from app.config import REVOCATION_BLOOM_CAPACITY, REVOCATION_BUCKET_SECONDS, REVOCATION_REDIS_URL
+from app.utils.bloom import BloomFilter
+from app.utils.redis_client import connect_redis
+
+logger = logging.getLogger(__name__)
+
+# Redis keys are "<prefix>:<bucket>" sets of jtis; revocations are published on the channel as "<bucket>:<jti>"
+REDIS_KEY_PREFIX = "revoked"
+REDIS_CHANNEL = "revoked-tokens"
+
+
+@dataclass
+class RevocationStats:
+    """Counters of revocations and lookups."""
+
+    revoked: int = 0
+    lookups: int = 0
+    rejected: int = 0
+    false_positives: int = 0  # Lookups the Bloom filter let through to the set in vain
+
+    def as_dict(self) -> dict:
+        return {
+            "revoked": self.revoked,
+            "lookups": self.lookups,
+            "rejected": self.rejected,
+            "false_positives": self.false_positives,
+        }
+
+
+class _Bucket:
+    __slots__ = ("bloom", "jtis")
+
+    def __init__(self, capacity: int):
+        self.bloom = BloomFilter(capacity)
+        self.jtis: set[str] = set()
+
+
+class RevocationStore:
+    """
+    Set of revoked token ids that forgets each id once its token has expired.
+
+    Args:
+        bucket_seconds: Width of the expiry buckets; memory is freed at this granularity
+        bloom_capacity: Revocations per bucket the Bloom filters are sized for
+        redis_client: Redis client shared by the workers, or None to keep revocations in-process
+        clock: Wall-clock time source, comparable with the ``exp`` claim (injectable for tests)
+
+    Example:
+        >>> store = RevocationStore()
+        >>> expires_at = time.time() + 60
+        >>> store.revoke("3f9c", expires_at)
+        >>> store.is_revoked("3f9c", expires_at)
+        True
+    """
+
+    def __init__(
+        self,
+        bucket_seconds: int = REVOCATION_BUCKET_SECONDS,
+        bloom_capacity: int = REVOCATION_BLOOM_CAPACITY,
+        redis_client: Any = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        if bucket_seconds <= 0:
+            raise ValueError("bucket_seconds must be a positive integer")
+        self.bucket_seconds = bucket_seconds
+        self.bloom_capacity = bloom_capacity
+        self._redis = redis_client
+        self._clock = clock
+        self._buckets: dict[int, _Bucket] = {}
+        self._lock = threading.Lock()
+        self._subscriber: Any = None
+        self.stats = RevocationStats()
+
+    def __len__(self) -> int:
+        return sum(len(bucket.jtis) for bucket in list(self._buckets.values()))
+
+    def revoke(self, jti: str, expires_at: float) -> None:
+        """Refuse the token with the given id until ``expires_at`` (epoch seconds)."""
+        if expires_at <= self._clock():
+            return
+        bucket = int(expires_at // self.bucket_seconds)
+        self._add(bucket, jti)
+        if self._redis is not None:
+            key = f"{REDIS_KEY_PREFIX}:{bucket}"
+            self._redis.sadd(key, jti)
+            self._redis.expireat(key, (bucket + 1) * self.bucket_seconds)
+            self._redis.publish(REDIS_CHANNEL, f"{bucket}:{jti}")
+
+    def is_revoked(self, jti: str, expires_at: float) -> bool:
+        """Whether the token with the given id and ``exp`` claim has been revoked."""
+        self.stats.lookups += 1
+        bucket = self._buckets.get(int(expires_at // self.bucket_seconds))
+        if bucket is None or jti not in bucket.bloom:
+            return False
+        if jti in bucket.jtis:
+            self.stats.rejected += 1
+            return True
+        self.stats.false_positives += 1
+        return False
+
+    def _add(self, bucket: int, jti: str) -> None:
+        with self._lock:
+            self._drop_expired()
+            entry = self._buckets.get(bucket)
+            if entry is None:
+                entry = self._buckets[bucket] = _Bucket(self.bloom_capacity)
+            if jti not in entry.jtis:
+                entry.jtis.add(jti)
+                entry.bloom.add(jti)
+                self.stats.revoked += 1
+
+    def _drop_expired(self) -> None:
+        # A bucket holds tokens expiring before its end; past that they are refused by their exp claim alone
+        current = int(self._clock() // self.bucket_seconds)
+        for bucket in [bucket for bucket in self._buckets if bucket < current]:
+            del self._buckets[bucket]
+
+    def start(self) -> None:
+        """Load the revocations shared by other workers and subscribe to new ones."""
+        if self._redis is None or self._subscriber is not None:
+            return
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{REDIS_CHANNEL: self._on_message})
+        # Subscribed before loading, so nothing revoked in between is missed
+        for key in self._redis.scan_iter(match=f"{REDIS_KEY_PREFIX}:*"):
+            bucket = int(key.rsplit(":", 1)[1])
+            for jti in self._redis.smembers(key):
+                self._add(bucket, jti)
+        self._subscriber = pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+    def stop(self) -> None:
+        if self._subscriber is not None:
+            self._subscriber.stop()
+            self._subscriber = None
+
+    def _on_message(self, message: dict) -> None:
+        try:
+            bucket, jti = message["data"].split(":", 1)
+            self._add(int(bucket), jti)
+        except (AttributeError, ValueError):
+            logger.warning("Ignoring malformed token revocation message: %r", message.get("data"))
+
+    def clear(self) -> None:
+        """Forget every in-process revocation."""
+        with self._lock:
+            self._buckets.clear()
+
+
+revocation_store = RevocationStore(redis_client=connect_redis(REVOCATION_REDIS_URL) if REVOCATION_REDIS_URL else None)
+
+
+def get_revocation_store() -> RevocationStore:
+    """FastAPI dependency returning the application's revocation store."""
+    return revocation_store
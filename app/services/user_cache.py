@@ -0,0 +1,195 @@
+"""Short-lived in-process cache of authenticated users.
+
+``get_current_user`` runs on every authenticated request, which made the
+lookup of the user by id the hottest query of the API. ``UserCache`` keeps the
+column values of recently authenticated users for a few seconds (bounded LRU)
+and hands every request its own detached ``User`` built from them.
+
+Commits that update or delete a user, or change the user's volunteer,
+organisation or coordinator profile, evict the user from every cache of the
+same engine. A lookup that started before such a commit never stores what it
+read, so a stale row cannot be cached after its eviction. Changes made by
+other processes, or by bulk ``UPDATE`` statements bypassing the ORM, are only
+picked up when the entry expires, which bounds the staleness to the TTL.
+
+The same commits record the new ``profile_version`` of each changed user in
+``profile_versions``, which lets stateless authentication (AUTH_STATELESS)
+recognise tokens signed with claims from before the change.
+"""
+
+import itertools
+import sys
+import threading
+import time
+import weakref
+from typing import Callable
+
+from sqlalchemy import Engine, event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.config import JWT_ACCESS_TOKEN_EXPIRE_MINUTES, USER_CACHE_SIZE, USER_CACHE_TTL_SECONDS
+from app.crud.user import get_user_by_id_async
+from app.db_handler.db_util import canonical_engine
+from app.schemas.db_models import Coordinator, Organisation, User, Volunteer
+from app.utils.cache import MISSING, CacheStats, TTLCache
+
+# Key in Session.info collecting {user id: new profile version or None} of changed users until commit
+_PENDING_USERS = "user_cache_ids"
+
+# Profile version recorded for deleted users: no token carries a version this high
+DELETED = sys.maxsize
+
+_USER_COLUMNS = [attr.key for attr in inspect(User).column_attrs]
+
+# Engines get serial numbers that are never reused, unlike id(), so a new test or
+# in-memory database cannot be served users cached for a disposed one
+_engine_serials: weakref.WeakKeyDictionary[Engine, int] = weakref.WeakKeyDictionary()
+_serial_counter = itertools.count()
+_serial_lock = threading.Lock()
+
+
+def _engine_serial(engine: Engine) -> int:
+    engine = canonical_engine(engine)
+    with _serial_lock:
+        serial = _engine_serials.get(engine)
+        if serial is None:
+            serial = _engine_serials[engine] = next(_serial_counter)
+        return serial
+
+
+class UserCache:
+    """
+    Bounded LRU of user rows that expire after a short TTL.
+
+    Args:
+        maxsize: Maximum number of users kept
+        ttl: Seconds a cached user is served without looking at the database
+        clock: Monotonic time source (injectable for tests)
+
+    Example:
+        >>> cache = UserCache(maxsize=1000, ttl=30)
+        >>> user = await cache.get_user(db, 42)
+    """
+
+    def __init__(
+        self,
+        maxsize: int = USER_CACHE_SIZE,
+        ttl: float = USER_CACHE_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._cache: TTLCache[tuple[int, int], dict] = TTLCache(maxsize=maxsize, ttl=ttl, clock=clock)
+        self._generation = 0
+        self._lock = threading.Lock()
+        _caches.add(self)
+
+    @property
+    def stats(self) -> CacheStats:
+        return self._cache.stats
+
+    async def get_user(self, session: AsyncSession, user_id: int) -> User | None:
+        """
+        Return the user with the given id, from the cache or the session's database.
+
+        A cached user is a detached instance of its own: column attributes can be
+        read, relationships cannot be lazily loaded.
+        """
+        key = (_engine_serial(session.get_bind()), user_id)
+        values = self._cache.get(key, MISSING)
+        if values is not MISSING:
+            user = User(**values)
+            make_transient_to_detached(user)
+            return user
+        generation = self._generation
+        user = await get_user_by_id_async(session, user_id)
+        if user is not None:
+            self._put(key, user, generation)
+        return user
+
+    def _put(self, key: tuple[int, int], user: User, generation: int) -> None:
+        values = {column: getattr(user, column) for column in _USER_COLUMNS}
+        with self._lock:
+            # Skip rows read before an invalidation that may have changed them
+            if generation == self._generation:
+                self._cache.set(key, values)
+
+    def invalidate(self, engine: Engine, user_ids: set[int]) -> None:
+        """Evict users of the engine's database."""
+        serial = _engine_serial(engine)
+        with self._lock:
+            self._generation += 1
+            for user_id in user_ids:
+                self._cache.pop((serial, user_id))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._cache.clear()
+
+
+class ProfileVersions:
+    """
+    Latest profile version of the users changed through this process.
+
+    Entries are forgotten after ``ttl`` seconds; by then every token signed
+    before the change has expired.
+
+    Args:
+        maxsize: Maximum number of users remembered
+        ttl: Seconds a version is remembered, at least the access token lifetime
+    """
+
+    def __init__(self, maxsize: int = USER_CACHE_SIZE, ttl: float = JWT_ACCESS_TOKEN_EXPIRE_MINUTES * 60):
+        self._versions: TTLCache[tuple[int, int], int] = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def record(self, engine: Engine, versions: dict[int, int]) -> None:
+        serial = _engine_serial(engine)
+        for user_id, version in versions.items():
+            self._versions.set((serial, user_id), version)
+
+    def is_current(self, engine: Engine, user_id: int, version: int) -> bool:
+        """Whether claims signed at ``version`` can still be trusted without loading the user."""
+        latest = self._versions.get((_engine_serial(engine), user_id))
+        return latest is None or version >= latest
+
+
+_caches: weakref.WeakSet[UserCache] = weakref.WeakSet()
+
+user_cache = UserCache()
+profile_versions = ProfileVersions()
+
+
+def get_user_cache() -> UserCache:
+    """FastAPI dependency returning the application's user cache."""
+    return user_cache
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_user_changes(session: Session, flush_context) -> None:
+    changes: dict[int, int | None] = {}
+    for obj in itertools.chain(session.dirty, session.deleted):
+        if isinstance(obj, User) and obj.id is not None:
+            changes[obj.id] = DELETED if obj in session.deleted else obj.profile_version
+        elif isinstance(obj, (Volunteer, Organisation, Coordinator)) and obj.user_id is not None:
+            changes.setdefault(obj.user_id, None)
+    if changes:
+        pending = session.info.setdefault(_PENDING_USERS, {})
+        for user_id, version in changes.items():
+            if version is not None or user_id not in pending:
+                pending[user_id] = version
+
+
+@event.listens_for(Session, "after_commit")
+def _evict_users(session: Session) -> None:
+    changes = session.info.pop(_PENDING_USERS, None)
+    if not changes:
+        return
+    engine = session.get_bind()
+    profile_versions.record(engine, {user_id: version for user_id, version in changes.items() if version is not None})
+    for cache in list(_caches):
+        cache.invalidate(engine, set(changes))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_user_changes(session: Session) -> None:
+    session.info.pop(_PENDING_USERS, None)
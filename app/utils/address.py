@@ -0,0 +1,194 @@
+"""Normalization of Polish postal addresses into stable lookup keys."""
+
+import re
+import unicodedata
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Final
+
+# Street type abbreviations mapped to their canonical form; "ulica" is the default type and is dropped
+STREET_TYPES: Final[dict[str, str]] = {
+    "ul": "",
+    "ulica": "",
+    "al": "aleja",
+    "aleja": "aleja",
+    "aleje": "aleja",
+    "pl": "plac",
+    "plac": "plac",
+    "os": "osiedle",
+    "osiedle": "osiedle",
+    "rondo": "rondo",
+    "skwer": "skwer",
+    "bulw": "bulwar",
+    "bulwar": "bulwar",
+}
+
+_POSTAL_CODE = re.compile(r"\b(\d{2})\s*-?\s*(\d{3})\b")
+_NUMBER_AND_UNIT = (
+    r"(?:\s|^)(?:nr\s+)?(?P<number>\d+[a-z]?(?:\s*-\s*\d+[a-z]?)?)"
+    r"(?:\s*(?:/|m\.?|lok\.?|lokal|mieszk\.?)\s*(?P<unit>\d+[a-z]?))?"
+)
+_HOUSE_NUMBER = re.compile(_NUMBER_AND_UNIT + r"$")
+# A street and house number followed by the city without a comma: "Długa 10 Kraków"
+_HOUSE_NUMBER_AND_CITY = re.compile(_NUMBER_AND_UNIT + r"\s+(?P<city>[a-z][a-z -]+)$")
+_ROMAN_NUMERAL = re.compile(r"^[ivxlc]+$")
+_PUNCTUATION = re.compile(r"[.,;:\"'()]")
+
+
+@dataclass(frozen=True)
+class NormalizedAddress:
+    """
+    Canonical parts of an address.
+
+    Attributes:
+        street: Street name without type prefix, lower-case ASCII (e.g. "mieczyslawa wrony")
+        street_type: Canonical street type ("aleja", "plac", "osiedle", ...) or "" for an ordinary street
+        house_number: House number, ranges written as "5-7"
+        unit: Flat/premises number ("lokal"), if any
+        postal_code: Postal code as "NN-NNN", if any
+        city: City name, lower-case ASCII
+    """
+
+    street: str = ""
+    street_type: str = ""
+    house_number: str = ""
+    unit: str = ""
+    postal_code: str = ""
+    city: str = ""
+
+    @property
+    def street_key(self) -> str:
+        """The full street name with its type, e.g. "aleja jana pawla ii"."""
+        return " ".join(([self.street_type] if self.street_type else []) + self.street.split())
+
+    @property
+    def street_alias(self) -> str:
+        """
+        The shortened form people commonly write the street in.
+
+        Streets named after people are routinely shortened to the surname
+        ("Mieczysława Wrony" -> "Wrony"), so only the last word is kept,
+        together with a trailing numeral or a leading day number
+        ("Jana Pawła II" -> "pawla ii", "29 Listopada" -> "29 listopada").
+        The alias is not unique ("Księcia Józefa" and "Józefa"), so it is only
+        a fallback for lookups that found no street under the full name.
+        """
+        words = self.street.split()
+        if len(words) < 2:
+            key = words
+        elif _ROMAN_NUMERAL.match(words[-1]) or words[-1].isdigit() or words[-2].isdigit():
+            key = words[-2:]
+        else:
+            key = words[-1:]
+        return " ".join(([self.street_type] if self.street_type else []) + key)
+
+    @property
+    def key(self) -> str:
+        """Stable key identifying the address regardless of how it was written."""
+        return "|".join((self.city, self.street_key, self.house_number, self.unit))
+
+
+def strip_diacritics(text: str) -> str:
+    """
+    Replace Polish (and other Latin) diacritics with their base letters.
+
+    Example:
+        >>> strip_diacritics("Łódź, Żółkiewskiego")
+        'Lodz, Zolkiewskiego'
+    """
+    text = text.replace("ł", "l").replace("Ł", "L")
+    return "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+
+
+def _clean(text: str) -> str:
+    return " ".join(_PUNCTUATION.sub(" ", strip_diacritics(text).lower()).split())
+
+
+def _split_street(text: str) -> tuple[str, str]:
+    """Split a cleaned street into (canonical type, name)."""
+    words = text.split()
+    street_type = ""
+    while words and words[0] in STREET_TYPES and len(words) > 1:
+        street_type = STREET_TYPES[words.pop(0)] or street_type
+    return street_type, " ".join(words)
+
+
+@lru_cache(maxsize=65536)
+def normalize_address(address: str) -> NormalizedAddress:
+    """
+    Parse a free-form Polish address into its canonical parts.
+
+    Accepts the shapes addresses arrive in, e.g. "ul. Mieczysława Wrony 115, Kraków",
+    "Mieczysława Wrony 115 , Kraków", "ul. Długa 10 Kraków" or "30-399 Kraków, Wrony 115 m. 4".
+    Without a comma the city is only recognised after the house number; a city
+    written first must be separated by a comma.
+
+    Args:
+        address: Address string
+
+    Returns:
+        NormalizedAddress; parts that could not be recognised are empty strings
+
+    Example:
+        >>> normalize_address("30-399 Kraków, ul. Wrony 115").key
+        'krakow|wrony|115|'
+    """
+    result: dict[str, str] = {}
+    for raw_part in address.split(","):
+        postal_code = _POSTAL_CODE.search(raw_part)
+        if postal_code:
+            result.setdefault("postal_code", f"{postal_code.group(1)}-{postal_code.group(2)}")
+            raw_part = _POSTAL_CODE.sub(" ", raw_part)
+        part = _clean(raw_part)
+        if not part:
+            continue
+        match = None
+        if "house_number" not in result:
+            match = _HOUSE_NUMBER.search(part) or _HOUSE_NUMBER_AND_CITY.search(part)
+        if match and match.start() > 0:
+            street_type, street = _split_street(part[: match.start()].strip())
+            result["street"] = street
+            result["street_type"] = street_type
+            result["house_number"] = match.group("number").replace(" ", "")
+            result["unit"] = match.group("unit") or ""
+            if match.groupdict().get("city"):
+                result.setdefault("city", match.group("city").strip())
+        elif "city" not in result:
+            result["city"] = part
+    return NormalizedAddress(**result)
+
+
+def address_key(address: str) -> str:
+    """
+    Return the normalized lookup key of an address.
+
+    Addresses without a recognisable street and house number fall back to their
+    cleaned text so that distinct free-form inputs never share a key.
+
+    Example:
+        >>> address_key("ul. Mieczysława Wrony 115, Kraków") == address_key("30-399 Kraków, Mieczysława Wrony 115")
+        True
+    """
+    normalized = normalize_address(address)
+    if not normalized.house_number:
+        return _clean(address)
+    return normalized.key
+
+
+def format_address(
+    street: str,
+    house_number: str | int,
+    city: str,
+    unit: str | int | None = None,
+    postal_code: str | None = None,
+) -> str:
+    """
+    Build a display address from separate columns, e.g. the RSPO CSV.
+
+    Example:
+        >>> format_address("Mieczysława Wrony", 115, "Kraków", postal_code="30-399")
+        'Mieczysława Wrony 115, 30-399 Kraków'
+    """
+    number = f"{house_number}/{unit}" if unit else f"{house_number}"
+    locality = f"{postal_code} {city}" if postal_code else city
+    return f"{street} {number}, {locality}"
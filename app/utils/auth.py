@@ -1,62 +1,42 @@
 """Authentication utilities for JWT token management and password hashing."""
 
+import secrets
+import time
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
-import bcrypt
 import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.config import JWT_SECRET_KEY, JWT_ACCESS_TOKEN_EXPIRE_MINUTES, JWT_ALGORITHM
-from app.db_handler.db_connection import get_db
-from app.crud.user import get_user_by_id
+from app.config import AUTH_STATELESS, JWT_SECRET_KEY, JWT_ACCESS_TOKEN_EXPIRE_MINUTES, JWT_ALGORITHM, TOKEN_CACHE_SIZE
+from app.db_handler.db_connection import get_async_db
 from app.schemas.db_models import User
+from app.schemas.enums import UserType
+from app.services.token_revocation import revocation_store
+from app.services.user_cache import UserCache, get_user_cache, profile_versions
+from app.utils.cache import TTLCache
+
+# Re-exported: bcrypt itself lives in app.utils.passwords so hasher worker processes can import it cheaply
+from app.utils.passwords import hash_password, verify_password  # noqa: F401
 
 
 # HTTP Bearer token scheme
 security = HTTPBearer()
 
-
-def hash_password(password: str) -> str:
-    """
-    Hash a password using bcrypt.
-
-    Note: Bcrypt automatically handles passwords up to 72 bytes.
-    Longer passwords are automatically truncated.
-    """
-    # Convert password to bytes and hash it
-    password_bytes = password.encode("utf-8")
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password_bytes, salt)
-    # Return as string for database storage
-    return hashed.decode("utf-8")
-
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """
-    Verify a password against its bcrypt hash.
-
-    Args:
-        plain_password: The plain text password to verify
-        hashed_password: The bcrypt hash from the database
-
-    Returns:
-        True if password matches, False otherwise
-    """
-    try:
-        password_bytes = plain_password.encode("utf-8")
-        hashed_bytes = hashed_password.encode("utf-8")
-        return bcrypt.checkpw(password_bytes, hashed_bytes)
-    except Exception:
-        return False
+# Claims of verified tokens, each kept until its token expires
+token_cache: TTLCache[str, dict] = TTLCache(maxsize=TOKEN_CACHE_SIZE)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Create a JWT access token.
 
+    Every token gets a random "jti" claim identifying it for revocation,
+    unless ``data`` already has one.
+
     Args:
         data: Dictionary containing claims to encode in the token
         expires_delta: Optional custom expiration time
@@ -72,6 +52,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.now(timezone.utc) + timedelta(minutes=JWT_ACCESS_TOKEN_EXPIRE_MINUTES)
 
     to_encode.update({"exp": expire})
+    to_encode.setdefault("jti", secrets.token_urlsafe(16))
     encoded_jwt = jwt.encode(to_encode, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
     return encoded_jwt
 
@@ -80,6 +61,10 @@ def decode_access_token(token: str) -> dict:
     """
     Decode and verify a JWT access token.
 
+    The claims of a valid token are cached until the token expires, so repeated
+    requests with the same token skip the signature check. Revoked tokens are
+    refused whether their claims are cached or not.
+
     Args:
         token: JWT token string
 
@@ -87,11 +72,14 @@ def decode_access_token(token: str) -> dict:
         Dictionary containing the token payload
 
     Raises:
-        HTTPException: If token is invalid or expired
+        HTTPException: If token is invalid, expired or revoked
     """
+    payload = token_cache.get(token)
+    if payload is not None:
+        _check_not_revoked(payload)
+        return dict(payload)
     try:
         payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
-        return payload
     except jwt.ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -104,27 +92,102 @@ def decode_access_token(token: str) -> dict:
             detail="Invalid token",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    expires_at = payload.get("exp")
+    if isinstance(expires_at, (int, float)):
+        token_cache.set(token, dict(payload), ttl=expires_at - time.time())
+    _check_not_revoked(payload)
+    return payload
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)
-) -> User:
+def _check_not_revoked(payload: dict) -> None:
+    jti = payload.get("jti")
+    if jti is not None and revocation_store.is_revoked(jti, payload["exp"]):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+def revoke_token(payload: dict) -> bool:
     """
-    Dependency to get the current authenticated user from JWT token.
+    Revoke the token with the given claims until it expires.
 
     Args:
-        credentials: HTTP Bearer token from request header
-        db: Database session
+        payload: Claims of a verified token
 
     Returns:
-        Current authenticated User object
+        False if the token has no "jti" claim and so cannot be revoked
+    """
+    jti = payload.get("jti")
+    if jti is None:
+        return False
+    revocation_store.revoke(jti, payload["exp"])
+    return True
 
-    Raises:
-        HTTPException: If authentication fails
+
+async def get_token_claims(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
+    """Dependency returning the verified claims of the request's access token."""
+    return decode_access_token(credentials.credentials)
+
+
+@dataclass(frozen=True)
+class Principal:
     """
-    token = credentials.credentials
-    payload = decode_access_token(token)
+    The authenticated user as far as most routes need it.
 
+    Built from the signed claims of the access token in stateless mode
+    (AUTH_STATELESS), otherwise from the User row. Routes that need more than
+    these fields load the user from the database themselves.
+    """
+
+    id: int
+    email: str
+    user_type: UserType
+    profile_version: int
+    created_at: datetime
+    updated_at: datetime
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            user_type=user.user_type,
+            profile_version=user.profile_version,
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+        )
+
+    @classmethod
+    def from_claims(cls, payload: dict) -> Optional["Principal"]:
+        """Return the principal signed into the token, or None if the token lacks profile claims."""
+        try:
+            return cls(
+                id=int(payload["sub"]),
+                email=payload["email"],
+                user_type=UserType(payload["user_type"]),
+                profile_version=int(payload["pv"]),
+                created_at=datetime.fromisoformat(payload["created_at"]),
+                updated_at=datetime.fromisoformat(payload["updated_at"]),
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
+
+
+def profile_claims(user: User) -> dict:
+    """Claims describing the user, signed into access tokens so stateless mode can trust them."""
+    return {
+        "sub": str(user.id),
+        "email": user.email,
+        "user_type": user.user_type.value,
+        "pv": user.profile_version,
+        "created_at": user.created_at.isoformat(),
+        "updated_at": user.updated_at.isoformat(),
+    }
+
+
+def _user_id_from_claims(payload: dict) -> int:
     user_id_str: Optional[str] = payload.get("sub")
     if user_id_str is None:
         raise HTTPException(
@@ -135,7 +198,7 @@ async def get_current_user(
 
     # Convert string user_id back to int
     try:
-        user_id = int(user_id_str)
+        return int(user_id_str)
     except (ValueError, TypeError):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -143,17 +206,78 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    user = get_user_by_id(db, user_id)
+
+async def _load_user(db: AsyncSession, cache: UserCache, user_id: int) -> User:
+    user = await cache.get_user(db, user_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
             headers={"WWW-Authenticate": "Bearer"},
         )
-
     return user
 
 
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db),
+    cache: UserCache = Depends(get_user_cache),
+) -> User:
+    """
+    Dependency to get the current authenticated user from JWT token.
+
+    The user is looked up through the short-lived user cache, so only the first
+    request of a user within USER_CACHE_TTL_SECONDS queries the database.
+
+    Args:
+        credentials: HTTP Bearer token from request header
+        db: Database session
+        cache: Cache of recently authenticated users
+
+    Returns:
+        Current authenticated User object
+
+    Raises:
+        HTTPException: If authentication fails
+    """
+    payload = decode_access_token(credentials.credentials)
+    return await _load_user(db, cache, _user_id_from_claims(payload))
+
+
+async def get_current_principal(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db),
+    cache: UserCache = Depends(get_user_cache),
+) -> Principal:
+    """
+    Dependency to get the current authenticated principal from JWT token.
+
+    In stateless mode (AUTH_STATELESS) the principal is built from the token's
+    claims without touching the database, unless the token predates a change
+    to the user seen by this process (its "pv" claim is older than the user's
+    profile version) or lacks profile claims; then the user is loaded as in
+    get_current_user.
+
+    Args:
+        credentials: HTTP Bearer token from request header
+        db: Database session, only used when the claims cannot be trusted
+        cache: Cache of recently authenticated users
+
+    Returns:
+        Current authenticated Principal
+
+    Raises:
+        HTTPException: If authentication fails
+    """
+    payload = decode_access_token(credentials.credentials)
+    user_id = _user_id_from_claims(payload)
+    if AUTH_STATELESS:
+        principal = Principal.from_claims(payload)
+        if principal is not None and profile_versions.is_current(db.get_bind(), user_id, principal.profile_version):
+            return principal
+    return Principal.from_user(await _load_user(db, cache, user_id))
+
+
 async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     """
     Dependency to get the current active user.
@@ -0,0 +1,56 @@
+"""Bloom filter for fast negative membership tests."""
+
+import math
+
+
+class BloomFilter:
+    """
+    Fixed-size set of strings that can answer "definitely absent" or "maybe present".
+
+    Keys are hashed with the built-in ``hash``, which strings cache, so a test
+    costs a few integer operations; as string hashes are salted per process, the
+    bits of a filter mean nothing to other processes. Once more than
+    ``capacity`` keys have been added the false positive rate grows beyond
+    ``error_rate``; keys are never reported absent by mistake.
+
+    Args:
+        capacity: Number of keys the filter is sized for
+        error_rate: Wanted false positive rate at capacity
+
+    Example:
+        >>> bloom = BloomFilter(capacity=1000)
+        >>> bloom.add("a")
+        >>> "a" in bloom
+        True
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        if capacity <= 0:
+            raise ValueError("capacity must be a positive integer")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def add(self, key: str) -> None:
+        # Double hashing: the k positions are h, h + step, h + 2 * step, ... with the step taken from h's high bits
+        h = hash(key)
+        step = (h >> 32) | 1
+        for i in range(self.hash_count):
+            position = (h + i * step) % self.size
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        h = hash(key)
+        step = (h >> 32) | 1
+        bits = self._bits
+        size = self.size
+        # Most absent keys miss one of the first positions, so test them one by one
+        for i in range(self.hash_count):
+            position = (h + i * step) % size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
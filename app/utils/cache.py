@@ -0,0 +1,110 @@
+"""In-process caching utilities."""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+# Sentinel returned by TTLCache.get when a key is absent, so that None can be cached as a value
+MISSING = object()
+
+
+@dataclass
+class CacheStats:
+    """Counters describing how effective a cache has been."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hit_ratio, 4),
+        }
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Thread-safe bounded LRU cache whose entries expire after a time-to-live.
+
+    Args:
+        maxsize: Maximum number of entries kept; the least recently used entry is evicted first
+        ttl: Default time-to-live in seconds, or None for entries that never expire
+        clock: Monotonic time source (injectable for tests)
+
+    Example:
+        >>> cache = TTLCache(maxsize=2, ttl=60)
+        >>> cache.set("a", 1)
+        >>> cache.get("a")
+        1
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float | None = None, clock: Callable[[], float] = time.monotonic):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be a positive integer")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data: OrderedDict[K, tuple[V, float | None]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = CacheStats()
+
+    def get(self, key: K, default=None):
+        """Return the cached value for key, or default if it is missing or expired."""
+        with self._lock:
+            item = self._data.get(key, MISSING)
+            if item is MISSING:
+                self.stats.misses += 1
+                return default
+            value, expires_at = item
+            if expires_at is not None and expires_at <= self._clock():
+                del self._data[key]
+                self.stats.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def set(self, key: K, value: V, ttl: float | None = None) -> None:
+        """Store value under key, overriding the default TTL when ttl is given."""
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = self._clock() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.stats.evictions += 1
+
+    def pop(self, key: K, default=None):
+        """Remove key from the cache and return its value."""
+        with self._lock:
+            item = self._data.pop(key, MISSING)
+        return default if item is MISSING else item[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: K) -> bool:
+        with self._lock:
+            item = self._data.get(key, MISSING)
+            if item is MISSING:
+                return False
+            expires_at = item[1]
+            return expires_at is None or expires_at > self._clock()
+
+    def __len__(self) -> int:
+        return len(self._data)
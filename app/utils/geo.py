@@ -0,0 +1,126 @@
+"""Geographic helpers: great-circle distance, bounding boxes and geohashes."""
+
+import math
+from typing import Final
+
+import numpy as np
+
+EARTH_RADIUS_KM: Final[float] = 6371.0088
+KM_PER_DEGREE_LAT: Final[float] = math.pi * EARTH_RADIUS_KM / 180
+
+# Precision of the geohash stored on each location (~4.8 m x 4.8 m cells)
+GEOHASH_PRECISION: Final[int] = 9
+
+_BASE32: Final[str] = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+BoundingBox = tuple[float, float, float, float]  # (min_lat, min_lon, max_lat, max_lon)
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in kilometres."""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    a = (
+        math.sin((phi2 - phi1) / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def haversine_km_array(latitude: float, longitude: float, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """Great-circle distances in kilometres from one point to arrays of points, computed in one pass."""
+    phi1 = math.radians(latitude)
+    phi2 = np.radians(latitudes)
+    a = (
+        np.sin((phi2 - phi1) / 2) ** 2
+        + math.cos(phi1) * np.cos(phi2) * np.sin(np.radians(longitudes - longitude) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def bounding_box(latitude: float, longitude: float, radius_km: float) -> BoundingBox:
+    """
+    Smallest latitude/longitude box containing the circle of radius_km around a point.
+
+    The box is clamped to valid coordinates and does not wrap around the antimeridian.
+
+    Example:
+        >>> min_lat, min_lon, max_lat, max_lon = bounding_box(50.06, 19.94, 10)
+    """
+    delta_lat = radius_km / KM_PER_DEGREE_LAT
+    min_lat = max(-90.0, latitude - delta_lat)
+    max_lat = min(90.0, latitude + delta_lat)
+    # The circle is widest at the latitude closest to a pole
+    widest = max(abs(min_lat), abs(max_lat))
+    if widest >= 90.0:
+        return (min_lat, -180.0, max_lat, 180.0)
+    delta_lon = delta_lat / math.cos(math.radians(widest))
+    return (min_lat, max(-180.0, longitude - delta_lon), max_lat, min(180.0, longitude + delta_lon))
+
+
+def geohash_encode(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    """
+    Encode a point as a geohash of the given length.
+
+    Example:
+        >>> geohash_encode(50.0614, 19.9366, 6)
+        'u2yhv9'
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        value, interval = (longitude, lon_range) if even else (latitude, lat_range)
+        mid = (interval[0] + interval[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            interval[0] = mid
+        else:
+            bits <<= 1
+            interval[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(chars)
+
+
+def geohash_cell_size(precision: int) -> tuple[float, float]:
+    """Height and width in degrees of a geohash cell of the given length."""
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2**lat_bits, 360.0 / 2**lon_bits
+
+
+def geohash_cover(box: BoundingBox, max_cells: int = 16) -> list[str]:
+    """
+    Geohash prefixes whose cells together cover a bounding box.
+
+    The longest prefix length needing at most max_cells cells is used, so each
+    prefix maps to one index range scan (``geohash >= prefix AND geohash < prefix + "~"``).
+    """
+    min_lat, min_lon, max_lat, max_lon = box
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        cell_height, cell_width = geohash_cell_size(precision)
+        rows = math.floor((max_lat + 90) / cell_height) - math.floor((min_lat + 90) / cell_height) + 1
+        columns = math.floor((max_lon + 180) / cell_width) - math.floor((min_lon + 180) / cell_width) + 1
+        if rows * columns <= max_cells:
+            break
+    else:
+        return [""]
+
+    cells = set()
+    first_row = math.floor((min_lat + 90) / cell_height)
+    first_column = math.floor((min_lon + 180) / cell_width)
+    for row in range(rows):
+        for column in range(columns):
+            # Encode the cell centre, clamped so that the edge cells stay inside the world
+            lat = min(89.999999, (first_row + row + 0.5) * cell_height - 90)
+            lon = min(179.999999, (first_column + column + 0.5) * cell_width - 180)
+            cells.add(geohash_encode(lat, lon, precision))
+    return sorted(cells)
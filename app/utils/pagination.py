@@ -0,0 +1,32 @@
+"""Opaque cursors for keyset pagination."""
+
+import base64
+import json
+from datetime import datetime
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(start_date: datetime, row_id: int) -> str:
+    """Return an opaque cursor pointing after the row with the given sort key."""
+    raw = json.dumps([start_date.isoformat(), row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Return the sort key an ``encode_cursor`` cursor points after.
+
+    Raises:
+        HTTPException: 400 if the cursor was not produced by encode_cursor
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        start_date, row_id = json.loads(raw)
+        start_date = datetime.fromisoformat(start_date)
+        if start_date.tzinfo is not None:
+            # Event dates are stored naive, so encode_cursor never adds an offset
+            raise ValueError("cursor date has a UTC offset")
+        return start_date, int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
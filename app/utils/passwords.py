@@ -0,0 +1,41 @@
+"""Password hashing with bcrypt.
+
+Kept free of application imports so that worker processes of the password
+hasher (see app.services.password_hasher) can import it cheaply.
+"""
+
+import bcrypt
+
+
+def hash_password(password: str) -> str:
+    """
+    Hash a password using bcrypt.
+
+    Note: Bcrypt automatically handles passwords up to 72 bytes.
+    Longer passwords are automatically truncated.
+    """
+    # Convert password to bytes and hash it
+    password_bytes = password.encode("utf-8")
+    salt = bcrypt.gensalt()
+    hashed = bcrypt.hashpw(password_bytes, salt)
+    # Return as string for database storage
+    return hashed.decode("utf-8")
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a password against its bcrypt hash.
+
+    Args:
+        plain_password: The plain text password to verify
+        hashed_password: The bcrypt hash from the database
+
+    Returns:
+        True if password matches, False otherwise
+    """
+    try:
+        password_bytes = plain_password.encode("utf-8")
+        hashed_bytes = hashed_password.encode("utf-8")
+        return bcrypt.checkpw(password_bytes, hashed_bytes)
+    except Exception:
+        return False
@@ -0,0 +1,14 @@
+"""Connection to the optional Redis-compatible store shared by the workers."""
+
+from typing import Any
+
+
+def connect_redis(url: str) -> Any:
+    """Return a client of the Redis-compatible store at ``url``; needs the optional ``redis`` package."""
+    try:
+        import redis
+    except ImportError as e:
+        raise RuntimeError(
+            "A Redis URL is configured but the redis package is not installed (uv sync --extra redis)"
+        ) from e
+    return redis.Redis.from_url(url, decode_responses=True)
@@ -0,0 +1,193 @@
+"""Request coalescing: concurrent identical calls share one execution.
+
+When a popular cache entry expires, every request arriving before it is
+refilled runs the same query. Wrapping the computation in a ``SingleFlight``
+lets the first caller (the leader) run it while later callers with the same
+key wait for its result instead.
+
+Failures are not retried on behalf of waiting callers: the leader's exception
+is raised in all of them at once, and nothing is remembered, so the next call
+runs the computation again.
+"""
+
+import asyncio
+import functools
+import inspect
+import threading
+import weakref
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.db_handler.db_util import canonical_engine
+
+T = TypeVar("T")
+
+
+@dataclass
+class SingleFlightStats:
+    """Counters of a SingleFlight group."""
+
+    executions: int = 0
+    collapsed: int = 0
+    failures: int = 0
+
+    def as_dict(self) -> dict:
+        return {"executions": self.executions, "collapsed": self.collapsed, "failures": self.failures}
+
+
+@dataclass
+class _Call:
+    done: threading.Event = field(default_factory=threading.Event)
+    result: object = None
+    error: BaseException | None = None
+
+
+class SingleFlight:
+    """
+    Group of computations in which concurrent calls with equal keys run once.
+
+    Args:
+        name: Name the group's counters are reported under in /health/metrics
+
+    Example:
+        >>> flights = SingleFlight("popular-query")
+        >>> rows = await flights.run(("events", page), lambda: load_page(page))
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.stats = SingleFlightStats()
+        self._futures: dict[tuple[asyncio.AbstractEventLoop, Hashable], asyncio.Future] = {}
+        self._calls: dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        _groups[name] = self
+
+    def __len__(self) -> int:
+        """Number of computations in flight."""
+        return len(self._futures) + len(self._calls)
+
+    async def run(self, key: Hashable, compute: Callable[[], Awaitable[T]]) -> T:
+        """Return ``await compute()``, or the result of the call with the same key already in flight."""
+        loop = asyncio.get_running_loop()
+        # Futures belong to one event loop
+        flight = (loop, key)
+        future = self._futures.get(flight)
+        if future is not None:
+            self.stats.collapsed += 1
+            # Shielded, so that a cancelled follower does not cancel the result for the others
+            return await asyncio.shield(future)
+
+        future = self._futures[flight] = loop.create_future()
+        self.stats.executions += 1
+        try:
+            result = await compute()
+        except asyncio.CancelledError:
+            self.stats.failures += 1
+            future.cancel()
+            raise
+        except BaseException as exc:
+            self.stats.failures += 1
+            future.set_exception(exc)
+            # Mark the exception as retrieved even when nobody was waiting for it
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._futures[flight]
+
+    def run_sync(self, key: Hashable, compute: Callable[[], T]) -> T:
+        """Blocking version of run, for calls made from several threads."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.stats.executions += 1
+            else:
+                self.stats.collapsed += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = compute()
+            return call.result
+        except BaseException as exc:
+            call.error = exc
+            with self._lock:
+                self.stats.failures += 1
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+# Every SingleFlight by name, for /health/metrics
+_groups: weakref.WeakValueDictionary[str, SingleFlight] = weakref.WeakValueDictionary()
+
+
+def single_flight_stats() -> dict[str, dict]:
+    """Counters of every SingleFlight group, by name."""
+    return {name: group.stats.as_dict() for name, group in sorted(_groups.items())}
+
+
+def _key_part(value: Hashable) -> Hashable:
+    # Sessions differ per request; calls are identical when they read the same database
+    if isinstance(value, AsyncSession):
+        value = value.sync_session
+    if isinstance(value, Session):
+        return canonical_engine(value.get_bind())
+    return value
+
+
+def call_key(*args, **kwargs) -> Hashable:
+    """Default key of single_flight: the arguments, with sessions replaced by the engine they use."""
+    return tuple(_key_part(arg) for arg in args), tuple(sorted((k, _key_part(v)) for k, v in kwargs.items()))
+
+
+def single_flight(name: str | None = None, key: Callable[..., Hashable] = call_key) -> Callable:
+    """
+    Coalesce concurrent calls of the decorated function with identical arguments.
+
+    Works on coroutine functions, whose callers share one awaited call, and on
+    plain functions called from several threads. Callers share the returned
+    object, so only use it on reads that do not depend on uncommitted changes
+    of the caller's session and whose results are not modified afterwards.
+
+    Args:
+        name: Name reported in /health/metrics, the function's qualified name by default
+        key: Function of the call's arguments returning the hashable key calls are coalesced by
+
+    Example:
+        >>> @single_flight()
+        >>> async def get_user_with_profile_async(session, user_id): ...
+    """
+
+    def decorator(func: Callable) -> Callable:
+        group = SingleFlight(name or f"{func.__module__}.{func.__qualname__}")
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                return await group.run(key(*args, **kwargs), lambda: func(*args, **kwargs))
+
+        else:
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                return group.run_sync(key(*args, **kwargs), lambda: func(*args, **kwargs))
+
+        wrapper.flights = group
+        return wrapper
+
+    return decorator
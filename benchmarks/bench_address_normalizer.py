@@ -0,0 +1,93 @@
+"""Throughput of the address normalizer and the cache hit rate it buys.
+
+Builds the addresses of the schools CSV in several common shapes ("ul." prefix,
+extra spaces, postal code first with a shortened street name, upper case
+without diacritics), normalizes them with and without the memoization of
+``normalize_address`` and compares the cache hit rate of raw and normalized keys.
+
+    uv run python -m benchmarks.bench_address_normalizer --repeat 20
+"""
+
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from benchmarks.common import print_table
+
+from app.utils.address import STREET_TYPES, address_key, format_address, normalize_address, strip_diacritics
+
+SCHOOLS_CSV = os.path.join(
+    "data", "Szkoły podstawowe samorządowe w roku 2023-2024 - liczba uczniów (2025-10-04 23-03-03).csv"
+)
+
+
+def load_corpus() -> list[str]:
+    df = pd.read_csv(SCHOOLS_CSV, dtype=str)
+    addresses = []
+    for row in df.itertuples(index=False):
+        street, house_number, city, postal_code = row.Ulica, row[23], row.Miejscowość, row[25]
+        words = street.split()
+        prefix = [words.pop(0)] if words[0].lower().rstrip(".") in STREET_TYPES and len(words) > 1 else []
+        short = " ".join(prefix + words[-2:] if words[-1].isdigit() else prefix + words[-1:])
+        addresses += [
+            format_address(street, house_number, city, postal_code=postal_code),
+            f"ul. {street} {house_number}, {city}",
+            f"{street}  {house_number} , {city}",
+            f"{postal_code} {city}, {short} {house_number}",
+            strip_diacritics(f"{street} {house_number}, {postal_code} {city}").upper(),
+        ]
+    return addresses
+
+
+def raw_key(address: str) -> str:
+    return " ".join(address.lower().split())
+
+
+def hit_rate(addresses: list[str], key) -> float:
+    seen = set()
+    hits = 0
+    for address in addresses:
+        k = key(address)
+        hits += k in seen
+        seen.add(k)
+    return hits / len(addresses)
+
+
+def throughput(fn, addresses: list[str], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for address in addresses:
+            fn(address)
+    return len(addresses) * repeat / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20, help="passes over the corpus per measurement")
+    args = parser.parse_args()
+
+    addresses = load_corpus()
+    normalize_address.cache_clear()
+
+    print_table(
+        f"Normalization throughput, {len(addresses)} addresses x {args.repeat}",
+        ["mode", "addresses/sec"],
+        [
+            ["uncached", throughput(normalize_address.__wrapped__, addresses, args.repeat)],
+            ["memoized", throughput(normalize_address, addresses, args.repeat)],
+        ],
+    )
+    print_table(
+        "Geocode cache hit rate (upper bound 80%: one first sighting per 5 variants)",
+        ["key", "distinct keys", "hit rate"],
+        [
+            ["raw (lower-case, collapsed spaces)", len(set(map(raw_key, addresses))), hit_rate(addresses, raw_key)],
+            ["normalized", len(set(map(address_key, addresses))), hit_rate(addresses, address_key)],
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
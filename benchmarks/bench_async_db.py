@@ -0,0 +1,168 @@
+"""Latency of async user routes under 200 parallel requests: synchronous Session vs AsyncSession.
+
+Serves ``GET /users/{user_id}`` (token check plus user lookup, two queries) in two
+variants from a temporary SQLite file in WAL mode:
+
+* before: the previous handler, ``async def`` calling the synchronous CRUD on a
+  ``Session`` from ``get_db``, so every query blocks the event loop;
+* after: the route of ``app.routes.user`` on an ``AsyncSession`` from
+  ``get_async_db`` (aiosqlite runs each query in its connection's thread).
+
+Every SELECT is delayed by ``--db-latency-ms`` inside the database driver, which
+stands in for the network round trip to PostgreSQL. Requests are sent
+concurrently through httpx's ASGI transport, so client and server share one
+event loop as in a single worker process.
+
+    uv run python -m benchmarks.bench_async_db --concurrency 200
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+from typing import Annotated
+
+import httpx
+from benchmarks.common import make_engine, percentile, print_table
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.crud.user import get_user_by_id
+from app.db_handler.db_connection import get_async_db, get_async_read_db, get_db
+from app.models.user import UserResponse
+from app.routes import user
+from app.schemas.db_models import User
+from app.schemas.enums import UserType
+from app.utils.auth import create_access_token, decode_access_token, security
+
+POOL_SIZE = 20  # Connections kept open; up to --concurrency more are opened under load
+
+
+def add_latency(engine, seconds: float) -> None:
+    """Delay every SELECT on the engine's connections in the thread executing it."""
+
+    def trace(statement: str) -> None:
+        if statement.lstrip().upper().startswith("SELECT"):
+            time.sleep(seconds)
+
+    @event.listens_for(engine, "connect")
+    def set_trace(dbapi_connection, connection_record):
+        dbapi_connection.execute("PRAGMA journal_mode=WAL")
+        if hasattr(dbapi_connection, "run_async"):
+            dbapi_connection.run_async(lambda connection: connection.set_trace_callback(trace))
+        else:
+            dbapi_connection.set_trace_callback(trace)
+
+
+def legacy_app(session_factory: sessionmaker) -> FastAPI:
+    """The user lookup as served before get_async_db: synchronous queries in async handlers."""
+
+    def get_session():
+        with session_factory() as session:
+            yield session
+
+    DBSession = Annotated[Session, Depends(get_session)]
+
+    async def get_current_user(db: DBSession, credentials: HTTPAuthorizationCredentials = Depends(security)) -> User:
+        current = get_user_by_id(db, int(decode_access_token(credentials.credentials)["sub"]))
+        if current is None:
+            raise HTTPException(status_code=401)
+        return current
+
+    app = FastAPI()
+
+    @app.get("/users/{user_id}")
+    async def get_user(auth_user: Annotated[User, Depends(get_current_user)], db: DBSession):
+        return UserResponse.model_validate(get_user_by_id(db, auth_user.id))
+
+    return app
+
+
+def async_app(session_factory: async_sessionmaker) -> FastAPI:
+    async def get_session():
+        async with session_factory() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(user.router)
+    app.dependency_overrides[get_async_db] = get_session
+    app.dependency_overrides[get_async_read_db] = get_session
+    app.dependency_overrides[get_db] = lambda: None
+    return app
+
+
+async def run_load(app: FastAPI, users: int, requests: int, concurrency: int) -> list:
+    tokens = [create_access_token({"sub": str(user_id)}) for user_id in range(1, users + 1)]
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(client: httpx.AsyncClient, i: int) -> None:
+        user_id = i % users + 1
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(f"/users/{user_id}", headers={"Authorization": f"Bearer {tokens[user_id - 1]}"})
+            latencies.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await one(client, 0)
+        latencies.clear()
+        start = time.perf_counter()
+        await asyncio.gather(*(one(client, i) for i in range(requests)))
+        seconds = time.perf_counter() - start
+    return [percentile(latencies, 50), percentile(latencies, 99), max(latencies), requests / seconds]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--db-latency-ms", type=float, nargs="+", default=[0.0, 1.0, 5.0])
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{Path(directory) / 'bench.db'}"
+        engine = make_engine(url)
+        with engine.begin() as connection:
+            connection.execute(
+                insert(User),
+                [
+                    {"email": f"user{i}@example.com", "password_hash": "x", "user_type": UserType.VOLUNTEER}
+                    for i in range(args.users)
+                ],
+            )
+        engine.dispose()
+
+        for latency_ms in args.db_latency_ms:
+            # Waiting for a pooled connection would block the loop of the synchronous variant for good
+            pool = {"pool_size": POOL_SIZE, "max_overflow": args.concurrency}
+            sync_engine = create_engine(url, connect_args={"check_same_thread": False}, **pool)
+            add_latency(sync_engine, latency_ms / 1000)
+            aio_engine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://"), **pool)
+            add_latency(aio_engine.sync_engine, latency_ms / 1000)
+
+            before = legacy_app(sessionmaker(bind=sync_engine, expire_on_commit=False))
+            after = async_app(async_sessionmaker(bind=aio_engine, expire_on_commit=False))
+            for name, app in (("sync Session", before), ("AsyncSession", after)):
+                result = asyncio.run(run_load(app, args.users, args.requests, args.concurrency))
+                rows.append([latency_ms, name, *result])
+
+            sync_engine.dispose()
+            asyncio.run(aio_engine.dispose())
+
+    print_table(
+        f"GET /users/{{id}}: {args.requests} requests, {args.concurrency} in parallel",
+        ["db latency ms", "session", "p50 ms", "p99 ms", "max ms", "req/s"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Build time, viewport query latency and incremental updates of the location cluster index.
+
+For each ``--sizes`` point count spread over Poland, loads ``LocationClusterIndex``
+and times ``--queries`` viewport queries (a 1280x800 px screen at random centres)
+per zoom level, compared with clustering the points of the viewport on every
+request. Then measures single-point inserts, including the periodic merges of
+the delta tables into the sorted arrays.
+
+    uv run python -m benchmarks.bench_clustering --sizes 50000 500000
+"""
+
+import argparse
+import math
+import random
+import time
+import tracemalloc
+from collections import Counter
+
+from benchmarks.common import percentile, print_table
+
+from app.services.clustering import DEFAULT_EXTENT, LocationClusterIndex, project
+from app.utils.geo import BoundingBox
+
+MIN_LAT, MAX_LAT = 49.0, 54.8
+MIN_LON, MAX_LON = 14.1, 24.1
+SCREEN = (1280, 800)
+
+
+def viewport(latitude: float, longitude: float, zoom: int) -> BoundingBox:
+    """Bounding box of a SCREEN-sized map centred on a point."""
+    x, y = project(latitude, longitude)
+    world_pixels = DEFAULT_EXTENT * 2**zoom
+    half_width, half_height = SCREEN[0] / 2 / world_pixels, SCREEN[1] / 2 / world_pixels
+
+    def lat(y: float) -> float:
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * min(max(y, 0.0), 1.0)))))
+
+    return (
+        lat(y + half_height),
+        max(-180.0, (x - half_width - 0.5) * 360),
+        lat(y - half_height),
+        min(180.0, (x + half_width - 0.5) * 360),
+    )
+
+
+def naive_clusters(points, box: BoundingBox, zoom: int, cell_bits: int) -> int:
+    """Cluster the points of the viewport from scratch, as a request without the index would."""
+    min_lat, min_lon, max_lat, max_lon = box
+    size = 1 << (zoom + cell_bits)
+    counts = Counter()
+    for _, latitude, longitude in points:
+        if min_lat <= latitude <= max_lat and min_lon <= longitude <= max_lon:
+            x, y = project(latitude, longitude)
+            counts[(int(x * size), int(y * size))] += 1
+    return len(counts)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50_000, 500_000])
+    parser.add_argument("--zooms", type=int, nargs="+", default=[6, 9, 12, 15, 17])
+    parser.add_argument("--queries", type=int, default=50, help="viewport queries per zoom level")
+    parser.add_argument("--naive-queries", type=int, default=3, help="from-scratch clusterings per zoom level")
+    parser.add_argument("--inserts", type=int, default=10_000, help="single-point inserts after the load")
+    args = parser.parse_args()
+
+    build_rows, query_rows, insert_rows = [], [], []
+    for size in args.sizes:
+        rng = random.Random(size)
+        points = [(i, rng.uniform(MIN_LAT, MAX_LAT), rng.uniform(MIN_LON, MAX_LON)) for i in range(1, size + 1)]
+
+        index = LocationClusterIndex()
+        start = time.perf_counter()
+        index.load(points)
+        build_seconds = time.perf_counter() - start
+
+        tracemalloc.start()
+        traced = LocationClusterIndex()
+        traced.load(points)
+        memory_mb = tracemalloc.get_traced_memory()[0] / 1024 / 1024
+        tracemalloc.stop()
+        del traced
+        build_rows.append([size, build_seconds, memory_mb])
+
+        centres = [(rng.uniform(MIN_LAT, MAX_LAT), rng.uniform(MIN_LON, MAX_LON)) for _ in range(args.queries)]
+        for zoom in args.zooms:
+            samples, features = [], 0
+            for latitude, longitude in centres:
+                box = viewport(latitude, longitude, zoom)
+                start = time.perf_counter()
+                features += len(index.get_clusters(box, zoom))
+                samples.append((time.perf_counter() - start) * 1000)
+            naive = []
+            for latitude, longitude in centres[: args.naive_queries]:
+                start = time.perf_counter()
+                naive_clusters(points, viewport(latitude, longitude, zoom), zoom, index.cell_bits)
+                naive.append((time.perf_counter() - start) * 1000)
+            query_rows.append(
+                [
+                    size,
+                    zoom,
+                    features / len(centres),
+                    percentile(samples, 50),
+                    percentile(samples, 95),
+                    percentile(naive, 50),
+                ]
+            )
+
+        latencies = []
+        merges = 0
+        for i in range(args.inserts):
+            pending = index.pending_changes
+            start = time.perf_counter()
+            index.upsert(size + i + 1, rng.uniform(MIN_LAT, MAX_LAT), rng.uniform(MIN_LON, MAX_LON))
+            latencies.append((time.perf_counter() - start) * 1000)
+            merges += index.pending_changes < pending
+        insert_rows.append(
+            [size, args.inserts, merges, sum(latencies) / len(latencies), percentile(latencies, 50), max(latencies)]
+        )
+
+    print_table("Index build", ["points", "seconds", "MB"], build_rows)
+    print_table(
+        f"Viewport queries ({SCREEN[0]}x{SCREEN[1]} px)",
+        ["points", "zoom", "avg features", "index p50 ms", "index p95 ms", "from scratch p50 ms"],
+        query_rows,
+    )
+    print_table(
+        "Incremental inserts",
+        ["points", "inserts", "merges", "avg ms", "p50 ms", "max ms (merge)"],
+        insert_rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
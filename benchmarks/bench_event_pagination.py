@@ -0,0 +1,108 @@
+"""Deep pages of /events/upcoming: OFFSET vs keyset pagination over a million events.
+
+Fills a temporary SQLite file with ``--events`` upcoming events and times
+fetching one page of ``--limit`` events at increasing depths, once by skipping
+rows with OFFSET and once by seeking past the (start_date, id) of the previous
+page's last event, as the X-Next-Cursor cursor does. Each query is run
+``--repeat`` times and the median reported.
+
+    uv run python -m benchmarks.bench_event_pagination --events 1000000
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from benchmarks.common import make_engine, make_session, print_table
+from sqlalchemy import insert, select
+
+from app.crud.event import _upcoming_event_page, get_upcoming_event_page
+from app.schemas.db_models import Event
+
+CHUNK = 50_000
+
+
+def fill(engine, count: int) -> None:
+    start = datetime.now() + timedelta(days=1)
+    rng = random.Random(0)
+    with engine.begin() as connection:
+        for offset in range(0, count, CHUNK):
+            rows = []
+            for i in range(offset, min(offset + CHUNK, count)):
+                # Minute resolution over ~2 years, so many events share a start date
+                begins = start + timedelta(minutes=rng.randrange(1_000_000))
+                rows.append(
+                    {
+                        "name": f"Event {i}",
+                        "description": "",
+                        "start_date": begins,
+                        "end_date": begins + timedelta(hours=2),
+                        "signup_start": begins - timedelta(days=7),
+                        "signup_end": begins,
+                        "location_id": 1 + i % 1000,
+                        "organisation_id": 1 + i % 500,
+                        "max_no_of_users": 20,
+                    }
+                )
+            connection.execute(insert(Event), rows)
+        connection.exec_driver_sql("ANALYZE")
+
+
+def median_ms(function, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    depths = [depth for depth in (0, 1_000, 10_000, 100_000, 500_000, 990_000) if depth < args.events]
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        engine = make_engine(f"sqlite:///{Path(directory) / 'bench.db'}")
+        started = time.perf_counter()
+        fill(engine, args.events)
+        print(f"Inserted {args.events} events in {time.perf_counter() - started:.1f} s")
+
+        session = make_session(engine)
+        for depth in depths:
+            after = None
+            if depth:
+                # The last event of the previous page, which is what the cursor encodes
+                last = session.execute(
+                    select(Event.start_date, Event.id).order_by(Event.start_date, Event.id).offset(depth - 1).limit(1)
+                ).one()
+                after = (last.start_date, last.id)
+
+            def by_offset(depth=depth):
+                return session.execute(_upcoming_event_page(args.limit).offset(depth)).all()
+
+            def by_keyset(after=after):
+                return get_upcoming_event_page(session, limit=args.limit, after=after)
+
+            assert [row.id for row in by_offset()] == [row.id for row in by_keyset()]
+            rows.append([depth, median_ms(by_offset, args.repeat), median_ms(by_keyset, args.repeat)])
+        session.close()
+        engine.dispose()
+
+    print_table(
+        f"Page of {args.limit} out of {args.events} upcoming events, median of {args.repeat}",
+        ["rows skipped", "OFFSET ms", "keyset ms"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""/events/nearby: ranking cost per candidate count and concurrent queries over 100k events.
+
+Fills a temporary SQLite file with ``--events`` events over the next 90 days
+at ``--locations`` locations clustered around 20 cities in Poland, and draws
+``--volunteers`` volunteer homes from the same distribution. Then:
+
+* ranking: for each radius, the candidates of ``--queries`` random volunteers
+  are ranked once with a per-row Python loop (haversine_km and sort) and once
+  with the vectorized rank_events_nearby;
+* load: ``--clients`` concurrent clients, each with its own AsyncSession,
+  query get_upcoming_events_nearby_async from random volunteers' homes for
+  ``--seconds``.
+
+    uv run python -m benchmarks.bench_events_nearby --events 100000 --volunteers 1000000 --clients 16
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+from benchmarks.common import make_engine, make_session, percentile, print_table
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.config import EVENTS_NEARBY_HORIZON_DAYS, EVENTS_NEARBY_KM_PER_DAY
+from app.crud.event import _nearby_event_candidates, get_upcoming_events_nearby_async, rank_events_nearby
+from app.schemas.db_models import Event, Location
+from app.utils.geo import haversine_km
+
+CITIES = np.array(
+    [
+        (52.23, 21.01), (50.06, 19.94), (51.76, 19.46), (51.11, 17.04), (52.41, 16.93),
+        (54.35, 18.65), (53.43, 14.55), (53.12, 18.01), (51.25, 22.57), (53.13, 23.16),
+        (50.26, 19.02), (50.04, 22.00), (50.87, 20.63), (53.78, 20.48), (50.67, 17.93),
+        (52.73, 15.24), (51.94, 15.51), (52.55, 19.71), (54.17, 16.17), (50.81, 19.12),
+    ]
+)  # fmt: skip
+
+
+def sample_points(rng: np.random.Generator, count: int) -> np.ndarray:
+    """Points around the cities, about 15 km apart from their centres on average."""
+    centres = CITIES[rng.integers(len(CITIES), size=count)]
+    return centres + rng.normal(scale=(0.12, 0.18), size=(count, 2))
+
+
+def fill(engine, rng: np.random.Generator, events: int, locations: int) -> None:
+    points = sample_points(rng, locations)
+    now = datetime.now()
+    with engine.begin() as connection:
+        connection.execute(
+            insert(Location),
+            [{"name": f"Location {i}", "latitude": lat, "longitude": lon} for i, (lat, lon) in enumerate(points)],
+        )
+        offsets = rng.uniform(0, 90 * 24 * 60, size=events)
+        location_ids = rng.integers(1, locations + 1, size=events)
+        rows = []
+        for i in range(events):
+            begins = now + timedelta(minutes=float(offsets[i]))
+            rows.append(
+                {
+                    "name": f"Event {i}",
+                    "description": "",
+                    "start_date": begins,
+                    "end_date": begins + timedelta(hours=2),
+                    "signup_start": begins - timedelta(days=7),
+                    "signup_end": begins,
+                    "location_id": int(location_ids[i]),
+                    "organisation_id": 1 + i % 500,
+                    "max_no_of_users": 20,
+                }
+            )
+        connection.execute(insert(Event), rows)
+        connection.exec_driver_sql("ANALYZE")
+
+
+def rank_in_python(rows, latitude, longitude, radius_km, km_per_day, limit, now):
+    """Reference ranking computing one row at a time."""
+    ranked = []
+    for row in rows:
+        distance = haversine_km(latitude, longitude, row.latitude, row.longitude)
+        if distance <= radius_km:
+            score = (row.start_date - now).total_seconds() / 86400 + distance / km_per_day
+            ranked.append((score, row.id, row, distance))
+    ranked.sort(key=lambda item: item[:2])
+    return [(row, distance) for _, _, row, distance in ranked[:limit]]
+
+
+def median_ms(function, arguments: list) -> float:
+    samples = []
+    for args in arguments:
+        start = time.perf_counter()
+        function(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return percentile(samples, 50)
+
+
+async def run_load(url: str, homes: np.ndarray, rng, clients: int, seconds: float, radius_km: float) -> list:
+    engine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://"), pool_size=clients)
+    factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+    latencies = []
+    found = []
+
+    async def client() -> None:
+        while time.perf_counter() < deadline:
+            latitude, longitude = homes[rng.integers(len(homes))]
+            start = time.perf_counter()
+            async with factory() as session:
+                matches = await get_upcoming_events_nearby_async(session, latitude, longitude, radius_km)
+            latencies.append((time.perf_counter() - start) * 1000)
+            found.append(len(matches))
+
+    deadline = time.perf_counter() + seconds
+    await asyncio.gather(*(client() for _ in range(clients)))
+    await engine.dispose()
+    return [
+        radius_km,
+        len(latencies) / seconds,
+        percentile(latencies, 50),
+        percentile(latencies, 99),
+        sum(found) / len(found),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--locations", type=int, default=20_000)
+    parser.add_argument("--volunteers", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    homes = sample_points(rng, args.volunteers)
+    ranking_rows = []
+    load_rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{Path(directory) / 'bench.db'}"
+        engine = make_engine(url)
+        started = time.perf_counter()
+        fill(engine, rng, args.events, args.locations)
+        print(f"Inserted {args.events} events in {time.perf_counter() - started:.1f} s")
+
+        session = make_session(engine)
+        now = datetime.now()
+        for radius_km in (5.0, 10.0, 25.0, 50.0):
+            cases = []
+            for latitude, longitude in homes[rng.integers(len(homes), size=args.queries)]:
+                query = _nearby_event_candidates(latitude, longitude, radius_km, now, EVENTS_NEARBY_HORIZON_DAYS)
+                rows = list(session.execute(query))
+                cases.append((rows, latitude, longitude, radius_km, EVENTS_NEARBY_KM_PER_DAY, 50, now))
+            for case in cases[:10]:
+                assert [row.id for row, _ in rank_in_python(*case)] == [row.id for row, _ in rank_events_nearby(*case)]
+            ranking_rows.append(
+                [
+                    radius_km,
+                    sum(len(case[0]) for case in cases) / len(cases),
+                    median_ms(rank_in_python, cases),
+                    median_ms(rank_events_nearby, cases),
+                ]
+            )
+        session.close()
+        engine.dispose()
+
+        for radius_km in (10.0, 25.0):
+            load_rows.append(asyncio.run(run_load(url, homes, rng, args.clients, args.seconds, radius_km)))
+
+    print_table(
+        f"Ranking the candidates of {args.queries} random volunteers, median per query",
+        ["radius km", "candidates", "python ms", "numpy ms"],
+        ranking_rows,
+    )
+    print_table(
+        f"{args.clients} concurrent clients over {args.events} events and {args.volunteers} volunteers",
+        ["radius km", "queries/s", "p50 ms", "p99 ms", "events found"],
+        load_rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
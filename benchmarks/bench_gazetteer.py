@@ -0,0 +1,96 @@
+"""Load time, memory and lookup latency of the offline gazetteer geocoder.
+
+Builds a synthetic gazetteer CSV (``--entries`` address points spread over
+Kraków postal codes), loads it with ``GazetteerGeocoder.from_csv`` and times
+lookups by street, by postal code and for unknown addresses.
+
+    uv run python -m benchmarks.bench_gazetteer --entries 500000
+"""
+
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.common import print_table
+
+from app.services.geocoders import GAZETTEER_FIELDS, GazetteerGeocoder
+
+
+def street_suffix(i: int) -> str:
+    """Spell i with letters so that street names never end in a number."""
+    letters = ""
+    while True:
+        i, rest = divmod(i, 26)
+        letters = chr(ord("a") + rest) + letters
+        if i == 0:
+            return letters.capitalize()
+
+
+def write_gazetteer(path: str, entries: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    streets = [f"Testowa {street_suffix(i)}" for i in range(max(1, entries // 50))]
+    rows = []
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=GAZETTEER_FIELDS)
+        writer.writeheader()
+        for i in range(entries):
+            street = streets[i % len(streets)]
+            row = {
+                "street": street,
+                "house_number": str(i // len(streets) + 1),
+                "postal_code": f"3{rng.randint(0, 1)}-{i % 1000:03d}",
+                "city": "Kraków",
+                "latitude": 50.0 + rng.random() * 0.1,
+                "longitude": 19.8 + rng.random() * 0.2,
+            }
+            writer.writerow(row)
+            if i % 97 == 0:
+                rows.append(row)
+    return rows
+
+
+def time_lookups(gazetteer: GazetteerGeocoder, addresses: list[str]) -> tuple[float, int]:
+    start = time.perf_counter()
+    found = sum(1 for address in addresses if gazetteer.geocode(address) is not None)
+    return (time.perf_counter() - start) / len(addresses) * 1e6, found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=200_000, help="address points in the gazetteer")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "gazetteer.csv")
+        sample = write_gazetteer(path, args.entries)
+
+        start = time.perf_counter()
+        gazetteer = GazetteerGeocoder.from_csv(path)
+        load_seconds = time.perf_counter() - start
+
+        # Measured on a second load: tracing allocations slows loading down considerably
+        tracemalloc.start()
+        traced = GazetteerGeocoder.from_csv(path)
+        memory_mb = tracemalloc.get_traced_memory()[0] / 1024 / 1024
+        tracemalloc.stop()
+        del traced
+
+    by_street = [f"ul. {r['street']} {r['house_number']}, {r['city']}" for r in sample]
+    by_postal_code = [f"{r['postal_code']} {r['city']}, Nieznana {r['house_number']}" for r in sample]
+    unknown = [f"Nieistniejąca {i}, Kraków" for i in range(len(sample))]
+
+    rows = []
+    for label, addresses in (("street + number", by_street), ("postal code", by_postal_code), ("unknown", unknown)):
+        micros, found = time_lookups(gazetteer, addresses)
+        rows.append([label, len(addresses), found, micros])
+
+    print(f"\nLoaded {len(gazetteer)} entries in {load_seconds:.2f} s, {memory_mb:.1f} MB resident in the index")
+    print_table("Gazetteer lookups", ["lookup", "queries", "found", "µs/lookup"], rows)
+
+
+if __name__ == "__main__":
+    main()
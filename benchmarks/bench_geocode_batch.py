@@ -0,0 +1,106 @@
+"""Throughput of the batch geocoding pipeline against a local fake geocoder.
+
+Geocodes the addresses of the schools CSV (repeated ``--copies`` times, which
+the pipeline deduplicates) serially, as the importer used to, and then through
+``BatchGeocoder`` at several request-per-second budgets. A fraction of calls
+time out to exercise the retry path.
+
+    uv run python -m benchmarks.bench_geocode_batch --latency 0.1 --failure-rate 0.05
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import threading
+import time
+from datetime import timedelta
+
+import pandas as pd
+from geopy.exc import GeocoderTimedOut
+
+from benchmarks.common import make_engine, make_session, print_table
+
+from app.services.geocode_batch import BatchGeocoder
+from app.services.geocode_cache import GeocodeCache
+
+SCHOOLS_CSV = os.path.join(
+    "data", "Szkoły podstawowe samorządowe w roku 2023-2024 - liczba uczniów (2025-10-04 23-03-03).csv"
+)
+
+
+class FlakyGeocoder:
+    """Fake geocoder with fixed latency that times out for a fraction of calls."""
+
+    def __init__(self, latency: float, failure_rate: float, seed: int = 0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def __call__(self, address: str) -> tuple[float, float]:
+        with self._lock:
+            self.calls += 1
+            fail = self._random.random() < self.failure_rate
+        time.sleep(self.latency)
+        if fail:
+            raise GeocoderTimedOut("simulated timeout")
+        digest = hashlib.sha1(address.encode("utf-8")).digest()
+        return 50.0 + digest[0] / 1000, 19.9 + digest[1] / 1000
+
+
+def load_addresses(copies: int) -> list[str]:
+    df = pd.read_csv(SCHOOLS_CSV)
+    addresses = [f"{row.Ulica} {row._24}, {row.Miejscowość}" for row in df.itertuples(index=True)]
+    return addresses * copies
+
+
+def fresh_cache() -> GeocodeCache:
+    return GeocodeCache(maxsize=100_000, ttl=timedelta(days=1), negative_ttl=timedelta(hours=1))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.1, help="simulated geocoder round trip in seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.05, help="fraction of calls that time out")
+    parser.add_argument("--copies", type=int, default=2, help="how many times each address is repeated")
+    parser.add_argument("--budgets", type=float, nargs="+", default=[10.0, 25.0, 50.0], help="requests per second")
+    args = parser.parse_args()
+
+    addresses = load_addresses(args.copies)
+    rows = []
+
+    geocoder = FlakyGeocoder(args.latency, failure_rate=0.0)
+    start = time.perf_counter()
+    for address in addresses:
+        geocoder(address)
+    elapsed = time.perf_counter() - start
+    rows.append(["serial", len(addresses), geocoder.calls, 0, 0, elapsed, len(addresses) / elapsed])
+
+    for budget in args.budgets:
+        session = make_session(make_engine())
+        geocoder = FlakyGeocoder(args.latency, args.failure_rate)
+        batch = BatchGeocoder(geocoder, requests_per_second=budget, backoff=0.05, cache=fresh_cache())
+        _, stats = batch.geocode_all(session, addresses)
+        rows.append(
+            [
+                f"batch {budget:g} rps",
+                len(addresses),
+                geocoder.calls,
+                stats.retries,
+                stats.failed,
+                stats.elapsed,
+                stats.throughput,
+            ]
+        )
+
+    print_table(
+        f"{len(addresses)} addresses, latency {args.latency * 1000:.0f} ms, failure rate {args.failure_rate:.0%}",
+        ["mode", "addresses", "geocoder calls", "retries", "failed", "seconds", "addresses/sec"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Re-import the Kraków schools CSV twice and count geocoder calls.
+
+The first run starts with an empty cache and geocodes every school. Before the
+second run the imported users, organisations and locations are deleted and the
+in-process LRU is dropped, so every hit on the second run comes from the
+persistent ``geocode_cache`` table. A third run keeps the LRU warm.
+
+    uv run python -m benchmarks.bench_geocode_cache --latency 0.05
+"""
+
+import argparse
+import hashlib
+import time
+
+from benchmarks.common import make_engine, make_session, print_table, timed
+
+from sqlalchemy import delete
+
+from app.db_handler.example_data import add_schools_as_organisations
+from app.schemas.db_models import Location, Organisation, User
+from app.services.geocode_cache import geocode_cache
+
+
+class FakeGeocoder:
+    """Deterministic stand-in for Nominatim that sleeps to simulate a network round trip."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+
+    def __call__(self, address: str) -> tuple[float, float]:
+        self.calls += 1
+        time.sleep(self.latency)
+        digest = hashlib.sha1(address.encode("utf-8")).digest()
+        return 50.0 + digest[0] / 1000, 19.9 + digest[1] / 1000
+
+
+def clear_imported_rows(session) -> None:
+    session.execute(delete(Organisation))
+    session.execute(delete(User))
+    session.execute(delete(Location))
+    session.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated geocoder round trip in seconds")
+    parser.add_argument("--rps", type=float, default=50.0, help="geocoder request-per-second budget")
+    args = parser.parse_args()
+
+    session = make_session(make_engine())
+    geocoder = FakeGeocoder(args.latency)
+    geocode_cache.clear_memory()
+    rows = []
+
+    for label, drop_memory in (("cold", False), ("persistent", True), ("warm LRU", False)):
+        if label != "cold":
+            clear_imported_rows(session)
+        if drop_memory:
+            geocode_cache.clear_memory()
+        geocode_cache.reset_stats()
+        geocoder.calls = 0
+        timings: dict = {}
+        with timed(label, timings):
+            add_schools_as_organisations(session, geocoder=geocoder, requests_per_second=args.rps)
+        stats = geocode_cache.stats
+        rows.append(
+            [label, geocoder.calls, stats.memory_hits, stats.db_hits, stats.misses, stats.hit_ratio, timings[label]]
+        )
+
+    print_table(
+        f"Schools CSV import, simulated geocoder latency {args.latency * 1000:.0f} ms",
+        ["run", "geocoder calls", "LRU hits", "DB hits", "misses", "hit ratio", "seconds"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""CPU spent on a password-guessing attack with and without the login limiter.
+
+Serves the user routes from a temporary SQLite file. An attacker at one address
+sends ``--rate`` logins per second with wrong passwords for ``--users``
+existing accounts, without waiting for the answers, for ``--seconds``; every
+second another user, whose account is not attacked, logs in from an address of
+their own. Reports the
+process CPU time (bcrypt runs in the password hasher's threads, which process
+time includes), the password checks run, the attempts refused with 429 or shed
+with 503, and how many legitimate logins succeeded. Limits default to a few
+attempts per minute so that a short run reaches them.
+
+    uv run python -m benchmarks.bench_login_limiter --rate 50 --seconds 10
+"""
+
+import argparse
+import asyncio
+import math
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+from benchmarks.common import make_engine, print_table
+from fastapi import FastAPI
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db_handler.db_connection import get_async_db
+from app.routes import user
+from app.schemas.db_models import User
+from app.schemas.enums import UserType
+from app.services.login_limiter import LoginLimiter, get_login_limiter
+from app.services.password_hasher import PasswordHasher, get_password_hasher
+from app.utils.passwords import hash_password
+
+PASSWORD = "SecurePass123"
+
+
+def make_app(session_factory: async_sessionmaker, hasher: PasswordHasher, limiter: LoginLimiter) -> FastAPI:
+    async def get_session():
+        async with session_factory() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(user.router)
+    app.dependency_overrides[get_async_db] = get_session
+    app.dependency_overrides[get_password_hasher] = lambda: hasher
+    app.dependency_overrides[get_login_limiter] = lambda: limiter
+    return app
+
+
+async def run_attack(app: FastAPI, users: int, rate: float, seconds: float) -> list:
+    statuses: dict[int, int] = {}
+    legit = {"ok": 0, "sent": 0}
+
+    async def attempt(client: httpx.AsyncClient, guess: int) -> None:
+        response = await client.post(
+            "/users/login", json={"email": f"user{guess % users}@example.com", "password": f"guess{guess}"}
+        )
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    async def attacker(client: httpx.AsyncClient) -> list[asyncio.Task]:
+        tasks = []
+        start = time.perf_counter()
+        while (due := start + len(tasks) / rate) < deadline:
+            await asyncio.sleep(max(due - time.perf_counter(), 0))
+            tasks.append(asyncio.create_task(attempt(client, len(tasks))))
+        return tasks
+
+    async def legitimate() -> None:
+        while time.perf_counter() < deadline:
+            transport = httpx.ASGITransport(app=app, client=(f"198.51.100.{legit['sent'] + 1}", 40000))
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                response = await client.post(
+                    "/users/login", json={"email": f"user{users + legit['sent']}@example.com", "password": PASSWORD}
+                )
+            legit["sent"] += 1
+            legit["ok"] += response.status_code == 200
+            await asyncio.sleep(1)
+
+    transport = httpx.ASGITransport(app=app, client=("203.0.113.7", 40000))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        cpu_start = time.process_time()
+        deadline = time.perf_counter() + seconds
+        tasks, _ = await asyncio.gather(attacker(client), legitimate())
+        cpu = time.process_time() - cpu_start
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return [
+        len(tasks),
+        statuses.get(429, 0),
+        statuses.get(503, 0),
+        cpu,
+        cpu / seconds * 100,
+        f"{legit['ok']}/{legit['sent']}",
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=50.0, help="attack attempts per second")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=2, help="password hasher threads")
+    parser.add_argument("--max-queue", type=int, default=8, help="password checks waiting before logins get 503")
+    parser.add_argument("--per-email", type=int, default=2, help="attempts per email and minute")
+    parser.add_argument("--per-ip", type=int, default=5, help="attempts per client address and minute")
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{Path(directory) / 'bench.db'}"
+        engine = make_engine(url)
+        password_hash = hash_password(PASSWORD)
+        with engine.begin() as connection:
+            connection.execute(
+                insert(User),
+                [
+                    {"email": f"user{i}@example.com", "password_hash": password_hash, "user_type": UserType.VOLUNTEER}
+                    for i in range(args.users + math.ceil(args.seconds) + 1)
+                ],
+            )
+        engine.dispose()
+
+        variants = [
+            ("off", LoginLimiter(per_email=0, per_ip=0)),
+            ("per email only", LoginLimiter(per_email=args.per_email, per_ip=0, window_seconds=60)),
+            ("per email and address", LoginLimiter(per_email=args.per_email, per_ip=args.per_ip, window_seconds=60)),
+        ]
+        for name, limiter in variants:
+            hasher = PasswordHasher(workers=args.workers, max_queue=args.max_queue)
+            aio_engine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://"))
+            app = make_app(async_sessionmaker(bind=aio_engine, expire_on_commit=False), hasher, limiter)
+            result = asyncio.run(run_attack(app, args.users, args.rate, args.seconds))
+            rows.append([name, *result[:3], hasher.stats.verifications, *result[3:]])
+            hasher.shutdown()
+            asyncio.run(aio_engine.dispose())
+
+    print_table(
+        f"{args.rate:.0f} guesses/s at {args.users} accounts for {args.seconds:.0f} s "
+        f"(limits: {args.per_email} per email, {args.per_ip} per address and minute)",
+        ["limiter", "attempts", "429s", "503s", "bcrypt checks", "CPU s", "CPU %", "legit logins ok"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
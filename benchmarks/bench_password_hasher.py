@@ -0,0 +1,158 @@
+"""Health-check latency while the server is busy with logins: bcrypt on the event loop vs in a worker pool.
+
+Serves the user and health routes from a temporary SQLite file. ``--logins``
+clients log in back to back for ``--seconds`` while one more client calls
+``/health`` every 20 ms; the health-check latency, counted from when each check
+was due, shows how long other requests wait for the event loop. Variants:
+
+* inline: bcrypt inside the handler, as before the password hasher;
+* thread pool / process pool: PasswordHasher with ``--workers`` workers and a
+  queue of ``--max-queue`` operations, beyond which logins get 503 (clients
+  honour its Retry-After).
+
+    uv run python -m benchmarks.bench_password_hasher --logins 32 --seconds 5
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import httpx
+from benchmarks.common import make_engine, percentile, print_table
+from fastapi import FastAPI
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.config import PasswordHashExecutor
+from app.db_handler.db_connection import get_async_db
+from app.routes import health_check, user
+from app.schemas.db_models import User
+from app.schemas.enums import UserType
+from app.services.password_hasher import PasswordHasher, get_password_hasher
+from app.utils.passwords import hash_password, verify_password
+
+PASSWORD = "SecurePass123"
+HEALTH_INTERVAL = 0.02
+
+
+class InlineHasher(PasswordHasher):
+    """bcrypt called directly in the handler, blocking the event loop."""
+
+    async def hash(self, password: str) -> str:
+        return hash_password(password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return verify_password(plain_password, hashed_password)
+
+
+def make_app(session_factory: async_sessionmaker, hasher: PasswordHasher) -> FastAPI:
+    async def get_session():
+        async with session_factory() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(health_check.router)
+    app.include_router(user.router)
+    app.dependency_overrides[get_async_db] = get_session
+    app.dependency_overrides[get_password_hasher] = lambda: hasher
+    return app
+
+
+async def run_load(app: FastAPI, users: int, logins: int, seconds: float) -> list:
+    statuses: dict[int, int] = {}
+    health_latencies = []
+    deadline = time.perf_counter() + seconds
+
+    async def login_client(client: httpx.AsyncClient, i: int) -> None:
+        while time.perf_counter() < deadline:
+            response = await client.post(
+                "/users/login", json={"email": f"user{i % users}@example.com", "password": PASSWORD}
+            )
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            if response.status_code == 503:
+                await asyncio.sleep(float(response.headers["retry-after"]))
+
+    async def health_client(client: httpx.AsyncClient) -> None:
+        # Latency counts from when the check was due, so time the loop was blocked before sending is included
+        due = time.perf_counter()
+        while due < deadline:
+            await asyncio.sleep(max(due - time.perf_counter(), 0))
+            await client.get("/health")
+            now = time.perf_counter()
+            health_latencies.append((now - due) * 1000)
+            due = max(due + HEALTH_INTERVAL, now)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await asyncio.gather(health_client(client), *(login_client(client, i) for i in range(logins)))
+    return [
+        statuses.get(200, 0) / seconds,
+        statuses.get(503, 0),
+        len(health_latencies),
+        percentile(health_latencies, 50),
+        percentile(health_latencies, 99),
+        max(health_latencies),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=32, help="clients logging in concurrently")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--users", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=min(os.cpu_count() or 1, 4))
+    parser.add_argument("--max-queue", type=int, default=8)
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{Path(directory) / 'bench.db'}"
+        engine = make_engine(url)
+        with ThreadPoolExecutor() as executor:
+            password_hash = list(executor.map(hash_password, [PASSWORD]))[0]
+        with engine.begin() as connection:
+            connection.execute(
+                insert(User),
+                [
+                    {"email": f"user{i}@example.com", "password_hash": password_hash, "user_type": UserType.VOLUNTEER}
+                    for i in range(args.users)
+                ],
+            )
+        engine.dispose()
+
+        variants = [
+            ("inline", InlineHasher(workers=1, max_queue=0)),
+            ("thread pool", PasswordHasher(args.workers, args.max_queue, PasswordHashExecutor.THREAD)),
+            ("process pool", PasswordHasher(args.workers, args.max_queue, PasswordHashExecutor.PROCESS)),
+        ]
+        for name, hasher in variants:
+            aio_engine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://"))
+            app = make_app(async_sessionmaker(bind=aio_engine, expire_on_commit=False), hasher)
+            result = asyncio.run(run_load(app, args.users, args.logins, args.seconds))
+            rows.append([name, *result, hasher.stats.max_queued])
+            hasher.shutdown()
+            asyncio.run(aio_engine.dispose())
+
+    print_table(
+        f"{args.logins} clients logging in for {args.seconds:.0f} s, /health every {HEALTH_INTERVAL * 1000:.0f} ms "
+        f"({args.workers} workers, queue {args.max_queue})",
+        [
+            "bcrypt",
+            "logins/s",
+            "503s",
+            "health checks",
+            "health p50 ms",
+            "health p99 ms",
+            "health max ms",
+            "max queued",
+        ],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
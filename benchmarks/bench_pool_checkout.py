@@ -0,0 +1,139 @@
+"""Checkout latency of the connection pool under contention, per pool size, overflow and pre-ping strategy.
+
+``--threads`` threads handle requests for ``--seconds`` per setting: each
+checks out a connection, runs one query, holds the connection for
+``--hold-ms`` of simulated work and returns it, with ``--think-ms`` between
+requests. Every statement sent to the temporary SQLite file, including
+pre-ping's ``SELECT 1``, is delayed by ``--latency-ms`` to stand in for the
+network round trip to a database server. Checkout latency is read from the
+pool's PoolMetrics, as reported by /health/metrics.
+
+    uv run python -m benchmarks.bench_pool_checkout --threads 32 --latency-ms 1
+"""
+
+import argparse
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from benchmarks.common import print_table
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError
+
+from app.config import PoolPrePing
+from app.db_handler.pool import MeteredQueuePool, instrument_pool, ping_idle_connections
+
+SETTINGS = [
+    # pool_size, max_overflow, pre-ping
+    (5, 10, PoolPrePing.ALWAYS),  # the previous hard-coded settings
+    (5, 10, PoolPrePing.IDLE),
+    (5, 10, PoolPrePing.NEVER),
+    (2, 0, PoolPrePing.IDLE),
+    (5, 0, PoolPrePing.IDLE),
+    (16, 16, PoolPrePing.IDLE),
+]
+
+
+class RemoteCursor:
+    """sqlite3 cursor whose statements take one simulated network round trip."""
+
+    def __init__(self, cursor: sqlite3.Cursor, latency: float):
+        self._cursor = cursor
+        self._latency = latency
+
+    def execute(self, *args):
+        time.sleep(self._latency)
+        return self._cursor.execute(*args)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class RemoteConnection:
+    """sqlite3 connection standing in for a connection to a database server."""
+
+    def __init__(self, path: str, latency: float):
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._latency = latency
+
+    def cursor(self, *args):
+        return RemoteCursor(self._connection.cursor(*args), self._latency)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+def run(path: str, args, pool_size: int, max_overflow: int, pre_ping: PoolPrePing) -> list:
+    latency = args.latency_ms / 1000
+    engine = create_engine(
+        "sqlite://",
+        creator=lambda: RemoteConnection(path, latency),
+        poolclass=MeteredQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=args.timeout,
+        pool_pre_ping=pre_ping == PoolPrePing.ALWAYS,
+    )
+    if pre_ping == PoolPrePing.IDLE:
+        ping_idle_connections(engine, 30.0)
+    metrics = instrument_pool(engine, f"bench-{pool_size}-{max_overflow}-{pre_ping}")
+    requests = 0
+    peak = 0
+    deadline = time.perf_counter() + args.seconds
+
+    def worker() -> None:
+        nonlocal requests, peak
+        while time.perf_counter() < deadline:
+            try:
+                with engine.connect() as connection:
+                    peak = max(peak, metrics.checked_out())
+                    connection.execute(text("SELECT 1"))
+                    time.sleep(args.hold_ms / 1000)
+                requests += 1
+            except TimeoutError:
+                pass
+            time.sleep(args.think_ms / 1000)
+
+    workers = [threading.Thread(target=worker) for _ in range(args.threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    stats = metrics.as_dict()
+    engine.dispose()
+    return [
+        f"{pool_size}+{max_overflow}",
+        str(pre_ping),
+        requests / args.seconds,
+        stats["checkout_wait_ms"]["p50"],
+        stats["checkout_wait_ms"]["p99"],
+        peak,
+        stats["timeouts"],
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--latency-ms", type=float, default=1.0, help="simulated round trip per statement")
+    parser.add_argument("--hold-ms", type=float, default=5.0, help="work done while holding the connection")
+    parser.add_argument("--think-ms", type=float, default=5.0, help="time between a thread's requests")
+    parser.add_argument("--timeout", type=float, default=2.0, help="pool_timeout")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = str(Path(directory) / "bench.db")
+        rows = [run(path, args, *setting) for setting in SETTINGS]
+
+    print_table(
+        f"{args.threads} threads, {args.latency_ms} ms per statement, connections held {args.hold_ms} ms",
+        ["size+overflow", "pre-ping", "requests/s", "checkout p50 ms", "checkout p99 ms", "peak out", "timeouts"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
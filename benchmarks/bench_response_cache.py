@@ -0,0 +1,126 @@
+"""Homepage load: /events/upcoming rendered on every request, from the response cache, or revalidated with 304.
+
+Serves the event routes from a temporary SQLite file with ``--events``
+upcoming events and requests the first page of ``/events/upcoming``, as the
+homepage does, with ``--clients`` concurrent clients for ``--seconds``.
+Variants:
+
+* uncached: every request queries and renders the page (response cache with TTL 0);
+* cached: the default response cache, the body is served from memory;
+* revalidated: clients send the ETag they hold and get 304 without a body.
+
+    uv run python -m benchmarks.bench_response_cache --clients 16 --seconds 5
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import httpx
+from benchmarks.common import make_engine, percentile, print_table
+from fastapi import FastAPI
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db_handler.db_connection import get_async_db, get_async_read_db
+from app.routes import event
+from app.schemas.db_models import Event
+from app.services.response_cache import ResponseCache, get_response_cache
+
+
+def make_app(session_factory: async_sessionmaker, cache: ResponseCache) -> FastAPI:
+    async def get_session():
+        async with session_factory() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(event.router)
+    app.dependency_overrides[get_async_db] = get_session
+    app.dependency_overrides[get_async_read_db] = get_session
+    app.dependency_overrides[get_response_cache] = lambda: cache
+    return app
+
+
+async def run_load(app: FastAPI, clients: int, seconds: float, revalidate: bool) -> list:
+    latencies = []
+    transferred = 0
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        nonlocal transferred
+        headers = {}
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = await client.get("/events/upcoming", headers=headers)
+            latencies.append((time.perf_counter() - start) * 1000)
+            assert response.status_code in (200, 304)
+            transferred += len(response.content)
+            if revalidate:
+                headers = {"If-None-Match": response.headers["etag"]}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        deadline = time.perf_counter() + seconds
+        await asyncio.gather(*(worker(client) for _ in range(clients)))
+    return [
+        len(latencies) / seconds,
+        percentile(latencies, 50),
+        percentile(latencies, 99),
+        transferred / len(latencies) / 1024,
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=10_000)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{Path(directory) / 'bench.db'}"
+        engine = make_engine(url)
+        start = datetime.now() + timedelta(days=1)
+        with engine.begin() as connection:
+            connection.execute(
+                insert(Event),
+                [
+                    {
+                        "name": f"Event {i}",
+                        "description": "Helping out at the local food bank",
+                        "start_date": start + timedelta(minutes=i),
+                        "end_date": start + timedelta(minutes=i + 120),
+                        "signup_start": start - timedelta(days=7),
+                        "signup_end": start,
+                        "location_id": 1 + i % 100,
+                        "organisation_id": 1 + i % 50,
+                        "max_no_of_users": 20,
+                    }
+                    for i in range(args.events)
+                ],
+            )
+        engine.dispose()
+
+        variants = [
+            ("uncached", ResponseCache(ttl=0), False),
+            ("cached", ResponseCache(), False),
+            ("revalidated", ResponseCache(), True),
+        ]
+        for name, cache, revalidate in variants:
+            aio_engine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://"))
+            app = make_app(async_sessionmaker(bind=aio_engine, expire_on_commit=False), cache)
+            rows.append([name, *asyncio.run(run_load(app, args.clients, args.seconds, revalidate))])
+            asyncio.run(aio_engine.dispose())
+
+    print_table(
+        f"/events/upcoming over {args.events} events with {args.clients} clients for {args.seconds:.0f} s",
+        ["variant", "requests/s", "p50 ms", "p99 ms", "KiB/response"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Thundering herd on a popular profile: every caller querying vs concurrent calls coalesced.
+
+Simulates the moment a popular profile drops out of a cache: ``--callers``
+requests, each with its own AsyncSession, ask for the same user's profile at
+once, ``--waves`` times. ``get_user_with_profile_async`` is called once as
+shipped (coalesced with single_flight) and once through ``__wrapped__``.
+Reports the queries run against the temporary SQLite file and the latency of
+a wave.
+
+    uv run python -m benchmarks.bench_single_flight --callers 64 --waves 50
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+from benchmarks.common import make_engine, percentile, print_table
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.crud.user import get_user_with_profile_async, register_volunteer_async
+from app.models.user import UserCreate, VolunteerCreate
+from app.schemas.enums import UserType
+
+
+async def run(url: str, callers: int, waves: int) -> list[list]:
+    engine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://"), pool_size=callers)
+    factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+    async with factory() as session:
+        user, _ = await register_volunteer_async(
+            session,
+            UserCreate(email="popular@example.com", password="SecurePass123", user_type=UserType.VOLUNTEER),
+            VolunteerCreate(
+                first_name="Anna", last_name="Nowak", birth_date=date(1990, 5, 17), phone_number="+48123456789"
+            ),
+            password_hash="hash",
+        )
+
+    queries = 0
+
+    def count(*args):
+        nonlocal queries
+        queries += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+
+    async def call(function):
+        async with factory() as session:
+            return await function(session, user.id)
+
+    rows = []
+    for name, function in [
+        ("every caller queries", get_user_with_profile_async.__wrapped__),
+        ("single flight", get_user_with_profile_async),
+    ]:
+        queries = 0
+        latencies = []
+        for _ in range(waves):
+            start = time.perf_counter()
+            await asyncio.gather(*(call(function) for _ in range(callers)))
+            latencies.append((time.perf_counter() - start) * 1000)
+        rows.append([name, queries / waves, percentile(latencies, 50), percentile(latencies, 99)])
+
+    await engine.dispose()
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--callers", type=int, default=64)
+    parser.add_argument("--waves", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{Path(directory) / 'bench.db'}"
+        make_engine(url).dispose()
+        rows = asyncio.run(run(url, args.callers, args.waves))
+
+    print_table(
+        f"{args.callers} concurrent profile reads of one user, {args.waves} waves",
+        ["variant", "queries/wave", "wave p50 ms", "wave p99 ms"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
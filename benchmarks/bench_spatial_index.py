@@ -0,0 +1,117 @@
+"""Radius search over the location table: naive full scan vs geohash index vs in-memory grid.
+
+Fills an in-memory SQLite database with ``--locations`` random points over
+Poland and times ``--queries`` radius searches per radius with
+
+* the naive approach: load every location and rank all of them by haversine distance,
+* ``query_locations_nearby``: geohash range scans on the indexed column plus a bounding box,
+* ``get_locations_nearby``: the in-memory grid index, loading only the returned rows.
+
+    uv run python -m benchmarks.bench_spatial_index --locations 100000
+"""
+
+import argparse
+import random
+import time
+
+from sqlalchemy import insert
+
+from benchmarks.common import make_engine, make_session, percentile, print_table
+
+from app.crud.location import get_all_locations, get_locations_nearby, query_locations_nearby
+from app.schemas.db_models import Location
+from app.services.spatial_index import location_index
+from app.utils.geo import geohash_encode, haversine_km
+
+# Rough bounding box of Poland
+MIN_LAT, MAX_LAT = 49.0, 54.8
+MIN_LON, MAX_LON = 14.1, 24.1
+
+
+def fill(session, count: int, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        latitude, longitude = rng.uniform(MIN_LAT, MAX_LAT), rng.uniform(MIN_LON, MAX_LON)
+        # Bulk inserts skip mapper events, so the geohash is computed here
+        rows.append(
+            {
+                "name": f"Location {i}",
+                "latitude": latitude,
+                "longitude": longitude,
+                "geohash": geohash_encode(latitude, longitude),
+            }
+        )
+    session.execute(insert(Location), rows)
+    session.commit()
+
+
+def naive_nearby(session, latitude: float, longitude: float, radius_km: float, limit: int = 50):
+    results = []
+    for location in get_all_locations(session):
+        distance = haversine_km(latitude, longitude, location.latitude, location.longitude)
+        if distance <= radius_km:
+            results.append((location, distance))
+    results.sort(key=lambda result: (result[1], result[0].id))
+    return results[:limit]
+
+
+def run(search, session, centres: list[tuple[float, float]], radius_km: float) -> tuple[list[float], int]:
+    samples = []
+    found = 0
+    for latitude, longitude in centres:
+        # A fresh identity map per query, as a request would have
+        session.expunge_all()
+        start = time.perf_counter()
+        found += len(search(session, latitude, longitude, radius_km))
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples, found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--locations", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=50, help="searches per radius and method")
+    parser.add_argument("--naive-queries", type=int, default=5, help="searches per radius for the full scan")
+    parser.add_argument("--radii", type=float, nargs="+", default=[1.0, 5.0, 25.0])
+    args = parser.parse_args()
+
+    session = make_session(make_engine())
+    fill(session, args.locations)
+
+    start = time.perf_counter()
+    location_index.get(session)
+    build_seconds = time.perf_counter() - start
+
+    rng = random.Random(1)
+    centres = [(rng.uniform(MIN_LAT, MAX_LAT), rng.uniform(MIN_LON, MAX_LON)) for _ in range(args.queries)]
+
+    rows = []
+    for radius_km in args.radii:
+        for label, search, queries in (
+            ("naive full scan", naive_nearby, centres[: args.naive_queries]),
+            ("geohash index (SQL)", query_locations_nearby, centres),
+            ("in-memory grid", get_locations_nearby, centres),
+        ):
+            samples, found = run(search, session, queries, radius_km)
+            rows.append(
+                [
+                    f"{radius_km:g} km",
+                    label,
+                    len(samples),
+                    found / len(samples),
+                    percentile(samples, 50),
+                    percentile(samples, 95),
+                ]
+            )
+
+    print(f"\nGrid index over {args.locations} locations built in {build_seconds:.2f} s")
+    print_table(
+        f"Radius search, {args.locations} locations",
+        ["radius", "method", "queries", "avg results", "p50 ms", "p95 ms"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
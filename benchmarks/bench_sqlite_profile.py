@@ -0,0 +1,182 @@
+"""Mixed reads and writes on a SQLite file: the previous engine settings vs the production profile.
+
+Fills a temporary SQLite file with ``--users`` volunteers and ``--events``
+upcoming events, then runs ``--threads`` threads for ``--seconds`` per engine.
+Each operation is a write with probability ``--writes`` (register_for_event for
+a new user/event pair) and otherwise a read (a page of /events/upcoming and a
+user's profile). Compared are:
+
+* previous: QueuePool with pre-ping and recycling and SQLite's defaults, i.e.
+  rollback journal, synchronous=FULL and a 2 MB page cache;
+* profile: sqlite_engine_options and apply_sqlite_profile as used by
+  create_db_engine (WAL, synchronous=NORMAL, mmap, 64 MB cache, busy_timeout).
+
+Both run the same CRUD functions, including their retries on "database is locked".
+
+    uv run python -m benchmarks.bench_sqlite_profile --threads 8 --writes 0.2 --seconds 10
+"""
+
+import argparse
+import itertools
+import random
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from benchmarks.common import make_session, percentile, print_table
+from sqlalchemy import Engine, create_engine, insert
+from sqlalchemy.pool import QueuePool
+
+from app.crud.event import get_upcoming_event_page, register_for_event
+from app.crud.user import get_user_with_profile
+from app.db_handler.sqlite_profile import apply_sqlite_profile, lock_retry_stats, sqlite_engine_options
+from app.models.event import EventUserRegistration
+from app.schemas.db_models import Base, Event, Location, User, Volunteer
+from app.schemas.enums import UserType
+
+
+def previous_engine(url: str) -> Engine:
+    """The engine create_db_engine built before the SQLite profile."""
+    return create_engine(url, poolclass=QueuePool, pool_size=5, max_overflow=10, pool_pre_ping=True, pool_recycle=3600)
+
+
+def profile_engine(url: str) -> Engine:
+    engine = create_engine(url, **sqlite_engine_options(url))
+    apply_sqlite_profile(engine)
+    return engine
+
+
+def fill(url: str, users: int, events: int) -> None:
+    engine = profile_engine(url)
+    Base.metadata.create_all(engine)
+    now = datetime.now()
+    with engine.begin() as connection:
+        connection.execute(
+            insert(Location), [{"name": f"Location {i}", "latitude": 50.0, "longitude": 19.9} for i in range(100)]
+        )
+        connection.execute(
+            insert(User),
+            [
+                {"email": f"user{i}@example.com", "password_hash": "hash", "user_type": UserType.VOLUNTEER}
+                for i in range(users)
+            ],
+        )
+        connection.execute(
+            insert(Volunteer),
+            [
+                {
+                    "user_id": i + 1,
+                    "first_name": "Anna",
+                    "last_name": "Nowak",
+                    "birth_date": date(1990, 5, 17),
+                    "phone_number": "+48123456789",
+                }
+                for i in range(users)
+            ],
+        )
+        connection.execute(
+            insert(Event),
+            [
+                {
+                    "name": f"Event {i}",
+                    "description": "",
+                    "start_date": now + timedelta(hours=1 + i),
+                    "end_date": now + timedelta(hours=3 + i),
+                    "signup_start": now,
+                    "signup_end": now + timedelta(hours=1 + i),
+                    "location_id": 1 + i % 100,
+                    "organisation_id": 1 + i % users,
+                    "max_no_of_users": 20,
+                }
+                for i in range(events)
+            ],
+        )
+    # Leave the file in rollback journal mode, as a database created by the previous engine would be
+    with engine.begin() as connection:
+        connection.exec_driver_sql("PRAGMA journal_mode=DELETE")
+    engine.dispose()
+
+
+def run(engine: Engine, threads: int, seconds: float, writes: float, users: int, events: int, pairs) -> list:
+    reads_ms: list[float] = []
+    writes_ms: list[float] = []
+    errors = 0
+    retries = lock_retry_stats.retries
+    deadline = time.perf_counter() + seconds
+
+    def worker(seed: int) -> None:
+        nonlocal errors
+        rng = random.Random(seed)
+        session = make_session(engine)
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                if rng.random() < writes:
+                    user_id, event_id = next(pairs)
+                    register_for_event(session, EventUserRegistration(user_id=user_id, event_id=event_id))
+                    writes_ms.append((time.perf_counter() - start) * 1000)
+                else:
+                    get_upcoming_event_page(session, 20)
+                    get_user_with_profile(session, rng.randint(1, users))
+                    session.rollback()
+                    reads_ms.append((time.perf_counter() - start) * 1000)
+            except Exception:
+                session.rollback()
+                errors += 1
+        session.close()
+
+    workers = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    engine.dispose()
+    return [
+        (len(reads_ms) + len(writes_ms)) / seconds,
+        percentile(reads_ms, 50),
+        percentile(reads_ms, 99),
+        percentile(writes_ms, 50),
+        percentile(writes_ms, 99),
+        lock_retry_stats.retries - retries,
+        errors,
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--events", type=int, default=5_000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--writes", type=float, default=0.2, help="share of operations that write")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    # Every registration is for a new (user, event) pair, shared by both runs
+    lock = threading.Lock()
+    product = itertools.product(range(1, args.events + 1), range(1, args.users + 1))
+
+    def next_pair():
+        with lock:
+            event_id, user_id = next(product)
+        return user_id, event_id
+
+    pairs = iter(next_pair, None)
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        for name, make_engine in [("previous", previous_engine), ("profile", profile_engine)]:
+            url = f"sqlite:///{Path(directory) / f'{name}.db'}"
+            fill(url, args.users, args.events)
+            result = run(make_engine(url), args.threads, args.seconds, args.writes, args.users, args.events, pairs)
+            rows.append([name, *result])
+
+    print_table(
+        f"{args.threads} threads, {args.writes:.0%} writes, {args.seconds:.0f} s per engine",
+        ["engine", "ops/s", "read p50 ms", "read p99 ms", "write p50 ms", "write p99 ms", "lock retries", "errors"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Import time and cold start of the application, each measured in a fresh interpreter.
+
+Every run uses a new SQLite file as database and measures:
+
+* import: ``python -X importtime -c "import app.main"``, the cumulative time
+  of app.main, and whether importing already created the database file;
+* cold start: from spawning ``uvicorn app.main:app`` until the first
+  ``GET /health`` answers 200, i.e. interpreter start, imports, the lifespan's
+  startup and the first request.
+
+The heaviest modules imported by app.main in the last run are listed too.
+
+    uv run python -m benchmarks.bench_startup --runs 5
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+from benchmarks.common import print_table
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def environment(directory: str) -> dict:
+    return {**os.environ, "DB_TYPE": "sqlite", "DB_NAME": str(Path(directory) / "startup.db")}
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int]]:
+    """(module, self µs, cumulative µs) of each line of -X importtime output."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        if self_us.strip().isdigit():
+            # Nested imports are indented by two spaces per level
+            modules.append((name[1:].rstrip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+def heaviest_imports(modules: list[tuple[str, int, int]], root: str) -> list[tuple[str, float]]:
+    """Modules imported by root and the modules they import, by cumulative ms, heaviest first."""
+    # -X importtime lists the modules a module imported right before it
+    end = next(i for i, (name, _, _) in enumerate(modules) if name == root)
+    start = end
+    while start > 0 and modules[start - 1][0].startswith(" "):
+        start -= 1
+    outer = [
+        (name.strip(), cumulative / 1000)
+        for name, _, cumulative in modules[start:end]
+        if len(name) - len(name.lstrip()) <= 4
+    ]
+    return sorted(outer, key=lambda item: -item[1])
+
+
+def measure_import(directory: str) -> tuple[float, bool, list[tuple[str, int, int]]]:
+    env = environment(directory)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"], env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-2000:])
+    modules = parse_importtime(result.stderr)
+    cumulative = next(cumulative for name, _, cumulative in modules if name == "app.main")
+    return cumulative / 1000, Path(env["DB_NAME"]).exists(), modules
+
+
+def measure_cold_start(directory: str, timeout: float) -> float:
+    port = free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=environment(directory),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+                    if response.status == 200:
+                        return (time.perf_counter() - start) * 1000
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.005)
+        raise RuntimeError(f"No /health response within {timeout} s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=30.0, help="longest wait for the first /health response")
+    parser.add_argument("--top", type=int, default=10, help="heaviest imports listed")
+    args = parser.parse_args()
+
+    imports, cold_starts, side_effects = [], [], 0
+    for _ in range(args.runs):
+        with tempfile.TemporaryDirectory() as directory:
+            import_ms, created_database, modules = measure_import(directory)
+            imports.append(import_ms)
+            side_effects += created_database
+        with tempfile.TemporaryDirectory() as directory:
+            cold_starts.append(measure_cold_start(directory, args.timeout))
+
+    print_table(
+        f"{args.runs} runs, fresh interpreter and database each",
+        ["measure", "median ms", "min ms", "max ms"],
+        [
+            ["import app.main", statistics.median(imports), min(imports), max(imports)],
+            ["cold start to first /health", statistics.median(cold_starts), min(cold_starts), max(cold_starts)],
+        ],
+    )
+    print(f"\nImports that created the database file: {side_effects} of {args.runs}")
+
+    print_table(
+        f"Heaviest imports of app.main (last run, top {args.top})",
+        ["module", "cumulative ms"],
+        [[name, ms] for name, ms in heaviest_imports(modules, "app.main")[: args.top]],
+    )
+
+
+if __name__ == "__main__":
+    main()
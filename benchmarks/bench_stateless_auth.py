@@ -0,0 +1,108 @@
+"""/users/me throughput: user loaded on every request, from the user cache, or built from the token's claims.
+
+Serves the user routes from a temporary SQLite file and calls ``/users/me``
+with ``--clients`` concurrent clients, each holding a token of its own user,
+for ``--seconds``. Variants:
+
+* database: the user is queried on every request (user cache with TTL 0);
+* cached: the default stateful mode with the user cache;
+* stateless: AUTH_STATELESS, the principal comes from the signed claims.
+
+    uv run python -m benchmarks.bench_stateless_auth --clients 16 --seconds 5
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+from benchmarks.common import make_engine, percentile, print_table
+from fastapi import FastAPI
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+
+from app.db_handler.db_connection import get_async_db
+from app.routes import user
+from app.schemas.db_models import User
+from app.schemas.enums import UserType
+from app.services.user_cache import UserCache, get_user_cache
+from app.utils import auth
+from app.utils.auth import create_access_token, profile_claims
+
+
+def make_app(session_factory: async_sessionmaker, cache: UserCache) -> FastAPI:
+    async def get_session():
+        async with session_factory() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(user.router)
+    app.dependency_overrides[get_async_db] = get_session
+    app.dependency_overrides[get_user_cache] = lambda: cache
+    return app
+
+
+async def run_load(app: FastAPI, tokens: list[str], seconds: float) -> list:
+    latencies = []
+    deadline = time.perf_counter() + seconds
+
+    async def worker(client: httpx.AsyncClient, token: str) -> None:
+        headers = {"Authorization": f"Bearer {token}"}
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = await client.get("/users/me", headers=headers)
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await asyncio.gather(*(worker(client, token) for token in tokens))
+    return [len(latencies) / seconds, percentile(latencies, 50), percentile(latencies, 99)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{Path(directory) / 'bench.db'}"
+        engine = make_engine(url)
+        with engine.begin() as connection:
+            connection.execute(
+                insert(User),
+                [
+                    {"email": f"user{i}@example.com", "password_hash": "x", "user_type": UserType.VOLUNTEER}
+                    for i in range(args.clients)
+                ],
+            )
+        with Session(engine) as session:
+            tokens = [create_access_token(profile_claims(row)) for row in session.scalars(select(User))]
+        engine.dispose()
+
+        variants = [
+            ("database", UserCache(ttl=0), False),
+            ("cached", UserCache(), False),
+            ("stateless", UserCache(), True),
+        ]
+        for name, cache, stateless in variants:
+            auth.AUTH_STATELESS = stateless
+            aio_engine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://"))
+            app = make_app(async_sessionmaker(bind=aio_engine, expire_on_commit=False), cache)
+            rows.append([name, *asyncio.run(run_load(app, tokens, args.seconds))])
+            asyncio.run(aio_engine.dispose())
+
+    print_table(
+        f"/users/me with {args.clients} clients for {args.seconds:.0f} s",
+        ["authentication", "requests/s", "p50 ms", "p99 ms"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
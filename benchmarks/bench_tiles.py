@@ -0,0 +1,146 @@
+"""Throughput of the pure-Python MVT encoder and of the /tiles endpoint's render and cache paths.
+
+Measures raw layer encoding (features per second), then loads ``--locations``
+random locations around Kraków into in-memory SQLite and, per zoom level, renders
+the tiles around Kraków cold, reads them back from the on-disk cache, and
+compares the tile size with the same features as GeoJSON. Finally times the
+invalidation after commits of one and of many changed locations.
+
+    uv run python -m benchmarks.bench_tiles --locations 100000
+"""
+
+import argparse
+import json
+import random
+import tempfile
+import time
+
+from benchmarks.common import make_engine, make_session, percentile, print_table
+from sqlalchemy import insert
+
+from app.schemas.db_models import Location
+from app.services.clustering import Cluster, cluster_index, project
+from app.services.tiles import TILE_BUFFER, TileCache, render_tile, tile_box
+from app.utils.mvt import DEFAULT_EXTENT, PointFeature, encode_layer, encode_tile
+
+CENTRE = (50.0614, 19.9366)
+
+
+def tiles_around(z: int, radius: int) -> list[tuple[int, int, int]]:
+    """The (2 * radius + 1)^2 tiles around CENTRE at zoom level z."""
+    x, y = project(*CENTRE)
+    size = 1 << z
+    cx, cy = int(x * size), int(y * size)
+    return [
+        (z, tx, ty)
+        for tx in range(max(cx - radius, 0), min(cx + radius, size - 1) + 1)
+        for ty in range(max(cy - radius, 0), min(cy + radius, size - 1) + 1)
+    ]
+
+
+def geojson_size(clusters: list[Cluster]) -> int:
+    """Size of the same features as the compact GeoJSON of /locations/clusters."""
+    features = [
+        {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [cluster.longitude, cluster.latitude]},
+            "properties": {"point_count": cluster.count, "id": cluster.location_id},
+        }
+        for cluster in clusters
+    ]
+    return len(json.dumps({"type": "FeatureCollection", "features": features}, separators=(",", ":")))
+
+
+def bench_encoder(count: int) -> list:
+    rng = random.Random(0)
+    features = [
+        PointFeature(
+            rng.randrange(4096),
+            rng.randrange(4096),
+            {"cluster": False, "name": f"Szkoła Podstawowa nr {i}", "category": rng.choice(["event", "organisation"])},
+            id=i,
+        )
+        for i in range(count)
+    ]
+    start = time.perf_counter()
+    data = encode_tile([encode_layer("locations", features)])
+    seconds = time.perf_counter() - start
+    return [count, seconds * 1000, count / seconds, len(data) / count]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--locations", type=int, default=100_000)
+    parser.add_argument("--zooms", type=int, nargs="+", default=[6, 9, 12, 14, 16])
+    parser.add_argument("--radius", type=int, default=2, help="tiles around the centre per axis")
+    args = parser.parse_args()
+
+    encoder_rows = [bench_encoder(count) for count in (1_000, 10_000, 50_000)]
+
+    rng = random.Random(42)
+    engine = make_engine()
+    session = make_session(engine)
+    rows = [
+        {"name": f"Lokalizacja {i}", "latitude": rng.gauss(CENTRE[0], 1.0), "longitude": rng.gauss(CENTRE[1], 1.5)}
+        for i in range(args.locations)
+    ]
+    session.execute(insert(Location), rows)
+    session.commit()
+    start = time.perf_counter()
+    cluster_index.get(session)
+    index_seconds = time.perf_counter() - start
+
+    render_rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        cache = TileCache(directory, max_zoom=max(args.zooms))
+        for z in args.zooms:
+            tiles = tiles_around(z, args.radius)
+            cold, hot, sizes, geojson_sizes = [], [], [], []
+            for tile in tiles:
+                generation = cache.generation
+                start = time.perf_counter()
+                data = render_tile(session, *tile)
+                cache.put(*tile, data, generation)
+                cold.append((time.perf_counter() - start) * 1000)
+                start = time.perf_counter()
+                cache.get(*tile)
+                hot.append((time.perf_counter() - start) * 1000)
+                sizes.append(len(data))
+            for z_, x, y in tiles:
+                box = tile_box(z_, x, y, TILE_BUFFER / DEFAULT_EXTENT)
+                geojson_sizes.append(geojson_size(cluster_index.get(session).get_clusters(box, z_)))
+            render_rows.append(
+                [
+                    z,
+                    len(tiles),
+                    percentile(cold, 50),
+                    percentile(cold, 95),
+                    1000 / (sum(cold) / len(cold)),
+                    percentile(hot, 50),
+                    sum(sizes) / len(sizes) / 1024,
+                    sum(geojson_sizes) / len(geojson_sizes) / 1024,
+                ]
+            )
+
+        invalidation_rows = []
+        for changed in (1, 100, 1000):
+            for z in args.zooms:
+                for tile in tiles_around(z, args.radius):
+                    cache.put(*tile, b"x", cache.generation)
+            points = [(rng.gauss(CENTRE[0], 0.05), rng.gauss(CENTRE[1], 0.05)) for _ in range(changed)]
+            start = time.perf_counter()
+            deleted = cache.invalidate(points)
+            invalidation_rows.append([changed, (time.perf_counter() - start) * 1000, deleted])
+
+    print_table("MVT encoder", ["features", "ms", "features/s", "bytes/feature"], encoder_rows)
+    print(f"\nCluster index over {args.locations} locations built in {index_seconds:.2f} s")
+    print_table(
+        f"Tiles around Kraków ({args.locations} locations)",
+        ["zoom", "tiles", "cold p50 ms", "cold p95 ms", "cold tiles/s", "cached p50 ms", "avg KB", "GeoJSON KB"],
+        render_rows,
+    )
+    print_table("Invalidation", ["changed locations", "ms", "tiles deleted"], invalidation_rows)
+
+
+if __name__ == "__main__":
+    main()
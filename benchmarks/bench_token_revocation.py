@@ -0,0 +1,77 @@
+"""Per-request cost of the token revocation check.
+
+Fills a RevocationStore with ``--revoked`` revocations spread over the access
+token lifetime, then times ``is_revoked`` for tokens that were never revoked
+(the common case), for revoked ones, and for tokens whose expiry bucket holds
+no revocations, next to a plain set lookup. The last rows time
+``decode_access_token`` for a token whose claims are cached, with and without
+the revocation check, which is the overhead every authenticated request pays.
+
+    uv run python -m benchmarks.bench_token_revocation --revoked 100000
+"""
+
+import argparse
+import random
+import secrets
+import time
+import timeit
+
+from benchmarks.common import print_table
+
+from app.config import JWT_ACCESS_TOKEN_EXPIRE_MINUTES
+from app.services import token_revocation
+from app.services.token_revocation import RevocationStore
+from app.utils import auth
+from app.utils.auth import create_access_token, decode_access_token
+
+
+def per_call_us(function, number: int) -> float:
+    """Best of five runs, in microseconds per call."""
+    return min(timeit.repeat(function, number=number, repeat=5)) / number * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--revoked", type=int, default=100_000)
+    parser.add_argument("--number", type=int, default=100_000, help="calls per timing run")
+    args = parser.parse_args()
+
+    lifetime = JWT_ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    now = time.time()
+    # Sized so each bucket is near its Bloom filter capacity
+    store = RevocationStore(bloom_capacity=max(args.revoked // (lifetime // 60), 1))
+    revoked = [(secrets.token_urlsafe(16), now + random.uniform(60, lifetime)) for _ in range(args.revoked)]
+    for jti, expires_at in revoked:
+        store.revoke(jti, expires_at)
+    jtis = {jti for jti, _ in revoked}
+
+    valid_jti, valid_exp = secrets.token_urlsafe(16), now + lifetime / 2
+    revoked_jti, revoked_exp = revoked[0]
+    empty_exp = now + lifetime + 3600
+
+    rows = [
+        ["is_revoked, not revoked", per_call_us(lambda: store.is_revoked(valid_jti, valid_exp), args.number)],
+        ["is_revoked, revoked", per_call_us(lambda: store.is_revoked(revoked_jti, revoked_exp), args.number)],
+        ["is_revoked, empty bucket", per_call_us(lambda: store.is_revoked(valid_jti, empty_exp), args.number)],
+        ["set lookup (reference)", per_call_us(lambda: valid_jti in jtis, args.number)],
+    ]
+
+    token = create_access_token({"sub": "1"})
+    decode_access_token(token)
+    for label, checked_store in [("no revocations", RevocationStore()), (f"{args.revoked} revoked", store)]:
+        auth.revocation_store = token_revocation.revocation_store = checked_store
+        rows.append([f"cached decode, {label}", per_call_us(lambda: decode_access_token(token), args.number)])
+    without_check = auth._check_not_revoked
+    auth._check_not_revoked = lambda payload: None
+    rows.append(["cached decode, check disabled", per_call_us(lambda: decode_access_token(token), args.number)])
+    auth._check_not_revoked = without_check
+
+    print_table(
+        f"Token revocation with {args.revoked} revoked tokens, false positives: {store.stats.false_positives}",
+        ["operation", "us per call"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
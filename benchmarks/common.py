@@ -0,0 +1,62 @@
+"""Shared helpers for the benchmark scripts.
+
+Benchmarks are run from the repository root as modules, e.g.::
+
+    uv run python -m benchmarks.bench_geocode_cache
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+# Benchmarks never touch the configured database; set this before importing the app
+os.environ.setdefault("DB_TYPE", "sqlite")
+os.environ.setdefault("DB_NAME", ":memory:")
+
+from sqlalchemy import create_engine, Engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker, Session  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.schemas.db_models import Base  # noqa: E402
+
+
+def make_engine(url: str = "sqlite:///:memory:") -> Engine:
+    """Create an engine with all tables created, sharing one connection for in-memory SQLite."""
+    if url == "sqlite:///:memory:":
+        engine = create_engine(url, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    else:
+        engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    return engine
+
+
+def make_session(engine: Engine) -> Session:
+    return sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)()
+
+
+@contextmanager
+def timed(label: str, results: dict):
+    """Store the wall-clock duration of the block in results[label] (seconds)."""
+    start = time.perf_counter()
+    yield
+    results[label] = time.perf_counter() - start
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Return the pct-th percentile (0-100) of samples using nearest-rank."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def print_table(title: str, header: list[str], rows: list[list]) -> None:
+    """Print rows as a fixed-width table."""
+    cells = [[str(c) for c in header]] + [[f"{c:.3f}" if isinstance(c, float) else str(c) for c in r] for r in rows]
+    widths = [max(len(row[i]) for row in cells) for i in range(len(header))]
+    print(f"\n{title}")
+    for idx, row in enumerate(cells):
+        print("  ".join(c.ljust(w) for c, w in zip(row, widths)))
+        if idx == 0:
+            print("  ".join("-" * w for w in widths))
@@ -1,12 +1,14 @@
 """Pytest configuration and fixtures for testing."""
 
+import asyncio
 import os
 import pytest
 from contextlib import asynccontextmanager
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from fastapi.testclient import TestClient
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 from fastapi import FastAPI
 
 # Set test database configuration before importing app
@@ -14,21 +16,49 @@ os.environ["DB_TYPE"] = "sqlite"
 os.environ["DB_NAME"] = ":memory:"
 
 from app.schemas.db_models import Base
-from app.db_handler.db_connection import get_db
+from app.db_handler.db_connection import get_async_db, get_async_read_db, get_db, get_read_db
+from app.db_handler.db_util import alias_engine
+from app.routes.health_check import get_metrics_token
+from app.services.login_limiter import LoginLimiter, get_login_limiter
+from app.services.response_cache import ResponseCache, get_response_cache
+
+METRICS_TEST_TOKEN = "test-metrics-token"
 
 
 @pytest.fixture(scope="function")
-def test_engine():
-    """Create a test database engine with proper SQLite configuration."""
+def test_engine(tmp_path_factory):
+    """
+    Create a test database engine with proper SQLite configuration.
+
+    The database is a file in WAL mode so that async_test_engine sees the same
+    committed data while the synchronous side keeps a single shared connection.
+    """
     engine = create_engine(
-        "sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool, echo=False
+        f"sqlite:///{tmp_path_factory.mktemp('db') / 'test.db'}",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+        echo=False,
     )
+
+    @event.listens_for(engine, "connect")
+    def set_wal_mode(dbapi_connection, connection_record):
+        dbapi_connection.execute("PRAGMA journal_mode=WAL")
+
     Base.metadata.create_all(engine)
     yield engine
     Base.metadata.drop_all(engine)
     engine.dispose()
 
 
+@pytest.fixture(scope="function")
+def async_test_engine(test_engine):
+    """Create an aiosqlite engine on the database of test_engine, sharing its in-memory indexes."""
+    engine = create_async_engine(test_engine.url.set(drivername="sqlite+aiosqlite"), poolclass=NullPool)
+    alias_engine(engine.sync_engine, test_engine)
+    yield engine
+    asyncio.run(engine.dispose())
+
+
 @pytest.fixture(scope="function")
 def test_db(test_engine):
     """Create a test database session."""
@@ -39,7 +69,7 @@ def test_db(test_engine):
 
 
 @pytest.fixture(scope="function")
-def test_app(test_db):
+def test_app(test_db, async_test_engine):
     """Create a test FastAPI app without lifespan events."""
 
     # Create a minimal lifespan that doesn't init the database
@@ -48,7 +78,7 @@ def test_app(test_db):
         yield
 
     # Import routers
-    from app.routes import user, health_check, navigation
+    from app.routes import user, health_check, navigation, event, location, tiles
 
     # Create new app instance for testing
     app = FastAPI(
@@ -62,6 +92,9 @@ def test_app(test_db):
     app.include_router(health_check.router)
     app.include_router(user.router)
     app.include_router(navigation.router)
+    app.include_router(event.router)
+    app.include_router(location.router)
+    app.include_router(tiles.router)
 
     # Override the database dependency
     def override_get_db():
@@ -70,7 +103,25 @@ def test_app(test_db):
         finally:
             pass
 
+    AsyncTestingSessionLocal = async_sessionmaker(bind=async_test_engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with AsyncTestingSessionLocal() as session:
+            yield session
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    # Without a replica, reads use the same database
+    app.dependency_overrides[get_read_db] = override_get_db
+    app.dependency_overrides[get_async_read_db] = override_get_async_db
+    # Every test starts without recorded login attempts
+    login_limiter = LoginLimiter()
+    app.dependency_overrides[get_login_limiter] = lambda: login_limiter
+    # ...and with no cached responses
+    response_cache = ResponseCache()
+    app.dependency_overrides[get_response_cache] = lambda: response_cache
+    # /health/metrics is enabled with a known token
+    app.dependency_overrides[get_metrics_token] = lambda: METRICS_TEST_TOKEN
 
     yield app
 
@@ -82,3 +133,9 @@ def client(test_app):
     """Create a test client."""
     with TestClient(test_app, raise_server_exceptions=False) as test_client:
         yield test_client
+
+
+@pytest.fixture
+def metrics_headers():
+    """Authorization headers accepted by /health/metrics in test_app."""
+    return {"Authorization": f"Bearer {METRICS_TEST_TOKEN}"}
@@ -0,0 +1,164 @@
+"""Tests for Polish address normalization."""
+
+import os
+
+import pandas as pd
+import pytest
+
+from app.utils.address import STREET_TYPES, address_key, format_address, normalize_address, strip_diacritics
+
+SCHOOLS_CSV = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.realpath(__file__))),
+    "data",
+    "Szkoły podstawowe samorządowe w roku 2023-2024 - liczba uczniów (2025-10-04 23-03-03).csv",
+)
+
+
+def raw_key(address: str) -> str:
+    """Cache key used before normalization: lower-cased with collapsed whitespace."""
+    return " ".join(address.lower().split())
+
+
+def address_variants(street: str, house_number: str, postal_code: str, city: str) -> list[str]:
+    """The shapes one school address arrives in from forms and other imports."""
+    # Shortened the way people write it: "Mieczysława Wrony" -> "Wrony", "Osiedle Na Stoku" -> "Osiedle Stoku"
+    words = street.split()
+    prefix = [words.pop(0)] if words[0].lower().rstrip(".") in STREET_TYPES and len(words) > 1 else []
+    short = " ".join(prefix + words[-2:] if words[-1].isdigit() else prefix + words[-1:])
+    return [
+        f"ul. {street} {house_number}, {city}",
+        f"{street}  {house_number} , {city}",
+        f"{postal_code} {city}, {short} {house_number}",
+        strip_diacritics(f"{street} {house_number}, {postal_code} {city}").upper(),
+    ]
+
+
+def cache_hit_rate(addresses: list[str], key) -> float:
+    """Fraction of lookups served by a cache keyed with ``key`` that sees every address once."""
+    seen = set()
+    hits = 0
+    for address in addresses:
+        k = key(address)
+        hits += k in seen
+        seen.add(k)
+    return hits / len(addresses)
+
+
+class TestNormalizeAddress:
+    """Test cases for normalize_address."""
+
+    @pytest.mark.parametrize(
+        "address",
+        [
+            "ul. Mieczysława Wrony 115, Kraków",
+            "Mieczysława Wrony 115 , Kraków",
+            "30-399 Kraków, Mieczysława Wrony 115",
+            "ULICA MIECZYSLAWA WRONY 115, KRAKOW",
+            "Mieczysława Wrony 115, 30 399 Kraków",
+            "ul. Mieczysława Wrony 115 Kraków",
+        ],
+    )
+    def test_variants_share_a_key(self, address):
+        """Test that common spellings of one address produce the same key."""
+        assert address_key(address) == "krakow|mieczyslawa wrony|115|"
+
+    @pytest.mark.parametrize(
+        ("address", "other"),
+        [
+            ("ul. Józefa 5, Kraków", "ul. Księcia Józefa 5, Kraków"),
+            ("Stary Kleparz 1, Kraków", "Nowy Kleparz 1, Kraków"),
+            ("Mały Rynek 1, Kraków", "Rynek 1, Kraków"),
+            ("30-399 Kraków, Wrony 115", "30-399 Kraków, Mieczysława Wrony 115"),
+        ],
+    )
+    def test_streets_sharing_a_word_do_not_share_a_key(self, address, other):
+        """Test that streets whose names end alike keep distinct keys and only share their alias."""
+        assert address_key(address) != address_key(other)
+        assert normalize_address(address).street_alias == normalize_address(other).street_alias
+
+    def test_city_without_comma(self):
+        """Test that a city written after the house number without a comma is recognised."""
+        normalized = normalize_address("ul. Długa 10 m. 3 Kraków")
+
+        assert (normalized.street, normalized.house_number, normalized.unit) == ("dluga", "10", "3")
+        assert normalized.city == "krakow"
+        assert address_key("ul. Długa 10 Kraków") == address_key("ul. Długa 10, Kraków")
+
+    def test_city_first_without_comma(self):
+        """Test the known limitation: a city written before the street needs a comma."""
+        assert address_key("Kraków ul. Długa 10") != address_key("Kraków, ul. Długa 10")
+
+    def test_parts(self):
+        """Test that every part of a full address is recognised."""
+        normalized = normalize_address("al. Jana Pawła II 37 m. 4, 31-864 Kraków")
+
+        assert normalized.street == "jana pawla ii"
+        assert normalized.street_type == "aleja"
+        assert normalized.street_key == "aleja jana pawla ii"
+        assert normalized.street_alias == "aleja pawla ii"
+        assert normalized.house_number == "37"
+        assert normalized.unit == "4"
+        assert normalized.postal_code == "31-864"
+        assert normalized.city == "krakow"
+
+    @pytest.mark.parametrize("address", ["Dietla 5/4, Kraków", "Dietla 5 lok. 4, Kraków", "Dietla 5 m 4, Kraków"])
+    def test_unit_formats(self, address):
+        """Test that the different ways of writing a flat number are equivalent."""
+        assert address_key(address) == "krakow|dietla|5|4"
+
+    def test_unit_distinguishes_addresses(self):
+        """Test that two flats in one building do not share a key."""
+        assert address_key("Dietla 5/4, Kraków") != address_key("Dietla 5/5, Kraków")
+
+    def test_house_number_range(self):
+        """Test that spaces inside a house number range are dropped."""
+        assert normalize_address("Smoleńsk 5 - 7, Kraków").house_number == "5-7"
+
+    def test_numbered_street_name(self):
+        """Test that a day number in the street name is not taken for the house number."""
+        normalized = normalize_address("29 Listopada 48, Kraków")
+
+        assert normalized.street_key == normalized.street_alias == "29 listopada"
+        assert normalized.house_number == "48"
+
+    def test_address_without_house_number(self):
+        """Test that free-form text falls back to its cleaned form."""
+        assert address_key("Rynek Główny, Kraków") == "rynek glowny krakow"
+
+    def test_format_address_round_trip(self):
+        """Test that addresses built from CSV columns normalize like typed ones."""
+        address = format_address("Mieczysława Wrony", 115, "Kraków", postal_code="30-399")
+
+        assert address == "Mieczysława Wrony 115, 30-399 Kraków"
+        assert address_key(address) == address_key("ul. Mieczysława Wrony 115, Kraków")
+
+
+class TestSchoolsCorpus:
+    """Cache hit rate on the addresses of the schools dataset."""
+
+    @pytest.fixture(scope="class")
+    def corpus(self) -> list[str]:
+        df = pd.read_csv(SCHOOLS_CSV, dtype=str)
+        addresses = []
+        for row in df.itertuples(index=False):
+            street, house_number, city, postal_code = row.Ulica, row[23], row.Miejscowość, row[25]
+            addresses.append(format_address(street, house_number, city, postal_code=postal_code))
+            addresses.extend(address_variants(street, house_number, postal_code, city))
+        return addresses
+
+    def test_every_school_address_is_parsed(self):
+        """Test that each address of the dataset yields a street and a house number."""
+        df = pd.read_csv(SCHOOLS_CSV, dtype=str)
+        for row in df.itertuples(index=False):
+            normalized = normalize_address(format_address(row.Ulica, row[23], row.Miejscowość, postal_code=row[25]))
+            assert normalized.street and normalized.house_number
+
+    def test_hit_rate_improves(self, corpus):
+        """Test that normalized keys turn every variant but the shortened street name into a cache hit."""
+        # The shortened street name only shares a key for streets named with one word
+        variants_per_address = 3 / 5
+        raw = cache_hit_rate(corpus, raw_key)
+        normalized = cache_hit_rate(corpus, address_key)
+
+        assert raw < 0.1
+        assert normalized > variants_per_address
@@ -0,0 +1,230 @@
+"""Tests for the asyncio database layer and the async CRUD operations."""
+
+import threading
+from datetime import date, datetime, timedelta
+
+import pytest
+from fastapi import status
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.crud.event import get_upcoming_events_async
+from app.crud.location import add_address_async, get_all_locations_async, get_locations_nearby_async
+from app.crud.user import (
+    delete_user_async,
+    get_user_by_email_async,
+    get_user_by_id_async,
+    get_user_with_profile_async,
+    get_volunteer_by_user_id_async,
+    register_volunteer_async,
+    update_volunteer_async,
+    update_volunteer,
+)
+from app.db_handler.db_util import ConnectionStringBuilder, DBType, canonical_engine
+from app.models.location import AddLocation
+from app.models.user import UserCreate, VolunteerCreate, VolunteerUpdate
+from app.schemas.db_models import Event, Location
+from app.schemas.enums import UserType
+from app.services.geocode_cache import geocode_cache
+from app.services.spatial_index import location_index
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def async_session_factory(async_test_engine) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(bind=async_test_engine, autoflush=False, expire_on_commit=False)
+
+
+def make_volunteer(email: str = "anna@example.com") -> tuple[UserCreate, VolunteerCreate]:
+    user_data = UserCreate(email=email, password="SecurePass123", user_type=UserType.VOLUNTEER)
+    volunteer_data = VolunteerCreate(
+        first_name="Anna", last_name="Nowak", birth_date=date(1990, 5, 17), phone_number="+48123456789"
+    )
+    return user_data, volunteer_data
+
+
+class TestConnectionStringBuilder:
+    """Test cases for the async driver URLs."""
+
+    def test_sqlite_async_driver(self):
+        """Test that SQLite uses aiosqlite."""
+        url = ConnectionStringBuilder.build(DBType.SQLITE, "app.db", async_driver=True)
+
+        assert url == "sqlite+aiosqlite:///app.db"
+
+    def test_postgresql_async_driver(self):
+        """Test that PostgreSQL uses asyncpg and keeps the credentials."""
+        url = ConnectionStringBuilder.build(DBType.POSTGRESQL, "app", "user", "secret", "db", 5432, async_driver=True)
+
+        assert url == "postgresql+asyncpg://user:secret@db:5432/app"
+
+
+@pytest.mark.anyio
+class TestAsyncUserCrud:
+    """Test cases for the async user CRUD operations."""
+
+    async def test_register_and_read(self, async_session_factory):
+        """Test registering a volunteer and reading it back with native awaits."""
+        async with async_session_factory() as session:
+            user, volunteer = await register_volunteer_async(session, *make_volunteer(), password_hash="hash")
+
+        async with async_session_factory() as session:
+            by_id = await get_user_by_id_async(session, user.id)
+            by_email = await get_user_by_email_async(session, "anna@example.com")
+            profile = await get_volunteer_by_user_id_async(session, user.id)
+
+        assert by_id.email == by_email.email == "anna@example.com"
+        assert profile.id == volunteer.id
+        assert profile.first_name == "Anna"
+
+    async def test_profile_is_loaded_before_returning(self, async_session_factory):
+        """Test that the profile relationship can be read after the session is closed."""
+        async with async_session_factory() as session:
+            user, _ = await register_volunteer_async(session, *make_volunteer(), password_hash="hash")
+
+        async with async_session_factory() as session:
+            loaded = await get_user_with_profile_async(session, user.id)
+
+        assert loaded.volunteer.last_name == "Nowak"
+
+    async def test_update_and_delete(self, async_session_factory):
+        """Test the operations bridged through run_sync commit their changes."""
+        async with async_session_factory() as session:
+            user, _ = await register_volunteer_async(session, *make_volunteer(), password_hash="hash")
+            updated = await update_volunteer_async(session, user.id, VolunteerUpdate(first_name="Ania"))
+            assert updated.first_name == "Ania"
+            assert await delete_user_async(session, user.id)
+
+        async with async_session_factory() as session:
+            assert await get_user_by_id_async(session, user.id) is None
+            assert not await delete_user_async(session, user.id)
+
+    async def test_duplicate_email_is_rolled_back(self, async_session_factory):
+        """Test that a failed registration leaves the session usable."""
+        async with async_session_factory() as session:
+            await register_volunteer_async(session, *make_volunteer(), password_hash="hash")
+            with pytest.raises(ValueError):
+                await register_volunteer_async(session, *make_volunteer(), password_hash="hash")
+
+            assert await get_user_by_email_async(session, "anna@example.com") is not None
+
+
+@pytest.mark.anyio
+class TestAsyncEventAndLocationCrud:
+    """Test cases for the async event and location reads."""
+
+    async def test_upcoming_events_with_location(self, test_db, async_session_factory):
+        """Test that upcoming events come with their location loaded and past ones are left out."""
+        start = datetime.now() + timedelta(days=2)
+        for name, begins in (("Sprzątanie Plant", start), ("Stare", start - timedelta(days=5))):
+            test_db.add(
+                Event(
+                    name=name,
+                    description="",
+                    start_date=begins,
+                    end_date=begins + timedelta(hours=2),
+                    signup_start=begins - timedelta(days=1),
+                    signup_end=begins,
+                    location=Location(name=name, latitude=50.06, longitude=19.94),
+                    organisation_id=1,
+                    max_no_of_users=10,
+                )
+            )
+        test_db.commit()
+
+        async with async_session_factory() as session:
+            events = await get_upcoming_events_async(session)
+
+        assert [event.name for event in events] == ["Sprzątanie Plant"]
+        assert events[0].location.name == "Sprzątanie Plant"
+
+    async def test_engines_share_the_spatial_index(
+        self, test_engine, test_db, async_test_engine, async_session_factory
+    ):
+        """Test that the async engine reuses the index of the synchronous one and sees its commits."""
+        test_db.add(Location(name="Rynek", latitude=50.0617, longitude=19.9373))
+        test_db.commit()
+
+        async with async_session_factory() as session:
+            nearby = await get_locations_nearby_async(session, 50.06, 19.94, 1.0)
+            locations = await get_all_locations_async(session)
+
+        assert canonical_engine(async_test_engine.sync_engine) is test_engine
+        assert location_index.peek(async_test_engine.sync_engine) is location_index.peek(test_engine)
+        assert [location.name for location, _ in nearby] == ["Rynek"]
+        assert len(locations) == 1
+
+    async def test_add_address_geocodes_off_the_event_loop(self, async_session_factory):
+        """Test that the blocking geocoder runs in a worker thread and its result is cached."""
+        loop_thread = threading.get_ident()
+        geocoder_threads = []
+
+        def geocoder(address: str) -> tuple[float, float]:
+            geocoder_threads.append(threading.get_ident())
+            return (50.0617, 19.9373)
+
+        data = AddLocation(address="Rynek Główny 1, Kraków", location_name="Sukiennice")
+        geocode_cache.clear_memory()
+        try:
+            async with async_session_factory() as session:
+                first = await add_address_async(session, data, geocoder=geocoder)
+                second = await add_address_async(session, data, geocoder=geocoder)
+                with pytest.raises(ValueError):
+                    await add_address_async(
+                        session, AddLocation(address="Nowhere 1", location_name="?"), lambda _: None
+                    )
+        finally:
+            geocode_cache.clear_memory()
+
+        assert (first.latitude, first.longitude) == (second.latitude, second.longitude) == (50.0617, 19.9373)
+        assert len(geocoder_threads) == 1
+        assert geocoder_threads[0] != loop_thread
+
+
+class TestAsyncRoutes:
+    """Test cases for routes served through get_async_db."""
+
+    def test_register_login_and_profile(self, client):
+        """Test that the async user routes and the async current-user dependency work end to end."""
+        registration = {
+            "user": {"email": "jan@example.com", "password": "SecurePass123", "user_type": "volunteer"},
+            "volunteer": {
+                "first_name": "Jan",
+                "last_name": "Kowalski",
+                "birth_date": "1990-05-17",
+                "phone_number": "+48123456789",
+            },
+        }
+        created = client.post("/users/register/volunteer", json=registration)
+        login = client.post("/users/login", json={"email": "jan@example.com", "password": "SecurePass123"})
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+        profile = client.get("/users/me/profile", headers=headers)
+
+        assert created.status_code == status.HTTP_201_CREATED
+        assert login.status_code == status.HTTP_200_OK
+        assert profile.status_code == status.HTTP_200_OK
+        assert profile.json()["volunteer"]["last_name"] == "Kowalski"
+
+    def test_route_sees_synchronous_commits(self, client, test_db):
+        """Test that changes committed through the synchronous session are visible to async routes."""
+        registration = {
+            "user": {"email": "ola@example.com", "password": "SecurePass123", "user_type": "volunteer"},
+            "volunteer": {
+                "first_name": "Ola",
+                "last_name": "Wiśniewska",
+                "birth_date": "1990-05-17",
+                "phone_number": "+48123456789",
+            },
+        }
+        user_id = client.post("/users/register/volunteer", json=registration).json()["user"]["id"]
+        login = client.post("/users/login", json={"email": "ola@example.com", "password": "SecurePass123"})
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+        update_volunteer(test_db, user_id, VolunteerUpdate(last_name="Zielińska"))
+        profile = client.get(f"/users/{user_id}/profile", headers=headers)
+
+        assert profile.status_code == status.HTTP_200_OK
+        assert profile.json()["volunteer"]["last_name"] == "Zielińska"
@@ -0,0 +1,169 @@
+"""Tests for the server-side location clustering."""
+
+import random
+from collections import Counter
+
+import pytest
+from fastapi import status
+
+from app.schemas.db_models import Location
+from app.services.clustering import LocationClusterIndex, cluster_index, project
+
+WORLD = (-85.0, -180.0, 85.0, 180.0)
+POLAND = (49.0, 14.1, 54.8, 24.1)
+
+
+def random_points(count: int, seed: int = 0) -> list[tuple[int, float, float]]:
+    rng = random.Random(seed)
+    return [(i, rng.uniform(49.0, 54.8), rng.uniform(14.1, 24.1)) for i in range(1, count + 1)]
+
+
+def brute_force_counts(points, zoom: int, cell_bits: int) -> Counter:
+    """Number of points per grid cell, computed point by point."""
+    size = 1 << (zoom + cell_bits)
+    counts = Counter()
+    for _, latitude, longitude in points:
+        x, y = project(latitude, longitude)
+        counts[(int(x * size), int(y * size))] += 1
+    return counts
+
+
+def snapshot(index: LocationClusterIndex, zoom: int) -> list[tuple]:
+    """Comparable view of the clusters of the whole world at a zoom level."""
+    return sorted(
+        (cluster.count, cluster.location_id, round(cluster.latitude, 9), round(cluster.longitude, 9))
+        for cluster in index.get_clusters(WORLD, zoom)
+    )
+
+
+class TestLocationClusterIndex:
+    """Test cases for LocationClusterIndex."""
+
+    def test_zoom_zero_is_one_cluster(self):
+        """Test that all points collapse into one cluster at the centroid on the world view."""
+        index = LocationClusterIndex()
+        index.load(random_points(1000))
+
+        (cluster,) = index.get_clusters(WORLD, 0)
+
+        assert cluster.count == 1000
+        assert 49.0 < cluster.latitude < 54.8 and 14.1 < cluster.longitude < 24.1
+        assert cluster.expansion_zoom == 1
+
+    @pytest.mark.parametrize("zoom", [3, 6, 9, 12, 16])
+    def test_cluster_counts_match_brute_force(self, zoom):
+        """Test that every zoom level has exactly the cells of a point-by-point grid clustering."""
+        points = random_points(2000)
+        index = LocationClusterIndex()
+        index.load(points)
+
+        clusters = index.get_clusters(WORLD, zoom)
+
+        assert sorted(cluster.count for cluster in clusters) == sorted(
+            brute_force_counts(points, zoom, index.cell_bits).values()
+        )
+
+    def test_single_points_keep_id_and_position(self):
+        """Test that a lone point is returned with its id and exact coordinates."""
+        index = LocationClusterIndex()
+        index.load([(7, 50.0614, 19.9366), (8, 52.2297, 21.0122)])
+
+        clusters = sorted(index.get_clusters(POLAND, 10), key=lambda cluster: cluster.location_id)
+
+        assert [cluster.location_id for cluster in clusters] == [7, 8]
+        assert clusters[0].latitude == pytest.approx(50.0614)
+        assert clusters[0].longitude == pytest.approx(19.9366)
+        assert clusters[0].count == 1
+
+    def test_bbox_filters_clusters(self):
+        """Test that only clusters centred inside the viewport are returned."""
+        index = LocationClusterIndex()
+        index.load([(1, 50.0614, 19.9366), (2, 52.2297, 21.0122)])
+
+        clusters = index.get_clusters((50.0, 19.8, 50.1, 20.1), 12)
+
+        assert [cluster.location_id for cluster in clusters] == [1]
+
+    def test_points_above_max_zoom(self):
+        """Test that every point is returned on its own above max_zoom."""
+        index = LocationClusterIndex(max_zoom=10)
+        index.load([(1, 50.0614, 19.9366), (2, 50.0615, 19.9367), (3, 50.5, 19.9)])
+
+        low = index.get_clusters((50.0, 19.8, 50.1, 20.1), 10)
+        high = index.get_clusters((50.0, 19.8, 50.1, 20.1), 11)
+
+        assert [cluster.count for cluster in low] == [2]
+        assert sorted(cluster.location_id for cluster in high) == [1, 2]
+
+    @pytest.mark.parametrize("delta_limit", [10_000, 7])
+    def test_incremental_updates_match_rebuild(self, delta_limit):
+        """Test that inserts, moves and deletes, with or without merges, equal a fresh build."""
+        points = random_points(300)
+        index = LocationClusterIndex(delta_limit=delta_limit)
+        index.load(points[:200])
+
+        current = {location_id: (latitude, longitude) for location_id, latitude, longitude in points[:200]}
+        rng = random.Random(5)
+        for location_id, latitude, longitude in points[200:]:
+            index.upsert(location_id, latitude, longitude)
+            current[location_id] = (latitude, longitude)
+        for location_id in rng.sample(sorted(current), 40):
+            index.remove(location_id)
+            del current[location_id]
+        for location_id in rng.sample(sorted(current), 40):
+            current[location_id] = (rng.uniform(49.0, 54.8), rng.uniform(14.1, 24.1))
+            index.upsert(location_id, *current[location_id])
+
+        rebuilt = LocationClusterIndex()
+        rebuilt.load((location_id, *point) for location_id, point in current.items())
+
+        assert len(index) == len(rebuilt) == len(current)
+        for zoom in (0, 4, 8, 12, 17):
+            assert snapshot(index, zoom) == snapshot(rebuilt, zoom)
+
+    def test_invalid_radius(self):
+        """Test that cells which do not nest across zoom levels are rejected."""
+        with pytest.raises(ValueError):
+            LocationClusterIndex(radius=60, extent=256)
+
+
+class TestClustersRoute:
+    """Test cases for GET /locations/clusters."""
+
+    @pytest.fixture
+    def locations(self, test_db):
+        rows = [Location(name=f"Szkoła {i}", latitude=50.06 + i / 10000, longitude=19.94) for i in range(5)]
+        rows.append(Location(name="Warszawa", latitude=52.2297, longitude=21.0122))
+        test_db.add_all(rows)
+        test_db.commit()
+        return rows
+
+    def test_clusters_and_points(self, client, locations):
+        """Test that nearby schools form a cluster while a distant location stays a point."""
+        response = client.get("/locations/clusters", params={"bbox": "14,49,24,55", "zoom": 8})
+
+        assert response.status_code == status.HTTP_200_OK
+        features = response.json()["features"]
+        clusters = [feature for feature in features if feature["properties"]["cluster"]]
+        points = [feature for feature in features if not feature["properties"]["cluster"]]
+        assert [cluster["properties"]["point_count"] for cluster in clusters] == [5]
+        assert [point["properties"]["name"] for point in points] == ["Warszawa"]
+        assert points[0]["geometry"]["coordinates"] == pytest.approx([21.0122, 52.2297])
+
+    def test_index_follows_commits(self, client, test_db, locations):
+        """Test that locations added after the index was built are clustered."""
+        client.get("/locations/clusters", params={"bbox": "14,49,24,55", "zoom": 8})
+        test_db.add(Location(name="Nowa szkoła", latitude=50.0605, longitude=19.9401))
+        test_db.commit()
+
+        response = client.get("/locations/clusters", params={"bbox": "14,49,24,55", "zoom": 8})
+
+        counts = sorted(feature["properties"].get("point_count", 1) for feature in response.json()["features"])
+        assert counts == [1, 6]
+        assert len(cluster_index.get(test_db)) == 7
+
+    def test_zoom_is_validated(self, client):
+        """Test that the zoom level must be within the supported range."""
+        response = client.get("/locations/clusters", params={"bbox": "14,49,24,55", "zoom": 30})
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
@@ -0,0 +1,147 @@
+"""Tests for the keyset pagination and filters of /events/upcoming."""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import status
+from sqlalchemy import event, text
+
+from app.crud.event import _upcoming_event_page
+from app.schemas.db_models import Event, Location
+from app.utils.pagination import encode_cursor
+
+NEXT = "X-Next-Cursor"
+
+
+@pytest.fixture
+def events(test_db) -> list[Event]:
+    """25 upcoming events of two organisations, several starting at the same time, and 3 past ones."""
+    location = Location(name="Rynek", latitude=50.06, longitude=19.94)
+    base = datetime.now().replace(microsecond=0) + timedelta(days=1)
+    rows = []
+    for i in range(28):
+        begins = base + timedelta(hours=i // 3) if i < 25 else base - timedelta(days=30 + i)
+        rows.append(
+            Event(
+                name=f"Zbiórka {i}" if i % 5 else f"Sprzątanie 100% parku {i}",
+                description="",
+                start_date=begins,
+                end_date=begins + timedelta(hours=2),
+                signup_start=begins - timedelta(days=1),
+                signup_end=begins,
+                location=location,
+                organisation_id=1 + i % 2,
+                max_no_of_users=10,
+            )
+        )
+    test_db.add_all(rows)
+    test_db.commit()
+    return rows
+
+
+def walk(client, **params) -> list[list[dict]]:
+    """Return every page of /events/upcoming for the given parameters."""
+    pages = []
+    cursor = None
+    while True:
+        response = client.get("/events/upcoming", params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == status.HTTP_200_OK
+        pages.append(response.json())
+        cursor = response.headers.get(NEXT)
+        if cursor is None:
+            return pages
+
+
+class TestKeysetPagination:
+    """Test cases for paging through /events/upcoming."""
+
+    def test_pages_cover_every_upcoming_event_once_in_order(self, client, events):
+        """Test that pages, including those splitting events with equal start dates, add up to the full list."""
+        pages = walk(client, limit=4)
+        listed = [item for page in pages for item in page]
+
+        assert [len(page) for page in pages] == [4] * 6 + [1]
+        assert [item["id"] for item in listed] == [
+            e.id for e in sorted(events[:25], key=lambda e: (e.start_date, e.id))
+        ]
+        assert set(listed[0]) == {"id", "name", "description", "start_date", "end_date"}
+
+    def test_exact_last_page_has_no_cursor(self, client, events):
+        """Test that a page ending with the last event does not announce another."""
+        response = client.get("/events/upcoming", params={"limit": 25})
+
+        assert len(response.json()) == 25
+        assert NEXT not in response.headers
+
+    def test_invalid_cursor(self, client, events):
+        """Test that a cursor not issued by the API is rejected."""
+        response = client.get("/events/upcoming", params={"cursor": "not-a-cursor"})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_cursor_with_utc_offset(self, client, events):
+        """Test that a crafted cursor with a timezone-aware date is rejected rather than failing the query."""
+        cursor = encode_cursor(datetime.now(timezone.utc) + timedelta(days=1), 1)
+
+        response = client.get("/events/upcoming", params={"cursor": cursor})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_only_listed_columns_are_selected(self, client, events, async_test_engine):
+        """Test that the query does not load whole Event rows."""
+        statements = []
+        event.listen(
+            async_test_engine.sync_engine,
+            "before_cursor_execute",
+            lambda conn, cursor, statement, *args: statements.append(statement),
+        )
+
+        client.get("/events/upcoming")
+
+        event_queries = [statement for statement in statements if "FROM event" in statement]
+        assert len(event_queries) == 1
+        assert "signup_start" not in event_queries[0]
+        assert "JOIN" not in event_queries[0]
+
+    def test_deep_pages_seek_through_the_index(self, test_db):
+        """Test that SQLite answers the keyset query from the (start_date, id) index."""
+        query = _upcoming_event_page(10, after=(datetime.now() + timedelta(days=3), 7))
+        compiled = query.compile(test_db.get_bind(), compile_kwargs={"literal_binds": True})
+
+        plan = " ".join(row[-1] for row in test_db.execute(text(f"EXPLAIN QUERY PLAN {compiled}")))
+
+        assert "ix_event_start_date_id" in plan
+        assert "TEMP B-TREE" not in plan
+
+
+class TestFilters:
+    """Test cases for the filters of /events/upcoming."""
+
+    def test_organisation(self, client, events):
+        """Test that only the organisation's events are listed, across pages."""
+        listed = [item for page in walk(client, organisation_id=2, limit=5) for item in page]
+
+        assert sorted(item["id"] for item in listed) == sorted(e.id for e in events[:25] if e.organisation_id == 2)
+
+    def test_name_contains_text_literally(self, client, events):
+        """Test that the name filter is case-insensitive and treats % as a character."""
+        response = client.get("/events/upcoming", params={"q": "sprzątanie 100%"})
+
+        assert {item["name"] for item in response.json()} == {f"Sprzątanie 100% parku {i}" for i in range(0, 25, 5)}
+        assert client.get("/events/upcoming", params={"q": "100%%"}).json() == []
+
+    def test_date_range(self, client, events):
+        """Test that start_from and start_to bound the start dates, and past events stay excluded."""
+        start_from = events[3].start_date
+        start_to = events[9].start_date
+
+        listed = client.get(
+            "/events/upcoming",
+            params={"start_from": start_from.isoformat(), "start_to": start_to.isoformat()},
+        ).json()
+        everything = client.get(
+            "/events/upcoming", params={"start_from": (start_from - timedelta(days=365)).isoformat()}
+        ).json()
+
+        assert [item["id"] for item in listed] == [e.id for e in events[3:9]]
+        assert len(everything) == 25
@@ -0,0 +1,157 @@
+"""Tests for /events/nearby and the distance/time ranking of nearby events."""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from fastapi import status
+
+from app.crud.event import get_upcoming_events_nearby
+from app.schemas.db_models import Event, Location, User
+from app.schemas.enums import UserType
+from app.utils.auth import create_access_token, profile_claims
+from app.utils.geo import KM_PER_DEGREE_LAT, haversine_km, haversine_km_array
+
+HOME = (50.0614, 19.9366)
+
+
+def north_of_home(km: float) -> tuple[float, float]:
+    return HOME[0] + km / KM_PER_DEGREE_LAT, HOME[1]
+
+
+@pytest.fixture
+def events(test_db) -> dict[str, Event]:
+    """Events 1 km away in 3 days, 5 km away tomorrow, 30 km away, past, and in two months."""
+    now = datetime.now().replace(microsecond=0)
+    places = {
+        "near": (north_of_home(1), now + timedelta(days=3)),
+        "soon": (north_of_home(5), now + timedelta(days=1)),
+        "far": (north_of_home(30), now + timedelta(days=1)),
+        "past": (north_of_home(1), now - timedelta(days=1)),
+        "later": (north_of_home(1), now + timedelta(days=60)),
+    }
+    events = {}
+    for name, ((latitude, longitude), begins) in places.items():
+        events[name] = Event(
+            name=name,
+            description="",
+            start_date=begins,
+            end_date=begins + timedelta(hours=2),
+            signup_start=begins - timedelta(days=7),
+            signup_end=begins,
+            location=Location(name=name, latitude=latitude, longitude=longitude),
+            organisation_id=1,
+            max_no_of_users=10,
+        )
+    test_db.add_all(events.values())
+    test_db.commit()
+    return events
+
+
+@pytest.fixture
+def volunteer(test_db) -> User:
+    user = User(
+        email="anna@example.com",
+        password_hash="hash",
+        user_type=UserType.VOLUNTEER,
+        location=Location(name="Home", latitude=HOME[0], longitude=HOME[1]),
+    )
+    test_db.add(user)
+    test_db.commit()
+    return user
+
+
+def bearer(user: User) -> dict:
+    return {"Authorization": f"Bearer {create_access_token(profile_claims(user))}"}
+
+
+class TestNearbyEvents:
+    """Test cases for GET /events/nearby."""
+
+    def test_ranked_by_time_and_distance(self, client, events, volunteer):
+        """Test that the default ranking prefers tomorrow's event 5 km away over one 1 km away in 3 days."""
+        response = client.get("/events/nearby", params={"radius_km": 10}, headers=bearer(volunteer))
+
+        assert response.status_code == status.HTTP_200_OK
+        listed = response.json()
+        assert [item["name"] for item in listed] == ["soon", "near"]
+        assert listed[0]["distance_km"] == pytest.approx(5, abs=0.01)
+        assert listed[1]["distance_km"] == pytest.approx(1, abs=0.01)
+
+    def test_km_per_day_weights_distance(self, client, events, volunteer):
+        """Test that a small km_per_day makes distance dominate."""
+        response = client.get("/events/nearby", params={"radius_km": 10, "km_per_day": 0.1}, headers=bearer(volunteer))
+
+        assert [item["name"] for item in response.json()] == ["near", "soon"]
+
+    def test_radius_and_horizon(self, client, events, volunteer):
+        """Test that far, past and too distant future events are excluded unless the limits allow them."""
+        wide = client.get("/events/nearby", params={"radius_km": 50, "within_days": 90}, headers=bearer(volunteer))
+
+        assert {item["name"] for item in wide.json()} == {"near", "soon", "far", "later"}
+
+    def test_explicit_point(self, client, events, volunteer):
+        """Test that lat and lon replace the user's location."""
+        latitude, longitude = north_of_home(30)
+        response = client.get(
+            "/events/nearby", params={"lat": latitude, "lon": longitude, "radius_km": 2}, headers=bearer(volunteer)
+        )
+
+        assert [item["name"] for item in response.json()] == ["far"]
+
+    def test_user_without_location(self, client, events, test_db):
+        """Test that users without a location must pass a point."""
+        user = User(email="jan@example.com", password_hash="hash", user_type=UserType.VOLUNTEER)
+        test_db.add(user)
+        test_db.commit()
+
+        assert client.get("/events/nearby", headers=bearer(user)).status_code == status.HTTP_400_BAD_REQUEST
+        assert (
+            client.get("/events/nearby", params={"lat": 50.0}, headers=bearer(user)).status_code
+            == status.HTTP_422_UNPROCESSABLE_CONTENT
+        )
+
+    def test_requires_authentication(self, client, events):
+        """Test that anonymous requests are refused."""
+        response = client.get("/events/nearby", params={"lat": HOME[0], "lon": HOME[1]})
+
+        assert response.status_code in (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN)
+
+
+class TestRanking:
+    """Test cases for the vectorized distance computation and ranking."""
+
+    def test_haversine_array_matches_scalar(self):
+        """Test that the vectorized distance equals haversine_km point by point."""
+        rng = np.random.default_rng(0)
+        latitudes = rng.uniform(-80, 80, 100)
+        longitudes = rng.uniform(-180, 180, 100)
+
+        distances = haversine_km_array(*HOME, latitudes, longitudes)
+
+        expected = [haversine_km(*HOME, lat, lon) for lat, lon in zip(latitudes, longitudes)]
+        assert distances == pytest.approx(expected, rel=1e-9)
+
+    def test_ties_are_broken_by_id(self, test_db):
+        """Test that events with equal scores keep a stable order."""
+        begins = datetime.now().replace(microsecond=0) + timedelta(days=2)
+        location = Location(name="Rynek", latitude=HOME[0], longitude=HOME[1])
+        test_db.add_all(
+            Event(
+                name=f"Zbiórka {i}",
+                description="",
+                start_date=begins,
+                end_date=begins,
+                signup_start=begins,
+                signup_end=begins,
+                location=location,
+                organisation_id=1,
+                max_no_of_users=10,
+            )
+            for i in range(5)
+        )
+        test_db.commit()
+
+        matches = get_upcoming_events_nearby(test_db, *HOME, radius_km=1, limit=3)
+
+        assert [row.name for row, _ in matches] == ["Zbiórka 0", "Zbiórka 1", "Zbiórka 2"]
@@ -0,0 +1,143 @@
+"""Tests for the batch geocoding pipeline."""
+
+import threading
+from datetime import timedelta
+
+import pytest
+from geopy.exc import GeocoderQueryError, GeocoderTimedOut
+
+from app.services.geocode_batch import BatchGeocoder, RateLimiter
+from app.services.geocode_cache import GeocodeCache
+from app.utils.cache import MISSING
+
+
+class FakeGeocoder:
+    """Local geocoder stub that can fail a number of times per address."""
+
+    def __init__(self, known: dict[str, tuple[float, float]], failures: dict[str, int] | None = None):
+        self.known = known
+        self.failures = dict(failures or {})
+        self.calls: list[str] = []
+        self._lock = threading.Lock()
+
+    def __call__(self, address: str) -> tuple[float, float] | None:
+        with self._lock:
+            self.calls.append(address)
+            remaining = self.failures.get(address, 0)
+            if remaining:
+                self.failures[address] = remaining - 1
+        if remaining:
+            raise GeocoderTimedOut("simulated timeout")
+        return self.known.get(address)
+
+
+@pytest.fixture
+def cache():
+    return GeocodeCache(maxsize=64, ttl=timedelta(days=1), negative_ttl=timedelta(hours=1))
+
+
+def make_batch(geocoder, cache, **kwargs) -> BatchGeocoder:
+    kwargs.setdefault("requests_per_second", 1000)
+    kwargs.setdefault("backoff", 0)
+    return BatchGeocoder(geocoder, cache=cache, **kwargs)
+
+
+class TestRateLimiter:
+    """Test cases for RateLimiter."""
+
+    def test_calls_are_spaced_by_interval(self):
+        """Test that consecutive acquires wait for successive slots."""
+        sleeps: list[float] = []
+        limiter = RateLimiter(rate=2, clock=lambda: 10.0, sleep=sleeps.append)
+
+        for _ in range(3):
+            limiter.acquire()
+
+        assert sleeps == [0.5, 1.0]
+
+    def test_invalid_rate(self):
+        """Test that a non-positive rate is rejected."""
+        with pytest.raises(ValueError):
+            RateLimiter(rate=0)
+
+
+class TestBatchGeocoder:
+    """Test cases for BatchGeocoder."""
+
+    def test_duplicates_are_geocoded_once(self, test_db, cache):
+        """Test that addresses sharing a cache key hit the geocoder once."""
+        geocoder = FakeGeocoder({"Miodowa 36, Kraków": (50.05, 19.94)})
+        addresses = ["Miodowa 36, Kraków", "miodowa 36 , Kraków", "Miodowa 36, Kraków"]
+
+        results, stats = make_batch(geocoder, cache).geocode_all(test_db, addresses)
+
+        assert len(geocoder.calls) == 1
+        assert all(results[address] == (50.05, 19.94) for address in addresses)
+        assert stats.addresses == 3
+        assert stats.unique_addresses == 1
+
+    def test_cached_addresses_skip_geocoder(self, test_db, cache):
+        """Test that results persisted by an earlier run are reused."""
+        geocoder = FakeGeocoder({"Miodowa 36, Kraków": (50.05, 19.94)})
+        make_batch(geocoder, cache).geocode_all(test_db, ["Miodowa 36, Kraków"])
+        cache.clear_memory()
+
+        _, stats = make_batch(geocoder, cache).geocode_all(test_db, ["Miodowa 36, Kraków"])
+
+        assert len(geocoder.calls) == 1
+        assert stats.cache_hits == 1
+
+    def test_timeouts_are_retried(self, test_db, cache):
+        """Test that a transient timeout is retried and counted."""
+        geocoder = FakeGeocoder({"Miodowa 36, Kraków": (50.05, 19.94)}, failures={"Miodowa 36, Kraków": 2})
+
+        results, stats = make_batch(geocoder, cache, max_retries=3).geocode_all(test_db, ["Miodowa 36, Kraków"])
+
+        assert results["Miodowa 36, Kraków"] == (50.05, 19.94)
+        assert stats.retries == 2
+        assert stats.failed == 0
+
+    def test_exhausted_retries_mark_address_failed(self, test_db, cache):
+        """Test that an address failing every attempt is reported and not cached."""
+        geocoder = FakeGeocoder({}, failures={"Miodowa 36, Kraków": 10})
+
+        results, stats = make_batch(geocoder, cache, max_retries=1).geocode_all(test_db, ["Miodowa 36, Kraków"])
+
+        assert results["Miodowa 36, Kraków"] is None
+        assert stats.failed == 1
+        assert len(geocoder.calls) == 2
+        assert cache.lookup(test_db, "Miodowa 36, Kraków") is MISSING
+
+    def test_non_retryable_error_fails_immediately(self, test_db, cache):
+        """Test that a query error is not retried."""
+
+        def broken(address: str):
+            raise GeocoderQueryError("bad query")
+
+        _, stats = make_batch(broken, cache, max_retries=3).geocode_all(test_db, ["?"])
+
+        assert stats.failed == 1
+        assert stats.retries == 0
+
+    def test_not_found_is_reported(self, test_db, cache):
+        """Test that unresolved addresses are counted as not found."""
+        geocoder = FakeGeocoder({"Miodowa 36, Kraków": (50.05, 19.94)})
+
+        results, stats = make_batch(geocoder, cache).geocode_all(test_db, ["Miodowa 36, Kraków", "Nowhere 1"])
+
+        assert results["Nowhere 1"] is None
+        assert stats.not_found == 1
+        assert stats.geocoded == 2
+
+    def test_lookups_run_concurrently(self, test_db, cache):
+        """Test that several workers geocode at the same time."""
+        barrier = threading.Barrier(3, timeout=5)
+
+        def waiting_geocoder(address: str):
+            barrier.wait()
+            return (50.0, 19.9)
+
+        addresses = ["A 1", "B 2", "C 3"]
+        results, _ = make_batch(waiting_geocoder, cache, max_workers=3).geocode_all(test_db, addresses)
+
+        assert all(results[address] == (50.0, 19.9) for address in addresses)
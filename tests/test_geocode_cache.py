@@ -0,0 +1,187 @@
+"""Tests for the in-process TTL cache and the persistent geocode cache."""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.crud.location import add_address, address_to_coordinates
+from app.models.location import AddLocation
+from app.schemas.db_models import GeocodeCacheEntry
+from app.services.geocode_cache import GeocodeCache, NOT_FOUND, geocode_cache
+from app.utils.cache import MISSING, TTLCache
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class CountingGeocoder:
+    """Geocoder stub that records every address it is asked for."""
+
+    def __init__(self, known: dict[str, tuple[float, float]]):
+        self.known = known
+        self.calls: list[str] = []
+
+    def __call__(self, address: str) -> tuple[float, float] | None:
+        self.calls.append(address)
+        return self.known.get(address)
+
+
+@pytest.fixture
+def cache():
+    return GeocodeCache(maxsize=16, ttl=timedelta(days=1), negative_ttl=timedelta(hours=1))
+
+
+class TestTTLCache:
+    """Test cases for TTLCache."""
+
+    def test_get_returns_stored_value(self):
+        """Test that a stored value is returned and counted as a hit."""
+        ttl_cache = TTLCache(maxsize=4)
+        ttl_cache.set("a", 1)
+
+        assert ttl_cache.get("a") == 1
+        assert ttl_cache.stats.hits == 1
+
+    def test_get_missing_returns_default(self):
+        """Test that a missing key returns the default and counts a miss."""
+        ttl_cache = TTLCache(maxsize=4)
+
+        assert ttl_cache.get("a", MISSING) is MISSING
+        assert ttl_cache.stats.misses == 1
+
+    def test_none_can_be_cached(self):
+        """Test that None is a valid cached value."""
+        ttl_cache = TTLCache(maxsize=4)
+        ttl_cache.set("a", None)
+
+        assert ttl_cache.get("a", MISSING) is None
+
+    def test_least_recently_used_entry_is_evicted(self):
+        """Test LRU eviction order when maxsize is exceeded."""
+        ttl_cache = TTLCache(maxsize=2)
+        ttl_cache.set("a", 1)
+        ttl_cache.set("b", 2)
+        ttl_cache.get("a")
+        ttl_cache.set("c", 3)
+
+        assert "a" in ttl_cache
+        assert "b" not in ttl_cache
+        assert ttl_cache.stats.evictions == 1
+
+    def test_entries_expire_after_ttl(self):
+        """Test that entries are dropped once their TTL has passed."""
+        clock = FakeClock()
+        ttl_cache = TTLCache(maxsize=4, ttl=10, clock=clock)
+        ttl_cache.set("a", 1)
+        ttl_cache.set("b", 2, ttl=100)
+
+        clock.now = 11
+        assert ttl_cache.get("a") is None
+        assert ttl_cache.get("b") == 2
+
+    def test_invalid_maxsize(self):
+        """Test that a non-positive maxsize is rejected."""
+        with pytest.raises(ValueError):
+            TTLCache(maxsize=0)
+
+
+class TestGeocodeCache:
+    """Test cases for GeocodeCache."""
+
+    def test_miss_calls_geocoder_and_persists(self, test_db, cache):
+        """Test that a miss geocodes once and stores the result in the database."""
+        geocoder = CountingGeocoder({"Miodowa 36, Kraków": (50.05, 19.94)})
+
+        assert cache.get_or_geocode(test_db, "Miodowa 36, Kraków", geocoder) == (50.05, 19.94)
+        assert geocoder.calls == ["Miodowa 36, Kraków"]
+        entry = test_db.get(GeocodeCacheEntry, "krakow|miodowa|36|")
+        assert entry is not None and entry.found
+
+    def test_repeated_lookup_hits_memory(self, test_db, cache):
+        """Test that a second lookup is served from the in-process LRU."""
+        geocoder = CountingGeocoder({"Miodowa 36, Kraków": (50.05, 19.94)})
+        cache.get_or_geocode(test_db, "Miodowa 36, Kraków", geocoder)
+        cache.get_or_geocode(test_db, "miodowa 36 , Kraków", geocoder)
+
+        assert len(geocoder.calls) == 1
+        assert cache.stats.memory_hits == 1
+        assert cache.stats.geocoder_calls == 1
+
+    def test_address_variants_share_an_entry(self, test_db, cache):
+        """Test that differently written forms of one address are geocoded once."""
+        geocoder = CountingGeocoder({"ul. Miodowa 36, Kraków": (50.05, 19.94)})
+        cache.get_or_geocode(test_db, "ul. Miodowa 36, Kraków", geocoder)
+        cache.clear_memory()
+
+        assert cache.get_or_geocode(test_db, "31-055 Krakow, Miodowa 36", geocoder) == (50.05, 19.94)
+        assert len(geocoder.calls) == 1
+
+    def test_persisted_entry_survives_memory_clear(self, test_db, cache):
+        """Test that the database level answers after the LRU is dropped."""
+        geocoder = CountingGeocoder({"Miodowa 36, Kraków": (50.05, 19.94)})
+        cache.get_or_geocode(test_db, "Miodowa 36, Kraków", geocoder)
+        cache.clear_memory()
+
+        assert cache.get_or_geocode(test_db, "Miodowa 36, Kraków", geocoder) == (50.05, 19.94)
+        assert len(geocoder.calls) == 1
+        assert cache.stats.db_hits == 1
+
+    def test_negative_result_is_cached(self, test_db, cache):
+        """Test that an unknown address is not geocoded twice."""
+        geocoder = CountingGeocoder({})
+
+        assert cache.get_or_geocode(test_db, "Nowhere 1", geocoder) is None
+        cache.clear_memory()
+        assert cache.lookup(test_db, "Nowhere 1") is NOT_FOUND
+        assert len(geocoder.calls) == 1
+        assert cache.stats.negative_hits == 1
+
+    def test_expired_entry_is_a_miss(self, test_db, cache):
+        """Test that an expired database entry triggers a new geocoder call."""
+        test_db.add(
+            GeocodeCacheEntry(
+                address_key="krakow|miodowa|36|",
+                latitude=1.0,
+                longitude=2.0,
+                found=True,
+                created_at=datetime.now() - timedelta(days=2),
+                expires_at=datetime.now() - timedelta(days=1),
+            )
+        )
+        test_db.commit()
+
+        assert cache.lookup(test_db, "Miodowa 36, Kraków") is MISSING
+        assert cache.stats.misses == 1
+
+
+class TestAddressToCoordinates:
+    """Test cases for cache integration in the location CRUD functions."""
+
+    @pytest.fixture(autouse=True)
+    def empty_shared_cache(self):
+        geocode_cache.clear_memory()
+        yield
+        geocode_cache.clear_memory()
+
+    def test_unknown_address_raises(self, test_db):
+        """Test that an address the geocoder cannot resolve raises ValueError."""
+        with pytest.raises(ValueError):
+            address_to_coordinates("Nowhere 1", session=test_db, geocoder=CountingGeocoder({}))
+
+    def test_add_address_uses_cache(self, test_db):
+        """Test that adding the same address twice geocodes it once."""
+        geocoder = CountingGeocoder({"Skotnicka 86, Kraków": (50.01, 19.89)})
+        data = AddLocation(address="Skotnicka 86, Kraków", location_name="SP 66")
+
+        first = add_address(test_db, data, geocoder=geocoder)
+        second = add_address(test_db, data, geocoder=geocoder)
+
+        assert (first.latitude, first.longitude) == (second.latitude, second.longitude) == (50.01, 19.89)
+        assert len(geocoder.calls) == 1
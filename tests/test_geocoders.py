@@ -0,0 +1,161 @@
+"""Tests for the pluggable geocoders."""
+
+import csv
+
+import pytest
+
+from app.services.geocoders import (
+    GAZETTEER_FIELDS,
+    FallbackGeocoder,
+    GazetteerGeocoder,
+    Geocoder,
+)
+
+OSM_EXTRACT = """<?xml version="1.0" encoding="UTF-8"?>
+<osm version="0.6">
+  <node id="1" lat="50.0165" lon="19.8879">
+    <tag k="addr:city" v="Kraków"/>
+    <tag k="addr:housenumber" v="115"/>
+    <tag k="addr:postcode" v="30-399"/>
+    <tag k="addr:street" v="Mieczysława Wrony"/>
+  </node>
+  <node id="2" lat="50.0" lon="19.9"/>
+  <way id="3"><nd ref="1"/><tag k="building" v="school"/></way>
+</osm>
+"""
+
+
+class StaticGeocoder(Geocoder):
+    """Geocoder answering from a fixed mapping."""
+
+    def __init__(self, known: dict[str, tuple[float, float]]):
+        self.known = known
+        self.calls = 0
+
+    def geocode(self, address: str) -> tuple[float, float] | None:
+        self.calls += 1
+        return self.known.get(address)
+
+
+@pytest.fixture
+def gazetteer():
+    gazetteer = GazetteerGeocoder()
+    gazetteer.add("Mieczysława Wrony", "115", "30-399", "Kraków", 50.0165, 19.8879)
+    gazetteer.add("Smoleńsk", "5-7", "31-108", "Kraków", 50.0574, 19.9315)
+    return gazetteer
+
+
+class TestGazetteerGeocoder:
+    """Test cases for GazetteerGeocoder."""
+
+    def test_lookup_by_street_and_number(self, gazetteer):
+        """Test an exact street, house number and city match."""
+        assert gazetteer.geocode("Mieczysława Wrony 115, Kraków") == (50.0165, 19.8879)
+
+    def test_lookup_ignores_prefix_case_and_spacing(self, gazetteer):
+        """Test that the street prefix, case and spacing do not matter."""
+        assert gazetteer.geocode("ul.  mieczysława wrony 115 , KRAKÓW") == (50.0165, 19.8879)
+
+    def test_lookup_by_postal_code(self, gazetteer):
+        """Test that the postal code resolves a shortened street name."""
+        assert gazetteer.geocode("30-399 Kraków, Wrony 115") == (50.0165, 19.8879)
+
+    def test_lookup_by_alias(self, gazetteer):
+        """Test that the shortened street name resolves without a postal code."""
+        assert gazetteer.geocode("Wrony 115, Kraków") == (50.0165, 19.8879)
+
+    @pytest.mark.parametrize(
+        ("street", "other"),
+        [("Józefa", "Księcia Józefa"), ("Stary Kleparz", "Nowy Kleparz"), ("Mały Rynek", "Rynek")],
+    )
+    def test_streets_sharing_a_word(self, street, other):
+        """Test that streets whose names end alike resolve to their own coordinates."""
+        gazetteer = GazetteerGeocoder()
+        gazetteer.add(street, "5", "31-001", "Kraków", 50.0, 19.0)
+        gazetteer.add(other, "5", "31-001", "Kraków", 51.0, 20.0)
+
+        assert gazetteer.geocode(f"ul. {street} 5, Kraków") == (50.0, 19.0)
+        assert gazetteer.geocode(f"ul. {other} 5, 31-001 Kraków") == (51.0, 20.0)
+
+    def test_missing_street_sharing_a_word(self):
+        """Test that a street absent from the gazetteer does not resolve to one whose name ends alike."""
+        gazetteer = GazetteerGeocoder()
+        gazetteer.add("Rynek", "1", "31-042", "Kraków", 50.0, 19.0)
+
+        assert gazetteer.geocode("Mały Rynek 1, 31-042 Kraków") is None
+
+    def test_ambiguous_alias(self):
+        """Test that an alias shared by several streets resolves to none of them."""
+        gazetteer = GazetteerGeocoder()
+        gazetteer.add("Stary Kleparz", "1", "31-150", "Kraków", 50.0, 19.0)
+        gazetteer.add("Nowy Kleparz", "1", "31-151", "Kraków", 51.0, 20.0)
+
+        assert gazetteer.geocode("Kleparz 1, Kraków") is None
+        assert gazetteer.geocode("Kleparz 1, 31-151 Kraków") == (51.0, 20.0)
+
+    def test_house_number_range(self, gazetteer):
+        """Test house numbers written as a range."""
+        assert gazetteer.geocode("Smoleńsk 5-7, Kraków") == (50.0574, 19.9315)
+
+    def test_unknown_address(self, gazetteer):
+        """Test that unknown or number-less addresses return None."""
+        assert gazetteer.geocode("Smoleńsk 9, Kraków") is None
+        assert gazetteer.geocode("Kraków") is None
+
+    def test_callable(self, gazetteer):
+        """Test that geocoder instances can be used as plain geocoding functions."""
+        assert gazetteer("Smoleńsk 5-7, Kraków") == gazetteer.geocode("Smoleńsk 5-7, Kraków")
+
+    def test_from_csv(self, tmp_path):
+        """Test loading a gazetteer CSV file."""
+        path = tmp_path / "gazetteer.csv"
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=GAZETTEER_FIELDS)
+            writer.writeheader()
+            writer.writerow(
+                {
+                    "street": "Skotnicka",
+                    "house_number": "86",
+                    "postal_code": "30-394",
+                    "city": "Kraków",
+                    "latitude": "50.01",
+                    "longitude": "19.89",
+                }
+            )
+
+        gazetteer = GazetteerGeocoder.from_csv(path)
+
+        assert len(gazetteer) == 1
+        assert gazetteer.geocode("Skotnicka 86, Kraków") == (50.01, 19.89)
+
+    def test_from_osm_xml(self, tmp_path):
+        """Test loading address nodes from an OSM extract."""
+        path = tmp_path / "extract.osm"
+        path.write_text(OSM_EXTRACT, encoding="utf-8")
+
+        gazetteer = GazetteerGeocoder.from_osm_xml(path)
+
+        assert len(gazetteer) == 1
+        assert gazetteer.geocode("Mieczysława Wrony 115, Kraków") == (50.0165, 19.8879)
+
+
+class TestFallbackGeocoder:
+    """Test cases for FallbackGeocoder."""
+
+    def test_primary_hit_skips_fallback(self, gazetteer):
+        """Test that the fallback is not called when the gazetteer knows the address."""
+        fallback = StaticGeocoder({})
+        geocoder = FallbackGeocoder(gazetteer, fallback)
+
+        assert geocoder.geocode("Smoleńsk 5-7, Kraków") == (50.0574, 19.9315)
+        assert fallback.calls == 0
+        assert geocoder.stats.primary_hits == 1
+
+    def test_fallback_is_counted(self, gazetteer):
+        """Test that misses go to the fallback and are counted."""
+        fallback = StaticGeocoder({"Rynek Główny 1, Kraków": (50.06, 19.94)})
+        geocoder = FallbackGeocoder(gazetteer, fallback)
+
+        assert geocoder.geocode("Rynek Główny 1, Kraków") == (50.06, 19.94)
+        assert geocoder.geocode("Nowhere 1") is None
+        assert geocoder.stats.as_dict() == {"primary_hits": 0, "fallback_calls": 2, "fallback_hits": 1}
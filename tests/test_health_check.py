@@ -2,6 +2,8 @@
 
 from fastapi import status
 
+from app.routes.health_check import get_metrics_token
+
 
 class TestHealthCheck:
     """Test cases for the health check endpoint."""
@@ -72,3 +74,31 @@ class TestHealthCheckEdgeCases:
         assert response.status_code == status.HTTP_200_OK
         # Health check should respond in less than 1 second
         assert (end_time - start_time) < 1.0
+
+
+class TestMetricsAccess:
+    """Test cases for the token protecting the metrics endpoint."""
+
+    def test_metrics_with_token(self, client, metrics_headers):
+        """Test that the metrics are served to clients sending the configured token."""
+        response = client.get("/health/metrics", headers=metrics_headers)
+        assert response.status_code == status.HTTP_200_OK
+        assert "login_limiter" in response.json()
+
+    def test_metrics_without_token(self, client):
+        """Test that clients without a token are asked to authenticate."""
+        response = client.get("/health/metrics")
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.headers["www-authenticate"] == "Bearer"
+
+    def test_metrics_with_wrong_token(self, client):
+        """Test that a wrong token is rejected."""
+        response = client.get("/health/metrics", headers={"Authorization": "Bearer wrong"})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_metrics_disabled_without_configured_token(self, client, test_app, metrics_headers):
+        """Test that the endpoint does not exist while METRICS_TOKEN is empty."""
+        test_app.dependency_overrides[get_metrics_token] = lambda: ""
+
+        response = client.get("/health/metrics", headers=metrics_headers)
+        assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,141 @@
+"""Tests for the viewport GeoJSON endpoint and the map page that consumes it."""
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import status
+
+from app.routes import location as location_routes
+from app.schemas.db_models import Event, Location, User
+from app.schemas.enums import UserType
+from app.services.osm_maps import CLUSTERS_URL, GEOJSON_URL, OSMMap
+
+KRAKOW_BBOX = "19.8,50.0,20.1,50.1"
+
+
+@pytest.fixture
+def map_data(test_db):
+    """An organisation and an event in Kraków and an organisation in Warsaw."""
+    school = Location(name="Szkoła Podstawowa nr 1", latitude=50.06, longitude=19.94)
+    warsaw = Location(name="Szkoła w Warszawie", latitude=52.23, longitude=21.01)
+    park = Location(name="Planty", latitude=50.061, longitude=19.937)
+    organisation = User(email="school@example.com", password_hash="x", user_type=UserType.ORGANISATION, location=school)
+    test_db.add_all(
+        [
+            organisation,
+            User(email="warsaw@example.com", password_hash="x", user_type=UserType.ORGANISATION, location=warsaw),
+        ]
+    )
+    test_db.flush()
+    now = datetime.now()
+    test_db.add(
+        Event(
+            name="Sprzątanie Plant",
+            description="",
+            start_date=now + timedelta(days=1),
+            end_date=now + timedelta(days=1, hours=3),
+            signup_start=now,
+            signup_end=now + timedelta(hours=12),
+            location=park,
+            organisation_id=organisation.id,
+            max_no_of_users=40,
+        )
+    )
+    test_db.commit()
+    return {"school": school, "warsaw": warsaw, "park": park}
+
+
+def feature_names(response) -> set[str]:
+    return {feature["properties"]["name"] for feature in response.json()["features"]}
+
+
+class TestLocationsGeoJSON:
+    """Test cases for GET /locations/geojson."""
+
+    def test_only_features_in_viewport(self, client, map_data):
+        """Test that locations outside the bounding box are left out."""
+        response = client.get("/locations/geojson", params={"bbox": KRAKOW_BBOX})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("application/geo+json")
+        assert feature_names(response) == {"Szkoła Podstawowa nr 1", "Planty"}
+
+    def test_feature_shape(self, client, map_data):
+        """Test that features are GeoJSON points in lon/lat order with a category."""
+        response = client.get("/locations/geojson", params={"bbox": KRAKOW_BBOX, "type": "event"})
+
+        (feature,) = response.json()["features"]
+        assert feature == {
+            "type": "Feature",
+            "id": map_data["park"].id,
+            "geometry": {"type": "Point", "coordinates": [19.937, 50.061]},
+            "properties": {"name": "Planty", "category": "event"},
+        }
+
+    def test_type_filter(self, client, map_data):
+        """Test that the type parameter selects organisation or event locations."""
+        organisations = client.get("/locations/geojson", params={"bbox": "14,49,24,55", "type": "organisation"})
+        events = client.get("/locations/geojson", params={"bbox": "14,49,24,55", "type": "event"})
+
+        assert feature_names(organisations) == {"Szkoła Podstawowa nr 1", "Szkoła w Warszawie"}
+        assert feature_names(events) == {"Planty"}
+
+    def test_limit(self, client, map_data):
+        """Test that the limit caps the number of features."""
+        response = client.get("/locations/geojson", params={"bbox": "14,49,24,55", "limit": 1})
+
+        assert len(response.json()["features"]) == 1
+
+    def test_streamed_in_chunks(self, client, test_db, monkeypatch):
+        """Test that a collection spanning several chunks is still one valid document."""
+        monkeypatch.setattr(location_routes, "GEOJSON_CHUNK_SIZE", 3)
+        test_db.add_all([Location(name=f"L{i}", latitude=50.05, longitude=19.9 + i / 1000) for i in range(10)])
+        test_db.commit()
+
+        response = client.get("/locations/geojson", params={"bbox": KRAKOW_BBOX})
+
+        assert len(response.json()["features"]) == 10
+
+    def test_empty_viewport(self, client, map_data):
+        """Test that an empty viewport returns an empty collection."""
+        response = client.get("/locations/geojson", params={"bbox": "0,0,1,1"})
+
+        assert response.json() == {"type": "FeatureCollection", "features": []}
+
+    @pytest.mark.parametrize("bbox", ["1,2,3", "a,b,c,d", "19.8,50.1,20.1,50.0", "20,0,10,1", "0,-91,1,1"])
+    def test_invalid_bbox(self, client, bbox):
+        """Test that malformed or inverted bounding boxes are rejected."""
+        response = client.get("/locations/geojson", params={"bbox": bbox})
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+
+    def test_wrapped_longitudes_are_clamped(self, client, map_data):
+        """Test that a viewport wider than the world is clamped instead of rejected."""
+        response = client.get("/locations/geojson", params={"bbox": "-250,-80,250,80"})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.json()["features"]) == 3
+
+
+class TestViewportMap:
+    """Test cases for the generated map page."""
+
+    def test_map_fetches_viewport_instead_of_embedding(self, tmp_path):
+        """Test that the page loads features on pan/zoom rather than baking in markers."""
+        path = tmp_path / "map.html"
+        OSMMap(geojson_url=GEOJSON_URL).generate_map(map_location=path)
+
+        html = path.read_text(encoding="utf-8")
+        assert json.dumps("/locations/geojson") in html
+        assert 'map.on("moveend", refresh)' in html
+        assert "toBBoxString()" in html
+
+    def test_map_uses_clusters_by_default(self, tmp_path):
+        """Test that the default page asks for the clusters of the current zoom level."""
+        path = tmp_path / "map.html"
+        OSMMap().generate_map(map_location=path)
+
+        html = path.read_text(encoding="utf-8")
+        assert json.dumps(CLUSTERS_URL) in html
+        assert "zoom: map.getZoom()" in html
@@ -0,0 +1,242 @@
+"""Tests for the sliding-window login limiter and the throttling of /users/login."""
+
+import pytest
+from fastapi import status
+
+from app.services.login_limiter import LoginLimiter, get_login_limiter
+from app.services.password_hasher import PasswordHasher, get_password_hasher
+
+
+class FakeClock:
+    def __init__(self, now: float = 6000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeRedis:
+    """The Redis commands the limiter's shared counters use."""
+
+    def __init__(self):
+        self.values: dict[str, int] = {}
+        self.ttls: dict[str, int] = {}
+        self.transactions: list[list[str]] = []
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def get(self, key):
+        return None if key not in self.values else str(self.values[key])
+
+    def incr(self, key):
+        self.values[key] = self.values.get(key, 0) + 1
+        return self.values[key]
+
+    def decr(self, key):
+        self.values[key] = self.values.get(key, 0) - 1
+        return self.values[key]
+
+    def expire(self, key, seconds):
+        self.ttls[key] = seconds
+        return True
+
+
+class FakePipeline:
+    """Queues commands and runs them together on execute, like a MULTI/EXEC transaction."""
+
+    def __init__(self, server: FakeRedis):
+        self.server = server
+        self.commands = []
+
+    def __getattr__(self, name):
+        return lambda *args: self.commands.append((name, args))
+
+    def execute(self):
+        self.server.transactions.append([name for name, _ in self.commands])
+        return [getattr(self.server, name)(*args) for name, args in self.commands]
+
+
+class InterleavingRedis(FakeRedis):
+    """Runs another worker's attempt just before the first transaction, as a concurrent request would."""
+
+    def __init__(self):
+        super().__init__()
+        self.concurrent = None
+
+    def pipeline(self):
+        if self.concurrent is not None:
+            concurrent, self.concurrent = self.concurrent, None
+            self.results = [concurrent()]
+        return super().pipeline()
+
+
+class CountingHasher(PasswordHasher):
+    """Hasher that rejects every password and counts the checks."""
+
+    def __init__(self):
+        super().__init__(workers=1, max_queue=0)
+        self.checks = 0
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        self.checks += 1
+        return False
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def limiter(clock):
+    return LoginLimiter(per_email=5, per_ip=20, window_seconds=60, maxsize=1000, clock=clock)
+
+
+class TestLoginLimiter:
+    """Test cases for LoginLimiter."""
+
+    def test_attempts_beyond_the_email_limit_are_refused(self, limiter):
+        """Test that the sixth attempt in a window is refused with the time to wait."""
+        results = [limiter.attempt("jan@example.com", "203.0.113.7") for _ in range(6)]
+
+        assert results[:5] == [None] * 5
+        assert results[5] == 60
+        assert limiter.attempt("JAN@example.com", "198.51.100.1") is not None
+        assert limiter.stats.allowed == 5
+        assert limiter.stats.rejected == 2
+
+    def test_window_slides(self, limiter, clock):
+        """Test that attempts of the previous window count in proportion to their overlap."""
+        for _ in range(5):
+            limiter.attempt("jan@example.com", None)
+
+        clock.now += 60
+        assert limiter.attempt("jan@example.com", None) == 1
+
+        clock.now += 1
+        assert limiter.attempt("jan@example.com", None) is None
+        assert limiter.attempt("jan@example.com", None) == 11
+
+    def test_refused_attempts_are_not_counted(self, limiter, clock):
+        """Test that a client retrying while refused is let through at the allowed rate."""
+        for _ in range(5):
+            limiter.attempt("jan@example.com", None)
+        for _ in range(100):
+            limiter.attempt("jan@example.com", None)
+
+        clock.now += 120
+
+        assert limiter.attempt("jan@example.com", None) is None
+
+    def test_client_address_limit_spans_emails(self, limiter):
+        """Test that one client cycling through emails is stopped by the per-address limit."""
+        results = [limiter.attempt(f"user{i}@example.com", "203.0.113.7") for i in range(21)]
+
+        assert results.count(None) == 20
+        assert limiter.attempt("user0@example.com", "198.51.100.1") is None
+
+    def test_zero_disables_a_limit(self, clock):
+        """Test that a limit of 0 lets every attempt through."""
+        limiter = LoginLimiter(per_email=0, per_ip=0, window_seconds=60, clock=clock)
+
+        assert all(limiter.attempt("jan@example.com", "203.0.113.7") is None for _ in range(100))
+
+    def test_counters_are_bounded(self, clock):
+        """Test that the least recently used counters are evicted beyond maxsize."""
+        limiter = LoginLimiter(per_email=5, per_ip=20, window_seconds=60, maxsize=10, clock=clock)
+        for i in range(100):
+            limiter.attempt(f"user{i}@example.com", f"203.0.113.{i}")
+
+        assert limiter.tracked == 10
+
+    def test_spraying_does_not_reset_a_throttled_email(self, clock):
+        """Test that attempts over many new emails do not evict the counter of an email at its limit."""
+        limiter = LoginLimiter(per_email=5, per_ip=0, window_seconds=60, maxsize=10, clock=clock)
+        for _ in range(5):
+            limiter.attempt("jan@example.com", None)
+
+        for i in range(100):
+            limiter.attempt(f"user{i}@example.com", None)
+
+        assert limiter.attempt("jan@example.com", None) is not None
+        assert limiter.tracked == 11
+
+    def test_shared_counters(self, clock):
+        """Test that workers counting in the same Redis store share the limit."""
+        server = FakeRedis()
+        workers = [
+            LoginLimiter(per_email=5, per_ip=0, window_seconds=60, redis_client=server, clock=clock) for _ in "ab"
+        ]
+
+        results = [workers[i % 2].attempt("jan@example.com", None) for i in range(6)]
+
+        assert results.count(None) == 5
+        assert set(server.ttls.values()) == {120}
+
+    def test_shared_counters_are_updated_in_one_transaction(self, clock):
+        """Test that an attempt increments and expires its counters together and refusals are taken back."""
+        server = FakeRedis()
+        limiter = LoginLimiter(per_email=1, per_ip=5, window_seconds=60, redis_client=server, clock=clock)
+
+        assert limiter.attempt("jan@example.com", "203.0.113.7") is None
+        assert limiter.attempt("jan@example.com", "203.0.113.7") is not None
+
+        assert server.transactions == [["get", "incr", "expire"] * 2, ["get", "incr", "expire"] * 2, ["decr"] * 2]
+        assert set(server.values.values()) == {1}
+
+    def test_concurrent_workers_cannot_both_pass_the_limit(self, clock):
+        """Test that of two workers counting the last allowed attempt at once, only one lets it through."""
+        server = InterleavingRedis()
+        first, second = (
+            LoginLimiter(per_email=1, per_ip=0, window_seconds=60, redis_client=server, clock=clock) for _ in "ab"
+        )
+        server.concurrent = lambda: second.attempt("jan@example.com", None)
+
+        result = first.attempt("jan@example.com", None)
+
+        assert server.results == [None]
+        assert result is not None
+
+
+class TestLoginThrottling:
+    """Test cases for /users/login with the limiter."""
+
+    def test_over_limit_logins_skip_the_password_check(self, client, test_app):
+        """Test that attempts beyond the limit get 429 without reaching bcrypt."""
+        client.post(
+            "/users/register/volunteer",
+            json={
+                "user": {"email": "jan@example.com", "password": "SecurePass123", "user_type": "volunteer"},
+                "volunteer": {
+                    "first_name": "Jan",
+                    "last_name": "Kowalski",
+                    "birth_date": "1990-05-17",
+                    "phone_number": "+48123456789",
+                },
+            },
+        )
+        hasher = CountingHasher()
+        limiter = LoginLimiter(per_email=3, per_ip=0)
+        test_app.dependency_overrides[get_password_hasher] = lambda: hasher
+        test_app.dependency_overrides[get_login_limiter] = lambda: limiter
+
+        responses = [
+            client.post("/users/login", json={"email": "jan@example.com", "password": "WrongPass123"}) for _ in range(5)
+        ]
+
+        assert [response.status_code for response in responses] == [401] * 3 + [429] * 2
+        assert int(responses[-1].headers["retry-after"]) > 0
+        assert hasher.checks == 3
+
+    def test_metrics_report_the_limiter(self, client, test_app, metrics_headers):
+        """Test that /health/metrics exposes the limiter counters."""
+        limiter = LoginLimiter(per_email=1, per_ip=0)
+        test_app.dependency_overrides[get_login_limiter] = lambda: limiter
+        for _ in range(3):
+            client.post("/users/login", json={"email": "nikt@example.com", "password": "WrongPass123"})
+
+        response = client.get("/health/metrics", headers=metrics_headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["login_limiter"]["rejected"] == 2
@@ -0,0 +1,216 @@
+"""Tests for the background map builder, the served map page and the request-path guard."""
+
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI, status
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.schemas.db_models import Base, Event, Location
+from app.services import osm_maps
+from app.services.map_builder import MapBuilder, get_map_builder
+from app.services.osm_maps import MapRenderedOnRequestPathError, RequestPathGuardMiddleware
+
+
+def wait_for(predicate, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def make_event(name: str, days: int = 1, description: str = "") -> Event:
+    start = datetime.now() + timedelta(days=days)
+    return Event(
+        name=name,
+        description=description,
+        start_date=start,
+        end_date=start + timedelta(hours=3),
+        signup_start=datetime.now(),
+        signup_end=start,
+        location=Location(name=name, latitude=50.06, longitude=19.94),
+        organisation_id=1,
+        max_no_of_users=10,
+    )
+
+
+@pytest.fixture
+def session_factory(test_engine):
+    return sessionmaker(bind=test_engine, autoflush=False, expire_on_commit=False)
+
+
+@pytest.fixture
+def builder(tmp_path, session_factory):
+    builder = MapBuilder(tmp_path / "osm_map.html", debounce=0.1, max_delay=2.0)
+    yield builder
+    builder.stop()
+
+
+class TestMapBuilder:
+    """Test cases for MapBuilder."""
+
+    def test_rebuild_bakes_in_upcoming_events(self, builder, test_db):
+        """Test that upcoming events are rendered as escaped markers and past ones are left out."""
+        test_db.add_all([make_event("Sprzątanie Plant", description="<b>rękawice</b>"), make_event("Stare", days=-3)])
+        test_db.commit()
+
+        builder.rebuild(test_db)
+
+        html = builder.path.read_text(encoding="utf-8")
+        assert "Event: Sprzątanie Plant" in html
+        assert "&lt;b&gt;rękawice&lt;/b&gt;" in html
+        assert "Stare" not in html
+        assert builder.stats.rebuilds == 1
+        assert builder.stats.last_duration_ms > 0
+
+    def test_write_is_atomic(self, builder, test_db, monkeypatch):
+        """Test that a failed render keeps the previous page and leaves no temporary file."""
+        builder.rebuild(test_db)
+        previous = builder.path.read_bytes()
+
+        def broken_save(self, path, **kwargs):
+            with open(path, "w") as f:
+                f.write("<html>half")
+            raise OSError("disk full")
+
+        monkeypatch.setattr(osm_maps.folium.Map, "save", broken_save)
+        with pytest.raises(OSError):
+            builder.rebuild(test_db)
+
+        assert builder.path.read_bytes() == previous
+        assert [path.name for path in builder.path.parent.iterdir()] == ["osm_map.html"]
+
+    def test_burst_of_commits_causes_one_rebuild(self, builder, session_factory):
+        """Test that changes committed within the debounce window are coalesced."""
+        builder.start(session_factory)
+        assert wait_for(lambda: builder.stats.rebuilds == 1)
+
+        with session_factory() as session:
+            for i in range(20):
+                session.add(Location(name=f"Szkoła {i}", latitude=50.0 + i / 100, longitude=19.9))
+                session.commit()
+            session.add(make_event("Bieg charytatywny"))
+            session.commit()
+
+        assert wait_for(lambda: builder.stats.rebuilds == 2)
+        time.sleep(0.3)
+        assert builder.stats.rebuilds == 2
+        assert builder.stats.triggers == 22
+        assert "Bieg charytatywny" in builder.path.read_text(encoding="utf-8")
+
+    def test_max_delay_bounds_continuous_changes(self, tmp_path, session_factory):
+        """Test that a steady stream of changes still rebuilds once max_delay has passed."""
+        builder = MapBuilder(tmp_path / "osm_map.html", debounce=0.2, max_delay=0.4)
+        try:
+            builder.start(session_factory)
+            deadline = time.monotonic() + 1.5
+            while time.monotonic() < deadline:
+                builder.schedule()
+                time.sleep(0.05)
+            assert builder.stats.rebuilds >= 2
+        finally:
+            builder.stop()
+
+    def test_unrelated_commits_do_not_trigger(self, builder, session_factory):
+        """Test that rolled back changes and other engines do not schedule rebuilds."""
+        builder.start(session_factory)
+        assert wait_for(lambda: builder.stats.rebuilds == 1)
+        triggers = builder.stats.triggers
+
+        with session_factory() as session:
+            session.add(Location(name="Wycofana", latitude=50.0, longitude=19.9))
+            session.flush()
+            session.rollback()
+        other_engine = create_engine("sqlite:///:memory:")
+        Base.metadata.create_all(other_engine)
+        with sessionmaker(bind=other_engine)() as session:
+            session.add(Location(name="Inna baza", latitude=50.0, longitude=19.9))
+            session.commit()
+
+        assert builder.stats.triggers == triggers
+
+    def test_rebuild_failures_are_counted(self, builder, session_factory, monkeypatch):
+        """Test that the builder thread survives a failing rebuild."""
+        monkeypatch.setattr(osm_maps.folium.Map, "save", lambda self, path, **kwargs: 1 / 0)
+        builder.start(session_factory)
+
+        assert wait_for(lambda: builder.stats.failures == 1)
+        assert builder.running
+
+    def test_invalid_delays(self, tmp_path):
+        """Test that max_delay shorter than the debounce period is rejected."""
+        with pytest.raises(ValueError):
+            MapBuilder(tmp_path / "osm_map.html", debounce=5, max_delay=1)
+
+
+class TestMapPage:
+    """Test cases for GET /navigation/map."""
+
+    @pytest.fixture
+    def map_client(self, test_app, builder):
+        test_app.dependency_overrides[get_map_builder] = lambda: builder
+        with TestClient(test_app) as test_client:
+            yield test_client
+
+    def test_not_generated_yet(self, map_client):
+        """Test that a missing page is reported as unavailable instead of rendered."""
+        response = map_client.get("/navigation/map")
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.headers["retry-after"] == "5"
+
+    def test_etag_and_conditional_get(self, map_client, builder, test_db):
+        """Test that the page carries an ETag and a matching If-None-Match yields 304."""
+        builder.rebuild(test_db)
+
+        response = map_client.get("/navigation/map")
+        etag = response.headers["etag"]
+        cached = map_client.get("/navigation/map", headers={"If-None-Match": etag})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/html")
+        assert response.content == builder.path.read_bytes()
+        assert cached.status_code == status.HTTP_304_NOT_MODIFIED
+        assert cached.content == b""
+
+    def test_etag_changes_after_rebuild(self, map_client, builder, test_db):
+        """Test that a rebuilt page with new events gets a new ETag."""
+        builder.rebuild(test_db)
+        etag = map_client.get("/navigation/map").headers["etag"]
+        test_db.add(make_event("Zbiórka żywności"))
+        test_db.commit()
+        builder.rebuild(test_db)
+
+        response = map_client.get("/navigation/map", headers={"If-None-Match": etag})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["etag"] != etag
+
+
+class TestRequestPathGuard:
+    """Test cases for RequestPathGuardMiddleware."""
+
+    def test_render_on_request_path_is_refused(self, tmp_path):
+        """Test that rendering the map inside a request handler raises."""
+        app = FastAPI()
+        app.add_middleware(RequestPathGuardMiddleware)
+
+        @app.get("/render")
+        def render():
+            osm_maps.generate_map(tmp_path / "osm_map.html")
+
+        with TestClient(app) as test_client:
+            with pytest.raises(MapRenderedOnRequestPathError):
+                test_client.get("/render")
+        assert not (tmp_path / "osm_map.html").exists()
+
+    def test_render_outside_requests_is_allowed(self, tmp_path):
+        """Test that the guard only applies while a request is handled."""
+        osm_maps.generate_map(tmp_path / "osm_map.html")
+
+        assert (tmp_path / "osm_map.html").exists()
@@ -0,0 +1,167 @@
+"""Tests for the bounded password hasher and the 503 load shedding of the user routes."""
+
+import asyncio
+import threading
+
+import pytest
+from fastapi import status
+
+from app.config import PasswordHashExecutor
+from app.services import password_hasher as password_hasher_module
+from app.services.password_hasher import PasswordHasher, PasswordHasherOverloadedError, get_password_hasher
+from app.utils.passwords import hash_password
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def hasher():
+    hasher = PasswordHasher(workers=1, max_queue=1)
+    yield hasher
+    hasher.shutdown()
+
+
+@pytest.fixture
+def blocked_hash(monkeypatch):
+    """Make hashing wait until the returned event is set."""
+    release = threading.Event()
+
+    def slow_hash(password: str) -> str:
+        release.wait(5)
+        return f"hashed:{password}"
+
+    monkeypatch.setattr(password_hasher_module, "hash_password", slow_hash)
+    yield release
+    release.set()
+
+
+@pytest.mark.anyio
+class TestPasswordHasher:
+    """Test cases for PasswordHasher."""
+
+    async def test_hash_and_verify_in_threads(self, hasher):
+        """Test that a password hashed in the pool verifies and a wrong one does not."""
+        password_hash = await hasher.hash("SecurePass123")
+
+        assert await hasher.verify("SecurePass123", password_hash)
+        assert not await hasher.verify("WrongPass123", password_hash)
+        assert hasher.stats.hashes == 1
+        assert hasher.stats.verifications == 2
+
+    async def test_hash_and_verify_in_processes(self):
+        """Test that the process pool variant gives the same results."""
+        hasher = PasswordHasher(workers=1, max_queue=1, executor=PasswordHashExecutor.PROCESS)
+        try:
+            assert await hasher.verify("SecurePass123", hash_password("SecurePass123"))
+        finally:
+            hasher.shutdown()
+
+    async def test_does_not_block_the_event_loop(self, hasher, blocked_hash):
+        """Test that other coroutines keep running while a hash is in progress."""
+        task = asyncio.create_task(hasher.hash("SecurePass123"))
+        ticks = 0
+        while not task.done() and ticks < 10:
+            await asyncio.sleep(0.01)
+            ticks += 1
+        blocked_hash.set()
+
+        assert ticks == 10
+        assert await task == "hashed:SecurePass123"
+
+    async def test_sheds_load_once_the_queue_is_full(self, hasher, blocked_hash):
+        """Test that operations beyond workers + max_queue are refused and counted."""
+        running = asyncio.create_task(hasher.hash("first"))
+        queued = asyncio.create_task(hasher.hash("second"))
+        await asyncio.sleep(0.05)
+
+        assert hasher.stats.running == 1
+        assert hasher.queue_depth == hasher.stats.queued == 1
+        with pytest.raises(PasswordHasherOverloadedError):
+            await hasher.hash("third")
+
+        blocked_hash.set()
+        assert await asyncio.gather(running, queued) == ["hashed:first", "hashed:second"]
+        assert hasher.stats.rejected == 1
+        assert hasher.stats.max_queued == 1
+        assert hasher.queue_depth == hasher.stats.queued == 0
+
+    async def test_usable_after_shutdown(self, hasher):
+        """Test that the pool is recreated on the first operation after shutdown."""
+        await hasher.hash("SecurePass123")
+        hasher.shutdown()
+
+        assert await hasher.verify("SecurePass123", await hasher.hash("SecurePass123"))
+
+    def test_invalid_sizes(self):
+        """Test that a pool without workers or with a negative queue is rejected."""
+        with pytest.raises(ValueError):
+            PasswordHasher(workers=0)
+        with pytest.raises(ValueError):
+            PasswordHasher(max_queue=-1)
+
+
+class OverloadedHasher(PasswordHasher):
+    async def hash(self, password: str) -> str:
+        raise PasswordHasherOverloadedError
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        raise PasswordHasherOverloadedError
+
+
+class TestLoadShedding:
+    """Test cases for the user routes when the hasher is saturated."""
+
+    def test_login_returns_503(self, client, test_app, test_db):
+        """Test that a login is answered with 503 and Retry-After instead of waiting."""
+        client.post(
+            "/users/register/volunteer",
+            json={
+                "user": {"email": "jan@example.com", "password": "SecurePass123", "user_type": "volunteer"},
+                "volunteer": {
+                    "first_name": "Jan",
+                    "last_name": "Kowalski",
+                    "birth_date": "1990-05-17",
+                    "phone_number": "+48123456789",
+                },
+            },
+        )
+        test_app.dependency_overrides[get_password_hasher] = OverloadedHasher
+
+        response = client.post("/users/login", json={"email": "jan@example.com", "password": "SecurePass123"})
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert int(response.headers["retry-after"]) > 0
+
+    def test_registration_returns_503(self, client, test_app):
+        """Test that a registration is shed before anything is written."""
+        test_app.dependency_overrides[get_password_hasher] = OverloadedHasher
+        registration = {
+            "user": {"email": "ola@example.com", "password": "SecurePass123", "user_type": "volunteer"},
+            "volunteer": {
+                "first_name": "Ola",
+                "last_name": "Nowak",
+                "birth_date": "1990-05-17",
+                "phone_number": "+48123456789",
+            },
+        }
+
+        response = client.post("/users/register/volunteer", json=registration)
+        del test_app.dependency_overrides[get_password_hasher]
+        retried = client.post("/users/register/volunteer", json=registration)
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert retried.status_code == status.HTTP_201_CREATED
+
+    def test_metrics_report_the_hasher(self, client, test_app, hasher, metrics_headers):
+        """Test that /health/metrics exposes the counters and queue depth."""
+        test_app.dependency_overrides[get_password_hasher] = lambda: hasher
+        hasher.stats.rejected = 3
+
+        response = client.get("/health/metrics", headers=metrics_headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["password_hasher"]["rejected"] == 3
+        assert response.json()["password_hasher"]["queued"] == 0
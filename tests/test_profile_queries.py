@@ -0,0 +1,142 @@
+"""Query-count tests pinning the statements run by the user read routes and profile loaders."""
+
+from datetime import date
+
+import pytest
+from fastapi import status
+from sqlalchemy import event
+
+from app.crud.user import get_user_with_profile, get_users_with_profiles
+from app.schemas.db_models import Coordinator, Organisation, User, Volunteer
+from app.schemas.enums import UserType
+from app.utils import auth
+from app.utils.auth import create_access_token, profile_claims
+
+
+@pytest.fixture(autouse=True)
+def stateless(monkeypatch):
+    """Authenticate from the token's claims, so that only the routes' own statements are counted."""
+    monkeypatch.setattr(auth, "AUTH_STATELESS", True)
+
+
+@pytest.fixture
+def users(test_db) -> dict[UserType, User]:
+    """One user of each type with their profile."""
+    volunteer = User(email="anna@example.com", password_hash="hash", user_type=UserType.VOLUNTEER)
+    volunteer.volunteer = Volunteer(
+        first_name="Anna", last_name="Nowak", birth_date=date(1990, 5, 17), phone_number="+48123456789"
+    )
+    organisation = User(email="fundacja@example.com", password_hash="hash", user_type=UserType.ORGANISATION)
+    organisation.organisation = Organisation(
+        org_name="Fundacja",
+        contact_person="Jan Kowalski",
+        description="",
+        phone_number="+48123456780",
+        address="Rynek 1, Kraków",
+        verified=True,
+    )
+    coordinator = User(email="szkola@example.com", password_hash="hash", user_type=UserType.COORDINATOR)
+    coordinator.coordinator = Coordinator(
+        school="LO 1", first_name="Ewa", last_name="Nowak", phone_number="+48123456781", verified=True
+    )
+    test_db.add_all([volunteer, organisation, coordinator])
+    test_db.commit()
+    return {user.user_type: user for user in (volunteer, organisation, coordinator)}
+
+
+def record_statements(engine) -> list[str]:
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+    return statements
+
+
+def bearer(user: User) -> dict:
+    return {"Authorization": f"Bearer {create_access_token(profile_claims(user))}"}
+
+
+class TestRouteQueryCounts:
+    """Test cases pinning the number of statements each user read route runs."""
+
+    @pytest.mark.parametrize("user_type", [UserType.VOLUNTEER, UserType.ORGANISATION, UserType.COORDINATOR])
+    def test_user_profile(self, client, users, async_test_engine, user_type):
+        """Test that /users/{user_id}/profile loads the user and its profile with one statement."""
+        user = users[user_type]
+        statements = record_statements(async_test_engine.sync_engine)
+
+        response = client.get(f"/users/{user.id}/profile", headers=bearer(users[UserType.VOLUNTEER]))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["user"]["email"] == user.email
+        assert len(response.json()) == 2
+        assert len(statements) == 1
+
+    def test_own_profile(self, client, users, async_test_engine):
+        """Test that /users/me/profile runs one statement."""
+        statements = record_statements(async_test_engine.sync_engine)
+
+        response = client.get("/users/me/profile", headers=bearer(users[UserType.ORGANISATION]))
+
+        assert response.json()["organisation"]["org_name"] == "Fundacja"
+        assert len(statements) == 1
+
+    def test_profiles_batch(self, client, users, async_test_engine):
+        """Test that /users/profiles loads every requested profile with one statement, in the requested order."""
+        ids = [users[UserType.COORDINATOR].id, 999, users[UserType.VOLUNTEER].id, users[UserType.ORGANISATION].id]
+        statements = record_statements(async_test_engine.sync_engine)
+
+        response = client.get("/users/profiles", params={"ids": ids}, headers=bearer(users[UserType.VOLUNTEER]))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [profile["user"]["id"] for profile in response.json()] == [ids[0], ids[2], ids[3]]
+        assert set(response.json()[0]) == {"user", "coordinator"}
+        assert len(statements) == 1
+
+    def test_profiles_batch_limit(self, client, users):
+        """Test that list views cannot request an unbounded number of profiles."""
+        response = client.get(
+            "/users/profiles", params={"ids": list(range(1, 102))}, headers=bearer(users[UserType.VOLUNTEER])
+        )
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+
+    def test_user_and_me(self, client, users, async_test_engine):
+        """Test that /users/{user_id} runs one statement and /users/me none in stateless mode."""
+        headers = bearer(users[UserType.VOLUNTEER])
+        statements = record_statements(async_test_engine.sync_engine)
+
+        client.get("/users/me", headers=headers)
+        assert len(statements) == 0
+
+        client.get(f"/users/{users[UserType.VOLUNTEER].id}", headers=headers)
+        assert len(statements) == 1
+
+
+class TestProfileLoaders:
+    """Test cases for get_user_with_profile and get_users_with_profiles."""
+
+    def test_profile_is_joined(self, users, test_db, test_engine):
+        """Test that the profile is loaded by the same statement and readable after the session closes."""
+        user_id = users[UserType.VOLUNTEER].id
+        test_db.expunge_all()
+        statements = record_statements(test_engine)
+
+        user = get_user_with_profile(test_db, user_id)
+        test_db.close()
+
+        assert len(statements) == 1
+        assert "JOIN volunteer" in statements[0]
+        assert user.volunteer.last_name == "Nowak"
+        assert user.organisation is None
+
+    def test_batch(self, users, test_db, test_engine):
+        """Test that any number of users is loaded with one statement and unknown ids are skipped."""
+        test_db.expunge_all()
+        statements = record_statements(test_engine)
+
+        loaded = get_users_with_profiles(test_db, [user.id for user in users.values()] + [999])
+
+        assert len(statements) == 1
+        assert set(loaded) == {user.id for user in users.values()}
+        assert loaded[users[UserType.COORDINATOR].id].coordinator.school == "LO 1"
+        assert get_users_with_profiles(test_db, []) == {}
+        assert len(statements) == 1
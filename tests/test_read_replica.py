@@ -0,0 +1,211 @@
+"""Tests for routing reads to a read replica and read-your-writes after a user's writes."""
+
+import time
+from datetime import date
+
+import pytest
+from fastapi import status
+from sqlalchemy import create_engine, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from starlette.requests import Request
+
+from app.db_handler import db_connection, read_replica
+from app.db_handler.db_connection import Database, get_async_db, get_async_read_db, get_db, get_read_db
+from app.db_handler.db_util import to_async_url
+from app.db_handler.read_replica import RecentWriters, client_key, track_writes
+from app.schemas.db_models import Base, User, Volunteer
+from app.schemas.enums import UserType
+from app.utils import auth
+from app.utils.auth import create_access_token, profile_claims
+
+
+def add_volunteers(session, first_name: str) -> list[User]:
+    users = []
+    for i in range(2):
+        user = User(email=f"user{i}@example.com", password_hash="hash", user_type=UserType.VOLUNTEER)
+        user.volunteer = Volunteer(
+            first_name=first_name, last_name="Nowak", birth_date=date(1990, 5, 17), phone_number="+48123456789"
+        )
+        session.add(user)
+        users.append(user)
+    session.commit()
+    return users
+
+
+def bearer(user: User) -> dict:
+    return {"Authorization": f"Bearer {create_access_token(profile_claims(user))}"}
+
+
+def make_request(headers: dict | None = None) -> Request:
+    raw_headers = [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw_headers})
+
+
+@pytest.fixture
+def replica_engine(tmp_path):
+    """A second SQLite file holding the same users as the primary, named "Replica" instead of "Anna"."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'replica.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as session:
+        add_volunteers(session, "Replica")
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def writers(monkeypatch) -> RecentWriters:
+    writers = RecentWriters(window=0.2)
+    monkeypatch.setattr(read_replica, "recent_writers", writers)
+    return writers
+
+
+@pytest.fixture
+def routed(test_app, test_engine, async_test_engine, replica_engine, writers, monkeypatch):
+    """The application's own session dependencies, on test_engine as primary and replica_engine as replica."""
+    async_replica_engine = create_async_engine(to_async_url(str(replica_engine.url)), poolclass=NullPool)
+    database = Database()
+    database.session_factory = sessionmaker(bind=test_engine, expire_on_commit=False)
+    database.read_session_factory = sessionmaker(bind=replica_engine, expire_on_commit=False)
+    database.async_session_factory = async_sessionmaker(bind=async_test_engine, expire_on_commit=False)
+    database.async_read_session_factory = async_sessionmaker(bind=async_replica_engine, expire_on_commit=False)
+    monkeypatch.setattr(db_connection, "database", database)
+    monkeypatch.setattr(auth, "AUTH_STATELESS", True)
+    for dependency in (get_db, get_read_db, get_async_db, get_async_read_db):
+        test_app.dependency_overrides.pop(dependency)
+    return test_app
+
+
+@pytest.fixture
+def volunteers(test_db) -> list[User]:
+    return add_volunteers(test_db, "Anna")
+
+
+class TestReadRouting:
+    """Test cases for get_read_db and get_async_read_db."""
+
+    def test_reads_go_to_the_replica(self, routed, client, volunteers):
+        """Test that profile reads are served by the replica."""
+        response = client.get(f"/users/{volunteers[1].id}/profile", headers=bearer(volunteers[0]))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["volunteer"]["first_name"] == "Replica"
+
+    def test_writer_reads_its_own_writes(self, routed, client, volunteers, writers):
+        """Test that after a write the user reads from the primary until the window has passed."""
+        writer, other = volunteers
+        path = f"/users/{writer.id}/profile"
+
+        patched = client.patch(f"/users/{writer.id}/volunteer", json={"first_name": "Ania"}, headers=bearer(writer))
+        own = client.get(path, headers=bearer(writer)).json()
+        others = client.get(path, headers=bearer(other)).json()
+        time.sleep(0.25)
+        later = client.get(path, headers=bearer(writer)).json()
+
+        assert patched.status_code == status.HTTP_200_OK
+        assert own["volunteer"]["first_name"] == "Ania"
+        assert others["volunteer"]["first_name"] == "Replica"
+        assert later["volunteer"]["first_name"] == "Replica"
+
+    def test_failed_write_is_not_sticky(self, routed, client, volunteers, writers):
+        """Test that a request that did not commit a write leaves the user on the replica."""
+        writer = volunteers[0]
+
+        response = client.patch("/users/999/volunteer", json={"first_name": "Ania"}, headers=bearer(writer))
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert not writers.wrote_recently(str(writer.id))
+
+    def test_sync_sessions(self, routed, test_engine, replica_engine, writers, volunteers):
+        """Test that get_read_db hands out replica sessions, and primary ones to recent writers."""
+        request = make_request(bearer(volunteers[0]))
+
+        reads = get_read_db(request)
+        assert next(reads).get_bind() is replica_engine
+        reads.close()
+        writers.mark(str(volunteers[0].id))
+        reads = get_read_db(request)
+        assert next(reads).get_bind() is test_engine
+        reads.close()
+
+    def test_without_replica(self, routed, client, volunteers, monkeypatch):
+        """Test that reads use the primary when no replica is configured."""
+        monkeypatch.setattr(db_connection.database, "async_read_session_factory", None)
+
+        response = client.get(f"/users/{volunteers[1].id}/profile", headers=bearer(volunteers[0]))
+
+        assert response.json()["volunteer"]["first_name"] == "Anna"
+
+
+class TestRecentWriters:
+    """Test cases for marking the users whose sessions committed a write."""
+
+    @pytest.fixture
+    def session(self, test_db, volunteers, writers):
+        track_writes(test_db, make_request(bearer(volunteers[0])))
+        yield test_db
+        test_db.info.clear()
+
+    def test_commit_after_flush_marks_the_user(self, session, volunteers, writers):
+        """Test that committing changed objects marks the session's user."""
+        volunteers[0].volunteer.first_name = "Ania"
+        session.commit()
+
+        assert writers.wrote_recently(str(volunteers[0].id))
+        assert not writers.wrote_recently(str(volunteers[1].id))
+
+    def test_bulk_statements_mark_the_user(self, session, volunteers, writers):
+        """Test that UPDATE statements executed without a flush count as writes."""
+        session.execute(update(Volunteer).values(first_name="Ania"))
+        session.commit()
+
+        assert writers.wrote_recently(str(volunteers[0].id))
+
+    def test_reads_and_rollbacks_do_not_mark(self, session, volunteers, writers):
+        """Test that committing only reads, or rolling back a write, leaves the user unmarked."""
+        session.get(User, volunteers[1].id)
+        session.commit()
+        volunteers[0].volunteer.first_name = "Ania"
+        session.flush()
+        session.rollback()
+        session.commit()
+
+        assert not writers.wrote_recently(str(volunteers[0].id))
+
+    def test_anonymous_sessions_do_not_mark(self, test_db, volunteers, writers):
+        """Test that writes of requests without a token are not tracked."""
+        track_writes(test_db, make_request())
+        volunteers[0].volunteer.first_name = "Ania"
+        test_db.commit()
+
+        assert len(writers._writes) == 0
+
+
+class TestClientKey:
+    """Test cases for client_key."""
+
+    def test_subject_of_the_bearer_token(self, volunteers):
+        """Test that requests are keyed by the user their token was issued to."""
+        assert client_key(make_request(bearer(volunteers[0]))) == str(volunteers[0].id)
+
+    @pytest.mark.parametrize("authorization", [None, "Bearer", "Bearer not-a-token", "Basic dXNlcjpwYXNz"])
+    def test_no_user(self, authorization):
+        """Test that requests without a readable bearer token have no key."""
+        assert client_key(make_request({"Authorization": authorization} if authorization else None)) is None
+
+
+class TestToAsyncUrl:
+    """Test cases for to_async_url."""
+
+    @pytest.mark.parametrize(
+        ("url", "expected"),
+        [
+            ("sqlite:///replica.db", "sqlite+aiosqlite:///replica.db"),
+            ("postgresql://user:pw@replica:5432/db", "postgresql+asyncpg://user:pw@replica:5432/db"),
+            ("postgresql+psycopg2://user:pw@replica/db", "postgresql+asyncpg://user:pw@replica/db"),
+        ],
+    )
+    def test_switches_the_driver(self, url, expected):
+        """Test that the asyncio driver replaces the default or explicit one."""
+        assert to_async_url(url) == expected
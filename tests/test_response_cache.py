@@ -0,0 +1,179 @@
+"""Tests for the cache of rendered /events/upcoming responses."""
+
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import status
+from sqlalchemy import event
+
+from app.schemas.db_models import Event, Location
+from app.services.response_cache import ResponseCache, get_response_cache
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def events(test_db) -> list[Event]:
+    """Three upcoming events."""
+    location = Location(name="Rynek", latitude=50.06, longitude=19.94)
+    begins = datetime.now().replace(microsecond=0) + timedelta(days=1)
+    rows = [
+        Event(
+            name=f"Zbiórka {i}",
+            description="",
+            start_date=begins + timedelta(hours=i),
+            end_date=begins + timedelta(hours=i + 2),
+            signup_start=begins - timedelta(days=1),
+            signup_end=begins,
+            location=location,
+            organisation_id=1,
+            max_no_of_users=10,
+        )
+        for i in range(3)
+    ]
+    test_db.add_all(rows)
+    test_db.commit()
+    return rows
+
+
+@pytest.fixture
+def event_queries(async_test_engine) -> list[str]:
+    """Statements selecting events run by the API from now on."""
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        if "FROM event" in statement:
+            statements.append(statement)
+
+    event.listen(async_test_engine.sync_engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(async_test_engine.sync_engine, "before_cursor_execute", record)
+
+
+class TestResponseCache:
+    """Test cases for serving /events/upcoming from the response cache."""
+
+    def test_hit_does_not_query(self, client, events, event_queries):
+        """Test that a repeated request gets the same body without running the handler."""
+        first = client.get("/events/upcoming")
+        second = client.get("/events/upcoming")
+
+        assert second.status_code == status.HTTP_200_OK
+        assert second.content == first.content
+        assert len(second.json()) == 3
+        assert len(event_queries) == 1
+
+    def test_if_none_match(self, client, events):
+        """Test that a client holding the current ETag gets 304 without a body."""
+        etag = client.get("/events/upcoming").headers["etag"]
+
+        response = client.get("/events/upcoming", headers={"If-None-Match": etag})
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+        assert client.get("/events/upcoming", headers={"If-None-Match": '"stale"'}).status_code == status.HTTP_200_OK
+
+    def test_next_cursor_is_replayed(self, client, events, event_queries):
+        """Test that the X-Next-Cursor header set by the handler is served with cached pages."""
+        first = client.get("/events/upcoming", params={"limit": 2})
+        second = client.get("/events/upcoming", params={"limit": 2})
+
+        assert second.headers["x-next-cursor"] == first.headers["x-next-cursor"]
+        assert len(event_queries) == 1
+
+    def test_query_strings_are_cached_separately(self, client, events, event_queries):
+        """Test that parameters are part of the key, whatever their order."""
+        one = client.get("/events/upcoming?limit=1&organisation_id=1")
+        client.get("/events/upcoming?organisation_id=1&limit=1")
+        everything = client.get("/events/upcoming")
+
+        assert len(one.json()) == 1
+        assert len(everything.json()) == 3
+        assert len(event_queries) == 2
+
+    def test_commit_of_an_event_invalidates(self, client, events, test_db, event_queries):
+        """Test that a committed change to an event is visible on the next request."""
+        etag = client.get("/events/upcoming").headers["etag"]
+
+        events[0].name = "Renamed"
+        test_db.commit()
+        response = client.get("/events/upcoming", headers={"If-None-Match": etag})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()[0]["name"] == "Renamed"
+        assert response.headers["etag"] != etag
+        assert len(event_queries) == 2
+
+    def test_rollback_keeps_entries(self, client, events, test_db, event_queries):
+        """Test that changes flushed and rolled back do not invalidate anything."""
+        client.get("/events/upcoming")
+
+        events[0].name = "Renamed"
+        test_db.flush()
+        test_db.rollback()
+        client.get("/events/upcoming")
+
+        assert len(event_queries) == 1
+
+    def test_unrelated_commit_keeps_entries(self, client, events, test_db, event_queries):
+        """Test that entries tagged "event" survive commits touching only locations."""
+        client.get("/events/upcoming")
+
+        test_db.add(Location(name="Kazimierz", latitude=50.05, longitude=19.95))
+        test_db.commit()
+        client.get("/events/upcoming")
+
+        assert len(event_queries) == 1
+
+    def test_not_stored_while_the_replica_may_lag(self, client, test_app, events, event_queries):
+        """Test that responses rendered within replica_lag of an invalidation are served but not stored."""
+        clock = FakeClock()
+        cache = ResponseCache(replica_lag=5, clock=clock)
+        test_app.dependency_overrides[get_response_cache] = lambda: cache
+        cache.invalidate({"event"})
+
+        first = client.get("/events/upcoming")
+        client.get("/events/upcoming")
+        assert len(event_queries) == 2
+        assert len(first.json()) == 3
+
+        clock.now = 5
+        client.get("/events/upcoming")
+        client.get("/events/upcoming")
+        assert len(event_queries) == 3
+
+    def test_metrics(self, client, events, metrics_headers):
+        """Test that hits, misses and 304s are reported."""
+        etag = client.get("/events/upcoming").headers["etag"]
+        client.get("/events/upcoming")
+        client.get("/events/upcoming", headers={"If-None-Match": etag})
+
+        metrics = client.get("/health/metrics", headers=metrics_headers).json()["response_cache"]
+
+        assert metrics["hits"] == 2
+        assert metrics["misses"] == 1
+        assert metrics["not_modified"] == 1
+        assert metrics["entries"] == 1
+
+
+class TestGenerations:
+    """Test cases for the tag generations of ResponseCache."""
+
+    def test_response_computed_across_an_invalidation_is_not_served(self):
+        """Test that an entry stamped before a commit is dropped instead of served."""
+        cache = ResponseCache(maxsize=8, ttl=60)
+        stamp = cache.stamp(("event",))
+        cache.invalidate({"event"})
+        cache.put("/events/upcoming?", b"[]", {}, stamp)
+
+        assert cache.get("/events/upcoming?", ("event",)) is None
+        assert len(cache._cache) == 0
@@ -0,0 +1,78 @@
+"""Tests for upgrading a database created before columns were added to the models."""
+
+import pytest
+from sqlalchemy import create_engine, inspect, select, text
+from sqlalchemy.orm import sessionmaker
+
+from app.db_handler.db_connection import add_missing_columns, init_db
+from app.crud.location import query_locations_nearby
+from app.schemas.db_models import Base, Location, User
+from app.schemas.enums import UserType
+from app.utils.geo import geohash_encode
+
+# Columns the models gained after the first release, with the indexes over them
+ADDED_COLUMNS = {"users": ["profile_version"], "location": ["geohash"]}
+ADDED_INDEXES = ["ix_location_geohash"]
+
+
+@pytest.fixture
+def baseline_engine(tmp_path):
+    """A SQLite database with the schema of the first release, holding one user and one location."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'baseline.db'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        for index in ADDED_INDEXES:
+            connection.execute(text(f"DROP INDEX {index}"))
+        for table, columns in ADDED_COLUMNS.items():
+            for column in columns:
+                connection.execute(text(f"ALTER TABLE {table} DROP COLUMN {column}"))
+        connection.execute(
+            text(
+                "INSERT INTO users (email, password_hash, user_type, created_at, updated_at) "
+                "VALUES ('anna@example.com', 'hash', 'VOLUNTEER', '2025-01-01', '2025-01-01')"
+            )
+        )
+        connection.execute(text("INSERT INTO location (name, latitude, longitude) VALUES ('Rynek', 50.0614, 19.9366)"))
+    yield engine
+    engine.dispose()
+
+
+class TestAddMissingColumns:
+    """Test cases for add_missing_columns and init_db on an existing database."""
+
+    def test_baseline_schema_lacks_the_columns(self, baseline_engine):
+        """Test that the fixture really has the old schema, which create_all does not change."""
+        Base.metadata.create_all(baseline_engine)
+
+        columns = {column["name"] for column in inspect(baseline_engine).get_columns("users")}
+        assert "profile_version" not in columns
+
+    def test_adds_the_missing_columns(self, baseline_engine):
+        """Test that every column added since the first release is added once."""
+        expected = {f"{table}.{column}" for table, columns in ADDED_COLUMNS.items() for column in columns}
+
+        assert set(add_missing_columns(baseline_engine)) == expected
+        assert add_missing_columns(baseline_engine) == []
+
+    def test_users_can_be_loaded_after_init_db(self, baseline_engine):
+        """Test that existing users get the default profile version, which updates then bump."""
+        init_db(baseline_engine)
+
+        with sessionmaker(bind=baseline_engine)() as session:
+            user = session.scalars(select(User).where(User.email == "anna@example.com")).one()
+            assert user.user_type == UserType.VOLUNTEER
+            assert user.profile_version == 1
+            user.email = "ania@example.com"
+            session.commit()
+            assert user.profile_version == 2
+
+    def test_locations_get_a_geohash_after_init_db(self, baseline_engine):
+        """Test that existing locations are indexed by geohash and found by radius search."""
+        init_db(baseline_engine)
+
+        indexes = {index["name"] for index in inspect(baseline_engine).get_indexes("location")}
+        with sessionmaker(bind=baseline_engine)() as session:
+            location = session.scalars(select(Location)).one()
+            assert location.geohash == geohash_encode(50.0614, 19.9366)
+            assert query_locations_nearby(session, 50.0614, 19.9366, 1) == [(location, 0)]
+        assert "ix_location_geohash" in indexes
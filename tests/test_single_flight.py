@@ -0,0 +1,241 @@
+"""Tests for request coalescing with SingleFlight."""
+
+import asyncio
+import threading
+from datetime import date, datetime, timedelta
+
+import httpx
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.crud.user import get_user_with_profile_async, register_volunteer_async
+from app.models.user import UserCreate, VolunteerCreate
+from app.schemas.db_models import Event, Location
+from app.schemas.enums import UserType
+from app.utils.single_flight import SingleFlight, call_key, single_flight, single_flight_stats
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def async_session_factory(async_test_engine) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(bind=async_test_engine, autoflush=False, expire_on_commit=False)
+
+
+@pytest.fixture
+def statements(async_test_engine) -> list[str]:
+    """Statements run on the async test engine from now on."""
+    recorded = []
+
+    def record(conn, cursor, statement, *args):
+        recorded.append(statement)
+
+    event.listen(async_test_engine.sync_engine, "before_cursor_execute", record)
+    yield recorded
+    event.remove(async_test_engine.sync_engine, "before_cursor_execute", record)
+
+
+@pytest.mark.anyio
+class TestSingleFlight:
+    """Test cases for coalescing coroutine calls."""
+
+    async def test_concurrent_calls_share_one_execution(self):
+        """Test that callers arriving while a call is in flight get its result."""
+        flights = SingleFlight("test-share")
+        release = asyncio.Event()
+        executions = 0
+
+        async def compute():
+            nonlocal executions
+            executions += 1
+            await release.wait()
+            return object()
+
+        tasks = [asyncio.create_task(flights.run("key", compute)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*tasks)
+
+        assert executions == 1
+        assert all(result is results[0] for result in results)
+        assert flights.stats.as_dict() == {"executions": 1, "collapsed": 4, "failures": 0}
+        assert len(flights) == 0
+
+    async def test_different_keys_run_separately(self):
+        """Test that only calls with equal keys are coalesced."""
+        flights = SingleFlight("test-keys")
+
+        async def compute(value):
+            await asyncio.sleep(0)
+            return value
+
+        results = await asyncio.gather(flights.run(1, lambda: compute(1)), flights.run(2, lambda: compute(2)))
+
+        assert results == [1, 2]
+        assert flights.stats.collapsed == 0
+
+    async def test_failure_reaches_every_caller_and_is_not_remembered(self):
+        """Test fail-fast: waiting callers get the leader's exception, and the next call runs again."""
+        flights = SingleFlight("test-failure")
+        release = asyncio.Event()
+
+        async def fail():
+            await release.wait()
+            raise ValueError("database is down")
+
+        tasks = [asyncio.create_task(flights.run("key", fail)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        async def succeed():
+            return "ok"
+
+        assert all(isinstance(result, ValueError) for result in results)
+        assert await flights.run("key", succeed) == "ok"
+        assert flights.stats.as_dict() == {"executions": 2, "collapsed": 2, "failures": 1}
+
+    async def test_cancelled_follower_does_not_cancel_the_call(self):
+        """Test that a caller giving up leaves the others waiting for the result."""
+        flights = SingleFlight("test-cancel")
+        release = asyncio.Event()
+
+        async def compute():
+            await release.wait()
+            return "done"
+
+        leader = asyncio.create_task(flights.run("key", compute))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flights.run("key", compute))
+        other = asyncio.create_task(flights.run("key", compute))
+        await asyncio.sleep(0)
+        follower.cancel()
+        release.set()
+
+        assert await leader == "done"
+        assert await other == "done"
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+
+    async def test_sessions_of_one_database_are_coalesced(self, async_session_factory, statements):
+        """Test that get_user_with_profile_async called through different sessions queries once."""
+        user_data = UserCreate(email="anna@example.com", password="SecurePass123", user_type=UserType.VOLUNTEER)
+        volunteer_data = VolunteerCreate(
+            first_name="Anna", last_name="Nowak", birth_date=date(1990, 5, 17), phone_number="+48123456789"
+        )
+        async with async_session_factory() as session:
+            user, _ = await register_volunteer_async(session, user_data, volunteer_data, password_hash="hash")
+        statements.clear()
+
+        sessions = [async_session_factory() for _ in range(4)]
+        loaded = await asyncio.gather(*(get_user_with_profile_async(session, user.id) for session in sessions))
+        for session in sessions:
+            await session.close()
+
+        assert {item.volunteer.last_name for item in loaded} == {"Nowak"}
+        assert len([statement for statement in statements if "FROM user" in statement]) == 1
+
+    async def test_concurrent_misses_of_the_response_cache_render_once(self, test_app, test_db, statements):
+        """Test that requests for an expired /events/upcoming page wait for one query."""
+        begins = datetime.now() + timedelta(days=1)
+        test_db.add(
+            Event(
+                name="Zbiórka",
+                description="",
+                start_date=begins,
+                end_date=begins + timedelta(hours=2),
+                signup_start=begins - timedelta(days=1),
+                signup_end=begins,
+                location=Location(name="Rynek", latitude=50.06, longitude=19.94),
+                organisation_id=1,
+                max_no_of_users=10,
+            )
+        )
+        test_db.commit()
+
+        transport = httpx.ASGITransport(app=test_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            responses = await asyncio.gather(*(client.get("/events/upcoming") for _ in range(5)))
+
+        assert {response.status_code for response in responses} == {200}
+        assert len({response.headers["etag"] for response in responses}) == 1
+        assert len([statement for statement in statements if "FROM event" in statement]) == 1
+
+
+class TestRunSync:
+    """Test cases for coalescing calls made from threads."""
+
+    def test_threads_share_one_execution(self):
+        """Test that threads calling while a call is in flight get its result."""
+        flights = SingleFlight("test-threads")
+        started = threading.Event()
+        release = threading.Event()
+        results = []
+
+        def compute():
+            started.set()
+            release.wait(5)
+            return object()
+
+        def call():
+            results.append(flights.run_sync("key", compute))
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait(5)
+        followers = [threading.Thread(target=call) for _ in range(3)]
+        for thread in followers:
+            thread.start()
+        while flights.stats.collapsed < 3:
+            threading.Event().wait(0.001)
+        release.set()
+        for thread in [leader, *followers]:
+            thread.join(5)
+
+        assert len(results) == 4
+        assert all(result is results[0] for result in results)
+        assert flights.stats.executions == 1
+
+    def test_failure_is_raised_and_not_remembered(self):
+        """Test that the exception is raised in the caller and the next call runs again."""
+        flights = SingleFlight("test-threads-failure")
+
+        def fail():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            flights.run_sync("key", fail)
+
+        assert flights.run_sync("key", lambda: "ok") == "ok"
+        assert flights.stats.failures == 1
+
+
+class TestDecorator:
+    """Test cases for the single_flight decorator and its metrics."""
+
+    def test_key_replaces_sessions_by_their_engine(self, test_db, test_engine):
+        """Test that calls differing only by session have equal keys."""
+        assert call_key(test_db, 7, kind="a") == call_key(test_db.get_bind(), 7, kind="a")
+        assert call_key(test_db, 7) != call_key(test_db, 8)
+
+    def test_plain_functions_are_wrapped_with_run_sync(self):
+        """Test that the decorator keeps the function's result and registers its group."""
+
+        @single_flight(name="test-decorated")
+        def double(value):
+            return value * 2
+
+        assert double(21) == 42
+        assert double.flights.stats.executions == 1
+        assert single_flight_stats()["test-decorated"]["executions"] == 1
+
+    def test_metrics(self, client, metrics_headers):
+        """Test that /health/metrics reports the groups of the decorated CRUD functions."""
+        metrics = client.get("/health/metrics", headers=metrics_headers).json()["single_flight"]
+
+        assert "app.crud.user.get_user_with_profile_async" in metrics
+        assert set(metrics["response_cache"]) == {"executions", "collapsed", "failures"}
@@ -0,0 +1,282 @@
+"""Tests for the geohash helpers, the location grid index and radius search."""
+
+import random
+
+import pytest
+from fastapi import status
+from sqlalchemy import delete, insert, update
+
+from app.crud.location import get_locations_nearby, query_locations_nearby
+from app.db_handler.db_connection import backfill_location_geohashes
+from app.schemas.db_models import Location
+from app.services.spatial_index import LocationGridIndex, LocationIndexRegistry, location_index
+from app.utils.geo import bounding_box, geohash_cover, geohash_encode, haversine_km
+
+KRAKOW = (50.0614, 19.9366)
+
+
+@pytest.fixture
+def locations(test_db):
+    """Two hundred locations scattered around Kraków plus one in Warsaw."""
+    rng = random.Random(1)
+    rows = [
+        Location(name=f"Location {i}", latitude=50.0 + rng.random() * 0.2, longitude=19.8 + rng.random() * 0.3)
+        for i in range(200)
+    ]
+    rows.append(Location(name="Warsaw", latitude=52.2297, longitude=21.0122))
+    test_db.add_all(rows)
+    test_db.commit()
+    return rows
+
+
+def brute_force(rows: list[Location], radius_km: float) -> list[int]:
+    """Ids of the rows within radius_km of Kraków, nearest first."""
+    distances = [(haversine_km(*KRAKOW, row.latitude, row.longitude), row.id) for row in rows]
+    return [location_id for distance, location_id in sorted(distances) if distance <= radius_km]
+
+
+class TestGeo:
+    """Test cases for the geographic helpers."""
+
+    def test_haversine(self):
+        """Test the distance between Kraków and Warsaw."""
+        assert haversine_km(*KRAKOW, 52.2297, 21.0122) == pytest.approx(252, abs=1)
+
+    def test_geohash_encode(self):
+        """Test a known geohash."""
+        assert geohash_encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+
+    def test_bounding_box_contains_circle(self):
+        """Test that points at the radius in all four directions are inside the box."""
+        min_lat, min_lon, max_lat, max_lon = bounding_box(*KRAKOW, 10)
+
+        assert haversine_km(*KRAKOW, max_lat, KRAKOW[1]) == pytest.approx(10)
+        assert haversine_km(*KRAKOW, KRAKOW[0], max_lon) >= 10
+        assert min_lat < KRAKOW[0] < max_lat and min_lon < KRAKOW[1] < max_lon
+
+    def test_geohash_cover(self):
+        """Test that every point of the box starts with one of the cover prefixes."""
+        box = bounding_box(*KRAKOW, 3)
+        cells = geohash_cover(box, max_cells=16)
+        rng = random.Random(0)
+
+        assert 1 <= len(cells) <= 16
+        for _ in range(200):
+            point = geohash_encode(rng.uniform(box[0], box[2]), rng.uniform(box[1], box[3]))
+            assert any(point.startswith(cell) for cell in cells)
+
+
+class TestLocationGridIndex:
+    """Test cases for LocationGridIndex."""
+
+    def test_nearby_is_sorted_and_bounded(self):
+        """Test that results are within the radius and ordered by distance."""
+        index = LocationGridIndex(cell_degrees=0.01)
+        index.upsert(1, 50.0614, 19.9366)
+        index.upsert(2, 50.0700, 19.9400)
+        index.upsert(3, 50.2000, 19.9366)
+
+        results = index.nearby(*KRAKOW, 5)
+
+        assert [location_id for location_id, _ in results] == [1, 2]
+        assert results[0][1] == pytest.approx(0)
+
+    def test_upsert_moves_and_remove_deletes(self):
+        """Test that updates move a point between cells and removal forgets it."""
+        index = LocationGridIndex(cell_degrees=0.01)
+        index.upsert(1, 50.2, 19.9)
+        index.upsert(1, *KRAKOW)
+
+        assert index.nearby(*KRAKOW, 1) == [(1, 0.0)]
+        index.remove(1)
+        assert index.nearby(*KRAKOW, 1) == []
+        assert len(index) == 0
+
+
+class TestLocationsNearby:
+    """Test cases for radius search over the location table."""
+
+    @pytest.mark.parametrize("radius_km", [0.5, 2, 5, 20, 300])
+    def test_grid_and_database_match_brute_force(self, test_db, locations, radius_km):
+        """Test that both search paths return exactly the brute-force answer."""
+        expected = brute_force(locations, radius_km)
+
+        from_grid = get_locations_nearby(test_db, *KRAKOW, radius_km, limit=500)
+        from_db = query_locations_nearby(test_db, *KRAKOW, radius_km, limit=500)
+
+        assert [location.id for location, _ in from_grid] == expected
+        assert [location.id for location, _ in from_db] == expected
+
+    def test_geohash_is_maintained(self, test_db, locations):
+        """Test that the geohash column follows coordinate changes."""
+        location = locations[0]
+        location.latitude, location.longitude = KRAKOW
+        test_db.commit()
+
+        assert location.geohash == geohash_encode(*KRAKOW)
+
+    def test_bulk_inserted_locations_are_found(self, test_db, test_engine, locations):
+        """Test that locations inserted without a geohash are found, and get one from the backfill."""
+        test_db.execute(insert(Location), [{"name": "Rynek", "latitude": KRAKOW[0], "longitude": KRAKOW[1]}])
+        test_db.commit()
+
+        nearest, distance = query_locations_nearby(test_db, *KRAKOW, 1)[0]
+        assert (nearest.name, nearest.geohash, distance) == ("Rynek", None, 0)
+        assert backfill_location_geohashes(test_engine, batch_size=1) == 1
+        test_db.refresh(nearest)
+        assert nearest.geohash == geohash_encode(*KRAKOW)
+        assert backfill_location_geohashes(test_engine) == 0
+
+    def test_index_follows_commits(self, test_db, locations):
+        """Test that inserts, moves and deletes reach the built index after commit."""
+        get_locations_nearby(test_db, *KRAKOW, 1)
+        moved, deleted = locations[0], locations[1]
+        added = Location(name="Rynek", latitude=KRAKOW[0], longitude=KRAKOW[1])
+        moved.latitude, moved.longitude = KRAKOW[0] + 0.001, KRAKOW[1]
+        test_db.add(added)
+        test_db.delete(deleted)
+        test_db.commit()
+
+        ids = [location.id for location, _ in get_locations_nearby(test_db, *KRAKOW, 50, limit=500)]
+
+        assert ids[:2] == [added.id, moved.id]
+        assert deleted.id not in ids
+        assert ids == brute_force([row for row in locations if row is not deleted] + [added], 50)
+
+    def test_update_only_commit(self, test_db, locations):
+        """Test that a commit moving a location without inserting one reaches the built index."""
+        get_locations_nearby(test_db, *KRAKOW, 1)
+        moved = locations[-1]
+        moved.latitude, moved.longitude = KRAKOW
+        test_db.commit()
+
+        assert [location.id for location, _ in get_locations_nearby(test_db, *KRAKOW, 1)][:1] == [moved.id]
+
+    def test_delete_only_commit(self, test_db, locations):
+        """Test that a commit deleting a location without inserting one reaches the built index."""
+        get_locations_nearby(test_db, *KRAKOW, 1)
+        deleted = locations[0]
+        test_db.delete(deleted)
+        test_db.commit()
+
+        ids = [location.id for location, _ in get_locations_nearby(test_db, *KRAKOW, 50, limit=500)]
+        assert deleted.id not in ids
+        assert len(location_index.get(test_db)) == len(locations) - 1
+
+    def test_rolled_back_changes_are_ignored(self, test_db, locations):
+        """Test that flushed but rolled back locations never reach the index."""
+        get_locations_nearby(test_db, *KRAKOW, 1)
+        test_db.add(Location(name="Temporary", latitude=KRAKOW[0], longitude=KRAKOW[1]))
+        test_db.flush()
+        test_db.rollback()
+
+        index = location_index.get(test_db)
+        assert len(index) == len(locations)
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestLocationIndexRegistry:
+    """Test cases for noticing changes other processes made to the location table."""
+
+    @pytest.fixture
+    def clock(self) -> FakeClock:
+        return FakeClock()
+
+    @pytest.fixture
+    def registry(self, clock) -> LocationIndexRegistry:
+        return LocationIndexRegistry(LocationGridIndex, check_interval=5, max_age=600, clock=clock)
+
+    @staticmethod
+    def other_process(test_engine, statement, parameters=None) -> None:
+        """Run a statement the way another worker would, bypassing this process's session events."""
+        with test_engine.begin() as connection:
+            connection.execute(statement, parameters)
+
+    def test_inserts_and_deletes_of_other_processes(self, test_db, test_engine, locations, registry, clock):
+        """Test that the index picks up other processes' inserts and deletes once check_interval has passed."""
+        registry.get(test_db)
+        self.other_process(test_engine, insert(Location), [{"name": "Rynek", "latitude": 50.06, "longitude": 19.94}])
+        self.other_process(test_engine, delete(Location).where(Location.id == locations[0].id))
+        new_id = len(locations) + 1
+
+        clock.now = 4.9
+        assert locations[0].id in dict(registry.get(test_db).nearby(*KRAKOW, 300))
+        assert new_id not in dict(registry.get(test_db).nearby(*KRAKOW, 300))
+        clock.now = 5
+        assert locations[0].id not in dict(registry.get(test_db).nearby(*KRAKOW, 300))
+        assert new_id in dict(registry.get(test_db).nearby(*KRAKOW, 300))
+        assert registry.rebuilds == 1
+
+    def test_own_commits_do_not_rebuild(self, test_db, locations, registry, clock):
+        """Test that commits of this process update the index without a rebuild."""
+        registry.get(test_db)
+        test_db.add(Location(name="Rynek", latitude=KRAKOW[0], longitude=KRAKOW[1]))
+        test_db.delete(locations[0])
+        test_db.delete(locations[1])
+        test_db.commit()
+
+        clock.now = 10
+        index = registry.get(test_db)
+
+        assert len(index) == len(locations) - 1
+        assert registry.rebuilds == 0
+
+    def test_own_updates_and_deletes_do_not_rebuild(self, test_db, locations, registry, clock):
+        """Test that commits of this process without inserts keep the recorded table state in step."""
+        registry.get(test_db)
+        locations[0].latitude = KRAKOW[0]
+        test_db.commit()
+        test_db.delete(locations[1])
+        test_db.commit()
+
+        clock.now = 10
+        index = registry.get(test_db)
+
+        assert len(index) == len(locations) - 1
+        assert registry.rebuilds == 0
+
+    def test_moves_are_picked_up_after_max_age(self, test_db, test_engine, locations, registry, clock):
+        """Test that a location moved by another process, which leaves count and ids alike, is seen after max_age."""
+        registry.get(test_db)
+        warsaw = locations[-1]
+        moved = update(Location).where(Location.id == warsaw.id).values(latitude=KRAKOW[0], longitude=KRAKOW[1])
+        self.other_process(test_engine, moved)
+
+        clock.now = 10
+        assert warsaw.id not in dict(registry.get(test_db).nearby(*KRAKOW, 30))
+        clock.now = 600
+        assert warsaw.id in dict(registry.get(test_db).nearby(*KRAKOW, 30))
+
+
+class TestNearbyRoute:
+    """Test cases for GET /locations/nearby."""
+
+    def test_returns_nearest_first(self, client, locations):
+        """Test that the endpoint ranks locations by distance."""
+        response = client.get("/locations/nearby", params={"lat": KRAKOW[0], "lon": KRAKOW[1], "radius_km": 3})
+
+        assert response.status_code == status.HTTP_200_OK
+        body = response.json()
+        assert [item["id"] for item in body] == brute_force(locations, 3)
+        assert body == sorted(body, key=lambda item: item["distance_km"])
+
+    def test_limit(self, client, locations):
+        """Test that the limit caps the result count."""
+        response = client.get("/locations/nearby", params={"lat": KRAKOW[0], "lon": KRAKOW[1], "limit": 3})
+
+        assert len(response.json()) == 3
+
+    def test_invalid_coordinates(self, client):
+        """Test that out-of-range parameters are rejected."""
+        response = client.get("/locations/nearby", params={"lat": 91, "lon": 0, "radius_km": 1})
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
@@ -0,0 +1,235 @@
+"""Tests for the SQLite engine profile and retries on "database is locked"."""
+
+import asyncio
+import sqlite3
+import threading
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.crud.event import register_for_event
+from app.db_handler.sqlite_profile import (
+    SQLiteProfile,
+    apply_sqlite_profile,
+    is_database_locked,
+    lock_retry_stats,
+    retry_on_locked,
+    sqlite_engine_options,
+)
+from app.models.event import EventUserRegistration
+from app.schemas.db_models import Base, Registration
+from app.schemas.enums import RegistrationStatus
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def database_url(tmp_path) -> str:
+    return f"sqlite:///{tmp_path / 'profile.db'}"
+
+
+def profiled_engine(url: str, profile: SQLiteProfile | None = None):
+    engine = create_engine(url, **sqlite_engine_options(url))
+    apply_sqlite_profile(engine, profile)
+    Base.metadata.create_all(engine)
+    return engine
+
+
+def locked_error() -> OperationalError:
+    return OperationalError("INSERT ...", {}, sqlite3.OperationalError("database is locked"))
+
+
+def pragmas(connection) -> dict:
+    names = ["journal_mode", "synchronous", "mmap_size", "cache_size", "busy_timeout", "foreign_keys"]
+    return {name: connection.execute(text(f"PRAGMA {name}")).scalar() for name in names}
+
+
+class TestProfile:
+    """Test cases for the pragmas and pool options of SQLite engines."""
+
+    def test_pragmas_are_set_on_every_connection(self, database_url):
+        """Test that WAL, synchronous=NORMAL, the caches, busy_timeout and foreign keys are on."""
+        engine = profiled_engine(database_url, SQLiteProfile(mmap_size=1 << 20, cache_size_kib=2048))
+
+        with engine.connect() as first, engine.connect() as second:
+            assert pragmas(first) == pragmas(second)
+            assert pragmas(first) == {
+                "journal_mode": "wal",
+                "synchronous": 1,
+                "mmap_size": 1 << 20,
+                "cache_size": -2048,
+                "busy_timeout": 5000,
+                "foreign_keys": 1,
+            }
+        engine.dispose()
+
+    @pytest.mark.anyio
+    async def test_async_engine(self, database_url):
+        """Test that aiosqlite connections get the same pragmas."""
+        url = database_url.replace("sqlite://", "sqlite+aiosqlite://")
+        engine = create_async_engine(url, **sqlite_engine_options(url))
+        apply_sqlite_profile(engine.sync_engine, SQLiteProfile(busy_timeout_ms=250))
+
+        async with engine.connect() as connection:
+            values = await connection.run_sync(pragmas)
+        await engine.dispose()
+
+        assert values["journal_mode"] == "wal"
+        assert values["busy_timeout"] == 250
+
+    def test_memory_database_is_shared(self):
+        """Test that an in-memory database is one connection shared by all sessions and threads."""
+        options = sqlite_engine_options("sqlite:///:memory:")
+        engine = profiled_engine("sqlite:///:memory:")
+        results = []
+
+        thread = threading.Thread(
+            target=lambda: results.append(engine.connect().execute(text("SELECT count(*) FROM registration")).scalar())
+        )
+        thread.start()
+        thread.join(5)
+
+        assert options["poolclass"] is StaticPool
+        assert results == [0]
+
+    def test_foreign_keys_are_enforced(self, database_url):
+        """Test that a registration for a missing user and event is refused."""
+        engine = profiled_engine(database_url)
+        session = sessionmaker(bind=engine)()
+        session.add(Registration(user_id=1, event_id=2, status=RegistrationStatus.PENDING))
+
+        with pytest.raises(IntegrityError):
+            session.commit()
+        session.close()
+        engine.dispose()
+
+
+class TestRetryOnLocked:
+    """Test cases for running units of work again when the database is locked."""
+
+    def test_retries_until_the_lock_is_gone(self, monkeypatch):
+        """Test that locked attempts are run again after growing delays."""
+        delays = []
+        monkeypatch.setattr("app.db_handler.sqlite_profile.time.sleep", delays.append)
+        attempts = []
+
+        @retry_on_locked(retries=3, delay=0.1)
+        def write():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise locked_error()
+            return "written"
+
+        retries = lock_retry_stats.retries
+
+        assert write() == "written"
+        assert len(attempts) == 3
+        assert lock_retry_stats.retries == retries + 2
+        assert 0.05 <= delays[0] <= 0.15
+        assert 0.1 <= delays[1] <= 0.3
+
+    def test_gives_up_after_the_last_retry(self, monkeypatch):
+        """Test that the error is raised once the retries are used up."""
+        monkeypatch.setattr("app.db_handler.sqlite_profile.time.sleep", lambda seconds: None)
+        failures = lock_retry_stats.failures
+
+        @retry_on_locked(retries=2)
+        def write():
+            raise ValueError("Failed to register volunteer") from locked_error()
+
+        with pytest.raises(ValueError):
+            write()
+        assert lock_retry_stats.failures == failures + 1
+
+    def test_other_errors_are_not_retried(self):
+        """Test that only "database is locked" is retried."""
+        attempts = []
+
+        @retry_on_locked()
+        def write():
+            attempts.append(1)
+            raise OperationalError("INSERT ...", {}, sqlite3.OperationalError("no such table: event"))
+
+        with pytest.raises(OperationalError):
+            write()
+        assert attempts == [1]
+        assert not is_database_locked(ValueError("database is locked"))
+
+    @pytest.mark.anyio
+    async def test_run_sync_is_retried_by_the_async_version(self, database_url):
+        """Test that a sync function run through run_sync is retried by its async version only."""
+        url = database_url.replace("sqlite://", "sqlite+aiosqlite://")
+        engine = create_async_engine(url, **sqlite_engine_options(url))
+        factory = async_sessionmaker(bind=engine)
+        calls = []
+
+        @retry_on_locked(delay=0.001)
+        def write(session):
+            calls.append(1)
+            if len(calls) < 3:
+                raise locked_error()
+            return "written"
+
+        @retry_on_locked(delay=0.001)
+        async def write_async(session):
+            return await session.run_sync(write)
+
+        async with factory() as session:
+            assert await write_async(session) == "written"
+        await engine.dispose()
+
+        assert len(calls) == 3
+
+    def test_registration_waits_for_another_writer(self, database_url):
+        """Test that register_for_event succeeds once a long write transaction of another connection commits."""
+        engine = profiled_engine(database_url, SQLiteProfile(busy_timeout_ms=20, foreign_keys=False))
+        blocker = sqlite3.connect(
+            database_url.removeprefix("sqlite:///"), isolation_level=None, check_same_thread=False
+        )
+        blocker.execute("BEGIN IMMEDIATE")
+        blocker.execute("INSERT INTO chat (created_at) VALUES (?)", (datetime.now().isoformat(),))
+        threading.Timer(0.2, lambda: blocker.execute("COMMIT")).start()
+        session = sessionmaker(bind=engine, expire_on_commit=False)()
+        retries = lock_retry_stats.retries
+
+        registration = register_for_event(
+            session, EventUserRegistration(user_id=1, event_id=2, status=RegistrationStatus.PENDING)
+        )
+
+        assert registration.id == 1
+        assert lock_retry_stats.retries > retries
+        session.close()
+        blocker.close()
+        engine.dispose()
+
+    def test_async_backoff_does_not_block_the_loop(self):
+        """Test that the async wrapper backs off with asyncio.sleep."""
+
+        @retry_on_locked(retries=1, delay=0.05)
+        async def write():
+            raise locked_error()
+
+        async def main():
+            ticks = 0
+
+            async def tick():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0.005)
+
+            ticker = asyncio.create_task(tick())
+            with pytest.raises(OperationalError):
+                await write()
+            ticker.cancel()
+            return ticks
+
+        assert asyncio.run(main()) > 3
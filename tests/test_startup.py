@@ -0,0 +1,107 @@
+"""Tests that importing the application has no side effects and that it starts within budget.
+
+Each test runs a fresh interpreter, as modules already imported by the test
+session would hide the cost. ``python -m benchmarks.bench_startup`` measures
+the same with uvicorn and ``-X importtime``.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+# Generous for a shared CI machine: about 1.0 s and 1.3 s on a single core
+IMPORT_BUDGET_SECONDS = 3.0
+COLD_START_BUDGET_SECONDS = 4.0
+
+REPOSITORY = Path(__file__).resolve().parents[1]
+
+IMPORT_SCRIPT = """
+import json, sys, threading, time
+start = time.perf_counter()
+import app.main
+seconds = time.perf_counter() - start
+from app.db_handler.db_connection import database
+from app.db_handler.pool import pool_stats
+print(json.dumps({
+    "seconds": seconds,
+    "threads": threading.active_count(),
+    "engines": [name for name in ("engine", "async_engine") if name in vars(database)],
+    "pools": list(pool_stats()),
+    "heavy_modules": sorted({"folium", "pandas", "geopy", "uvicorn"} & set(sys.modules)),
+}))
+"""
+
+COLD_START_SCRIPT = """
+import json, time
+start = time.perf_counter()
+from fastapi.testclient import TestClient
+from app.main import app
+from app.container import container
+with TestClient(app) as client:
+    status = client.get("/health").status_code
+    seconds = time.perf_counter() - start
+    started = container.started and container.map_builder.running
+print(json.dumps({"seconds": seconds, "status": status, "started": started, "stopped": not container.started}))
+"""
+
+
+def run_fresh(script: str, tmp_path: Path) -> dict:
+    env = {
+        **os.environ,
+        "DB_TYPE": "sqlite",
+        "DB_NAME": str(tmp_path / "app.db"),
+        # Keep the map builder from rendering the page during the test
+        "MAP_REBUILD_DEBOUNCE_SECONDS": "60",
+        "MAP_REBUILD_MAX_DELAY_SECONDS": "60",
+    }
+    result = subprocess.run([sys.executable, "-c", script], cwd=REPOSITORY, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr[-2000:]
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+@pytest.fixture
+def database_file(tmp_path) -> Path:
+    return tmp_path / "app.db"
+
+
+class TestImport:
+    """Test cases for importing app.main."""
+
+    def test_import_has_no_side_effects(self, tmp_path, database_file):
+        """Test that importing the application opens no database, starts no thread and skips the map renderer."""
+        result = run_fresh(IMPORT_SCRIPT, tmp_path)
+
+        assert not database_file.exists()
+        assert result["engines"] == []
+        assert result["pools"] == []
+        assert result["threads"] == 1
+        assert result["heavy_modules"] == []
+
+    def test_import_budget(self, tmp_path):
+        """Test that importing the application stays within IMPORT_BUDGET_SECONDS."""
+        result = run_fresh(IMPORT_SCRIPT, tmp_path)
+
+        assert result["seconds"] < IMPORT_BUDGET_SECONDS
+
+
+class TestColdStart:
+    """Test cases for the container's startup and shutdown."""
+
+    def test_first_response_within_budget(self, tmp_path, database_file):
+        """Test that import, startup and the first /health response stay within COLD_START_BUDGET_SECONDS."""
+        result = run_fresh(COLD_START_SCRIPT, tmp_path)
+
+        assert result["status"] == 200
+        assert result["seconds"] < COLD_START_BUDGET_SECONDS
+
+    def test_startup_and_shutdown(self, tmp_path, database_file):
+        """Test that the lifespan creates the database and starts the background work, and shutdown stops it."""
+        result = run_fresh(COLD_START_SCRIPT, tmp_path)
+
+        assert database_file.exists()
+        assert result["started"] is True
+        assert result["stopped"] is True
@@ -0,0 +1,167 @@
+"""Tests for the principal built from signed claims and the profile version."""
+
+from datetime import date
+
+import pytest
+from fastapi import status
+from sqlalchemy import event
+
+from app.crud.user import delete_user, update_volunteer
+from app.models.user import VolunteerUpdate
+from app.schemas.db_models import User, Volunteer
+from app.schemas.enums import UserType
+from app.utils import auth
+from app.utils.auth import Principal, create_access_token, decode_access_token, profile_claims
+
+
+@pytest.fixture
+def volunteer(test_db) -> User:
+    user = User(email="anna@example.com", password_hash="hash", user_type=UserType.VOLUNTEER)
+    user.volunteer = Volunteer(
+        first_name="Anna", last_name="Nowak", birth_date=date(1990, 5, 17), phone_number="+48123456789"
+    )
+    test_db.add(user)
+    test_db.commit()
+    return user
+
+
+@pytest.fixture
+def stateless(monkeypatch):
+    monkeypatch.setattr(auth, "AUTH_STATELESS", True)
+
+
+@pytest.fixture
+def count_selects(async_test_engine):
+    """Return a callable giving the number of SELECTs run on the async engine so far."""
+    statements = []
+
+    @event.listens_for(async_test_engine.sync_engine, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    return lambda: len(statements)
+
+
+def bearer(user: User) -> dict:
+    return {"Authorization": f"Bearer {create_access_token(profile_claims(user))}"}
+
+
+class TestProfileVersion:
+    """Test cases for User.profile_version."""
+
+    def test_starts_at_one_and_grows_with_updates(self, volunteer, test_db):
+        """Test that every committed change of the user row increments the version."""
+        assert volunteer.profile_version == 1
+
+        volunteer.email = "anna.nowak@example.com"
+        test_db.commit()
+        volunteer.user_type = UserType.COORDINATOR
+        test_db.commit()
+
+        assert volunteer.profile_version == 3
+
+    def test_unchanged_user_keeps_its_version(self, volunteer, test_db):
+        """Test that profile table changes and no-op assignments leave the version alone."""
+        update_volunteer(test_db, volunteer.id, VolunteerUpdate(first_name="Ania"))
+        volunteer.email = volunteer.email
+        test_db.commit()
+
+        assert volunteer.profile_version == 1
+
+
+class TestPrincipal:
+    """Test cases for Principal."""
+
+    def test_claims_round_trip(self, volunteer):
+        """Test that the principal from a token's claims equals the one from the row."""
+        token = create_access_token(profile_claims(volunteer))
+
+        assert Principal.from_claims(decode_access_token(token)) == Principal.from_user(volunteer)
+
+    def test_tokens_without_profile_claims(self):
+        """Test that tokens lacking profile claims give no principal."""
+        assert Principal.from_claims({"sub": "1"}) is None
+        assert Principal.from_claims({**dict.fromkeys(["sub", "email", "user_type", "pv"], "x")}) is None
+
+
+class TestStatelessMode:
+    """Test cases for get_current_principal with AUTH_STATELESS."""
+
+    def test_me_is_answered_from_claims(self, client, volunteer, stateless, count_selects):
+        """Test that /users/me does not query the database."""
+        response = client.get("/users/me", headers=bearer(volunteer))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["email"] == "anna@example.com"
+        assert count_selects() == 0
+
+    def test_routes_needing_the_profile_still_load_it(self, client, volunteer, stateless):
+        """Test that /users/me/profile loads the full user."""
+        response = client.get("/users/me/profile", headers=bearer(volunteer))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["volunteer"]["first_name"] == "Anna"
+
+    def test_token_older_than_the_profile_is_not_trusted(self, client, volunteer, test_db, stateless):
+        """Test that after a change the old token's claims are replaced by the current row."""
+        headers = bearer(volunteer)
+        volunteer.email = "anna.nowak@example.com"
+        test_db.commit()
+
+        response = client.get("/users/me", headers=headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["email"] == "anna.nowak@example.com"
+
+    def test_deleted_user_is_rejected(self, client, volunteer, test_db, stateless):
+        """Test that the token of a user deleted through this process stops working."""
+        headers = bearer(volunteer)
+        delete_user(test_db, volunteer.id)
+
+        assert client.get("/users/me", headers=headers).status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_token_without_profile_claims_falls_back(self, client, volunteer, stateless, count_selects):
+        """Test that tokens issued before profile claims existed are checked against the database."""
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': str(volunteer.id)})}"}
+
+        response = client.get("/users/me", headers=headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert count_selects() == 1
+
+
+class TestStatefulMode:
+    """Test cases for get_current_principal without AUTH_STATELESS."""
+
+    def test_claims_are_checked_against_the_database(self, client, volunteer, test_db):
+        """Test that the default mode reports the row, even when the token's claims differ."""
+        headers = bearer(volunteer)
+        volunteer.email = "anna.nowak@example.com"
+        test_db.commit()
+
+        response = client.get("/users/me", headers=headers)
+
+        assert response.json()["email"] == "anna.nowak@example.com"
+
+    def test_login_token_carries_profile_claims(self, client):
+        """Test that login issues tokens usable in stateless mode."""
+        client.post(
+            "/users/register/volunteer",
+            json={
+                "user": {"email": "jan@example.com", "password": "SecurePass123", "user_type": "volunteer"},
+                "volunteer": {
+                    "first_name": "Jan",
+                    "last_name": "Kowalski",
+                    "birth_date": "1990-05-17",
+                    "phone_number": "+48123456789",
+                },
+            },
+        )
+        login = client.post("/users/login", json={"email": "jan@example.com", "password": "SecurePass123"})
+
+        principal = Principal.from_claims(decode_access_token(login.json()["access_token"]))
+
+        assert principal is not None
+        assert principal.email == "jan@example.com"
+        assert principal.profile_version == 1
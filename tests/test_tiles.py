@@ -0,0 +1,385 @@
+"""Tests for the MVT encoder, the tile cache and the /tiles endpoint."""
+
+import os
+import random
+import struct
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import status
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db_handler.db_connection import get_read_db
+from app.routes import tiles
+from app.schemas.db_models import Base, Event, Location
+from app.services.clustering import project
+from app.services.osm_maps import VECTOR_TILES_URL, OSMMap
+from app.services.tiles import TileCache, affected_tiles, get_tile_cache, render_tile
+from app.utils.mvt import PointFeature, encode_layer, encode_tile
+
+
+def read_varint(data: bytes, pos: int) -> tuple[int, int]:
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return result, pos
+
+
+def read_fields(data: bytes) -> list[tuple[int, int | bytes | float]]:
+    """Split a protobuf message into (field number, value) pairs."""
+    fields, pos = [], 0
+    while pos < len(data):
+        key, pos = read_varint(data, pos)
+        number, wire_type = key >> 3, key & 7
+        if wire_type == 0:
+            value, pos = read_varint(data, pos)
+        elif wire_type == 1:
+            (value,) = struct.unpack("<d", data[pos : pos + 8])
+            pos += 8
+        elif wire_type == 2:
+            length, pos = read_varint(data, pos)
+            value, pos = data[pos : pos + length], pos + length
+        else:
+            raise AssertionError(f"unexpected wire type {wire_type}")
+        fields.append((number, value))
+    return fields
+
+
+def read_packed(data: bytes) -> list[int]:
+    values, pos = [], 0
+    while pos < len(data):
+        value, pos = read_varint(data, pos)
+        values.append(value)
+    return values
+
+
+def unzigzag(value: int) -> int:
+    return (value >> 1) ^ -(value & 1)
+
+
+def decode_value(data: bytes):
+    ((number, value),) = read_fields(data)
+    return {1: lambda v: v.decode(), 3: float, 5: int, 6: unzigzag, 7: bool}[number](value)
+
+
+def decode_tile(data: bytes) -> dict[str, dict]:
+    """Decode an MVT tile of point layers into {layer name: {"extent", "features"}}."""
+    layers = {}
+    for number, layer_data in read_fields(data):
+        assert number == 3
+        fields = read_fields(layer_data)
+        keys = [value.decode() for number, value in fields if number == 3]
+        values = [decode_value(value) for number, value in fields if number == 4]
+        features = []
+        for feature_data in (value for number, value in fields if number == 2):
+            feature = {"id": None, "properties": {}}
+            for number, value in read_fields(feature_data):
+                if number == 1:
+                    feature["id"] = value
+                elif number == 2:
+                    tags = read_packed(value)
+                    feature["properties"] = {keys[k]: values[v] for k, v in zip(tags[::2], tags[1::2])}
+                elif number == 3:
+                    assert value == 1  # POINT
+                elif number == 4:
+                    command, dx, dy = read_packed(value)
+                    assert command == 9  # MoveTo, count 1
+                    feature["point"] = (unzigzag(dx), unzigzag(dy))
+            features.append(feature)
+        layers[next(value.decode() for number, value in fields if number == 1)] = {
+            "version": next(value for number, value in fields if number == 15),
+            "extent": next(value for number, value in fields if number == 5),
+            "features": features,
+        }
+    return layers
+
+
+def tile_of(latitude: float, longitude: float, z: int) -> tuple[int, int, int]:
+    x, y = project(latitude, longitude)
+    return z, int(x * (1 << z)), int(y * (1 << z))
+
+
+class TestMVTEncoder:
+    """Test cases for the MVT encoder."""
+
+    def test_round_trip(self):
+        """Test that geometry, ids and every attribute type survive encoding."""
+        features = [
+            PointFeature(10, 4000, {"name": "Planty", "cluster": False, "count": 3, "delta": -2, "score": 0.5}, id=7),
+            PointFeature(-20, 5, {"name": "Planty", "cluster": True}),
+        ]
+
+        layers = decode_tile(encode_tile([encode_layer("locations", features)]))
+
+        layer = layers["locations"]
+        assert layer["version"] == 2 and layer["extent"] == 4096
+        assert layer["features"] == [
+            {
+                "id": 7,
+                "point": (10, 4000),
+                "properties": {"name": "Planty", "cluster": False, "count": 3, "delta": -2, "score": 0.5},
+            },
+            {"id": None, "point": (-20, 5), "properties": {"name": "Planty", "cluster": True}},
+        ]
+
+    def test_keys_and_values_are_shared(self):
+        """Test that repeated keys and values are stored once per layer."""
+        features = [PointFeature(i, i, {"category": "event", "count": 1}) for i in range(50)]
+
+        fields = read_fields(encode_layer("locations", features))
+
+        assert [value for number, value in fields if number == 3] == [b"category", b"count"]
+        assert len([value for number, value in fields if number == 4]) == 2
+
+    def test_true_and_one_are_distinct_values(self):
+        """Test that booleans are not merged with the integers they compare equal to."""
+        layer = decode_tile(encode_tile([encode_layer("l", [PointFeature(0, 0, {"a": True, "b": 1})])]))["l"]
+
+        assert layer["features"][0]["properties"] == {"a": True, "b": 1}
+        assert type(layer["features"][0]["properties"]["b"]) is int
+
+    def test_empty_tile(self):
+        """Test that a tile without layers has no bytes."""
+        assert encode_tile([]) == b""
+
+
+class TestTileInvalidation:
+    """Test cases for choosing the tiles a change invalidates."""
+
+    def test_point_tile_at_every_zoom(self):
+        """Test that the tile containing the point is affected at every cached zoom level."""
+        tiles = affected_tiles([(50.0614, 19.9366)], max_zoom=18)
+
+        for z in range(19):
+            assert tile_of(50.0614, 19.9366, z) in tiles
+
+    def test_change_stays_local(self):
+        """Test that a change in Kraków leaves the tiles of Warsaw alone at city zoom levels."""
+        tiles = affected_tiles([(50.0614, 19.9366)], max_zoom=14)
+
+        assert tile_of(52.2297, 21.0122, 10) not in tiles
+        assert len([tile for tile in tiles if tile[0] == 14]) <= 4
+
+    def test_invalidated_tiles_cover_every_changed_tile(self, test_db):
+        """Test that moving, adding and removing locations only changes tiles that are invalidated."""
+        rng = random.Random(3)
+        locations = [
+            Location(name=f"L{i}", latitude=rng.uniform(50.0, 50.1), longitude=rng.uniform(19.85, 20.05))
+            for i in range(300)
+        ]
+        test_db.add_all(locations)
+        test_db.commit()
+        moved, removed = locations[0], locations[1]
+        old_points = [(moved.latitude, moved.longitude), (removed.latitude, removed.longitude)]
+
+        def window(z: int) -> set[tuple[int, int, int]]:
+            tiles = set()
+            for latitude, longitude in old_points + [(50.05, 19.95)]:
+                _, x, y = tile_of(latitude, longitude, z)
+                tiles |= {(z, x + dx, y + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)}
+            return tiles
+
+        tiles = set().union(*(window(z) for z in range(19)))
+        before = {tile: render_tile(test_db, *tile) for tile in tiles}
+
+        moved.latitude, moved.longitude = 50.05, 19.95
+        test_db.delete(removed)
+        added = Location(name="Nowa", latitude=50.0451, longitude=19.9402)
+        test_db.add(added)
+        test_db.commit()
+
+        changed = {tile for tile in tiles if render_tile(test_db, *tile) != before[tile]}
+        invalidated = affected_tiles(old_points + [(50.05, 19.95), (added.latitude, added.longitude)], max_zoom=18)
+        assert changed
+        assert changed <= invalidated
+
+
+class TestTileCache:
+    """Test cases for TileCache."""
+
+    def test_put_and_get(self, tmp_path):
+        """Test that stored tiles are read back and deeper zoom levels are never cached."""
+        cache = TileCache(tmp_path, max_zoom=10)
+
+        assert cache.put(5, 17, 10, b"tile", cache.generation)
+        assert not cache.put(11, 1, 1, b"deep", cache.generation)
+
+        assert cache.get(5, 17, 10) == b"tile"
+        assert cache.get(11, 1, 1) is None
+        assert [path.name for path in (tmp_path / "5" / "17").iterdir()] == ["10.mvt"]
+
+    def test_stale_render_is_not_stored(self, tmp_path):
+        """Test that a tile rendered before an invalidation is dropped."""
+        cache = TileCache(tmp_path)
+        generation = cache.generation
+        cache.invalidate([(50.06, 19.94)])
+
+        assert not cache.put(*tile_of(50.06, 19.94, 12), b"stale", generation)
+
+    def test_invalidate_deletes_only_affected_tiles(self, tmp_path):
+        """Test that only the tiles around a changed point are deleted."""
+        cache = TileCache(tmp_path)
+        krakow, warsaw = tile_of(50.0614, 19.9366, 12), tile_of(52.2297, 21.0122, 12)
+        cache.put(*krakow, b"krakow", cache.generation)
+        cache.put(*warsaw, b"warsaw", cache.generation)
+
+        assert cache.invalidate([(50.0614, 19.9366)]) == 1
+
+        assert cache.get(*krakow) is None
+        assert cache.get(*warsaw) == b"warsaw"
+
+    def test_expired_tiles_are_rendered_again(self, tmp_path):
+        """Test that a tile older than the TTL, possibly rendered from a stale index, is not served."""
+        cache = TileCache(tmp_path, ttl=60)
+        cache.put(5, 17, 10, b"tile", cache.generation)
+        old = time.time() - 61
+        os.utime(cache.path(5, 17, 10), (old, old))
+
+        assert cache.get(5, 17, 10) is None
+        assert cache.put(5, 17, 10, b"fresh", cache.generation)
+        assert cache.get(5, 17, 10) == b"fresh"
+
+
+class TestTilesRoute:
+    """Test cases for GET /tiles/{z}/{x}/{y}.mvt."""
+
+    @pytest.fixture
+    def cache(self, test_app, tmp_path):
+        cache = TileCache(tmp_path / "tiles")
+        test_app.dependency_overrides[get_tile_cache] = lambda: cache
+        return cache
+
+    @pytest.fixture
+    def locations(self, test_db):
+        rows = [Location(name=f"Szkoła {i}", latitude=50.06 + i / 10000, longitude=19.94) for i in range(5)]
+        rows.append(Location(name="Warszawa", latitude=52.2297, longitude=21.0122))
+        test_db.add_all(rows)
+        test_db.commit()
+        return rows
+
+    def url(self, latitude: float, longitude: float, z: int) -> str:
+        return "/tiles/{}/{}/{}.mvt".format(*tile_of(latitude, longitude, z))
+
+    def test_tile_content(self, client, cache, locations):
+        """Test that a tile holds the clusters and single locations; a missing category is left out."""
+        response = client.get(self.url(51.0, 20.0, 6))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"] == "application/vnd.mapbox-vector-tile"
+        features = decode_tile(response.content)["locations"]["features"]
+        clusters = [feature for feature in features if feature["properties"]["cluster"]]
+        points = [feature for feature in features if not feature["properties"]["cluster"]]
+        assert [cluster["properties"]["point_count"] for cluster in clusters] == [5]
+        assert points == [
+            {
+                "id": locations[-1].id,
+                "point": points[0]["point"],
+                "properties": {"cluster": False, "name": "Warszawa"},
+            }
+        ]
+        assert all(0 <= coordinate < 4096 for feature in features for coordinate in feature["point"])
+
+    def test_cached_until_a_location_changes(self, client, cache, test_db, locations):
+        """Test that a tile is served from cache and rendered again only after a nearby change."""
+        krakow, warsaw = self.url(50.06, 19.94, 12), self.url(52.2297, 21.0122, 12)
+
+        assert client.get(krakow).headers["x-tile-cache"] == "miss"
+        assert client.get(warsaw).headers["x-tile-cache"] == "miss"
+        assert client.get(krakow).headers["x-tile-cache"] == "hit"
+
+        test_db.add(Location(name="Nowa szkoła", latitude=50.0605, longitude=19.9401))
+        test_db.commit()
+
+        response = client.get(krakow)
+        assert response.headers["x-tile-cache"] == "miss"
+        assert (
+            sum(
+                feature["properties"].get("point_count", 1)
+                for feature in decode_tile(response.content)["locations"]["features"]
+            )
+            == 6
+        )
+        assert client.get(warsaw).headers["x-tile-cache"] == "hit"
+
+    def test_new_event_invalidates_its_location(self, client, cache, test_db, locations):
+        """Test that an event changes the category of an existing location, so its tile is rendered again."""
+        url = self.url(52.2297, 21.0122, 14)
+        client.get(url)
+        now = datetime.now()
+        test_db.add(
+            Event(
+                name="Bieg",
+                description="",
+                start_date=now + timedelta(days=1),
+                end_date=now + timedelta(days=1, hours=2),
+                signup_start=now,
+                signup_end=now + timedelta(hours=12),
+                location_id=locations[-1].id,
+                organisation_id=1,
+                max_no_of_users=10,
+            )
+        )
+        test_db.commit()
+
+        response = client.get(url)
+
+        assert response.headers["x-tile-cache"] == "miss"
+        (feature,) = decode_tile(response.content)["locations"]["features"]
+        assert feature["properties"]["category"] == "event"
+
+    def test_rendered_from_the_primary_after_an_invalidation(self, client, test_app, cache, locations, monkeypatch):
+        """Test that misses right after an invalidation are rendered from the primary, later ones from the replica."""
+        replica = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+        Base.metadata.create_all(replica)
+        ReplicaSession = sessionmaker(bind=replica)
+
+        def read_replica():
+            with ReplicaSession() as session:
+                yield session
+
+        test_app.dependency_overrides[get_read_db] = read_replica
+
+        response = client.get(self.url(50.06, 19.94, 12))
+        assert response.headers["x-tile-cache"] == "miss"
+        assert len(decode_tile(response.content)["locations"]["features"]) == 1
+
+        monkeypatch.setattr(tiles, "DB_READ_YOUR_WRITES_SECONDS", 0)
+        assert client.get(self.url(52.2297, 21.0122, 12)).content == b""
+        replica.dispose()
+
+    def test_empty_tile(self, client, cache, locations):
+        """Test that a tile without locations is an empty body."""
+        response = client.get("/tiles/3/0/0.mvt")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.content == b""
+
+    @pytest.mark.parametrize("path", ["/tiles/3/8/0.mvt", "/tiles/3/0/8.mvt"])
+    def test_tile_out_of_range(self, client, cache, path):
+        """Test that tile coordinates beyond the zoom level's grid are not found."""
+        assert client.get(path).status_code == status.HTTP_404_NOT_FOUND
+
+    def test_zoom_is_validated(self, client, cache):
+        """Test that zoom levels above the maximum are rejected."""
+        assert client.get("/tiles/23/0/0.mvt").status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+
+
+class TestVectorTileMap:
+    """Test cases for the vector tile map page."""
+
+    def test_map_uses_vector_tiles(self, tmp_path):
+        """Test that the page draws locations from vector tiles when asked to."""
+        path = tmp_path / "map.html"
+        OSMMap(vector_tiles_url=VECTOR_TILES_URL).generate_map(map_location=path)
+
+        html = path.read_text(encoding="utf-8")
+        assert "Leaflet.VectorGrid" in html
+        assert 'L.vectorGrid.protobuf("/tiles/{z}/{x}/{y}.mvt"' in html
+        assert "/locations/clusters" not in html
@@ -0,0 +1,182 @@
+"""Tests for the Bloom filter, the token revocation store and logout."""
+
+import time
+from collections import defaultdict
+
+import pytest
+from fastapi import HTTPException, status
+
+from app.services.token_revocation import RevocationStore, revocation_store
+from app.utils.auth import create_access_token, decode_access_token
+from app.utils.bloom import BloomFilter
+
+
+class FakeRedis:
+    """The few Redis commands the revocation store uses, with publish delivering synchronously."""
+
+    def __init__(self):
+        self.sets: dict[str, set[str]] = defaultdict(set)
+        self.expiry: dict[str, int] = {}
+        self.handlers = []
+
+    def sadd(self, key, member):
+        self.sets[key].add(member)
+
+    def expireat(self, key, when):
+        self.expiry[key] = when
+
+    def smembers(self, key):
+        return set(self.sets[key])
+
+    def scan_iter(self, match):
+        return [key for key in self.sets if key.startswith(match.rstrip("*"))]
+
+    def publish(self, channel, data):
+        for handler in self.handlers:
+            handler({"channel": channel, "data": data})
+
+    def pubsub(self, ignore_subscribe_messages):
+        return FakePubSub(self)
+
+
+class FakePubSub:
+    def __init__(self, server):
+        self.server = server
+
+    def subscribe(self, **handlers):
+        self.server.handlers.extend(handlers.values())
+
+    def run_in_thread(self, sleep_time, daemon):
+        return self
+
+    def stop(self):
+        pass
+
+
+@pytest.fixture
+def store():
+    return RevocationStore(bucket_seconds=60, bloom_capacity=100)
+
+
+@pytest.fixture
+def logged_in(client):
+    """Register and log in a volunteer, returning the login response body."""
+    client.post(
+        "/users/register/volunteer",
+        json={
+            "user": {"email": "jan@example.com", "password": "SecurePass123", "user_type": "volunteer"},
+            "volunteer": {
+                "first_name": "Jan",
+                "last_name": "Kowalski",
+                "birth_date": "1990-05-17",
+                "phone_number": "+48123456789",
+            },
+        },
+    )
+    yield client.post("/users/login", json={"email": "jan@example.com", "password": "SecurePass123"}).json()
+    revocation_store.clear()
+
+
+class TestBloomFilter:
+    """Test cases for BloomFilter."""
+
+    def test_no_false_negatives_and_few_false_positives(self):
+        """Test that added keys are always found and the false positive rate is near the target."""
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f"key-{i}")
+
+        assert all(f"key-{i}" in bloom for i in range(1000))
+        false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+        assert false_positives < 300
+
+    def test_invalid_parameters(self):
+        """Test that an empty capacity or an impossible error rate is rejected."""
+        with pytest.raises(ValueError):
+            BloomFilter(capacity=0)
+        with pytest.raises(ValueError):
+            BloomFilter(capacity=10, error_rate=1)
+
+
+class TestRevocationStore:
+    """Test cases for RevocationStore."""
+
+    def test_revoked_token_is_found(self, store):
+        """Test that only the revoked id with its own expiry is reported."""
+        expires_at = time.time() + 600
+        store.revoke("abc", expires_at)
+
+        assert store.is_revoked("abc", expires_at)
+        assert not store.is_revoked("def", expires_at)
+        assert not store.is_revoked("abc", expires_at + 3600)
+        assert store.stats.rejected == 1
+        assert len(store) == 1
+
+    def test_buckets_are_dropped_after_their_tokens_expire(self):
+        """Test that revocations are forgotten once their tokens could not be used anyway."""
+        now = [1000.0]
+        store = RevocationStore(bucket_seconds=60, bloom_capacity=100, clock=lambda: now[0])
+        store.revoke("early", 1030)
+        store.revoke("late", 1200)
+
+        now[0] = 1130
+        store.revoke("later", 1300)
+
+        assert len(store) == 2
+        assert store.is_revoked("late", 1200)
+
+    def test_already_expired_tokens_are_not_stored(self, store):
+        """Test that revoking an expired token keeps nothing."""
+        store.revoke("abc", time.time() - 1)
+
+        assert len(store) == 0
+
+    def test_revocations_are_shared_between_workers(self):
+        """Test that workers see each other's revocations, including those made before they started."""
+        server = FakeRedis()
+        first = RevocationStore(redis_client=server)
+        first.start()
+        expires_at = time.time() + 600
+        first.revoke("before", expires_at)
+
+        second = RevocationStore(redis_client=server)
+        second.start()
+        first.revoke("after", expires_at)
+
+        assert second.is_revoked("before", expires_at)
+        assert second.is_revoked("after", expires_at)
+        assert all(when > expires_at for when in server.expiry.values())
+
+
+class TestLogout:
+    """Test cases for revoking tokens on logout."""
+
+    def test_tokens_get_unique_ids(self):
+        """Test that every token carries its own jti."""
+        first = decode_access_token(create_access_token({"sub": "1"}))
+        second = decode_access_token(create_access_token({"sub": "1"}))
+
+        assert first["jti"] != second["jti"]
+
+    def test_logged_out_token_is_refused(self, client, logged_in):
+        """Test that the token used to log out stops working, including its cached claims."""
+        headers = {"Authorization": f"Bearer {logged_in['access_token']}"}
+        assert client.get("/users/me", headers=headers).status_code == status.HTTP_200_OK
+
+        assert client.post("/users/logout", headers=headers).status_code == status.HTTP_200_OK
+        response = client.get("/users/me", headers=headers)
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.json()["detail"] == "Token has been revoked"
+        with pytest.raises(HTTPException):
+            decode_access_token(logged_in["access_token"])
+
+    def test_other_sessions_stay_logged_in(self, client, logged_in, metrics_headers):
+        """Test that logging out revokes only the token used to do so."""
+        other = client.post("/users/login", json={"email": "jan@example.com", "password": "SecurePass123"}).json()
+        client.post("/users/logout", headers={"Authorization": f"Bearer {logged_in['access_token']}"})
+
+        response = client.get("/users/me", headers={"Authorization": f"Bearer {other['access_token']}"})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert client.get("/health/metrics", headers=metrics_headers).json()["token_revocation"]["active"] == 1
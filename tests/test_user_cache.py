@@ -0,0 +1,218 @@
+"""Tests for the authenticated-user cache and the decoded-token cache."""
+
+import time
+from datetime import date, timedelta
+
+import pytest
+from fastapi import HTTPException, status
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.crud.user import delete_user, update_volunteer
+from app.models.user import VolunteerUpdate
+from app.schemas.db_models import User, Volunteer
+from app.schemas.enums import UserType
+from app.services.user_cache import UserCache, _engine_serial, get_user_cache
+from app.utils.auth import create_access_token, decode_access_token, token_cache
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def async_session_factory(async_test_engine) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(bind=async_test_engine, autoflush=False, expire_on_commit=False)
+
+
+@pytest.fixture
+def cache():
+    return UserCache(maxsize=100, ttl=60)
+
+
+@pytest.fixture
+def volunteer(test_db) -> User:
+    user = User(email="anna@example.com", password_hash="hash", user_type=UserType.VOLUNTEER)
+    user.volunteer = Volunteer(
+        first_name="Anna", last_name="Nowak", birth_date=date(1990, 5, 17), phone_number="+48123456789"
+    )
+    test_db.add(user)
+    test_db.commit()
+    return user
+
+
+@pytest.fixture
+def count_selects(async_test_engine):
+    """Return a callable giving the number of SELECTs run on the async engine so far."""
+    statements = []
+
+    @event.listens_for(async_test_engine.sync_engine, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    return lambda: len(statements)
+
+
+@pytest.mark.anyio
+class TestUserCache:
+    """Test cases for UserCache."""
+
+    async def test_second_lookup_is_served_from_memory(self, cache, volunteer, async_session_factory, count_selects):
+        """Test that a cached user skips the query and is a detached copy."""
+        async with async_session_factory() as session:
+            first = await cache.get_user(session, volunteer.id)
+        async with async_session_factory() as session:
+            second = await cache.get_user(session, volunteer.id)
+            assert second not in session
+
+        assert count_selects() == 1
+        assert second is not first
+        assert second.email == "anna@example.com"
+        assert second.user_type == UserType.VOLUNTEER
+        assert cache.stats.hits == 1
+        assert cache.stats.misses == 1
+
+    async def test_update_evicts(self, cache, volunteer, test_db, async_session_factory):
+        """Test that committing a changed user evicts it."""
+        async with async_session_factory() as session:
+            await cache.get_user(session, volunteer.id)
+
+        volunteer.email = "anna.nowak@example.com"
+        test_db.commit()
+
+        async with async_session_factory() as session:
+            user = await cache.get_user(session, volunteer.id)
+        assert user.email == "anna.nowak@example.com"
+
+    async def test_profile_update_and_delete_evict(
+        self, cache, volunteer, test_db, async_session_factory, count_selects
+    ):
+        """Test that update_volunteer and delete_user evict the user."""
+        async with async_session_factory() as session:
+            await cache.get_user(session, volunteer.id)
+        update_volunteer(test_db, volunteer.id, VolunteerUpdate(first_name="Ania"))
+        async with async_session_factory() as session:
+            await cache.get_user(session, volunteer.id)
+        assert count_selects() == 2
+
+        delete_user(test_db, volunteer.id)
+        async with async_session_factory() as session:
+            assert await cache.get_user(session, volunteer.id) is None
+
+    async def test_rollback_keeps_entry(self, cache, volunteer, test_db, async_session_factory, count_selects):
+        """Test that rolled back changes do not evict."""
+        async with async_session_factory() as session:
+            await cache.get_user(session, volunteer.id)
+
+        volunteer.email = "inny@example.com"
+        test_db.flush()
+        test_db.rollback()
+
+        async with async_session_factory() as session:
+            user = await cache.get_user(session, volunteer.id)
+        assert count_selects() == 1
+        assert user.email == "anna@example.com"
+
+    async def test_lookup_racing_a_commit_is_not_stored(self, cache, volunteer, test_db, async_session_factory):
+        """Test that a row read before a concurrent invalidation is returned but not cached."""
+        async with async_session_factory() as session:
+            generation = cache._generation
+            stale = await session.get(User, volunteer.id)
+            volunteer.email = "nowy@example.com"
+            test_db.commit()
+            cache._put((_engine_serial(test_db.get_bind()), volunteer.id), stale, generation)
+
+        assert len(cache._cache) == 0
+
+    async def test_entries_expire(self, volunteer, async_session_factory, count_selects):
+        """Test that a user is looked up again once the TTL has passed."""
+        clock = FakeClock()
+        cache = UserCache(maxsize=10, ttl=60, clock=clock)
+        async with async_session_factory() as session:
+            await cache.get_user(session, volunteer.id)
+            clock.now = 59.9
+            await cache.get_user(session, volunteer.id)
+            assert count_selects() == 1
+            clock.now = 60
+            await cache.get_user(session, volunteer.id)
+
+        assert count_selects() == 2
+
+    async def test_databases_are_kept_apart(self, cache, volunteer, async_session_factory):
+        """Test that the same id in another database is not served from the cache."""
+        async with async_session_factory() as session:
+            await cache.get_user(session, volunteer.id)
+        other = create_engine("sqlite:///:memory:")
+        cache.invalidate(other, {volunteer.id})
+
+        async with async_session_factory() as session:
+            assert (await cache.get_user(session, volunteer.id)).email == "anna@example.com"
+        assert cache.stats.hits == 1
+
+
+class TestTokenCache:
+    """Test cases for the decoded-token cache."""
+
+    def test_valid_token_is_cached(self):
+        """Test that decoding the same token twice hits the cache and returns independent dicts."""
+        token = create_access_token({"sub": "7"})
+        hits = token_cache.stats.hits
+
+        first = decode_access_token(token)
+        first["sub"] = "changed"
+        second = decode_access_token(token)
+
+        assert second["sub"] == "7"
+        assert token_cache.stats.hits == hits + 1
+
+    def test_cached_token_expires_with_the_token(self):
+        """Test that a cached token is not accepted after its expiry."""
+        token = create_access_token({"sub": "7"}, expires_delta=timedelta(seconds=1))
+        decode_access_token(token)
+
+        time.sleep(2.1)
+
+        with pytest.raises(HTTPException) as exc_info:
+            decode_access_token(token)
+        assert exc_info.value.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+class TestCachedAuthentication:
+    """Test cases for get_current_user with the user cache."""
+
+    def test_current_user_is_cached_and_reported(self, client, test_app, volunteer, count_selects, metrics_headers):
+        """Test that repeated /users/me calls query the user once and the hit ratio is exposed."""
+        cache = UserCache(maxsize=10, ttl=60)
+        test_app.dependency_overrides[get_user_cache] = lambda: cache
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': str(volunteer.id)})}"}
+
+        responses = [client.get("/users/me", headers=headers) for _ in range(5)]
+        metrics = client.get("/health/metrics", headers=metrics_headers).json()
+
+        assert all(response.status_code == status.HTTP_200_OK for response in responses)
+        assert responses[-1].json()["email"] == "anna@example.com"
+        assert count_selects() == 1
+        assert cache.stats.hit_ratio == 0.8
+        assert set(metrics["user_cache"]) >= {"hits", "misses", "hit_ratio"}
+        assert "hit_ratio" in metrics["token_cache"]
+
+    def test_deleted_user_is_rejected(self, client, volunteer, test_db):
+        """Test that a user deleted after authenticating is not served from the cache."""
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': str(volunteer.id)})}"}
+        assert client.get("/users/me", headers=headers).status_code == status.HTTP_200_OK
+
+        delete_user(test_db, volunteer.id)
+
+        assert client.get("/users/me", headers=headers).status_code == status.HTTP_401_UNAUTHORIZED